@@ -0,0 +1,61 @@
+"""
+Compares TransformersThinkRepository and OnnxThinkRepository on the same prompts.
+Usage: python benchmarks/compare_think_repositories.py [--model MODEL] [--repeat N]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from infrastructure.onnx_engine.onnx_models_handler import OnnxModelsHandler
+from infrastructure.repositories.onnx_think_repository import OnnxThinkRepository
+from infrastructure.repositories.transformers_think_repository import TransformersThinkRepository
+from infrastructure.transformers_engine.models_handler import DEFAULT_MODEL, ModelsHandler
+
+PROMPTS = [
+    "Hola, ¿cómo estás?",
+    "What is a guanaco?",
+    "Explain in one sentence why caching the attention keys speeds up decoding.",
+    "Write a short greeting for a new member of the team.",
+]
+
+
+def measure(repository, prompts, repeat):
+    # The first call pays for loading (and exporting) the model, keep it out of the numbers
+    repository.get_think(prompts[0])
+    latencies = []
+    answers = []
+    for _ in range(repeat):
+        for prompt in prompts:
+            start = time.perf_counter()
+            answers.append(repository.get_think(prompt))
+            latencies.append(time.perf_counter() - start)
+    return latencies, answers[:len(prompts)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    repositories = {
+        "transformers": TransformersThinkRepository(ModelsHandler(model_name=args.model)),
+        "onnx": OnnxThinkRepository(OnnxModelsHandler(model_name=args.model)),
+    }
+    results = {name: measure(repository, PROMPTS, args.repeat) for name, repository in repositories.items()}
+
+    print(f"{'engine':<14}{'mean (s)':>10}{'p50 (s)':>10}{'max (s)':>10}")
+    for name, (latencies, _) in results.items():
+        print(f"{name:<14}{statistics.mean(latencies):>10.3f}{statistics.median(latencies):>10.3f}{max(latencies):>10.3f}")
+
+    mismatches = sum(1 for a, b in zip(results["transformers"][1], results["onnx"][1]) if a != b)
+    print(f"Answers differing between engines: {mismatches}/{len(PROMPTS)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Import-time profile of the service entry point, summarized from python -X importtime.
+Reports the total time to import the module, the packages that cost the most (self time of all
+their submodules) and any heavy dependency that was imported eagerly, and fails when the import
+is over the startup budget or pulls in one of those dependencies.
+
+Usage: python -m benchmarks.import_time [--module main] [--top 15] [--budget SECONDS] [--json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+
+# Seconds importing main may take: configuration and wiring only, the model stack is loaded on first use
+STARTUP_BUDGET_SECONDS = 1.5
+# Only imported when a model, a chat client or an ONNX session is actually needed
+DEFERRED_PACKAGES = ("torch", "transformers", "onnxruntime", "numpy", "zulip", "arize")
+
+
+def parse_importtime(lines: Iterable[str]) -> List[dict]:
+    """Entries of python -X importtime output: name, self and cumulative microseconds, nesting depth."""
+    entries = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # The header line ("self [us] | cumulative | imported package")
+            continue
+        # One space after the separator, then two more per nesting level
+        name = fields[2].rstrip()[1:]
+        entries.append({
+            "name": name.strip(),
+            "self_us": int(fields[0]),
+            "cumulative_us": int(fields[1]),
+            "depth": (len(name) - len(name.lstrip())) // 2,
+        })
+    return entries
+
+
+def measure_imports(module: str = "main") -> List[dict]:
+    """Import module in a fresh interpreter, as the service does on start."""
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC_DIR, os.environ.get("PYTHONPATH")])))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, env=environment, capture_output=True, text=True, check=True,
+    )
+    return parse_importtime(result.stderr.splitlines())
+
+
+def summarize_imports(entries: List[dict], module: str, top: int = 15) -> dict:
+    self_time: Dict[str, int] = defaultdict(int)
+    for entry in entries:
+        self_time[entry["name"].split(".")[0]] += entry["self_us"]
+    module_entry = next((entry for entry in entries if entry["name"] == module and entry["depth"] == 0), None)
+    imported_packages = set(self_time)
+    return {
+        "module": module,
+        "total_s": module_entry["cumulative_us"] / 1e6 if module_entry else None,
+        "modules_imported": len(entries),
+        "top_packages": [
+            {"package": package, "self_s": microseconds / 1e6}
+            for package, microseconds in sorted(self_time.items(), key=lambda item: item[1], reverse=True)[:top]
+        ],
+        "eager_heavy_packages": [package for package in DEFERRED_PACKAGES if package in imported_packages],
+    }
+
+
+def format_report(summary: dict, budget: float) -> str:
+    total = f"{summary['total_s']:.3f} s" if summary["total_s"] is not None else "not imported"
+    lines = [
+        f"import {summary['module']}: {total} (budget {budget:.3f} s), {summary['modules_imported']} modules",
+        f"{'package':<32} {'self ms':>9}",
+    ]
+    lines.extend(f"{item['package']:<32} {item['self_s'] * 1000:>9.1f}" for item in summary["top_packages"])
+    if summary["eager_heavy_packages"]:
+        lines.append(f"Imported eagerly (should be deferred): {', '.join(summary['eager_heavy_packages'])}")
+    return "\n".join(lines)
+
+
+def check_budget(summary: dict, budget: float) -> List[str]:
+    """Reasons the startup is over budget (empty when within)."""
+    problems = []
+    if summary["total_s"] is None:
+        problems.append(f"{summary['module']} was not imported")
+    elif summary["total_s"] > budget:
+        problems.append(f"import {summary['module']} took {summary['total_s']:.3f} s, over the {budget:.3f} s budget")
+    if summary["eager_heavy_packages"]:
+        problems.append(f"import {summary['module']} imported {', '.join(summary['eager_heavy_packages'])}")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time profile of the service entry point")
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=15, help="Number of packages to list")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_SECONDS, help="Seconds the import may take")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    summary = summarize_imports(measure_imports(args.module), args.module, args.top)
+    print(json.dumps(summary, indent=2) if args.json else format_report(summary, args.budget))
+    problems = check_budget(summary, args.budget)
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Offline benchmark suite for ModelsHandler.
+Measures latency and throughput of tiny random-init models across prompt lengths, batch sizes,
+thread counts and engine options, writes the results as JSON and compares them with a stored baseline.
+
+Usage: python -m benchmarks.models_handler_benchmark [--quick] [--output FILE] [--baseline FILE] [--update-baseline]
+"""
+
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import torch
+from benchmarks.tiny_models import save_tiny_model
+from infrastructure.observability.metrics import MetricsRegistry
+from infrastructure.onnx_engine.onnx_models_handler import OnnxModelsHandler
+from infrastructure.transformers_engine.inference_metrics import InferenceMetrics
+from infrastructure.transformers_engine.models_handler import ModelsHandler
+
+DEFAULT_BASELINE = str(Path(__file__).resolve().parent / "baseline.json")
+DEFAULT_TOLERANCE = 0.5
+
+ENGINE_OPTIONS = {
+    "transformers-default": {"engine": "transformers", "memory_profile": "default"},
+    "transformers-low": {"engine": "transformers", "memory_profile": "low"},
+    "onnx": {"engine": "onnx"},
+}
+
+FULL_GRID = {"prompt_lengths": [16, 128, 512], "batch_sizes": [1, 4], "thread_counts": [1, os.cpu_count() or 1]}
+QUICK_GRID = {"prompt_lengths": [16, 128], "batch_sizes": [1, 2], "thread_counts": [1]}
+
+
+def build_prompt(length: int) -> str:
+    # The tiny tokenizer is byte level: one ASCII character is one token
+    text = "the guanaco spits at the llama "
+    return (text * (length // len(text) + 1))[:length]
+
+
+def case_name(engine: str, prompt_length: int, batch_size: int, threads: int) -> str:
+    return f"{engine}/prompt={prompt_length}/batch={batch_size}/threads={threads}"
+
+
+def build_handler(engine: str, model_dir: str, onnx_cache_dir: str, metrics: InferenceMetrics):
+    options = ENGINE_OPTIONS[engine]
+    if options["engine"] == "onnx":
+        return OnnxModelsHandler(model_name=model_dir, cache_dir=onnx_cache_dir)
+    return ModelsHandler(memory_profile=options["memory_profile"], model_name=model_dir, metrics=metrics)
+
+
+def run_case(handler, prompts, iterations: int) -> list:
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        if len(prompts) == 1:
+            handler.generate_text(prompts[0])
+        else:
+            handler.generate_texts(prompts)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def calibrate(repeat: int = 20) -> float:
+    """
+    Time a fixed single threaded workload, so results from machines (or runs) of different
+    speed can be compared: latencies are judged relative to this number.
+    """
+    default_threads = torch.get_num_threads()
+    torch.set_num_threads(1)
+    try:
+        matrix = torch.ones((256, 256))
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(10):
+                matrix @ matrix
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+    finally:
+        torch.set_num_threads(default_threads)
+
+
+def summarize(latencies: list, output_tokens: float) -> dict:
+    ordered = sorted(latencies)
+    total_time = sum(latencies)
+    return {
+        "iterations": len(latencies),
+        # The minimum is the least sensitive to noisy neighbours, regressions are judged on it
+        "latency_min_s": round(ordered[0], 6),
+        "latency_mean_s": round(statistics.mean(latencies), 6),
+        "latency_p50_s": round(statistics.median(latencies), 6),
+        "latency_p95_s": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 6),
+        "output_tokens_per_s": round(output_tokens / total_time, 3) if output_tokens and total_time else None,
+    }
+
+
+def run_suite(grid: dict, engines: list, iterations: int, model_dir: str, onnx_cache_dir: str) -> dict:
+    results = {}
+    default_threads = torch.get_num_threads()
+    try:
+        for engine in engines:
+            registry = MetricsRegistry()
+            handler = build_handler(engine, model_dir, onnx_cache_dir, InferenceMetrics(registry))
+            for prompt_length, batch_size, threads in itertools.product(
+                grid["prompt_lengths"], grid["batch_sizes"], sorted(set(grid["thread_counts"]))
+            ):
+                if batch_size > 1 and not hasattr(handler, "generate_texts"):
+                    continue
+                torch.set_num_threads(threads)
+                prompts = [build_prompt(prompt_length)] * batch_size
+                output_tokens = registry.histogram("inference_output_tokens", "")
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    run_case(handler, prompts, 1)  # warm up: loading, export and allocator caches
+                    tokens_before = output_tokens.get()["sum"]
+                    latencies = run_case(handler, prompts, iterations)
+                generated = output_tokens.get()["sum"] - tokens_before
+                name = case_name(engine, prompt_length, batch_size, threads)
+                results[name] = summarize(latencies, generated)
+                print(f"{name:<60} min {results[name]['latency_min_s']:.4f}s  p50 {results[name]['latency_p50_s']:.4f}s")
+    finally:
+        torch.set_num_threads(default_threads)
+    return results
+
+
+def compare_with_baseline(report: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list:
+    """Cases slower than the baseline by more than the tolerance, after normalizing by machine speed."""
+    speed_factor = report["calibration_s"] / baseline["calibration_s"]
+    regressions = []
+    for name, result in report["results"].items():
+        reference = baseline["results"].get(name)
+        if not reference or not reference.get("latency_min_s"):
+            continue
+        ratio = result["latency_min_s"] / (reference["latency_min_s"] * speed_factor)
+        if ratio > 1 + tolerance:
+            regressions.append({"case": name, "baseline_min_s": reference["latency_min_s"], "current_min_s": result["latency_min_s"], "ratio": round(ratio, 3)})
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Offline ModelsHandler benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="Smaller grid, for local iterations")
+    parser.add_argument("--engines", default=",".join(ENGINE_OPTIONS), help="Comma separated engine options")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--model-size", default="tiny", choices=["tiny", "small"])
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    calibration = calibrate()
+    with tempfile.TemporaryDirectory(prefix="donmingo-bench-") as work_dir:
+        model_dir = save_tiny_model(os.path.join(work_dir, f"model-{args.model_size}"), size=args.model_size)
+        results = run_suite(
+            QUICK_GRID if args.quick else FULL_GRID,
+            args.engines.split(","),
+            args.iterations,
+            model_dir,
+            os.path.join(work_dir, "onnx"),
+        )
+
+    report = {
+        "model_size": args.model_size,
+        "torch_version": torch.__version__,
+        "cpu_count": os.cpu_count(),
+        "calibration_s": round(calibration, 6),
+        "results": results,
+    }
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        print(f"Baseline updated at {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --update-baseline to create it")
+        return 0
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    if baseline.get("model_size") != args.model_size:
+        print(f"Baseline was recorded with model size {baseline.get('model_size')}, skipping comparison")
+        return 0
+
+    regressions = compare_with_baseline(report, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"[REGRESSION] {regression['case']}: {regression['baseline_min_s']:.4f}s -> {regression['current_min_s']:.4f}s (x{regression['ratio']} after machine speed normalization)")
+    if regressions:
+        return 1
+    print("No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+Builds tiny randomly initialized causal LMs and matching tokenizers on disk,
+so the generation path can be benchmarked without downloading real checkpoints.
+"""
+
+import os
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers, decoders
+from transformers import PreTrainedTokenizerFast, Qwen3Config, Qwen3ForCausalLM
+
+SPECIAL_TOKENS = ["<|pad|>", "<|endoftext|>"]
+
+TINY_MODEL_SIZES = {
+    "tiny": {"hidden_size": 64, "intermediate_size": 128, "num_hidden_layers": 2, "num_attention_heads": 4, "num_key_value_heads": 2},
+    "small": {"hidden_size": 256, "intermediate_size": 768, "num_hidden_layers": 4, "num_attention_heads": 8, "num_key_value_heads": 4},
+}
+
+
+def build_tiny_tokenizer() -> PreTrainedTokenizerFast:
+    """Byte level tokenizer: every UTF-8 byte is a token, so any prompt can be encoded."""
+    alphabet = pre_tokenizers.ByteLevel.alphabet()
+    vocabulary = {token: index for index, token in enumerate(SPECIAL_TOKENS + sorted(alphabet))}
+    tokenizer = Tokenizer(models.WordLevel(vocab=vocabulary, unk_token=SPECIAL_TOKENS[1]))
+    tokenizer.pre_tokenizer = pre_tokenizers.Sequence([
+        pre_tokenizers.ByteLevel(add_prefix_space=False, use_regex=False),
+        pre_tokenizers.Split("", behavior="isolated"),
+    ])
+    tokenizer.decoder = decoders.ByteLevel()
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, pad_token=SPECIAL_TOKENS[0], eos_token=SPECIAL_TOKENS[1])
+
+
+def build_tiny_model(vocab_size: int, size: str = "tiny", seed: int = 0) -> Qwen3ForCausalLM:
+    torch.manual_seed(seed)
+    dimensions = TINY_MODEL_SIZES[size]
+    config = Qwen3Config(
+        vocab_size=vocab_size,
+        head_dim=dimensions["hidden_size"] // dimensions["num_attention_heads"],
+        max_position_embeddings=1024,
+        **dimensions,
+    )
+    return Qwen3ForCausalLM(config).eval()
+
+
+def save_tiny_model(directory: str, size: str = "tiny", seed: int = 0) -> str:
+    """Save a tiny model and its tokenizer in a directory usable as a from_pretrained name."""
+    if os.path.exists(os.path.join(directory, "config.json")):
+        return directory
+    tokenizer = build_tiny_tokenizer()
+    model = build_tiny_model(len(tokenizer), size, seed)
+    model.config.eos_token_id = tokenizer.eos_token_id
+    model.config.pad_token_id = tokenizer.pad_token_id
+    model.generation_config.eos_token_id = tokenizer.eos_token_id
+    model.generation_config.pad_token_id = tokenizer.pad_token_id
+    os.makedirs(directory, exist_ok=True)
+    model.save_pretrained(directory)
+    tokenizer.save_pretrained(directory)
+    return directory
@@ -0,0 +1,106 @@
+"""
+Per-stage latency breakdown of the spans written by JsonlSpanExporter.
+For every span name (optionally split by an attribute such as guanaco or stream) it reports the count,
+total, mean, p50, p95 and max duration, and the share of the traced cycle time spent in that stage.
+
+Usage: python -m benchmarks.trace_report SPANS_FILE [--group-by ATTRIBUTE] [--json]
+"""
+
+import argparse
+import json
+import math
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+ROOT_SPAN = "guanaco.cycle"
+
+
+def load_spans(path: str) -> List[dict]:
+    """Spans of a JSONL trace file; lines that are not valid JSON (e.g. cut by a crash) are skipped."""
+    spans = []
+    with open(path) as trace_file:
+        for line in trace_file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return spans
+
+
+def get_duration(span: dict) -> Optional[float]:
+    if span.get("endTimeUnixNano") is None or span.get("startTimeUnixNano") is None:
+        return None
+    return (span["endTimeUnixNano"] - span["startTimeUnixNano"]) / 1e9
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def aggregate(spans: Iterable[dict], group_by: Optional[str] = None) -> Dict[str, dict]:
+    durations: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    for span in spans:
+        duration = get_duration(span)
+        if duration is None:
+            continue
+        stage = span["name"]
+        if group_by:
+            stage += f" [{group_by}={span.get('attributes', {}).get(group_by, '-')}]"
+        durations[stage].append(duration)
+        if span.get("status", {}).get("code") == "ERROR":
+            errors[stage] += 1
+
+    root_total = sum(sum(values) for stage, values in durations.items() if stage.split(" [")[0] == ROOT_SPAN)
+    breakdown = {}
+    for stage, values in durations.items():
+        values.sort()
+        total = sum(values)
+        breakdown[stage] = {
+            "count": len(values),
+            "errors": errors[stage],
+            "total_s": total,
+            "mean_s": total / len(values),
+            "p50_s": percentile(values, 0.5),
+            "p95_s": percentile(values, 0.95),
+            "max_s": values[-1],
+            "share_of_cycles": total / root_total if root_total else None,
+        }
+    return dict(sorted(breakdown.items(), key=lambda item: item[1]["total_s"], reverse=True))
+
+
+def format_report(breakdown: Dict[str, dict]) -> str:
+    header = f"{'stage':<48} {'count':>7} {'errors':>6} {'total s':>9} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'cycle %':>8}"
+    lines = [header, "-" * len(header)]
+    for stage, stats in breakdown.items():
+        share = f"{stats['share_of_cycles'] * 100:.1f}" if stats["share_of_cycles"] is not None else "-"
+        lines.append(
+            f"{stage:<48} {stats['count']:>7} {stats['errors']:>6} {stats['total_s']:>9.3f} {stats['mean_s'] * 1000:>9.1f} "
+            f"{stats['p50_s'] * 1000:>9.1f} {stats['p95_s'] * 1000:>9.1f} {stats['max_s'] * 1000:>9.1f} {share:>8}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Per-stage latency breakdown of a trace file")
+    parser.add_argument("spans_file")
+    parser.add_argument("--group-by", help="Span attribute to split stages by (e.g. guanaco, stream)")
+    parser.add_argument("--json", action="store_true", help="Print the breakdown as JSON")
+    args = parser.parse_args(argv)
+
+    breakdown = aggregate(load_spans(args.spans_file), args.group_by)
+    if not breakdown:
+        print(f"No finished spans in {args.spans_file}", file=sys.stderr)
+        return 1
+    print(json.dumps(breakdown, indent=2) if args.json else format_report(breakdown))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Admission stage in front of the model: a cheap look at the messages a guanaco has not answered
+decides whether they are worth a full generation. Acknowledgements, emoji-only messages and echoes
+of the guanaco's own words are left unanswered, thanks get a canned reply and greetings a short
+generation. An optional classifier scores what no rule matched and sends low scores to the cheap path.
+A rule applies when it matches every unanswered message, so a question followed by "ok" still gets an answer.
+"""
+
+import logging
+import re
+from typing import Callable, List, Optional
+from domain.entities.admission_decision import CANNED, CHEAP, SKIP, THINK, AdmissionDecision
+from domain.entities.channel import Channel
+from domain.entities.chat_message import ChatMessage
+from domain.entities.user import User
+from domain.ports.admission_filter import AdmissionFilter
+from application.services.conversation_memory import to_plain_text
+from infrastructure.observability.metrics import MetricsRegistry, get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHEAP_MAX_NEW_TOKENS = 48
+DEFAULT_CANNED_THANKS = "You're welcome!"
+
+# Emoji are rendered as :name: once the markup is stripped
+EMOJI_CODE = re.compile(r":[a-z0-9_+-]+:")
+ACKNOWLEDGEMENT = re.compile(r"^(ok|okay|k|kk|ack|\+1|got it|cool|nice|great|sure|vale|dale|listo|entendido|perfecto|genial)[\s.!]*$", re.IGNORECASE)
+THANKS = re.compile(r"^(thanks|thank you|thx|ty|gracias|muchas gracias)([\s,]+\S+)?[\s.!]*$", re.IGNORECASE)
+GREETING = re.compile(r"^(hi|hello|hey|hola|buenas|buen d[ií]a|good (morning|afternoon|evening))([\s,]+\S+)?[\s.!]*$", re.IGNORECASE)
+
+
+def normalize(message: ChatMessage) -> str:
+    return " ".join(to_plain_text(message.content).split()).lower()
+
+
+class AdmissionRule:
+    def __init__(self, name: str, action: str, matches: Callable[[ChatMessage, Channel, Optional[User]], bool], reply: Optional[str] = None):
+        self.name = name
+        self.action = action
+        self.matches = matches
+        self.reply = reply
+
+
+def is_echo(message: ChatMessage, channel: Channel, user: Optional[User]) -> bool:
+    """The message repeats something the guanaco itself said in the topic (e.g. another bot quoting it)."""
+    text = normalize(message)
+    return bool(text) and any(previous.sender == user and normalize(previous) == text
+                              for previous in channel.get_messages() if previous.id != message.id)
+
+
+def is_emoji_only(message: ChatMessage, channel: Channel, user: Optional[User]) -> bool:
+    text = EMOJI_CODE.sub("", to_plain_text(message.content))
+    return not re.sub(r"[\W_]", "", text)
+
+
+def default_rules(canned_thanks: str = DEFAULT_CANNED_THANKS) -> List[AdmissionRule]:
+    return [
+        AdmissionRule("echo", SKIP, is_echo),
+        AdmissionRule("emoji_only", SKIP, is_emoji_only),
+        AdmissionRule("acknowledgement", SKIP, lambda message, channel, user: bool(ACKNOWLEDGEMENT.match(normalize(message)))),
+        AdmissionRule("thanks", CANNED, lambda message, channel, user: bool(THANKS.match(normalize(message))), reply=canned_thanks),
+        AdmissionRule("greeting", CHEAP, lambda message, channel, user: bool(GREETING.match(normalize(message)))),
+    ]
+
+
+class RuleAdmissionFilter(AdmissionFilter):
+    def __init__(self, rules: Optional[List[AdmissionRule]] = None, classifier: Optional[Callable[[str], float]] = None,
+                 classifier_threshold: float = 0.5, cheap_max_new_tokens: int = DEFAULT_CHEAP_MAX_NEW_TOKENS,
+                 metrics: Optional[MetricsRegistry] = None):
+        self.rules = rules if rules is not None else default_rules()
+        # Probability that a text needs a full answer
+        self.classifier = classifier
+        self.classifier_threshold = classifier_threshold
+        self.cheap_max_new_tokens = cheap_max_new_tokens
+        metrics = metrics or get_metrics_registry()
+        self._decisions = metrics.counter("admission_decisions", "Channels decided by the admission stage", ("rule", "action"))
+
+    def decide(self, channel: Channel, user: Optional[User]) -> AdmissionDecision:
+        decision = self._decide(channel, user)
+        self._decisions.inc(rule=decision.rule or "none", action=decision.action)
+        return decision
+
+    def _decide(self, channel: Channel, user: Optional[User]) -> AdmissionDecision:
+        messages = channel.get_unanswered_messages(user)
+        if not messages:
+            return AdmissionDecision(THINK)
+        for rule in self.rules:
+            if all(rule.matches(message, channel, user) for message in messages):
+                return AdmissionDecision(rule.action, rule=rule.name, reply=rule.reply,
+                                         max_new_tokens=self.cheap_max_new_tokens if rule.action == CHEAP else None)
+        if self.classifier is not None:
+            text = "\n".join(to_plain_text(message.content) for message in messages)
+            try:
+                score = self.classifier(text)
+            except Exception as e:
+                # The model decides when the classifier cannot
+                logger.warning("Admission classifier failed, admitting the message: %s", e)
+                return AdmissionDecision(THINK)
+            if score < self.classifier_threshold:
+                return AdmissionDecision(CHEAP, rule="classifier", max_new_tokens=self.cheap_max_new_tokens)
+        return AdmissionDecision(THINK)
@@ -0,0 +1,136 @@
+"""
+Rolling conversation memory: a summary per (stream, topic) of everything older than the last few messages.
+The prompt for a reply is the summary plus the last recent_messages raw messages, both bounded in size,
+so the prefill cost of a reply does not grow with the age of the topic.
+Messages that leave the raw window are folded into the summary incrementally, off the reply path:
+the update is submitted as background work (in the reply pipeline, the lowest priority of its inference
+queue) and generated by the guanaco's model through ThinkRepository.get_raw_think: without its persona template
+and outside its reply quota. Until it is done the previous summary is used.
+"""
+
+import collections
+import logging
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from domain.entities.channel import Channel
+from domain.entities.chat_message import ChatMessage
+from domain.ports.think_repository import ThinkRepository
+from infrastructure.observability.metrics import MetricsRegistry, get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_MARKER = "Updated summary:"
+SUMMARY_PROMPT = (
+    "Summarize the conversation in a few sentences, keeping names, decisions and open questions.\n"
+    "Summary so far: {summary}\n"
+    "New messages:\n{messages}\n"
+    + SUMMARY_MARKER
+)
+
+
+def to_plain_text(content: str) -> str:
+    """Chat platforms send rendered markup: the tags are noise for the model."""
+    return re.sub(r"<[^>]+>", "", content).strip()
+
+
+class TopicMemory:
+    def __init__(self):
+        self.summary = ""
+        # Id of the newest message folded into the summary (None: nothing summarized yet)
+        self.summarized_until: Optional[int] = None
+        self.updating = False
+
+
+class ConversationMemory:
+    def __init__(self, recent_messages: int = 6, summary_max_new_tokens: int = 96, max_summary_chars: int = 1200,
+                 max_message_chars: int = 500, max_messages_per_update: int = 20, max_topics: int = 10000,
+                 submit: Optional[Callable[[Channel, Callable[[], None]], bool]] = None, metrics: Optional[MetricsRegistry] = None):
+        if recent_messages < 1:
+            raise ValueError(f"Invalid recent messages: {recent_messages}. Expected at least 1.")
+        self.recent_messages = recent_messages
+        self.summary_max_new_tokens = summary_max_new_tokens
+        self.max_summary_chars = max_summary_chars
+        self.max_message_chars = max_message_chars
+        self.max_messages_per_update = max_messages_per_update
+        self.max_topics = max_topics
+        # Runs a summary update in the background; returns False when it cannot be taken now (retried on the next reply)
+        self.submit = submit or self._run_in_thread
+        # Least recently used topic first, forgotten beyond max_topics
+        self._topics: "collections.OrderedDict[Tuple[str, str], TopicMemory]" = collections.OrderedDict()
+        self._lock = threading.Lock()
+        metrics = metrics or get_metrics_registry()
+        self._updates = metrics.counter("conversation_summary_updates", "Conversation summary updates", ("result",))
+
+    def build_prompt(self, channel: Channel, think_repository: ThinkRepository) -> str:
+        """The summary of the older messages and the last recent_messages raw; schedules folding the ones left out."""
+        messages = channel.get_messages()
+        recent = messages[-self.recent_messages:]
+        older = messages[:-self.recent_messages]
+        key = (channel.get_id(), channel.get_topic())
+        with self._lock:
+            memory = self._get_topic(key)
+            summary = memory.summary
+            pending = [message for message in older if memory.summarized_until is None or message.id > memory.summarized_until]
+            needs_update = bool(pending) and not memory.updating
+            if needs_update:
+                memory.updating = True
+        if needs_update:
+            # A topic first seen with a long history is summarized from its latest messages, not replayed from the start
+            batch = pending[-self.max_messages_per_update:]
+            if not self.submit(channel, lambda: self.update_summary(key, batch, think_repository)):
+                with self._lock:
+                    memory.updating = False
+
+        lines = [f"Summary of the earlier conversation: {summary}"] if summary else []
+        lines.extend(self._format_message(message) for message in recent)
+        return "\n".join(lines)
+
+    def update_summary(self, key: Tuple[str, str], messages: List[ChatMessage], think_repository: ThinkRepository) -> None:
+        """Fold messages into the summary of the topic (synchronous: call it from background work)."""
+        with self._lock:
+            memory = self._get_topic(key)
+            previous = memory.summary
+        prompt = SUMMARY_PROMPT.format(summary=previous or "(none)", messages="\n".join(self._format_message(message) for message in messages))
+        try:
+            reply = think_repository.get_raw_think(prompt, max_new_tokens=self.summary_max_new_tokens)
+        except Exception as e:
+            self._updates.inc(result="error")
+            logger.warning("Could not update the summary of %s: %s", key, e)
+            with self._lock:
+                memory.updating = False
+            return
+        # Models may echo the prompt before the continuation
+        summary = reply.rsplit(SUMMARY_MARKER, 1)[-1].strip()[:self.max_summary_chars] or previous
+        self._updates.inc(result="success")
+        with self._lock:
+            memory.summary = summary
+            memory.summarized_until = messages[-1].id
+            memory.updating = False
+
+    def get_summary(self, stream: str, topic: str) -> str:
+        with self._lock:
+            memory = self._topics.get((stream, topic))
+            return memory.summary if memory else ""
+
+    def get_cache_sizes(self) -> Dict[str, int]:
+        return {"conversation_summaries": len(self._topics)}
+
+    def _get_topic(self, key: Tuple[str, str]) -> TopicMemory:
+        # Called with the lock held
+        memory = self._topics.get(key)
+        if memory is None:
+            memory = self._topics[key] = TopicMemory()
+            if len(self._topics) > self.max_topics:
+                self._topics.popitem(last=False)
+        else:
+            self._topics.move_to_end(key)
+        return memory
+
+    def _format_message(self, message: ChatMessage) -> str:
+        return f"{message.sender.name}: {to_plain_text(message.content)[:self.max_message_chars]}"
+
+    @staticmethod
+    def _run_in_thread(channel: Channel, task: Callable[[], None]) -> bool:
+        threading.Thread(target=task, name="ConversationSummary", daemon=True).start()
+        return True
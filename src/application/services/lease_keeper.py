@@ -0,0 +1,125 @@
+"""
+Services that let several processes (or hosts) split guanacos and topics between them through a LeaseRepository.
+Leases are kept alive with heartbeats; when an owner dies its leases expire and another process takes over.
+"""
+
+import logging
+import os
+import socket
+import threading
+from typing import Callable, Optional, Set
+from domain.ports.lease_repository import LeaseRepository
+
+logger = logging.getLogger(__name__)
+
+
+def default_owner_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaseKeeper:
+    """
+    Owns as many of the candidate keys as it can: renews the owned ones on every heartbeat,
+    reports the ones it lost and tries to acquire the free (or expired) ones.
+    """
+
+    def __init__(self, lease_repository: LeaseRepository, owner: str, ttl: float = 30.0,
+                 on_acquired: Optional[Callable[[str], None]] = None, on_lost: Optional[Callable[[str], None]] = None):
+        self.lease_repository = lease_repository
+        self.owner = owner
+        self.ttl = ttl
+        # Renew well before expiry so a slow heartbeat does not lose the lease
+        self.heartbeat_interval = ttl / 3
+        self.on_acquired = on_acquired
+        self.on_lost = on_lost
+        self._candidates: Set[str] = set()
+        self._owned: Set[str] = set()
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add_candidate(self, key: str) -> None:
+        with self._lock:
+            self._candidates.add(key)
+
+    def remove_candidate(self, key: str) -> None:
+        with self._lock:
+            self._candidates.discard(key)
+            owned = key in self._owned
+            self._owned.discard(key)
+        if owned:
+            self.lease_repository.release(key, self.owner)
+
+    def owns(self, key: str) -> bool:
+        return key in self._owned
+
+    def get_owned(self) -> Set[str]:
+        return set(self._owned)
+
+    def get_standby(self) -> Set[str]:
+        """Candidates currently owned by another process."""
+        with self._lock:
+            return self._candidates - self._owned
+
+    def heartbeat(self) -> None:
+        with self._lock:
+            owned = sorted(self._owned)
+            candidates = sorted(self._candidates - self._owned)
+
+        renewed = set(self.lease_repository.renew(owned, self.owner, self.ttl)) if owned else set()
+        for key in owned:
+            if key not in renewed:
+                with self._lock:
+                    self._owned.discard(key)
+                logger.warning("Lease '%s' was lost by %s", key, self.owner)
+                if self.on_lost:
+                    self.on_lost(key)
+
+        for key in candidates:
+            if self.lease_repository.acquire(key, self.owner, self.ttl):
+                with self._lock:
+                    if key not in self._candidates:
+                        self.lease_repository.release(key, self.owner)
+                        continue
+                    self._owned.add(key)
+                logger.info("Lease '%s' acquired by %s", key, self.owner)
+                if self.on_acquired:
+                    self.on_acquired(key)
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._heartbeat_loop, name="LeaseKeeper", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the heartbeats and release the owned leases so other processes take over right away."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+        for key in self.get_owned():
+            self.lease_repository.release(key, self.owner)
+        with self._lock:
+            self._owned.clear()
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stop_event.wait(self.heartbeat_interval):
+            try:
+                self.heartbeat()
+            except Exception as e:
+                logger.error("Lease heartbeat failed: %s", e)
+
+
+class TopicLeaseClaim:
+    """
+    Claim of a (guanaco, stream, topic) before answering it, so processes sharing the same guanacos
+    never answer the same topic. Claiming again extends the lease while the topic stays active.
+    """
+
+    def __init__(self, lease_repository: LeaseRepository, owner: str, ttl: float = 30.0):
+        self.lease_repository = lease_repository
+        self.owner = owner
+        self.ttl = ttl
+
+    def __call__(self, job) -> bool:
+        guanaco_name, stream_id, topic = job.key
+        return self.lease_repository.acquire(f"topic:{guanaco_name}:{stream_id}:{topic}", self.owner, self.ttl)
@@ -0,0 +1,389 @@
+"""
+Service that splits answering into three stages connected by bounded queues:
+fetch (channels to answer) -> think (model inference) -> send (post the reply and mark as read).
+Network I/O of one channel overlaps with the inference of another, and full queues push back on fetching.
+With several send workers, several topics are sent at once: a topic has a single job per guanaco in flight,
+and the sends of different guanacos to one (stream, topic) take turns on the TopicLocks Guanaco.answer uses too.
+Jobs wait for inference in a PriorityReplyQueue: direct messages and mentions first, fair between streams.
+When inference falls behind, newer fetches of a waiting topic replace its job, and jobs whose triggering
+message is too old are shed: answered with a short fallback, or marked as read without a reply.
+Before queueing, the guanaco's admission stage can leave trivial messages unanswered, answer them with a
+canned reply (neither reaches the model) or think them with a smaller generation budget.
+With a ConversationMemory, the prompt is the topic's rolling summary plus its last messages, and the summary
+updates go through the inference queue as background jobs, thought only when no reply is waiting.
+On shutdown the pipeline drains: intake stops, in-flight replies get until a deadline to be sent,
+and the unfinished ones are returned as PendingReply so they can be resumed on the next start.
+"""
+
+import collections
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+from domain.entities.admission_decision import AdmissionDecision
+from domain.entities.channel import Channel
+from domain.entities.guanaco.guanaco import Guanaco
+from domain.entities.guanaco.topic_locks import TopicLocks, get_topic_locks
+from domain.entities.pending_reply import PendingReply
+from domain.errors import QuotaExceededError
+from application.services.conversation_memory import ConversationMemory
+from application.services.reply_queue import BACKGROUND, NORMAL, URGENT, PriorityReplyQueue
+from infrastructure.observability.metrics import MetricsRegistry, get_metrics_registry
+from infrastructure.observability.tracing import get_tracer
+
+logger = logging.getLogger(__name__)
+
+# How often blocked stages re-check whether the pipeline is stopping
+STOP_CHECK_INTERVAL = 0.1
+
+SHED_FALLBACK = "fallback"
+SHED_SKIP = "skip"
+SHED_POLICIES = (SHED_FALLBACK, SHED_SKIP)
+DEFAULT_FALLBACK_REPLY = "Sorry, I fell behind and could not answer this in time."
+
+
+class ReplyJob:
+    def __init__(self, guanaco: Guanaco, channel: Channel):
+        self.guanaco = guanaco
+        self.channel = channel
+        self.reply: Optional[str] = None
+        self.enqueued_at = time.monotonic()
+        unanswered = channel.get_unanswered_messages(guanaco.user)
+        self.priority = URGENT if any(message.is_private or message.is_mention for message in unanswered) else NORMAL
+        # Wall-clock time of the oldest message this reply answers, and of the newest one (the trigger)
+        self.waiting_since = min((message.created_at.timestamp() for message in unanswered), default=time.time())
+        self.triggered_at = max((message.created_at.timestamp() for message in unanswered), default=time.time())
+        self.shed = False
+        self.admission: Optional[AdmissionDecision] = None
+        # Span of the cycle that fetched the job: the think and send stages run on other threads and attach to it
+        self.trace_parent = get_tracer().get_current_span()
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return (self.guanaco.name, self.channel.get_id(), self.channel.get_topic())
+
+    def to_pending_reply(self) -> PendingReply:
+        return PendingReply(self.guanaco.name, self.channel.get_id(), self.channel.get_topic(), self.triggered_at, self.reply)
+
+
+class BackgroundJob:
+    """Model work that is not a reply (e.g. a summary update), run by the inference stage when no reply waits."""
+    priority = BACKGROUND
+
+    def __init__(self, channel: Channel, task: Callable[[], None]):
+        self.channel = channel
+        self.task = task
+        self.waiting_since = time.time()
+        self.trace_parent = get_tracer().get_current_span()
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return (BACKGROUND, self.channel.get_id(), self.channel.get_topic())
+
+
+class ReplyPipeline:
+    def __init__(self, inference_workers: int = 1, send_workers: int = 1, max_pending_inference: int = 8, max_pending_sends: int = 8,
+                 channel_claim: Optional[Callable[[ReplyJob], bool]] = None, stream_weights: Optional[Dict[str, float]] = None,
+                 metrics: Optional[MetricsRegistry] = None, max_message_age: Optional[float] = None,
+                 shed_policy: str = SHED_FALLBACK, fallback_reply: str = DEFAULT_FALLBACK_REPLY,
+                 conversation_memory: Optional[ConversationMemory] = None, topic_locks: Optional[TopicLocks] = None):
+        if shed_policy not in SHED_POLICIES:
+            raise ValueError(f"Invalid shed policy: {shed_policy}. Expected one of: {', '.join(SHED_POLICIES)}.")
+        self.inference_workers = inference_workers
+        self.send_workers = send_workers
+        # Optional ownership check (e.g. a topic lease) made when fetching and again right before sending
+        self.channel_claim = channel_claim
+        # Seconds after which the triggering message is too old to be worth a model reply (None: never shed)
+        self.max_message_age = max_message_age
+        self.shed_policy = shed_policy
+        self.fallback_reply = fallback_reply
+        self.conversation_memory = conversation_memory
+        # With several send workers, replies within one (stream, topic) still go out one at a time
+        self.topic_locks = topic_locks if topic_locks is not None else get_topic_locks()
+        if conversation_memory:
+            conversation_memory.submit = self.submit_background
+        self._inference_queue = PriorityReplyQueue(maxsize=max_pending_inference, stream_weights=stream_weights)
+        self._send_queue: "queue.Queue[ReplyJob]" = queue.Queue(maxsize=max_pending_sends)
+        # Channels between fetch and send: unread until the reply is sent, so the next fetch sees them again
+        self._in_flight: Dict[Tuple[str, str, str], ReplyJob] = {}
+        # Condition rather than a plain lock so drain() can wait for the in-flight jobs to finish
+        self._in_flight_lock = threading.Condition()
+        self._stop_event = threading.Event()
+        self._intake_closed = threading.Event()
+        # Replies left unsent by the previous run, reused when their topic is fetched again unchanged
+        self._resumed: Dict[Tuple[str, str, str], PendingReply] = {}
+        # Topics refused by a quota that said when it can grant them: not fetched again before then (monotonic time)
+        self._deferred: Dict[Tuple[str, str, str], float] = {}
+        self._threads: List[threading.Thread] = []
+        # Last think and send failures, for runtime introspection
+        self.recent_errors: Deque[dict] = collections.deque(maxlen=50)
+        metrics = metrics or get_metrics_registry()
+        self._jobs_counter = metrics.counter("reply_jobs", "Reply jobs queued for inference", ("priority",))
+        self._queue_wait = metrics.histogram("reply_queue_wait_seconds", "Time a reply job waited for inference", ("priority",))
+        self._message_age = metrics.histogram("reply_message_age_seconds", "Age of the oldest unanswered message when inference starts", ("priority",))
+        self._coalesced_counter = metrics.counter("reply_jobs_coalesced", "Waiting reply jobs replaced by a newer fetch of the same topic")
+        self._resumed_counter = metrics.counter("reply_jobs_resumed", "Replies thought before a shutdown and sent after the restart")
+        self._shed_counter = metrics.counter("reply_jobs_shed", "Reply jobs not sent to the model because their message was too old", ("policy",))
+        self._deferred_counter = metrics.counter("reply_jobs_deferred", "Fetched topics left for later because their guanaco is over quota")
+
+    def start(self) -> None:
+        """Start the inference and send stages."""
+        if self._threads:
+            raise ValueError("Reply pipeline is already running")
+
+        self._stop_event.clear()
+        self._intake_closed.clear()
+        for index in range(self.inference_workers):
+            self._threads.append(threading.Thread(target=self._inference_loop, name=f"ReplyPipeline-think-{index}", daemon=True))
+        for index in range(self.send_workers):
+            self._threads.append(threading.Thread(target=self._send_loop, name=f"ReplyPipeline-send-{index}", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the stages; jobs still queued are dropped (their channels stay unread)."""
+        self._stop_event.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(timeout=max(0, deadline - time.monotonic()))
+        self._threads = []
+
+    def close_intake(self) -> None:
+        """Stop accepting new jobs; the ones already fetched keep going through the stages."""
+        self._intake_closed.set()
+
+    def drain(self, timeout: float = 20.0) -> List[PendingReply]:
+        """
+        Close intake, wait up to timeout seconds for the in-flight jobs to be sent, then stop.
+        Returns the jobs that did not finish, to be resumed on the next start.
+        """
+        self.close_intake()
+        deadline = time.monotonic() + timeout
+        with self._in_flight_lock:
+            self._in_flight_lock.wait_for(lambda: not self._in_flight, timeout)
+            unfinished = [job.to_pending_reply() for job in self._in_flight.values()]
+        self.stop(timeout=max(0.0, deadline - time.monotonic()))
+        if unfinished:
+            logger.warning("Reply pipeline stopped with %s unfinished replies", len(unfinished))
+        return unfinished
+
+    def resume(self, pending_replies: List[PendingReply]) -> None:
+        """Replies left by the previous run: sent without thinking again if their topic has no newer message."""
+        self._resumed = {pending.key: pending for pending in pending_replies}
+
+    def fetch(self, guanaco: Guanaco) -> bool:
+        """Fetch stage for one guanaco. Returns True if new jobs were queued."""
+        queued = False
+        if self._intake_closed.is_set():
+            return queued
+        jobs = [ReplyJob(guanaco, channel) for channel in guanaco.get_channels_to_answer()]
+        # Urgent jobs first, so a full queue does not keep them waiting behind the normal ones of the same fetch
+        jobs.sort(key=lambda job: (job.priority != URGENT, job.waiting_since))
+        for job in jobs:
+            if self._intake_closed.is_set():
+                break
+            if self._is_deferred(job):
+                self._deferred_counter.inc()
+                continue
+            with self._in_flight_lock:
+                current = self._in_flight.get(job.key)
+                if current is not None:
+                    # Still waiting for inference: think on the newest messages instead (no-op once thinking started).
+                    # Only when they need the model too; otherwise the queued job still answers the older ones
+                    if self._admit(job) and self._inference_queue.replace(current, job):
+                        self._in_flight[job.key] = job
+                        self._coalesced_counter.inc()
+                        self._jobs_counter.inc(priority=job.priority)
+                    continue
+                self._in_flight[job.key] = job
+            if self.channel_claim and not self.channel_claim(job):
+                self._release(job)
+                continue
+            if self._resume_reply(job) or self._shed_if_stale(job) or not self._admit(job):
+                if not self._put(self._send_queue, job, intake=True):
+                    self._release(job)
+                    break
+                continue
+            if not self._put(self._inference_queue, job, intake=True):
+                self._release(job)
+                break
+            self._jobs_counter.inc(priority=job.priority)
+            queued = True
+        return queued
+
+    def submit_background(self, channel: Channel, task: Callable[[], None]) -> bool:
+        """Queue model work at the lowest priority. Returns False when it cannot be taken now (stopping or full)."""
+        if self._intake_closed.is_set() or self._stop_event.is_set():
+            return False
+        try:
+            self._inference_queue.put(BackgroundJob(channel, task), block=False)
+        except queue.Full:
+            return False
+        return True
+
+    def get_queue_depths(self) -> Dict[str, int]:
+        return {
+            "inference": self._inference_queue.qsize(),
+            "send": self._send_queue.qsize(),
+            "in_flight": len(self._in_flight),
+        }
+
+    def get_inference_queue_sizes(self) -> Dict[str, int]:
+        """Jobs waiting for inference by priority class."""
+        return self._inference_queue.get_sizes()
+
+    def get_cache_sizes(self) -> Dict[str, int]:
+        sizes = {"in_flight_jobs": len(self._in_flight), "resumed_replies": len(self._resumed), "deferred_topics": len(self._deferred)}
+        if self.conversation_memory:
+            sizes.update(self.conversation_memory.get_cache_sizes())
+        return sizes
+
+    @staticmethod
+    def _get_span_attributes(job: ReplyJob) -> dict:
+        return {"guanaco": job.guanaco.name, "stream": job.channel.get_id(), "topic": job.channel.get_topic(), "priority": job.priority}
+
+    def _record_error(self, job: ReplyJob, stage: str, error: Exception) -> None:
+        self.recent_errors.append({"at": time.time(), "source": f"{stage}:{job.guanaco.name}", "error": str(error)})
+
+    def _put(self, target, job: ReplyJob, intake: bool = False) -> bool:
+        """Blocking put (backpressure) that gives up when the pipeline stops, or when intake closes for fetched jobs."""
+        while not self._stop_event.is_set() and not (intake and self._intake_closed.is_set()):
+            try:
+                target.put(job, timeout=STOP_CHECK_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source) -> Optional[ReplyJob]:
+        while not self._stop_event.is_set():
+            try:
+                return source.get(timeout=STOP_CHECK_INTERVAL)
+            except queue.Empty:
+                continue
+        return None
+
+    def _release(self, job: ReplyJob) -> None:
+        with self._in_flight_lock:
+            if self._in_flight.get(job.key) is job:
+                del self._in_flight[job.key]
+                self._in_flight_lock.notify_all()
+
+    def _defer(self, job: ReplyJob, retry_after: float) -> None:
+        now = time.monotonic()
+        with self._in_flight_lock:
+            # Deferrals already due are dropped, so topics never fetched again do not pile up
+            self._deferred = {key: until for key, until in self._deferred.items() if until > now}
+            self._deferred[job.key] = now + retry_after
+
+    def _is_deferred(self, job: ReplyJob) -> bool:
+        with self._in_flight_lock:
+            until = self._deferred.get(job.key)
+            if until is None:
+                return False
+            if until > time.monotonic():
+                return True
+            del self._deferred[job.key]
+            return False
+
+    def _resume_reply(self, job: ReplyJob) -> bool:
+        """Reuse the reply thought by the previous run when the topic did not change since."""
+        pending = self._resumed.pop(job.key, None)
+        if pending is None or pending.reply is None or pending.triggered_at != job.triggered_at:
+            return False
+        job.reply = pending.reply
+        self._resumed_counter.inc()
+        return True
+
+    def _admit(self, job: ReplyJob) -> bool:
+        """Admission stage. Returns False when the job needs no model: skipped (no reply) or answered with a canned reply."""
+        job.admission = job.guanaco.admit(job.channel)
+        if job.admission.needs_model():
+            return True
+        job.reply = job.admission.reply
+        return False
+
+    def _shed_if_stale(self, job: ReplyJob) -> bool:
+        """Mark the job as shed (with the fallback reply, or none) when its triggering message is too old."""
+        if self.max_message_age is None or time.time() - job.triggered_at <= self.max_message_age:
+            return False
+        job.shed = True
+        job.reply = self.fallback_reply if self.shed_policy == SHED_FALLBACK else None
+        self._shed_counter.inc(policy=self.shed_policy)
+        return True
+
+    def _inference_loop(self) -> None:
+        while True:
+            job = self._get(self._inference_queue)
+            if job is None:
+                return
+            if isinstance(job, BackgroundJob):
+                self._run_background(job)
+                continue
+            self._queue_wait.observe(time.monotonic() - job.enqueued_at, priority=job.priority)
+            self._message_age.observe(max(0.0, time.time() - job.waiting_since), priority=job.priority)
+            try:
+                if not self._shed_if_stale(job):
+                    with get_tracer().start_span("reply.think", parent=job.trace_parent, **self._get_span_attributes(job)):
+                        job.reply = self._think(job)
+            except QuotaExceededError as e:
+                # Released unanswered: the channel is still unread, so a later fetch retries it (once the quota allows)
+                logger.info("%s, answering later", e)
+                if e.retry_after is not None:
+                    self._defer(job, e.retry_after)
+                self._release(job)
+                continue
+            except Exception as e:
+                logger.error("Guanaco '%s' could not think a reply: %s", job.guanaco.name, e)
+                self._record_error(job, "think", e)
+                self._release(job)
+                continue
+            if not self._put(self._send_queue, job):
+                self._release(job)
+
+    def _think(self, job: ReplyJob) -> str:
+        kwargs = {}
+        if self.conversation_memory is not None:
+            kwargs["prompt"] = self.conversation_memory.build_prompt(job.channel, job.guanaco.think_repository)
+        if job.admission is not None and job.admission.max_new_tokens is not None:
+            kwargs["max_new_tokens"] = job.admission.max_new_tokens
+        return job.guanaco.think(job.channel, **kwargs)
+
+    def _run_background(self, job: BackgroundJob) -> None:
+        try:
+            with get_tracer().start_span("reply.background", parent=job.trace_parent, stream=job.channel.get_id(), topic=job.channel.get_topic()):
+                job.task()
+        except Exception as e:
+            logger.error("Background model work on %s failed: %s", job.key, e)
+
+    def _send_loop(self) -> None:
+        while True:
+            job = self._get(self._send_queue)
+            if job is None:
+                return
+            try:
+                with get_tracer().start_span("reply.send", parent=job.trace_parent, shed=job.shed, **self._get_span_attributes(job)), \
+                        self.topic_locks.hold(job.channel.get_id(), job.channel.get_topic()):
+                    self._send(job)
+            except Exception as e:
+                logger.error("Guanaco '%s' could not send a reply: %s", job.guanaco.name, e)
+                self._record_error(job, "send", e)
+            finally:
+                self._release(job)
+
+    def _send(self, job: ReplyJob) -> None:
+        if self.channel_claim and not self.channel_claim(job):
+            logger.warning("Guanaco '%s' lost the claim on %s, reply dropped", job.guanaco.name, job.key)
+            return
+        if job.reply is None:
+            # Shed, or left unanswered by the admission stage
+            job.channel.mark_as_read()
+            if job.shed:
+                logger.info("Guanaco '%s' skipped a stale message on %s", job.guanaco.name, job.key)
+            else:
+                logger.info("Guanaco '%s' skipped a trivial message on %s (%s)", job.guanaco.name, job.key, job.admission.rule if job.admission else None)
+            return
+        job.channel.respond(job.reply)
+        logger.info("%s has processed messages", job.guanaco.name,
+                    extra={"guanaco": job.guanaco.name, "stream": job.channel.get_id(), "topic": job.channel.get_topic()})
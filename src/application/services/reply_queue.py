@@ -0,0 +1,131 @@
+"""
+Bounded queue of reply jobs that decides which reply is thought next:
+urgent jobs (direct messages and mentions) before normal ones, background model work (e.g. conversation
+summaries) only when no reply is waiting, a weighted fair share of the model between streams inside
+each class, and the longest waiting topic first inside a stream.
+A topic has at most one pending job: a newer job for the same key replaces it (coalescing).
+"""
+
+import heapq
+import itertools
+import queue
+import threading
+from typing import Dict, List, Optional
+
+URGENT = "urgent"
+NORMAL = "normal"
+BACKGROUND = "background"
+PRIORITY_CLASSES = (URGENT, NORMAL, BACKGROUND)
+
+
+class PriorityReplyQueue:
+    """
+    Drop-in for queue.Queue in the reply pipeline (put/get with timeout, queue.Full/queue.Empty, qsize).
+    Fairness uses stride scheduling: every stream advances a virtual clock by 1/weight for each job taken,
+    and the stream with the smallest clock goes next, so a chatty stream cannot starve a quiet one.
+    Urgent jobs may use urgent_headroom extra slots, so a queue full of normal jobs never blocks them.
+    Background jobs have maxsize slots of their own: they never take the room of a reply.
+    """
+
+    def __init__(self, maxsize: int = 8, urgent_headroom: Optional[int] = None, stream_weights: Optional[Dict[str, float]] = None):
+        if any(weight <= 0 for weight in (stream_weights or {}).values()):
+            raise ValueError("Stream weights must be positive")
+        self.maxsize = maxsize
+        self.urgent_headroom = maxsize if urgent_headroom is None else urgent_headroom
+        self.stream_weights = stream_weights or {}
+        # class -> stream -> heap of [waiting_since, sequence, job, live]; replaced entries stay in the heap as not live
+        self._pending: Dict[str, Dict[str, list]] = {priority: {} for priority in PRIORITY_CLASSES}
+        self._entries: Dict[tuple, list] = {}
+        self._passes: Dict[str, Dict[str, float]] = {priority: {} for priority in PRIORITY_CLASSES}
+        self._virtual_time: Dict[str, float] = {priority: 0.0 for priority in PRIORITY_CLASSES}
+        self._sizes: Dict[str, int] = {priority: 0 for priority in PRIORITY_CLASSES}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def put(self, job, block: bool = True, timeout: Optional[float] = None) -> None:
+        priority = job.priority if job.priority in PRIORITY_CLASSES else NORMAL
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._has_room(priority), timeout if block else 0):
+                raise queue.Full
+            self._push(job, priority)
+            self._condition.notify_all()
+
+    def replace(self, old_job, new_job) -> bool:
+        """
+        Put new_job in place of old_job if old_job is still waiting; it takes no extra room.
+        Returns False when old_job was already taken by a consumer (or never queued).
+        """
+        with self._condition:
+            entry = self._entries.get(old_job.key)
+            if entry is None or entry[2] is not old_job:
+                return False
+            self._discard(entry)
+            self._push(new_job, new_job.priority if new_job.priority in PRIORITY_CLASSES else NORMAL)
+            self._condition.notify_all()
+            return True
+
+    def is_pending(self, job) -> bool:
+        entry = self._entries.get(job.key)
+        return entry is not None and entry[2] is job
+
+    def get(self, block: bool = True, timeout: Optional[float] = None):
+        with self._condition:
+            if not self._condition.wait_for(lambda: self.qsize() > 0, timeout if block else 0):
+                raise queue.Empty
+            priority = next(priority for priority in PRIORITY_CLASSES if self._sizes[priority])
+            job = self._pop(priority)
+            self._condition.notify_all()
+            return job
+
+    def qsize(self) -> int:
+        return sum(self._sizes.values())
+
+    def get_sizes(self) -> Dict[str, int]:
+        return dict(self._sizes)
+
+    def _has_room(self, priority: str) -> bool:
+        if self.maxsize <= 0:
+            return True
+        if priority == BACKGROUND:
+            return self._sizes[BACKGROUND] < self.maxsize
+        limit = self.maxsize + self.urgent_headroom if priority == URGENT else self.maxsize
+        return self.qsize() - self._sizes[BACKGROUND] < limit
+
+    def _push(self, job, priority: str) -> None:
+        # Called with the condition held
+        stream = job.channel.get_id()
+        pending = self._pending[priority]
+        if not pending.get(stream):
+            # A stream that was idle rejoins at the current virtual time instead of cashing in its idle time
+            self._passes[priority][stream] = max(self._passes[priority].get(stream, 0.0), self._virtual_time[priority])
+        entry = [job.waiting_since, next(self._sequence), job, True]
+        heapq.heappush(pending.setdefault(stream, []), entry)
+        self._entries[job.key] = entry
+        self._sizes[priority] += 1
+
+    def _discard(self, entry: list) -> None:
+        # Called with the condition held; the entry is skipped when it reaches the top of its heap
+        entry[3] = False
+        job = entry[2]
+        del self._entries[job.key]
+        self._sizes[job.priority if job.priority in PRIORITY_CLASSES else NORMAL] -= 1
+
+    def _pop(self, priority: str):
+        pending = self._pending[priority]
+        passes = self._passes[priority]
+        for stream in list(pending):
+            heap = pending[stream]
+            while heap and not heap[0][3]:
+                heapq.heappop(heap)
+            if not heap:
+                del pending[stream]
+        streams: List[str] = list(pending)
+        stream = min(streams, key=lambda stream: (passes[stream], pending[stream][0][0]))
+        _, _, job, _ = heapq.heappop(pending[stream])
+        self._virtual_time[priority] = passes[stream]
+        passes[stream] += 1.0 / self.stream_weights.get(stream, 1.0)
+        if not pending[stream]:
+            del pending[stream]
+        del self._entries[job.key]
+        self._sizes[priority] -= 1
+        return job
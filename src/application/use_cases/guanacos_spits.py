@@ -4,26 +4,76 @@ Use case for managing multiple Guanaco workers with infinite loop execution.
 Follows Clean Architecture principles by orchestrating domain entities through repositories.
 """
 
-import time
+import logging
+import os
 import threading
 import signal
 import sys
-from typing import List, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Dict, Optional, Set
+from domain.entities.guanaco.guanaco import Guanaco
 from domain.ports.guanacos_repository import GuanacosRepository
-from infrastructure.workers.guanaco_worker import GuanacoWorker
+from domain.ports.lease_repository import LeaseRepository
+from domain.ports.reply_journal_repository import ReplyJournalRepository
+from application.services.lease_keeper import LeaseKeeper, default_owner_id
+from application.services.reply_pipeline import ReplyPipeline
+from infrastructure.workers.guanaco_scheduler import GuanacoScheduler, ScheduledGuanaco
+from infrastructure.workers.poll_policy import AdaptivePollPolicy, PollPolicy
+
+logger = logging.getLogger(__name__)
 
 
 class GuanacosSpits:
     """
     Use case for managing multiple Guanaco workers.
     Coordinates the execution of multiple Guanacos concurrently with proper lifecycle management.
+    All Guanacos share one scheduler, so the number of threads does not grow with the roster.
+    With a lease repository, several processes share the roster: each one runs only the Guanacos
+    it holds a lease for and keeps the others on standby, taking them over when their owner dies.
+    Shutdown drains: no new work is fetched, in-flight replies get until drain_timeout to be sent,
+    and the unfinished ones are written to the reply journal and resumed on the next start.
+    The roster is checked every roster_check_interval seconds: when the repository reports changes,
+    only added, removed or changed Guanacos are started or stopped, the others keep running.
+    Workers can be paused, resumed and given a fixed poll interval at runtime (see AdminHttpServer).
     """
     
-    def __init__(self, guanacos_repository: GuanacosRepository, sleep_time: int = 10):
+    def __init__(self, guanacos_repository: GuanacosRepository, sleep_time: int = 10, max_workers: Optional[int] = None,
+                 poll_policy_factory: Optional[Callable[[], PollPolicy]] = None, pipeline: Optional[ReplyPipeline] = None,
+                 lease_repository: Optional[LeaseRepository] = None, owner_id: Optional[str] = None, lease_ttl: float = 30.0,
+                 drain_timeout: float = 20.0, reply_journal: Optional[ReplyJournalRepository] = None,
+                 roster_check_interval: float = 5.0, channel_concurrency: int = 1):
         self.guanacos_repository = guanacos_repository
         self.sleep_time = sleep_time
-        self._workers: Dict[str, GuanacoWorker] = {}
+        self.roster_check_interval = roster_check_interval
+        self.drain_timeout = drain_timeout
+        self.reply_journal = reply_journal
+        self.owner_id = owner_id or default_owner_id()
+        self._lease_keeper = LeaseKeeper(
+            lease_repository, self.owner_id, lease_ttl,
+            on_acquired=self._on_lease_acquired, on_lost=self._on_lease_lost,
+        ) if lease_repository else None
+        self._guanacos: Dict[str, Guanaco] = {}
+        self._workers_lock = threading.Lock()
+        # With a pipeline, scheduled cycles only fetch: thinking and sending happen in the pipeline stages
+        self.pipeline = pipeline
+        # Without a pipeline a cycle answers its channels itself: shared threads let it answer several topics at once.
+        # With one, the pipeline's send workers do (see ReplyPipeline send_workers)
+        self.channel_concurrency = channel_concurrency
+        self._channel_executor = ThreadPoolExecutor(max_workers=channel_concurrency, thread_name_prefix="GuanacoChannel") if channel_concurrency > 1 and not pipeline else None
+        # Each Guanaco gets its own policy: faster polling after activity, backing off while idle
+        self.poll_policy_factory = poll_policy_factory or (lambda: AdaptivePollPolicy.from_sleep_time(sleep_time))
+        self._scheduler = GuanacoScheduler(
+            max_workers=max_workers or min(32, (os.cpu_count() or 1) + 4),
+            on_worker_stopped=lambda entry: self._wakeup.set(),
+        )
+        self._workers: Dict[str, ScheduledGuanaco] = {}
+        # Runtime controls, kept across reschedules (lease takeover, roster reload)
+        self._paused: Set[str] = set()
+        self._interval_overrides: Dict[str, float] = {}
         self._shutdown_requested = False
+        # Set whenever shutdown is requested or a worker stops, so waiting needs no polling
+        self._wakeup = threading.Event()
         
         # Set up signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self._signal_handler)
@@ -38,61 +88,185 @@ class GuanacosSpits:
             self._start_all_workers()
             self._wait_for_shutdown()
         except KeyboardInterrupt:
-            print("\n[INFO] Shutdown requested via keyboard interrupt")
+            logger.info("Shutdown requested via keyboard interrupt")
         finally:
             self._stop_all_workers()
     
     def stop(self) -> None:
         """Request shutdown of all workers."""
         self._shutdown_requested = True
+        self._wakeup.set()
     
     def _start_all_workers(self) -> None:
         """Initialize and start workers for all Guanacos from the repository."""
         guanacos = self.guanacos_repository.get_guanacos()
         
         if not guanacos:
-            print("[WARNING] No guanacos found in repository")
+            logger.warning("No guanacos found in repository")
             return
         
-        print(f"[INFO] Starting {len(guanacos)} Guanaco workers...")
+        logger.info("Starting %s Guanaco workers...", len(guanacos))
+        if self.pipeline:
+            if self.reply_journal:
+                pending_replies = self.reply_journal.load()
+                self.reply_journal.clear()
+                if pending_replies:
+                    logger.info("Resuming %s replies left unfinished by the previous run", len(pending_replies))
+                self.pipeline.resume(pending_replies)
+            self.pipeline.start()
+        self._scheduler.start()
         
         for guanaco in guanacos:
-            worker_id = guanaco.name or f"guanaco_{len(self._workers)}"
-            if worker_id in self._workers:
-                print(f"[WARNING] Worker with ID '{worker_id}' already exists, skipping")
+            worker_id = guanaco.name or f"guanaco_{len(self._guanacos)}"
+            if worker_id in self._guanacos:
+                logger.warning("Worker with ID '%s' already exists, skipping", worker_id)
                 continue
             
-            worker = GuanacoWorker(guanaco, self.sleep_time)
-            self._workers[worker_id] = worker
-            worker.start()
+            self._add_guanaco(worker_id, guanaco)
+        
+        if self._lease_keeper:
+            # First heartbeat inline so owned Guanacos start now instead of one interval later
+            self._lease_keeper.heartbeat()
+            self._lease_keeper.start()
+            logger.info("%s Guanaco workers on standby, owned by other processes", len(self._lease_keeper.get_standby()))
         
         running_count = len([w for w in self._workers.values() if w.is_running()])
-        print(f"[INFO] {running_count} Guanaco workers started successfully")
+        logger.info("%s Guanaco workers started successfully", running_count)
+    
+    def reload_roster(self) -> None:
+        """Diff the repository roster against the running one: start added, stop removed and restart changed Guanacos."""
+        try:
+            guanacos = self.guanacos_repository.get_guanacos()
+        except Exception as e:
+            # A broken edit of the roster must not take down the Guanacos already running
+            logger.error("Could not reload the guanacos roster, keeping the current one: %s", e)
+            return
+        
+        roster: Dict[str, Guanaco] = {}
+        for guanaco in guanacos:
+            roster.setdefault(guanaco.name or f"guanaco_{len(roster)}", guanaco)
+        
+        removed = [worker_id for worker_id in self._guanacos if worker_id not in roster]
+        added = [worker_id for worker_id in roster if worker_id not in self._guanacos]
+        # Repositories return the same instance for an unchanged Guanaco
+        changed = [worker_id for worker_id in roster if worker_id in self._guanacos and roster[worker_id] is not self._guanacos[worker_id]]
+        
+        for worker_id in removed:
+            self._remove_guanaco(worker_id)
+        for worker_id in changed:
+            # The scheduler starts the new entry only once the old one's cycle in flight has finished
+            was_scheduled = worker_id in self._workers
+            self._unschedule_worker(worker_id)
+            self._guanacos[worker_id] = roster[worker_id]
+            if was_scheduled:
+                self._schedule_worker(worker_id)
+        for worker_id in added:
+            self._add_guanaco(worker_id, roster[worker_id])
+        if added and self._lease_keeper:
+            self._lease_keeper.heartbeat()
+        
+        if removed or added or changed:
+            logger.info("Roster reloaded: %s added, %s removed, %s changed", len(added), len(removed), len(changed))
+    
+    def _add_guanaco(self, worker_id: str, guanaco: Guanaco) -> None:
+        self._guanacos[worker_id] = guanaco
+        if self._lease_keeper:
+            self._lease_keeper.add_candidate(self._get_lease_key(worker_id))
+        else:
+            self._schedule_worker(worker_id)
+    
+    def _remove_guanaco(self, worker_id: str) -> None:
+        # A cycle already in flight is allowed to finish
+        self._unschedule_worker(worker_id)
+        del self._guanacos[worker_id]
+        self._paused.discard(worker_id)
+        self._interval_overrides.pop(worker_id, None)
+        if self._lease_keeper:
+            self._lease_keeper.remove_candidate(self._get_lease_key(worker_id))
+    
+    def _schedule_worker(self, worker_id: str) -> None:
+        guanaco = self._guanacos[worker_id]
+        work = None
+        if self.pipeline:
+            work = lambda guanaco=guanaco: self.pipeline.fetch(guanaco)
+        elif self._channel_executor:
+            work = lambda guanaco=guanaco: guanaco.work(executor=self._channel_executor, max_concurrent_channels=self.channel_concurrency)
+        with self._workers_lock:
+            self._workers[worker_id] = self._scheduler.add(worker_id, guanaco, poll_policy=self._create_poll_policy(worker_id), work=work)
+            if worker_id in self._paused:
+                self._scheduler.pause(worker_id)
+    
+    def _create_poll_policy(self, worker_id: str) -> PollPolicy:
+        if worker_id in self._interval_overrides:
+            return PollPolicy(self._interval_overrides[worker_id])
+        return self.poll_policy_factory()
+    
+    def _unschedule_worker(self, worker_id: str) -> None:
+        with self._workers_lock:
+            entry = self._workers.pop(worker_id, None)
+        if entry:
+            self._scheduler.remove(worker_id)
+    
+    @staticmethod
+    def _get_lease_key(worker_id: str) -> str:
+        return f"guanaco:{worker_id}"
+    
+    def _get_worker_id(self, lease_key: str) -> str:
+        return lease_key[len("guanaco:"):]
+    
+    def _on_lease_acquired(self, lease_key: str) -> None:
+        worker_id = self._get_worker_id(lease_key)
+        if worker_id in self._guanacos and worker_id not in self._workers:
+            logger.info("Taking over Guanaco '%s'", worker_id)
+            self._schedule_worker(worker_id)
+    
+    def _on_lease_lost(self, lease_key: str) -> None:
+        worker_id = self._get_worker_id(lease_key)
+        logger.warning("Guanaco '%s' is now owned by another process, stopping it here", worker_id)
+        self._unschedule_worker(worker_id)
     
     def _stop_all_workers(self) -> None:
         """Stop all running workers gracefully."""
-        if not self._workers:
+        if not self._guanacos:
             return
         
-        print(f"[INFO] Stopping {len(self._workers)} Guanaco workers...")
+        logger.info("Stopping %s Guanaco workers (draining for up to %ss)...", len(self._workers), self.drain_timeout)
         
-        for worker in self._workers.values():
-            worker.stop()
+        deadline = time.monotonic() + self.drain_timeout
+        if self.pipeline:
+            # Fetch cycles blocked on a full queue give up right away instead of holding the drain
+            self.pipeline.close_intake()
+        self._scheduler.stop(timeout=self.drain_timeout)
+        if self._channel_executor:
+            self._channel_executor.shutdown(wait=False)
+        if self.pipeline:
+            unfinished = self.pipeline.drain(timeout=max(0.0, deadline - time.monotonic()))
+            if self.reply_journal:
+                self.reply_journal.save(unfinished)
+        if self._lease_keeper:
+            # Released only after in-flight replies are done, so the next owner does not answer them twice
+            self._lease_keeper.stop()
         
-        print("[INFO] All Guanaco workers stopped")
+        logger.info("All Guanaco workers stopped")
         self._workers.clear()
+        self._guanacos.clear()
     
     def _wait_for_shutdown(self) -> None:
         """Wait for shutdown signal or until all workers stop."""
         try:
             while not self._shutdown_requested:
                 # Check if any workers are still running
-                running_workers = [w for w in self._workers.values() if w.is_running()]
-                if not running_workers:
-                    print("[INFO] All workers stopped, shutting down")
+                running_workers = [w for w in list(self._workers.values()) if w.is_running()]
+                # Standby Guanacos keep the process alive: it takes them over when their owner dies
+                standby_workers = self._lease_keeper.get_standby() if self._lease_keeper else set()
+                if not running_workers and not standby_workers:
+                    logger.info("All workers stopped, shutting down")
                     break
                 
-                time.sleep(1)  # Check every second
+                self._wakeup.wait(self.roster_check_interval)
+                self._wakeup.clear()
+                if not self._shutdown_requested and self.guanacos_repository.has_changes():
+                    self.reload_roster()
         except KeyboardInterrupt:
             raise  # Re-raise to be handled by caller
     
@@ -100,16 +274,103 @@ class GuanacosSpits:
         """Handle shutdown signals gracefully."""
         signal_names = {signal.SIGINT: "SIGINT", signal.SIGTERM: "SIGTERM"}
         signal_name = signal_names.get(signum, f"Signal {signum}")
-        print(f"\n[INFO] Received {signal_name}, initiating graceful shutdown...")
+        logger.info("Received %s, initiating graceful shutdown...", signal_name)
         self._shutdown_requested = True
+        # Event.set() takes a lock the interrupted main thread may be holding inside wait(),
+        # so it is called from another thread instead of from the signal handler itself
+        threading.Thread(target=self._wakeup.set, daemon=True).start()
     
     def get_running_workers(self) -> List[str]:
         """Get list of currently running worker IDs."""
-        return [worker_id for worker_id, worker in self._workers.items() 
+        return [worker_id for worker_id, worker in list(self._workers.items()) 
                 if worker.is_running()]
     
     def is_worker_running(self, worker_id: str) -> bool:
         """Check if a specific worker is running."""
         if worker_id not in self._workers:
             return False
-        return self._workers[worker_id].is_running()
\ No newline at end of file
+        return self._workers[worker_id].is_running()
+    
+    def get_worker_stats(self) -> Dict[str, dict]:
+        """Polling statistics (effective interval, idle streak...) of every worker."""
+        return {worker_id: worker.poll_policy.get_stats() for worker_id, worker in list(self._workers.items())}
+    
+    def get_standby_workers(self) -> List[str]:
+        """Worker IDs whose lease is held by another process."""
+        if not self._lease_keeper:
+            return []
+        return sorted(self._get_worker_id(key) for key in self._lease_keeper.get_standby())
+    
+    def pause_worker(self, worker_id: str) -> None:
+        """Stop polling a Guanaco until resumed; a cycle in flight finishes. Raises KeyError for unknown workers."""
+        self._check_known_worker(worker_id)
+        with self._workers_lock:
+            self._paused.add(worker_id)
+            if worker_id in self._workers:
+                self._scheduler.pause(worker_id)
+        logger.info("Guanaco '%s' paused", worker_id)
+    
+    def resume_worker(self, worker_id: str) -> None:
+        """Resume a paused Guanaco; its next cycle runs right away."""
+        self._check_known_worker(worker_id)
+        with self._workers_lock:
+            self._paused.discard(worker_id)
+            if worker_id in self._workers:
+                self._scheduler.resume(worker_id)
+        logger.info("Guanaco '%s' resumed", worker_id)
+    
+    def set_worker_interval(self, worker_id: str, interval: Optional[float]) -> None:
+        """Poll a Guanaco every interval seconds, or go back to the default (adaptive) policy with None."""
+        self._check_known_worker(worker_id)
+        if interval is not None and interval <= 0:
+            raise ValueError(f"Invalid poll interval: {interval}. Expected a positive number of seconds.")
+        with self._workers_lock:
+            if interval is None:
+                self._interval_overrides.pop(worker_id, None)
+            else:
+                self._interval_overrides[worker_id] = interval
+            if worker_id in self._workers:
+                self._scheduler.set_poll_policy(worker_id, self._create_poll_policy(worker_id))
+        logger.info("Guanaco '%s' poll interval set to %s", worker_id, interval if interval is not None else 'default')
+    
+    def unload_models(self) -> int:
+        """Free the memory of every model used by the roster; they load again on the next think. Returns how many were asked."""
+        think_repositories = self._get_think_repositories()
+        for think_repository in think_repositories:
+            think_repository.unload()
+        return len(think_repositories)
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Snapshot of the runtime state: workers, queues, models, caches and recent errors."""
+        workers = {worker_id: worker.get_state() for worker_id, worker in list(self._workers.items())}
+        recent_errors = list(self._scheduler.recent_errors)
+        status: Dict[str, Any] = {
+            "owner_id": self.owner_id,
+            "shutdown_requested": self._shutdown_requested,
+            "workers": workers,
+            "paused_workers": sorted(self._paused),
+            "standby_workers": self.get_standby_workers(),
+            "scheduler": {"max_workers": self._scheduler.max_workers, "cycles_in_flight": self._scheduler.get_in_flight_count()},
+            "models": {worker_id: guanaco.think_repository.get_status()
+                       for worker_id, guanaco in list(self._guanacos.items()) if getattr(guanaco, "think_repository", None)},
+            "caches": {"guanacos": len(self._guanacos)},
+        }
+        if self.pipeline:
+            status["queues"] = self.pipeline.get_queue_depths()
+            status["inference_queue_by_priority"] = self.pipeline.get_inference_queue_sizes()
+            status["caches"].update(self.pipeline.get_cache_sizes())
+            recent_errors.extend(self.pipeline.recent_errors)
+        status["recent_errors"] = sorted(recent_errors, key=lambda error: error["at"])
+        return status
+    
+    def _check_known_worker(self, worker_id: str) -> None:
+        if worker_id not in self._guanacos:
+            raise KeyError(f"Unknown Guanaco: {worker_id}")
+    
+    def _get_think_repositories(self) -> list:
+        # Guanacos often share one repository (and its model), unload it once
+        unique = {}
+        for guanaco in list(self._guanacos.values()):
+            if getattr(guanaco, "think_repository", None) is not None:
+                unique.setdefault(id(guanaco.think_repository), guanaco.think_repository)
+        return list(unique.values())
@@ -0,0 +1,27 @@
+from typing import Optional
+
+# What to do with a channel before the model: think as usual, leave it unanswered,
+# answer with a canned reply, or think with a smaller generation budget
+THINK = "think"
+SKIP = "skip"
+CANNED = "canned"
+CHEAP = "cheap"
+ADMISSION_ACTIONS = (THINK, SKIP, CANNED, CHEAP)
+
+class AdmissionDecision:
+    def __init__(self, action: str = THINK, rule: Optional[str] = None, reply: Optional[str] = None, max_new_tokens: Optional[int] = None):
+        if action not in ADMISSION_ACTIONS:
+            raise ValueError(f"Invalid admission action: {action}. Expected one of: {', '.join(ADMISSION_ACTIONS)}.")
+        if action == CANNED and not reply:
+            raise ValueError("Reply is required for a canned answer")
+        self.action = action
+        # Name of the rule that decided (None: admitted because nothing matched)
+        self.rule = rule
+        self.reply = reply
+        self.max_new_tokens = max_new_tokens
+
+    def needs_model(self) -> bool:
+        return self.action in (THINK, CHEAP)
+
+    def __repr__(self) -> str:
+        return f"AdmissionDecision({self.action!r}, rule={self.rule!r})"
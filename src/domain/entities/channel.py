@@ -1,15 +1,19 @@
-from typing import List, TYPE_CHECKING
+from typing import Iterable, List, Optional, TYPE_CHECKING
 from domain.entities.chat_message import ChatMessage
+from domain.entities.message_history import MessageHistory
+from domain.entities.user import User
 
 if TYPE_CHECKING:
     # Imported only for type checking to avoid circular import at runtime
     from domain.ports.chat_message_repository import ChatMessageRepository
 
 class Channel:
-    def __init__(self, id: str, topic: str, messages: List[ChatMessage], chat_message_repository: "ChatMessageRepository"):
+    def __init__(self, id: str, topic: str, messages: Iterable[ChatMessage], chat_message_repository: "ChatMessageRepository",
+                 max_messages: Optional[int] = None):
         self.id = id
         self.topic = topic
-        self.messages = messages
+        # Ordered by id without duplicates; with max_messages only the newest are kept
+        self.messages = MessageHistory(messages, max_messages)
         self.chat_message_repository = chat_message_repository
 
     def __eq__(self, other) -> bool:
@@ -19,23 +23,44 @@ class Channel:
         return hash((self.id, self.topic))
     
     def __str__(self) -> str:
-        text = f"Channel topic: {self.topic} \n Messages:"
-        for message in self.messages:
-            text += f"\n------------\n {message}"
-        return text
+        # A single join: repeated concatenation is quadratic in the length of the history
+        return f"Channel topic: {self.topic} \n Messages:" + "".join(f"\n------------\n {message}" for message in self.messages)
     
     def respond(self, message: str) -> None:
         self.chat_message_repository.send_channel_message(message, self.id, self.topic)
         self.chat_message_repository.mark_as_read(self)
 
+    def mark_as_read(self) -> None:
+        """Leave the channel unanswered without fetching it again."""
+        self.chat_message_repository.mark_as_read(self)
+
     def get_last_message(self) -> ChatMessage:
-        return self.messages[-1]
+        """The newest message, by id."""
+        return self.messages.last()
+
+    def add_message(self, message: ChatMessage) -> bool:
+        """False when the message was already in the channel."""
+        return self.messages.add(message)
 
-    def add_message(self, message: ChatMessage) -> None:
-        self.messages.append(message)
+    def add_messages(self, messages: Iterable[ChatMessage]) -> int:
+        """Merge a fetched page; returns how many messages were new."""
+        return self.messages.merge(messages)
+
+    def has_message(self, message_id: int) -> bool:
+        return message_id in self.messages
 
     def get_messages(self) -> List[ChatMessage]:
-        return self.messages
+        return self.messages.to_list()
+
+    def get_unanswered_messages(self, user: Optional[User]) -> List[ChatMessage]:
+        """Messages after the last one sent by user (all of them if user never spoke)."""
+        unanswered = []
+        for message in reversed(self.messages):
+            if user is not None and message.sender == user:
+                break
+            unanswered.append(message)
+        unanswered.reverse()
+        return unanswered
     
     def get_id(self) -> str:
         return self.id
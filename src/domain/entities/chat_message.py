@@ -3,7 +3,7 @@ from domain.entities.user import User
 from datetime import datetime
 
 class ChatMessage:
-    def __init__(self, id: int, content: str, sender: User, created_at: datetime):
+    def __init__(self, id: int, content: str, sender: User, created_at: datetime, is_private: bool = False, is_mention: bool = False):
         if not id:
             raise ValueError("ID is required")
         if content is None:
@@ -17,6 +17,9 @@ class ChatMessage:
         self.content = content
         self.sender = sender
         self.created_at = created_at
+        # Direct message, or a stream message that mentions the receiving user
+        self.is_private = is_private
+        self.is_mention = is_mention
     
     def __str__(self):
         return f"Message: {self.content} \nSender: {self.sender.name} \nCreated at: {self.created_at}"
\ No newline at end of file
@@ -1,17 +1,132 @@
+import contextvars
+import logging
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Callable, Dict, List, Optional, Tuple
 from domain.ports.chat_message_repository import ChatMessageRepository
+from domain.entities.admission_decision import CANNED, SKIP, THINK, AdmissionDecision
+from domain.entities.channel import Channel
+from domain.entities.guanaco.topic_locks import TopicLocks, get_topic_locks
 from domain.entities.user import User
-from domain.errors import MissingUserError, MissingRepositoryError
+from domain.errors import ChannelWorkError, MissingUserError, MissingRepositoryError, QuotaExceededError
+from domain.ports.admission_filter import AdmissionFilter
 from domain.ports.think_repository import ThinkRepository
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENT_CHANNELS = 4
+
+
+class WorkResult:
+    """What one work() call did with the channels it found."""
+
+    def __init__(self):
+        self.answered = 0
+        # Left unread because of the quota, answered on a later cycle
+        self.deferred = 0
+        self.errors: List[Tuple[Channel, Exception]] = []
+
 class Guanaco:
-    def __init__(self, name: str = None, user: User = None, chat_message_repository: ChatMessageRepository = None, think_repository: ThinkRepository = None):
+    def __init__(self, name: str = None, user: User = None, chat_message_repository: ChatMessageRepository = None, think_repository: ThinkRepository = None,
+                 topic_locks: Optional[TopicLocks] = None, admission_filter: Optional[AdmissionFilter] = None):
         self.name = name
         self.user = user
         self.chat_message_repository = chat_message_repository
         self.think_repository = think_repository
+        self.admission_filter = admission_filter
+        self.topic_locks = topic_locks if topic_locks is not None else get_topic_locks()
+        self.last_work_result: Optional[WorkResult] = None
+
+    def work(self, executor: Optional[Executor] = None, max_concurrent_channels: int = DEFAULT_MAX_CONCURRENT_CHANNELS):
+        """
+        Process unread messages once. Returns True if work was performed, False otherwise.
+        With an executor, up to max_concurrent_channels channels are answered at the same time, so the cycle
+        takes as long as its slowest topic rather than the sum of all of them; replies within one
+        (stream, topic) are still sent one at a time. A failing channel does not stop the others:
+        once every channel was handled, the failures are raised together as a ChannelWorkError.
+        """
+        channels = self.get_channels_to_answer()
+        result = WorkResult()
+        if executor is None or len(channels) < 2:
+            for channel in channels:
+                self._record_outcome(result, channel, lambda channel=channel: self.answer(channel))
+        else:
+            self._answer_concurrently(channels, executor, max(1, max_concurrent_channels), result)
+        self.last_work_result = result
+        
+        if result.answered:
+            logger.info("%s has processed messages", self.name, extra={"guanaco": self.name, "answered": result.answered})
+        if result.errors:
+            raise ChannelWorkError(result.errors)
+        
+        return result.answered > 0
+
+    def _answer_concurrently(self, channels: List[Channel], executor: Executor, max_concurrent_channels: int, result: WorkResult) -> None:
+        submitted: Dict[Future, Channel] = {}
+        pending = set()
+        for channel in channels:
+            if len(pending) >= max_concurrent_channels:
+                _, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # Each channel runs in a copy of this context, so its model and send spans stay children of the cycle
+            future = executor.submit(contextvars.copy_context().run, self.answer, channel)
+            submitted[future] = channel
+            pending.add(future)
+        wait(pending)
+        for future, channel in submitted.items():
+            self._record_outcome(result, channel, future.result)
+
+    def _record_outcome(self, result: WorkResult, channel: Channel, get_outcome: Callable[[], bool]) -> None:
+        try:
+            answered = get_outcome()
+        except Exception as e:
+            logger.error("Could not answer channel: %s", e, extra={"guanaco": self.name, "stream": channel.get_id(), "topic": channel.get_topic()})
+            result.errors.append((channel, e))
+            return
+        if answered:
+            result.answered += 1
+        else:
+            result.deferred += 1
 
-    def work(self):
-        """Process unread messages once. Returns True if work was performed, False otherwise."""
+    def answer(self, channel: Channel) -> bool:
+        """Think and respond in one channel. Returns False when the quota defers the answer to a later cycle."""
+        # Only identifiers: rendering the whole channel would rebuild every message on each reply
+        logger.debug("Answering channel", extra={"guanaco": self.name, "stream": channel.get_id(), "topic": channel.get_topic()})
+        with self.topic_locks.hold(channel.get_id(), channel.get_topic()):
+            decision = self.admit(channel)
+            if decision.action == SKIP:
+                channel.mark_as_read()
+                return True
+            if decision.action == CANNED:
+                channel.respond(decision.reply)
+                return True
+            try:
+                reply = self.think(channel, max_new_tokens=decision.max_new_tokens)
+            except QuotaExceededError as e:
+                # The channel stays unread and is answered on a later cycle
+                logger.info("%s, answering later", e)
+                return False
+            channel.respond(reply)
+        return True
+
+    def get_channels_to_answer(self) -> List[Channel]:
+        """Fetch stage: channels with unread messages whose last message was not sent by this guanaco."""
+        self.check_can_work()
+        channels = self.chat_message_repository.get_streams_with_unread_messages()
+        return [channel for channel in channels.values() if channel.get_last_message().sender != self.user]
+
+    def admit(self, channel: Channel) -> AdmissionDecision:
+        """Admission stage: whether the channel needs the model, a canned reply or no reply at all."""
+        if self.admission_filter is None:
+            return AdmissionDecision(THINK)
+        return self.admission_filter.decide(channel, self.user)
+
+    def think(self, channel: Channel, prompt: Optional[str] = None, max_new_tokens: Optional[int] = None) -> str:
+        """Inference stage: the reply to the last message of the channel, or to prompt when given (e.g. built from its history)."""
+        message = prompt if prompt is not None else channel.get_last_message().content
+        if max_new_tokens is None:
+            return self.think_repository.get_think(message)
+        return self.think_repository.get_think(message, max_new_tokens=max_new_tokens)
+
+    def check_can_work(self) -> None:
         if self.user is None:
             raise MissingUserError("Cannot work without a user")
         
@@ -20,17 +135,3 @@ class Guanaco:
         
         if self.think_repository is None:
             raise MissingRepositoryError("Cannot work without a think repository")
-        
-        channels = self.chat_message_repository.get_streams_with_unread_messages()
-        work_performed = False
-        
-        for channel in channels.values():
-            print(f"Channel: {channel}")
-            if channel.get_last_message().sender != self.user:
-                channel.respond(self.think_repository.get_think(channel.get_last_message().content))
-                work_performed = True
-        
-        if work_performed:
-            print(f"{self.name} has processed messages")
-        
-        return work_performed
\ No newline at end of file
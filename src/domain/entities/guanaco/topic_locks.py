@@ -0,0 +1,43 @@
+"""
+Per-(stream, topic) locks, so replies within one topic are sent one at a time while other topics proceed.
+"""
+
+import contextlib
+import threading
+from typing import Dict, Hashable, Iterator, List
+
+
+class TopicLocks:
+    """One lock per (stream, topic), kept only while a reply holds or waits for it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (stream, topic) -> [lock, number of holders and waiters]
+        self._locks: Dict[tuple, List] = {}
+
+    @contextlib.contextmanager
+    def hold(self, stream: Hashable, topic: Hashable) -> Iterator[None]:
+        key = (stream, topic)
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._locks)
+
+
+# Shared by every Guanaco of the process: two guanacos answering the same topic take turns too
+_topic_locks = TopicLocks()
+
+
+def get_topic_locks() -> TopicLocks:
+    return _topic_locks
@@ -0,0 +1,88 @@
+import bisect
+from typing import Dict, Iterable, Iterator, List, Optional
+from domain.entities.chat_message import ChatMessage
+
+
+class MessageHistory:
+    """
+    Messages of a channel ordered by id, each one once: adding a message that is already there replaces it
+    (the newer copy may carry an edit). With max_messages only the newest ones are kept.
+    """
+
+    def __init__(self, messages: Iterable[ChatMessage] = (), max_messages: Optional[int] = None):
+        if max_messages is not None and max_messages < 1:
+            raise ValueError(f"Invalid max messages: {max_messages}. Expected at least 1.")
+        self.max_messages = max_messages
+        # Parallel lists sorted by id, and the position lookup for membership
+        self._ids: List[int] = []
+        self._messages: List[ChatMessage] = []
+        self._by_id: Dict[int, ChatMessage] = {}
+        self.merge(messages)
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __iter__(self) -> Iterator[ChatMessage]:
+        return iter(self._messages)
+
+    def __reversed__(self) -> Iterator[ChatMessage]:
+        return reversed(self._messages)
+
+    def __contains__(self, message_id: int) -> bool:
+        return message_id in self._by_id
+
+    def add(self, message: ChatMessage) -> bool:
+        """Insert message in id order; False when it was already there."""
+        return self.merge([message]) == 1
+
+    def merge(self, messages: Iterable[ChatMessage]) -> int:
+        """Insert a fetched page (in any order); returns how many messages were new."""
+        new_by_id: Dict[int, ChatMessage] = {}
+        for message in messages:
+            if message.id in self._by_id:
+                self._replace(message)
+            else:
+                # A page can repeat a message: the last copy wins, like for the ones already stored
+                new_by_id[message.id] = message
+        if not new_by_id:
+            return 0
+        new_messages = sorted(new_by_id.values(), key=lambda message: message.id)
+        self._by_id.update(new_by_id)
+        if not self._ids or new_messages[0].id > self._ids[-1]:
+            # The usual case: newer than everything stored
+            self._messages.extend(new_messages)
+            self._ids.extend(message.id for message in new_messages)
+        elif len(new_messages) == 1:
+            index = bisect.bisect_left(self._ids, new_messages[0].id)
+            self._ids.insert(index, new_messages[0].id)
+            self._messages.insert(index, new_messages[0])
+        else:
+            # Two sorted runs: the sort merges them in linear time
+            self._messages = sorted(self._messages + new_messages, key=lambda message: message.id)
+            self._ids = [message.id for message in self._messages]
+        self._trim()
+        return len(new_messages)
+
+    def get(self, message_id: int) -> Optional[ChatMessage]:
+        return self._by_id.get(message_id)
+
+    def last(self) -> ChatMessage:
+        """The message with the highest id (IndexError when empty)."""
+        return self._messages[-1]
+
+    def to_list(self) -> List[ChatMessage]:
+        return list(self._messages)
+
+    def _replace(self, message: ChatMessage) -> None:
+        index = bisect.bisect_left(self._ids, message.id)
+        self._messages[index] = message
+        self._by_id[message.id] = message
+
+    def _trim(self) -> None:
+        if self.max_messages is None or len(self._messages) <= self.max_messages:
+            return
+        excess = len(self._messages) - self.max_messages
+        for message in self._messages[:excess]:
+            del self._by_id[message.id]
+        del self._messages[:excess]
+        del self._ids[:excess]
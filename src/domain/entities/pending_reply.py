@@ -0,0 +1,23 @@
+from typing import Optional, Tuple
+
+class PendingReply:
+    """A reply that was not sent before shutdown: the topic it answers and, if it was already thought, its text."""
+
+    def __init__(self, guanaco_name: str, stream_id: str, topic: str, triggered_at: float, reply: Optional[str] = None):
+        if not guanaco_name:
+            raise ValueError("Guanaco name is required")
+        self.guanaco_name = guanaco_name
+        self.stream_id = stream_id
+        self.topic = topic
+        self.triggered_at = triggered_at
+        self.reply = reply
+
+    @property
+    def key(self) -> Tuple[str, str, str]:
+        return (self.guanaco_name, self.stream_id, self.topic)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, PendingReply) and self.key == other.key and self.triggered_at == other.triggered_at and self.reply == other.reply
+
+    def __repr__(self) -> str:
+        return f"PendingReply({self.guanaco_name!r}, {self.stream_id!r}, {self.topic!r}, {self.triggered_at!r}, reply={self.reply is not None})"
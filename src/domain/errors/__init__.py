@@ -4,5 +4,7 @@ Domain-specific error classes for the guanaco application.
 
 from .missing_user_error import MissingUserError
 from .missing_repository_error import MissingRepositoryError
+from .quota_exceeded_error import QuotaExceededError
+from .channel_work_error import ChannelWorkError
 
-__all__ = ['MissingUserError', 'MissingRepositoryError']
+__all__ = ['MissingUserError', 'MissingRepositoryError', 'QuotaExceededError', 'ChannelWorkError']
@@ -0,0 +1,11 @@
+"""
+Error raised when some channels of a work cycle could not be answered.
+"""
+
+class ChannelWorkError(Exception):
+    """Raised once every channel of the cycle was handled, with the failures of all the channels that failed"""
+
+    def __init__(self, errors):
+        # [(channel, exception)]
+        self.errors = errors
+        super().__init__("; ".join(f"{channel.get_id()}/{channel.get_topic()}: {error}" for channel, error in errors))
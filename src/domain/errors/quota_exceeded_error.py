@@ -0,0 +1,11 @@
+"""
+Error raised when a guanaco has used up its share of the model.
+"""
+
+class QuotaExceededError(Exception):
+    """Raised when thinking now would exceed the guanaco's quota; the message can be answered later"""
+
+    def __init__(self, message, retry_after=None):
+        # Seconds until the quota can grant the request (None: unknown, retry on a later cycle)
+        self.retry_after = retry_after
+        super().__init__(message)
@@ -0,0 +1,13 @@
+from abc import ABC, abstractmethod
+from typing import Optional, TYPE_CHECKING
+from domain.entities.admission_decision import AdmissionDecision
+from domain.entities.user import User
+
+if TYPE_CHECKING:
+    from domain.entities.channel import Channel
+
+class AdmissionFilter(ABC):
+    @abstractmethod
+    def decide(self, channel: "Channel", user: Optional[User]) -> AdmissionDecision:
+        """Whether the messages user has not answered in channel are worth a model generation."""
+        raise NotImplementedError("Not implemented")
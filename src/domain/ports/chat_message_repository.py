@@ -1,7 +1,7 @@
 # Repository interface for chat messages
 
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 from domain.entities.chat_message import ChatMessage
 from domain.entities.user import User
@@ -28,4 +28,7 @@ class ChatMessageRepository(ABC):
         raise NotImplementedError("Not implemented")
     @abstractmethod
     def get_streams_with_unread_messages(self) -> Dict[str, "Channel"]:
-        raise NotImplementedError("Not implemented")
\ No newline at end of file
+        raise NotImplementedError("Not implemented")
+    def get_account_user(self) -> Optional[User]:
+        """The user the repository posts as, when the platform tells it."""
+        return None
\ No newline at end of file
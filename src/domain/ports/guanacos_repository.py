@@ -6,4 +6,8 @@ class GuanacosRepository(ABC):
 
     @abstractmethod
     def get_guanacos(self) -> List[Guanaco]:
-        raise NotImplementedError("Not implemented")
\ No newline at end of file
+        raise NotImplementedError("Not implemented")
+
+    def has_changes(self) -> bool:
+        """True when get_guanacos() would return a different roster than its last call. Fixed rosters never change."""
+        return False
@@ -0,0 +1,21 @@
+# Repository interface for ownership leases shared between processes
+
+from abc import ABC, abstractmethod
+from typing import List, Optional
+
+class LeaseRepository(ABC):
+    @abstractmethod
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        """Take the lease if it is free, expired or already ours (which extends it). Returns True if owned."""
+        raise NotImplementedError("Not implemented")
+    @abstractmethod
+    def renew(self, keys: List[str], owner: str, ttl: float) -> List[str]:
+        """Extend the leases still held by owner. Returns the keys that were renewed."""
+        raise NotImplementedError("Not implemented")
+    @abstractmethod
+    def release(self, key: str, owner: str):
+        raise NotImplementedError("Not implemented")
+    @abstractmethod
+    def get_owner(self, key: str) -> Optional[str]:
+        """Current owner of an unexpired lease, None if nobody holds it."""
+        raise NotImplementedError("Not implemented")
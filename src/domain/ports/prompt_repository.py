@@ -0,0 +1,7 @@
+from abc import ABC, abstractmethod
+
+class PromptRepository(ABC):
+    @abstractmethod
+    def get_prompt(self, name: str) -> str:
+        """Source of the prompt template called name. Raises KeyError when there is none."""
+        raise NotImplementedError("Not implemented")
@@ -0,0 +1,17 @@
+# Repository interface for the replies left unfinished by a shutdown
+
+from abc import ABC, abstractmethod
+from typing import List
+from domain.entities.pending_reply import PendingReply
+
+class ReplyJournalRepository(ABC):
+    @abstractmethod
+    def save(self, pending_replies: List[PendingReply]):
+        """Replace the journal with pending_replies."""
+        raise NotImplementedError("Not implemented")
+    @abstractmethod
+    def load(self) -> List[PendingReply]:
+        raise NotImplementedError("Not implemented")
+    @abstractmethod
+    def clear(self):
+        raise NotImplementedError("Not implemented")
@@ -1,6 +1,20 @@
 from abc import ABC, abstractmethod
+from typing import Optional
 
 class ThinkRepository(ABC):
     @abstractmethod
-    def get_think(self, message: str) -> str:
-        raise NotImplementedError("Not implemented")
\ No newline at end of file
+    def get_think(self, message: str, max_new_tokens: Optional[int] = None) -> str:
+        """Reply to message, generating at most max_new_tokens tokens (None: the engine default)."""
+        raise NotImplementedError("Not implemented")
+
+    def get_raw_think(self, prompt: str, max_new_tokens: Optional[int] = None) -> str:
+        """Continue prompt as given: no persona template and, behind a quota, not counted as a reply."""
+        return self.get_think(prompt, max_new_tokens=max_new_tokens)
+
+    def get_status(self) -> dict:
+        """Runtime state of the engine behind this repository (model, load state...) for introspection."""
+        return {}
+
+    def unload(self) -> None:
+        """Free the memory held by the model; it is loaded again on the next think."""
+        pass
@@ -0,0 +1,32 @@
+"""
+Builds the admission stage from the environment. Guanacos share one filter, so the optional
+classifier model is loaded once.
+"""
+
+import threading
+from typing import Optional
+from application.services.admission_filter import RuleAdmissionFilter, default_rules
+from infrastructure.config.admission_config import AdmissionConfig
+from infrastructure.transformers_engine.admission_classifier import TransformersAdmissionClassifier
+
+_admission_filter: Optional[RuleAdmissionFilter] = None
+_filter_lock = threading.Lock()
+
+
+def build_admission_filter(admission_config: Optional[AdmissionConfig] = None) -> Optional[RuleAdmissionFilter]:
+    """The configured admission filter, or None with ADMISSION_FILTER=off (every message goes to the model)."""
+    global _admission_filter
+    admission_config = admission_config or AdmissionConfig()
+    if admission_config.mode == "off":
+        return None
+    with _filter_lock:
+        if _admission_filter is None:
+            classifier = TransformersAdmissionClassifier(admission_config.classifier_model, admission_config.classifier_label) \
+                if admission_config.classifier_model else None
+            _admission_filter = RuleAdmissionFilter(
+                rules=default_rules(admission_config.canned_thanks),
+                classifier=classifier,
+                classifier_threshold=admission_config.classifier_threshold,
+                cheap_max_new_tokens=admission_config.cheap_max_new_tokens,
+            )
+        return _admission_filter
@@ -0,0 +1,7 @@
+import os
+
+class AdminConfig:
+    def __init__(self):
+        self.admin_host = os.getenv("ADMIN_HOST") or "127.0.0.1"
+        admin_port = os.getenv("ADMIN_PORT")
+        self.admin_port = int(admin_port) if admin_port else None
@@ -0,0 +1,17 @@
+import os
+from application.services.admission_filter import DEFAULT_CANNED_THANKS, DEFAULT_CHEAP_MAX_NEW_TOKENS
+
+ADMISSION_MODES = ("off", "rules")
+
+class AdmissionConfig:
+    def __init__(self):
+        # With rules, trivial messages are skipped, answered with a canned reply or thought with fewer tokens
+        self.mode = os.getenv("ADMISSION_FILTER") or "off"
+        if self.mode not in ADMISSION_MODES:
+            raise ValueError(f"Invalid ADMISSION_FILTER: {self.mode}. Expected one of: {', '.join(ADMISSION_MODES)}.")
+        self.canned_thanks = os.getenv("ADMISSION_THANKS_REPLY") or DEFAULT_CANNED_THANKS
+        self.cheap_max_new_tokens = int(os.getenv("ADMISSION_CHEAP_TOKENS") or DEFAULT_CHEAP_MAX_NEW_TOKENS)
+        # Optional text-classification model scoring what no rule matched; label is its "needs an answer" class
+        self.classifier_model = os.getenv("ADMISSION_CLASSIFIER_MODEL") or None
+        self.classifier_label = os.getenv("ADMISSION_CLASSIFIER_LABEL") or "LABEL_1"
+        self.classifier_threshold = float(os.getenv("ADMISSION_CLASSIFIER_THRESHOLD") or 0.5)
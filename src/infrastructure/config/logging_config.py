@@ -0,0 +1,13 @@
+import os
+from infrastructure.observability.structured_logging import LOG_FORMATS
+
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+class LoggingConfig:
+    def __init__(self):
+        self.log_level = (os.getenv("LOG_LEVEL") or "INFO").upper()
+        if self.log_level not in LOG_LEVELS:
+            raise ValueError(f"Invalid LOG_LEVEL: {self.log_level}. Expected one of: {', '.join(LOG_LEVELS)}.")
+        self.log_format = os.getenv("LOG_FORMAT") or "text"
+        if self.log_format not in LOG_FORMATS:
+            raise ValueError(f"Invalid LOG_FORMAT: {self.log_format}. Expected one of: {', '.join(LOG_FORMATS)}.")
@@ -0,0 +1,9 @@
+import os
+
+class MetricsConfig:
+    def __init__(self):
+        self.metrics_file = os.getenv("METRICS_FILE")
+        self.metrics_host = os.getenv("METRICS_HOST") or "127.0.0.1"
+        metrics_port = os.getenv("METRICS_PORT")
+        self.metrics_port = int(metrics_port) if metrics_port else None
+        self.export_interval = float(os.getenv("METRICS_EXPORT_INTERVAL") or 15)
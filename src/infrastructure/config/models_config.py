@@ -0,0 +1,12 @@
+import os
+
+MEMORY_PROFILES = ("default", "low")
+
+class ModelsConfig:
+    def __init__(self):
+        self.memory_profile = os.getenv("MODEL_MEMORY_PROFILE") or "default"
+        self.onnx_cache_dir = os.getenv("ONNX_CACHE_DIR") or ".onnx_cache"
+
+        if self.memory_profile not in MEMORY_PROFILES:
+            valid_profiles = ", ".join(MEMORY_PROFILES)
+            raise ValueError(f"Invalid MODEL_MEMORY_PROFILE: {self.memory_profile}. Expected one of: {valid_profiles}.")
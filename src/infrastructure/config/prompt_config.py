@@ -0,0 +1,14 @@
+import os
+
+PROMPT_SOURCES = ("file", "arize")
+
+class PromptConfig:
+    def __init__(self):
+        # Name of the template the replies are built from; without it the message is sent to the model as is
+        self.template_name = os.getenv("PROMPT_TEMPLATE")
+        self.source = os.getenv("PROMPT_SOURCE") or "file"
+        if self.source not in PROMPT_SOURCES:
+            raise ValueError(f"Invalid PROMPT_SOURCE: {self.source}. Expected one of: {', '.join(PROMPT_SOURCES)}.")
+        # Local templates (<name>.txt): the source itself with PROMPT_SOURCE=file, the fallback otherwise
+        self.directory = os.getenv("PROMPT_DIR") or "prompts"
+        self.cache_ttl = float(os.getenv("PROMPT_CACHE_TTL") or 300)
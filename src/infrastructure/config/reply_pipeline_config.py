@@ -0,0 +1,22 @@
+import os
+from application.services.reply_pipeline import DEFAULT_FALLBACK_REPLY, SHED_POLICIES
+
+class ReplyPipelineConfig:
+    def __init__(self):
+        max_message_age = os.getenv("REPLY_MAX_MESSAGE_AGE")
+        self.max_message_age = float(max_message_age) if max_message_age else None
+        self.shed_policy = os.getenv("REPLY_SHED_POLICY") or "fallback"
+        if self.shed_policy not in SHED_POLICIES:
+            raise ValueError(f"Invalid REPLY_SHED_POLICY: {self.shed_policy}. Expected one of: {', '.join(SHED_POLICIES)}.")
+        self.fallback_reply = os.getenv("REPLY_FALLBACK_MESSAGE") or DEFAULT_FALLBACK_REPLY
+        # Shutdown: seconds given to in-flight replies, and where the unfinished ones are kept for the next start
+        self.drain_timeout = float(os.getenv("DRAIN_TIMEOUT") or 20)
+        self.journal_file = os.getenv("REPLY_JOURNAL_FILE") or ".reply_journal.json"
+        # Conversation memory: raw messages kept in the prompt next to the topic summary (None: only the last message)
+        recent_messages = os.getenv("REPLY_RECENT_MESSAGES")
+        self.recent_messages = int(recent_messages) if recent_messages else None
+        self.summary_max_new_tokens = int(os.getenv("REPLY_SUMMARY_TOKENS") or 96)
+        # Topics a guanaco answers at the same time (replies within one topic are still sent one at a time)
+        self.channel_concurrency = int(os.getenv("REPLY_CHANNEL_CONCURRENCY") or 1)
+        if self.channel_concurrency < 1:
+            raise ValueError(f"Invalid REPLY_CHANNEL_CONCURRENCY: {self.channel_concurrency}. Expected at least 1.")
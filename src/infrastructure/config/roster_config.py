@@ -0,0 +1,7 @@
+import os
+
+class RosterConfig:
+    def __init__(self):
+        # Without a roster file the built-in single guanaco is used
+        self.guanacos_file = os.getenv("GUANACOS_FILE") or None
+        self.check_interval = float(os.getenv("ROSTER_CHECK_INTERVAL") or 5)
@@ -0,0 +1,14 @@
+import os
+
+SHARD_MODES = ("none", "guanaco", "topic")
+
+class ShardingConfig:
+    def __init__(self):
+        # none: one process runs every guanaco; guanaco: processes split the guanacos;
+        # topic: every process runs every guanaco but each topic is answered by one of them
+        self.shard_mode = os.getenv("SHARD_MODE") or "none"
+        if self.shard_mode not in SHARD_MODES:
+            raise ValueError(f"Invalid SHARD_MODE: {self.shard_mode}. Expected one of: {', '.join(SHARD_MODES)}.")
+        self.lease_db_path = os.getenv("LEASE_DB_PATH") or ".leases.sqlite3"
+        self.lease_ttl = float(os.getenv("LEASE_TTL") or 30)
+        self.owner_id = os.getenv("SHARD_OWNER_ID") or None
@@ -0,0 +1,7 @@
+import os
+
+class TracingConfig:
+    def __init__(self):
+        # JSONL file the spans are appended to; tracing is off when unset
+        self.trace_file = os.getenv("TRACE_FILE")
+        self.flush_interval = float(os.getenv("TRACE_FLUSH_INTERVAL") or 2)
@@ -1,5 +1,6 @@
 import os
 from dotenv import load_dotenv
+from infrastructure.repositories.zulip_unread_index import ENGAGEMENT_MODES
 
 load_dotenv()
 
@@ -16,4 +17,16 @@ class ZulipConfig:
         ] if not value]
         if missing:
             missing_keys = ", ".join(missing)
-            raise ValueError(f"Missing required environment variables: {missing_keys}. Create a .env or set them in the environment.")
\ No newline at end of file
+            raise ValueError(f"Missing required environment variables: {missing_keys}. Create a .env or set them in the environment.")
+
+        # Messages of a topic fetched as history and kept in its channel
+        self.channel_max_messages = int(os.getenv("ZULIP_CHANNEL_MAX_MESSAGES") or 500)
+        if self.channel_max_messages < 1:
+            raise ValueError(f"Invalid ZULIP_CHANNEL_MAX_MESSAGES: {self.channel_max_messages}. Expected a positive integer.")
+
+        # Topics worth a reply, decided from the unread index before any message body is fetched
+        self.engagement = os.getenv("ZULIP_ENGAGEMENT") or "all"
+        if self.engagement not in ENGAGEMENT_MODES:
+            raise ValueError(f"Invalid ZULIP_ENGAGEMENT: {self.engagement}. Expected one of: {', '.join(ENGAGEMENT_MODES)}.")
+        engagement_streams = os.getenv("ZULIP_ENGAGEMENT_STREAMS")
+        self.engagement_streams = [stream.strip() for stream in engagement_streams.split(",") if stream.strip()] if engagement_streams else None
\ No newline at end of file
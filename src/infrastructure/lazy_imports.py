@@ -0,0 +1,53 @@
+"""
+Deferred imports of the heavy dependencies (torch, transformers, onnxruntime, numpy, zulip).
+lazy_import() returns a stand-in bound to a module-level name like a regular import; the module
+is imported the first time one of its attributes is read or the stand-in is called, so importing
+main does not pay for a model stack that is not needed yet. The name is still a module attribute,
+so tests patch it exactly like an eager import.
+"""
+
+import importlib
+from typing import Any, Optional
+
+
+class LazyModule:
+    """Stands in for a module (or one of its attributes) until it is first used."""
+
+    def __init__(self, module_name: str, attribute: Optional[str] = None):
+        object.__setattr__(self, "_module_name", module_name)
+        object.__setattr__(self, "_attribute", attribute)
+        object.__setattr__(self, "_target", None)
+
+    def is_loaded(self) -> bool:
+        return self._target is not None
+
+    def _load(self) -> Any:
+        target = self._target
+        if target is None:
+            # import_module holds the import lock: concurrent first uses get the same module
+            target = importlib.import_module(self._module_name)
+            if self._attribute is not None:
+                target = getattr(target, self._attribute)
+            object.__setattr__(self, "_target", target)
+        return target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._load(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self._load(), name)
+
+    def __call__(self, *args, **kwargs) -> Any:
+        return self._load()(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        name = f"{self._module_name}.{self._attribute}" if self._attribute else self._module_name
+        return f"<lazy {name}{'' if self.is_loaded() else ' (not imported)'}>"
+
+
+def lazy_import(module_name: str, attribute: Optional[str] = None) -> LazyModule:
+    """lazy_import("torch") for `import torch`, lazy_import("transformers", "AutoTokenizer") for `from transformers import AutoTokenizer`."""
+    return LazyModule(module_name, attribute)
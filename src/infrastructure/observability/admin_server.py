@@ -0,0 +1,104 @@
+"""
+Local HTTP endpoint to inspect and steer a running process without restarting it.
+GET /status returns the runtime state as JSON (workers, last cycle duration, queue depths,
+model load state, cache sizes and recent errors); POST routes pause, resume or re-pace a worker
+and unload the models. It binds to localhost by default: there is no authentication.
+"""
+
+import json
+import logging
+import re
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WORKER_ROUTE = re.compile(r"^/workers/(?P<worker_id>[^/]+)/(?P<action>pause|resume|interval)$")
+
+
+class AdminHttpServer:
+    """Serves the admin routes of a GuanacosSpits (anything with its status and control methods)."""
+
+    def __init__(self, guanacos_spits, host: str = "127.0.0.1", port: int = 9465):
+        self.guanacos_spits = guanacos_spits
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def handle(self, method: str, path: str, body: bytes = b"") -> Tuple[int, dict]:
+        """Route a request to the use case; returns the HTTP status and the JSON payload."""
+        # Routes match the path alone, so a query string (e.g. from a cache-busting client) is ignored
+        path = urllib.parse.urlsplit(path).path
+        try:
+            if method == "GET" and path == "/status":
+                return 200, self.guanacos_spits.get_status()
+            if method == "POST" and path == "/models/unload":
+                return 200, {"unloaded": self.guanacos_spits.unload_models()}
+            match = WORKER_ROUTE.match(path)
+            if method == "POST" and match:
+                # Roster names often have spaces or accents, which clients percent-encode in the path
+                return self._handle_worker(urllib.parse.unquote(match.group("worker_id")), match.group("action"), body)
+            return 404, {"error": f"No route for {method} {path}"}
+        except KeyError as e:
+            return 404, {"error": e.args[0] if e.args else str(e)}
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        except Exception as e:
+            logger.exception("Admin request %s %s failed", method, path)
+            return 500, {"error": str(e)}
+
+    def _handle_worker(self, worker_id: str, action: str, body: bytes) -> Tuple[int, dict]:
+        if action == "pause":
+            self.guanacos_spits.pause_worker(worker_id)
+        elif action == "resume":
+            self.guanacos_spits.resume_worker(worker_id)
+        else:
+            try:
+                payload = json.loads(body or b"{}")
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON body: {e}")
+            if not isinstance(payload, dict) or "interval" not in payload:
+                raise ValueError('Expected a JSON body like {"interval": 5} (null for the default policy)')
+            interval = payload["interval"]
+            if interval is not None and (isinstance(interval, bool) or not isinstance(interval, (int, float))):
+                raise ValueError(f"Invalid poll interval: {interval}. Expected a number of seconds or null.")
+            self.guanacos_spits.set_worker_interval(worker_id, interval)
+        return 200, {"worker": worker_id, "action": action}
+
+    def start(self) -> None:
+        admin = self
+
+        class AdminRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self._respond(*admin.handle("GET", self.path))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self._respond(*admin.handle("POST", self.path, self.rfile.read(length) if length else b""))
+
+            def _respond(self, status: int, payload: dict):
+                # default=str keeps odd values (e.g. dtypes in memory reports) from breaking the status page
+                body = json.dumps(payload, default=str).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), AdminRequestHandler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="AdminHttpServer", daemon=True)
+        self._thread.start()
+        logger.info("Admin endpoint listening on http://%s:%s/status", self.host, self.port)
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
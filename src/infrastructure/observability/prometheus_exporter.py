@@ -0,0 +1,97 @@
+"""
+Exposes a MetricsRegistry in the Prometheus text format, either by periodically writing
+a file (for the node exporter textfile collector) or through a local HTTP endpoint.
+"""
+
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from infrastructure.observability.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class PrometheusFileExporter:
+    def __init__(self, registry: MetricsRegistry, path: str, interval: float = 15.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def write(self) -> None:
+        # Write to a temporary file and rename so scrapers never read a half written file
+        temporary_path = f"{self.path}.tmp"
+        with open(temporary_path, "w") as metrics_file:
+            metrics_file.write(self.registry.to_prometheus_text())
+        os.replace(temporary_path, self.path)
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._export_loop, name="PrometheusFileExporter", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+        self.write()
+
+    def _export_loop(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                logger.error("Could not write metrics to %s: %s", self.path, e)
+
+
+class PrometheusHttpExporter:
+    def __init__(self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9464):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        registry = self.registry
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes every few seconds would flood the output
+
+        self._server = ThreadingHTTPServer((self.host, self.port), MetricsRequestHandler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="PrometheusHttpExporter", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def build_exporters(registry: MetricsRegistry, metrics_config) -> list:
+    """Exporters enabled by the configuration (METRICS_FILE and/or METRICS_PORT)."""
+    exporters = []
+    if metrics_config.metrics_file:
+        exporters.append(PrometheusFileExporter(registry, metrics_config.metrics_file, metrics_config.export_interval))
+    if metrics_config.metrics_port is not None:
+        exporters.append(PrometheusHttpExporter(registry, metrics_config.metrics_host, metrics_config.metrics_port))
+    return exporters
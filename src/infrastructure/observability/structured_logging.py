@@ -0,0 +1,108 @@
+"""
+Non-blocking structured logging on top of the standard logging module.
+Modules log through logging.getLogger(__name__) with %-style arguments, so messages below the
+configured level are never formatted. Records go through a QueueHandler to a QueueListener that
+formats and writes them from a background thread, keeping I/O out of the reply path.
+Fields passed as extra={...} are rendered as key=value pairs (text) or object keys (json).
+"""
+
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from typing import Optional, TextIO
+
+LOG_FORMATS = ("text", "json")
+
+# Attributes every LogRecord has; anything else on a record came from extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", logging.INFO, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+
+class Summary:
+    """
+    Lazy, bounded rendering of a large payload (a prompt, a reply...) for log arguments:
+    the text is only cut when the record is actually formatted, and never dumped whole.
+    """
+
+    def __init__(self, text, limit: int = 120):
+        self.text = text
+        self.limit = limit
+
+    def __str__(self) -> str:
+        text = str(self.text)
+        if len(text) <= self.limit:
+            return text
+        return f"{text[:self.limit]}... ({len(text)} chars)"
+
+
+def summarize(text, limit: int = 120) -> Summary:
+    return Summary(text, limit)
+
+
+def get_extra_fields(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class StructuredFormatter(logging.Formatter):
+    """[LEVEL] message key=value..., or one JSON object per line."""
+
+    def __init__(self, log_format: str = "text"):
+        if log_format not in LOG_FORMATS:
+            raise ValueError(f"Invalid log format: {log_format}. Expected one of: {', '.join(LOG_FORMATS)}.")
+        super().__init__()
+        self.log_format = log_format
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = get_extra_fields(record)
+        if self.log_format == "json":
+            entry = {"time": record.created, "level": record.levelname, "logger": record.name, "message": record.getMessage()}
+            entry.update(fields)
+            if record.exc_info:
+                entry["exception"] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+        text = f"[{record.levelname}] {record.getMessage()}"
+        if fields:
+            text += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            text += "\n" + self.formatException(record.exc_info)
+        return text
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread (the queue is in-process, records need no pickling)."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class BackgroundLogging:
+    """
+    Routes the root logger through a queue to a writer thread. stop() writes the records
+    still queued and detaches from the root logger.
+    """
+
+    def __init__(self, level: str = "INFO", log_format: str = "text", stream: Optional[TextIO] = None):
+        self.level = level
+        self.output = logging.StreamHandler(stream or sys.stdout)
+        self.output.setFormatter(StructuredFormatter(log_format))
+        # SimpleQueue.put is reentrant, so logging from a signal handler cannot deadlock on the queue
+        self._records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        self._queue_handler = DeferredQueueHandler(self._records)
+        self._listener = logging.handlers.QueueListener(self._records, self.output, respect_handler_level=True)
+        self._previous_level: Optional[int] = None
+
+    def start(self) -> None:
+        root = logging.getLogger()
+        self._previous_level = root.level
+        root.addHandler(self._queue_handler)
+        root.setLevel(self.level)
+        self._listener.start()
+
+    def stop(self) -> None:
+        root = logging.getLogger()
+        root.removeHandler(self._queue_handler)
+        if self._previous_level is not None:
+            root.setLevel(self._previous_level)
+        self._listener.stop()
+        self.output.flush()
@@ -0,0 +1,207 @@
+"""
+Span-based tracing of the reply path: scheduler cycles, chat platform calls, model stages and pipeline stages.
+A span is a named, timed operation with attributes (stream, topic, token counts...) and a parent, so a slow
+reply can be broken down by stage. The current span is tracked with contextvars; work handed to another
+thread names its parent explicitly (see ReplyJob.trace_parent).
+Finished spans go to the exporter set on the tracer (anything with export(span), e.g. JsonlSpanExporter).
+Without an exporter no span is created and a traced stage costs a context manager call.
+"""
+
+import contextlib
+import contextvars
+import json
+import logging
+import queue
+import random
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+from infrastructure.observability.metrics import MetricsRegistry, get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str, span_id: str, parent_id: Optional[str] = None,
+                 attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.start_time_ns = time.time_ns()
+        self.end_time_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def record_error(self, error: BaseException) -> None:
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        if self.end_time_ns is None:
+            self.end_time_ns = time.time_ns()
+
+    def get_duration(self) -> Optional[float]:
+        """Seconds between start and end (None while the span is open)."""
+        return (self.end_time_ns - self.start_time_ns) / 1e9 if self.end_time_ns is not None else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """OTLP-style JSON representation (field names of the OTLP span, attributes as a plain object)."""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_time_ns,
+            "endTimeUnixNano": self.end_time_ns,
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"},
+        }
+
+
+class NoopSpan:
+    """Span handed out while tracing is disabled: accepts everything, records nothing."""
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = NoopSpan()
+
+_current_span: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Tracer:
+    def __init__(self, exporter=None):
+        self.exporter = exporter
+
+    def set_exporter(self, exporter) -> None:
+        self.exporter = exporter
+
+    def is_enabled(self) -> bool:
+        return self.exporter is not None
+
+    def get_current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    @contextlib.contextmanager
+    def start_span(self, name: str, parent: Optional[Span] = None, **attributes: Any) -> Iterator[Span]:
+        """
+        Time the enclosed block as a child of parent (default: the current span), making it the current span.
+        An exception escaping the block marks the span as failed and is re-raised.
+        """
+        exporter = self.exporter
+        if exporter is None:
+            yield NOOP_SPAN
+            return
+        parent = parent if parent is not None else _current_span.get()
+        if parent is None or parent.trace_id is None:
+            span = Span(name, _new_id(128), _new_id(64), None, attributes)
+        else:
+            span = Span(name, parent.trace_id, _new_id(64), parent.span_id, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            exporter.export(span)
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer; disabled until an exporter is set."""
+    return _tracer
+
+
+class JsonlSpanExporter:
+    """
+    Appends finished spans to a file, one JSON object per line, from a background thread.
+    export() never blocks: spans are queued and written in batches of up to batch_size,
+    at least every flush_interval seconds; when the queue is full spans are dropped and counted.
+    """
+
+    def __init__(self, path: str, batch_size: int = 256, flush_interval: float = 2.0, max_queue_size: int = 10000,
+                 metrics: Optional[MetricsRegistry] = None):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._spans: "queue.Queue[Span]" = queue.Queue(maxsize=max_queue_size)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        metrics = metrics or get_metrics_registry()
+        self._exported = metrics.counter("trace_spans_exported", "Spans written to the trace file")
+        self._dropped = metrics.counter("trace_spans_dropped", "Spans dropped because the export queue was full")
+
+    def export(self, span: Span) -> None:
+        try:
+            self._spans.put_nowait(span)
+        except queue.Full:
+            self._dropped.inc()
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._export_loop, name="JsonlSpanExporter", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the writer thread and write the spans still queued."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+        self.flush()
+
+    def flush(self) -> None:
+        while True:
+            batch = self._take_batch(timeout=None)
+            if not batch:
+                return
+            self._write(batch)
+
+    def _export_loop(self) -> None:
+        while not self._stop_event.is_set():
+            batch = self._take_batch(timeout=self.flush_interval)
+            if batch:
+                self._write(batch)
+
+    def _take_batch(self, timeout: Optional[float]) -> List[Span]:
+        """Up to batch_size queued spans, waiting up to timeout for the first one (None: do not wait)."""
+        batch: List[Span] = []
+        try:
+            batch.append(self._spans.get(timeout=timeout) if timeout else self._spans.get_nowait())
+            while len(batch) < self.batch_size:
+                batch.append(self._spans.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _write(self, batch: List[Span]) -> None:
+        lines = "".join(json.dumps(span.to_dict(), default=str) + "\n" for span in batch)
+        try:
+            with open(self.path, "a") as trace_file:
+                trace_file.write(lines)
+            self._exported.inc(len(batch))
+        except OSError as e:
+            logger.error("Could not write %s spans to %s: %s", len(batch), self.path, e)
@@ -0,0 +1,104 @@
+"""
+Exports a Hugging Face causal LM to ONNX with explicit past-key-values inputs and outputs,
+so decoding can reuse the attention cache instead of re-running the whole sequence per token.
+"""
+
+import json
+import logging
+import os
+from infrastructure.lazy_imports import lazy_import
+
+torch = lazy_import("torch")
+AutoModelForCausalLM = lazy_import("transformers", "AutoModelForCausalLM")
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FILE_NAME = "model.onnx"
+METADATA_FILE_NAME = "export.json"
+
+
+def get_past_names(num_layers: int, prefix: str = "past_key_values") -> list:
+    names = []
+    for layer_index in range(num_layers):
+        names.extend([f"{prefix}.{layer_index}.key", f"{prefix}.{layer_index}.value"])
+    return names
+
+
+class CausalLMExporter:
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def get_export_dir(self, model_name: str) -> str:
+        return os.path.join(self.cache_dir, model_name.replace("/", "--"))
+
+    def get_export_path(self, model_name: str) -> str:
+        return os.path.join(self.get_export_dir(model_name), EXPORT_FILE_NAME)
+
+    def is_exported(self, model_name: str) -> bool:
+        """An export is reusable only if it was produced for this model with the same library versions."""
+        metadata_path = os.path.join(self.get_export_dir(model_name), METADATA_FILE_NAME)
+        if not os.path.exists(self.get_export_path(model_name)) or not os.path.exists(metadata_path):
+            return False
+        with open(metadata_path) as metadata_file:
+            return json.load(metadata_file) == self.get_metadata(model_name)
+
+    def get_metadata(self, model_name: str) -> dict:
+        import transformers
+        return {
+            "model_name": model_name,
+            "torch_version": torch.__version__,
+            "transformers_version": transformers.__version__,
+        }
+
+    def export(self, model_name: str, model=None) -> str:
+        """Export the model once; later calls return the cached file."""
+        export_path = self.get_export_path(model_name)
+        if self.is_exported(model_name):
+            return export_path
+
+        logger.info("Exporting %s to ONNX at %s", model_name, export_path)
+        if model is None:
+            model = AutoModelForCausalLM.from_pretrained(model_name)
+        model.eval()
+
+        config = model.config
+        num_layers = config.num_hidden_layers
+        num_kv_heads = getattr(config, "num_key_value_heads", None) or config.num_attention_heads
+        head_dim = getattr(config, "head_dim", None) or config.hidden_size // config.num_attention_heads
+
+        # A one token past keeps the cache concatenation in the traced graph
+        input_ids = torch.ones((1, 2), dtype=torch.long)
+        attention_mask = torch.ones((1, 3), dtype=torch.long)
+        past = [torch.zeros((1, num_kv_heads, 1, head_dim), dtype=torch.float32) for _ in range(2 * num_layers)]
+
+        past_names = get_past_names(num_layers)
+        present_names = get_past_names(num_layers, prefix="present")
+        dynamic_axes = {
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "total_sequence"},
+            "logits": {0: "batch", 1: "sequence"},
+        }
+        for name in past_names:
+            dynamic_axes[name] = {0: "batch", 2: "past_sequence"}
+        for name in present_names:
+            dynamic_axes[name] = {0: "batch", 2: "total_sequence"}
+
+        # The wrapper subclasses torch.nn.Module, so it is only imported when a model is actually exported
+        from infrastructure.onnx_engine.causal_lm_with_past import CausalLMWithPast
+
+        os.makedirs(self.get_export_dir(model_name), exist_ok=True)
+        with torch.no_grad():
+            torch.onnx.export(
+                CausalLMWithPast(model.float()),
+                (input_ids, attention_mask, *past),
+                export_path,
+                input_names=["input_ids", "attention_mask", *past_names],
+                output_names=["logits", *present_names],
+                dynamic_axes=dynamic_axes,
+                opset_version=17,
+                dynamo=False,
+            )
+
+        with open(os.path.join(self.get_export_dir(model_name), METADATA_FILE_NAME), "w") as metadata_file:
+            json.dump(self.get_metadata(model_name), metadata_file)
+        return export_path
@@ -0,0 +1,35 @@
+"""
+Wrapper traced by CausalLMExporter: the model's attention cache as plain tensor inputs and outputs.
+"""
+
+import torch
+from transformers.cache_utils import DynamicCache
+
+
+class CausalLMWithPast(torch.nn.Module):
+    """Flattens the model's cache into plain tensors so the graph can be traced."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+        self.num_layers = model.config.num_hidden_layers
+
+    def forward(self, input_ids, attention_mask, *past_key_values):
+        cache = DynamicCache(config=self.model.config)
+        for layer_index in range(self.num_layers):
+            cache.update(past_key_values[2 * layer_index], past_key_values[2 * layer_index + 1], layer_index)
+
+        past_length = past_key_values[0].shape[2]
+        position_ids = torch.arange(input_ids.shape[1], dtype=torch.long).unsqueeze(0) + past_length
+        outputs = self.model(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            position_ids=position_ids,
+            past_key_values=cache,
+            use_cache=True,
+        )
+
+        present = []
+        for layer in outputs.past_key_values.layers:
+            present.extend([layer.keys, layer.values])
+        return (outputs.logits, *present)
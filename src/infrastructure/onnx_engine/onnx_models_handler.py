@@ -0,0 +1,121 @@
+"""
+Greedy text generation on top of an ONNX export of the causal LM, executed by onnxruntime on CPU.
+Mirrors ModelsHandler.generate_text so both engines are interchangeable behind the ThinkRepository port.
+"""
+
+import logging
+import os
+import threading
+from typing import Optional
+from infrastructure.config.models_config import ModelsConfig
+from infrastructure.lazy_imports import lazy_import
+from infrastructure.observability.tracing import get_tracer
+from infrastructure.onnx_engine.causal_lm_exporter import CausalLMExporter
+from infrastructure.transformers_engine.models_handler import DEFAULT_MODEL, FALLBACK_RESPONSE, clean_prompt
+
+np = lazy_import("numpy")
+onnxruntime = lazy_import("onnxruntime")
+AutoTokenizer = lazy_import("transformers", "AutoTokenizer")
+
+logger = logging.getLogger(__name__)
+
+
+class OnnxModelsHandler:
+    def __init__(self, model_name: Optional[str] = None, cache_dir: Optional[str] = None, max_new_tokens: int = 32):
+        self.model_name = model_name or DEFAULT_MODEL
+        self.max_new_tokens = max_new_tokens
+        self.exporter = CausalLMExporter(cache_dir or ModelsConfig().onnx_cache_dir)
+        self._session = None
+        self._tokenizer = None
+        # Guanacos generate from several scheduler threads: export the model and create its session only once
+        self._session_lock = threading.Lock()
+
+    def get_session(self) -> "onnxruntime.InferenceSession":
+        session = self._session
+        if session is None:
+            with self._session_lock:
+                if self._session is None:
+                    export_path = self.exporter.export(self.model_name)
+                    session_options = onnxruntime.SessionOptions()
+                    session_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+                    session_options.intra_op_num_threads = os.cpu_count() or 1
+                    self._session = onnxruntime.InferenceSession(
+                        export_path, sess_options=session_options, providers=["CPUExecutionProvider"]
+                    )
+                session = self._session
+        return session
+
+    def get_tokenizer(self):
+        if self._tokenizer is None:
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            # Like ModelsHandler: a long prompt loses its oldest context, not the message being answered
+            self._tokenizer.truncation_side = "left"
+        return self._tokenizer
+
+    def is_loaded(self) -> bool:
+        return self._session is not None
+
+    def get_status(self) -> dict:
+        return {
+            "engine": "onnx",
+            "model": self.model_name,
+            "loaded": self.is_loaded(),
+            "max_new_tokens": self.max_new_tokens,
+        }
+
+    def unload(self) -> None:
+        """Drop the inference session and tokenizer; the next generation creates them again from the exported model."""
+        was_loaded = self.is_loaded()
+        # A generation in progress keeps its own reference to the session until it finishes
+        self._session = None
+        self._tokenizer = None
+        if was_loaded:
+            logger.info("ONNX session for %s unloaded", self.model_name)
+
+    def get_empty_past(self, session: "onnxruntime.InferenceSession", batch_size: int) -> dict:
+        """Zero-length cache tensors shaped after the exported graph inputs."""
+        past = {}
+        for graph_input in session.get_inputs():
+            if graph_input.name.startswith("past_key_values."):
+                _, num_kv_heads, _, head_dim = graph_input.shape
+                past[graph_input.name] = np.zeros((batch_size, num_kv_heads, 0, head_dim), dtype=np.float32)
+        return past
+
+    def generate_ids(self, input_ids: "np.ndarray", attention_mask: "np.ndarray", eos_token_id: Optional[int] = None,
+                     max_new_tokens: Optional[int] = None) -> list:
+        """Greedy decoding of a single sequence, feeding the present cache back as the next past."""
+        session = self.get_session()
+        past_names = [graph_input.name for graph_input in session.get_inputs() if graph_input.name.startswith("past_key_values.")]
+        feed = {"input_ids": input_ids, "attention_mask": attention_mask, **self.get_empty_past(session, input_ids.shape[0])}
+
+        generated = []
+        for _ in range(max_new_tokens or self.max_new_tokens):
+            logits, *present = session.run(None, feed)
+            next_token = int(logits[0, -1].argmax())
+            generated.append(next_token)
+            if eos_token_id is not None and next_token == eos_token_id:
+                break
+            attention_mask = np.concatenate([attention_mask, np.ones((1, 1), dtype=attention_mask.dtype)], axis=1)
+            feed = {"input_ids": np.array([[next_token]], dtype=np.int64), "attention_mask": attention_mask}
+            feed.update(zip(past_names, present))
+        return generated
+
+    def generate_text(self, prompt: str, max_new_tokens: Optional[int] = None) -> str:
+        tracer = get_tracer()
+        with tracer.start_span("model.generate_text", engine="onnx", model=self.model_name) as span:
+            try:
+                with tracer.start_span("model.tokenize"):
+                    tokenizer = self.get_tokenizer()
+                    inputs = tokenizer(clean_prompt(prompt), return_tensors="np", max_length=512, truncation=True)
+                    input_ids = inputs["input_ids"].astype(np.int64)
+                    attention_mask = inputs["attention_mask"].astype(np.int64)
+                with tracer.start_span("model.generate", max_new_tokens=max_new_tokens or self.max_new_tokens):
+                    generated = self.generate_ids(input_ids, attention_mask, tokenizer.eos_token_id, max_new_tokens)
+                span.set_attributes(input_tokens=int(input_ids.shape[-1]), output_tokens=len(generated))
+                with tracer.start_span("model.decode"):
+                    # Only the continuation, like ModelsHandler does
+                    return tokenizer.decode(generated, skip_special_tokens=True)
+            except Exception as e:
+                span.record_error(e)
+                logger.error("ONNX generation failed: %s", e)
+                return FALLBACK_RESPONSE
@@ -0,0 +1,44 @@
+"""
+Builds the model input for a message from a prompt template, so the prompt wording lives
+in the prompt service (or a local file) instead of in the code.
+"""
+
+import threading
+from typing import Optional
+from infrastructure.config.prompt_config import PromptConfig
+from infrastructure.prompts.prompt_templates import PromptTemplateProvider
+from infrastructure.repositories.arize_prompt_repository import ArizePromptRepository
+from infrastructure.repositories.file_prompt_repository import FilePromptRepository
+
+
+class ContextBuilder:
+    def __init__(self, prompt_template_provider: PromptTemplateProvider, template_name: str = "reply"):
+        self.prompt_template_provider = prompt_template_provider
+        self.template_name = template_name
+
+    def build(self, message: str) -> str:
+        return self.prompt_template_provider.get_template(self.template_name).render(message=message)
+
+
+_prompt_template_provider: Optional[PromptTemplateProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_prompt_template_provider(prompt_config: PromptConfig) -> PromptTemplateProvider:
+    """Process-wide provider, so every think repository shares one template cache."""
+    global _prompt_template_provider
+    with _provider_lock:
+        if _prompt_template_provider is None:
+            local_repository = FilePromptRepository(prompt_config.directory)
+            # Local files are read on the first use, then served from the cache like remote templates
+            prompt_repository = ArizePromptRepository() if prompt_config.source == "arize" else local_repository
+            _prompt_template_provider = PromptTemplateProvider(prompt_repository, fallback_repository=local_repository, ttl=prompt_config.cache_ttl)
+        return _prompt_template_provider
+
+
+def build_context_builder(prompt_config: Optional[PromptConfig] = None) -> Optional[ContextBuilder]:
+    """The configured context builder, or None when no PROMPT_TEMPLATE is set (messages go to the model as is)."""
+    prompt_config = prompt_config or PromptConfig()
+    if not prompt_config.template_name:
+        return None
+    return ContextBuilder(get_prompt_template_provider(prompt_config), prompt_config.template_name)
@@ -0,0 +1,129 @@
+"""
+Prompt templates fetched from a prompt service and kept in memory with stale-while-revalidate:
+a cached template is always served right away, and once it is older than the TTL a background
+refresh fetches the new source. Until the service answered once, the local fallback (or the
+built-in default) is served, so reply latency never depends on the prompt service.
+Templates use {variable} placeholders and are compiled once per version (the hash of their source).
+"""
+
+import hashlib
+import logging
+import string
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from domain.ports.prompt_repository import PromptRepository
+from infrastructure.observability.metrics import MetricsRegistry, get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Used when a template is neither cached nor available locally: the message itself, as before templates
+DEFAULT_TEMPLATE = "{message}"
+
+
+class PromptTemplate:
+    """A compiled template: the source is parsed once, rendering only joins literals and values."""
+
+    def __init__(self, name: str, source: str, version: Optional[str] = None):
+        self.name = name
+        self.source = source
+        self.version = version or hashlib.sha256(source.encode("utf-8")).hexdigest()[:12]
+        self._parts: List[Tuple[str, Optional[str]]] = []
+        for literal, field, format_spec, conversion in string.Formatter().parse(source):
+            if field is not None and (not field.isidentifier() or format_spec or conversion):
+                raise ValueError(f"Invalid placeholder {{{field}}} in prompt template {name}. Expected {{variable}}.")
+            self._parts.append((literal, field))
+
+    def get_variables(self) -> List[str]:
+        return [field for _, field in self._parts if field is not None]
+
+    def render(self, **variables) -> str:
+        """Fill the placeholders; variables that are not given render as empty strings."""
+        return "".join(literal + (str(variables.get(field, "")) if field is not None else "") for literal, field in self._parts)
+
+
+class CachedTemplate:
+    def __init__(self, template: PromptTemplate, fetched_at: float, from_service: bool):
+        self.template = template
+        self.fetched_at = fetched_at
+        # When the service fails, the next refresh is attempted after retry_interval rather than the TTL
+        self.refresh_after = fetched_at
+        self.from_service = from_service
+
+
+class PromptTemplateProvider:
+    """
+    In-memory cache of compiled templates in front of a prompt service.
+    get_template() never waits for the service: it returns the cached template (refreshing it in the
+    background when older than ttl seconds) or, on a miss, the fallback repository's template or the default.
+    """
+
+    def __init__(self, prompt_repository: PromptRepository, fallback_repository: Optional[PromptRepository] = None,
+                 ttl: float = 300.0, retry_interval: float = 30.0, clock=time.monotonic,
+                 run_in_background: Optional[Callable[[Callable[[], None]], None]] = None,
+                 metrics: Optional[MetricsRegistry] = None):
+        self.prompt_repository = prompt_repository
+        self.fallback_repository = fallback_repository
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.clock = clock
+        self.run_in_background = run_in_background or (lambda task: threading.Thread(target=task, name="PromptTemplateRefresh", daemon=True).start())
+        self._cache: Dict[str, CachedTemplate] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        metrics = metrics or get_metrics_registry()
+        self._refreshes = metrics.counter("prompt_template_refreshes", "Prompt template fetches from the prompt service", ("result",))
+        self._compilations = metrics.counter("prompt_template_compilations", "Prompt template versions compiled")
+
+    def get_template(self, name: str) -> PromptTemplate:
+        with self._lock:
+            cached = self._cache.get(name)
+            if cached is None:
+                # Served until the service answers, which is asked right away
+                cached = self._cache[name] = CachedTemplate(self._load_fallback(name), self.clock(), from_service=False)
+            now = self.clock()
+            is_stale = not cached.from_service or now - cached.fetched_at >= self.ttl
+            needs_refresh = is_stale and now >= cached.refresh_after and name not in self._refreshing
+            if needs_refresh:
+                self._refreshing.add(name)
+        if needs_refresh:
+            self.run_in_background(lambda: self.refresh(name))
+        return cached.template
+
+    def refresh(self, name: str) -> None:
+        """Fetch the template from the service now; on failure keep serving the cached one and retry later."""
+        with self._lock:
+            cached = self._cache.get(name)
+        try:
+            source = self.prompt_repository.get_prompt(name)
+            # Same source, same version: no need to compile again
+            template = cached.template if cached is not None and cached.template.source == source else self._compile(name, source)
+        except Exception as e:
+            self._refreshes.inc(result="error")
+            logger.warning("Could not refresh prompt template %s, serving the cached one: %s", name, e)
+            with self._lock:
+                self._refreshing.discard(name)
+                if name in self._cache:
+                    self._cache[name].refresh_after = self.clock() + self.retry_interval
+            return
+        self._refreshes.inc(result="success")
+        with self._lock:
+            self._cache[name] = CachedTemplate(template, self.clock(), from_service=True)
+            self._refreshing.discard(name)
+
+    def get_cache_sizes(self) -> Dict[str, int]:
+        return {"prompt_templates": len(self._cache)}
+
+    def _compile(self, name: str, source: str) -> PromptTemplate:
+        template = PromptTemplate(name, source)
+        self._compilations.inc()
+        logger.info("Prompt template %s compiled (version %s)", name, template.version)
+        return template
+
+    def _load_fallback(self, name: str) -> PromptTemplate:
+        if self.fallback_repository is not None:
+            try:
+                return self._compile(name, self.fallback_repository.get_prompt(name))
+            except Exception as e:
+                logger.warning("No local prompt template %s, using the default one: %s", name, e)
+        return PromptTemplate(name, DEFAULT_TEMPLATE)
@@ -0,0 +1,17 @@
+from domain.ports.prompt_repository import PromptRepository
+
+class ArizePromptRepository(PromptRepository):
+    """Prompt templates managed in Arize. Every call is a network round trip: use it behind a PromptTemplateProvider."""
+
+    def __init__(self, arize_client=None):
+        if arize_client is None:
+            # Imported here so the arize package is only needed when prompts come from Arize
+            from infrastructure.clients.arize import ArizeClient
+            arize_client = ArizeClient()
+        self.arize_client = arize_client
+
+    def get_prompt(self, name: str) -> str:
+        prompt = self.arize_client.get_prompt(name)
+        if prompt is None:
+            raise KeyError(f"Prompt not found in Arize: {name}")
+        return prompt
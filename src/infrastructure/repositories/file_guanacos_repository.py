@@ -0,0 +1,172 @@
+"""
+Roster of guanacos read from a JSON, TOML or YAML file, so personas can be added or changed without code changes.
+Models and chat clients are shared: guanacos using the same engine and model reuse one loaded model,
+guanacos of the same platform read one realm fetch (each with its own read cursor), and an unchanged guanaco is returned as the same instance on every read, so callers can diff rosters by identity.
+"""
+
+import json
+import os
+import threading
+import tomllib
+import yaml
+from typing import Callable, Dict, List, Optional, Tuple
+from domain.entities.guanaco.guanaco import Guanaco
+from domain.entities.user import User
+from domain.ports.chat_message_repository import ChatMessageRepository
+from domain.ports.guanacos_repository import GuanacosRepository
+from domain.ports.think_repository import ThinkRepository
+from infrastructure.admission.admission_filter_builder import build_admission_filter
+from infrastructure.onnx_engine.onnx_models_handler import OnnxModelsHandler
+from infrastructure.prompts.context_builder import build_context_builder
+from infrastructure.repositories.onnx_think_repository import OnnxThinkRepository
+from infrastructure.repositories.quota_think_repository import QuotaThinkRepository
+from infrastructure.repositories.realm_chat_message_repository import RealmFetcher, RealmSubscription
+from infrastructure.repositories.transformers_think_repository import TransformersThinkRepository
+from infrastructure.repositories.zulip_chat_message_repository import ZulipChatMessageRepository
+from infrastructure.transformers_engine.models_handler import ModelsHandler
+
+SUPPORTED_EXTENSIONS = (".json", ".toml", ".yaml", ".yml")
+THINK_ENGINES = ("transformers", "onnx")
+QUOTA_OPTIONS = ("tokens_per_minute", "max_concurrent", "policy", "max_new_tokens", "min_new_tokens", "max_wait")
+SUBSCRIBE_OPTIONS = ("streams", "topics", "mentions")
+
+
+def build_chat_message_repository(platform: str) -> ChatMessageRepository:
+    if platform != "zulip":
+        raise ValueError(f"Unsupported chat platform: {platform}")
+    return ZulipChatMessageRepository()
+
+
+def build_think_repository(engine: str, model: Optional[str]) -> ThinkRepository:
+    if engine == "onnx":
+        return OnnxThinkRepository(OnnxModelsHandler(model_name=model), context_builder=build_context_builder())
+    return TransformersThinkRepository(ModelsHandler(model_name=model), context_builder=build_context_builder())
+
+
+class FileGuanacosRepository(GuanacosRepository):
+    """
+    The file holds a list of guanacos (top level, or under a "guanacos" key), for example in YAML:
+
+        guanacos:
+          - name: Pancho
+            user: {platform_id: 1, platform: zulip, name: Paco}
+            think: {engine: transformers, model: Qwen/Qwen3-1.7B}
+            quota: {tokens_per_minute: 600, max_concurrent: 1, policy: degrade}
+            subscribe: {streams: [42], mentions: true}
+
+    The optional quota keeps the guanaco within its share of a model shared with others (see QuotaThinkRepository).
+    The optional subscribe limits the topics it answers (all of them by default, see RealmSubscription).
+    """
+
+    def __init__(self, path: str,
+                 chat_message_repository_factory: Callable[[str], ChatMessageRepository] = build_chat_message_repository,
+                 think_repository_factory: Callable[[str, Optional[str]], ThinkRepository] = build_think_repository):
+        extension = os.path.splitext(path)[1].lower()
+        if extension not in SUPPORTED_EXTENSIONS:
+            raise ValueError(f"Unsupported roster file: {path}. Expected one of: {', '.join(SUPPORTED_EXTENSIONS)}.")
+        self.path = path
+        self.chat_message_repository_factory = chat_message_repository_factory
+        self.think_repository_factory = think_repository_factory
+        self._chat_message_repositories: Dict[str, ChatMessageRepository] = {}
+        self._realm_fetchers: Dict[str, RealmFetcher] = {}
+        self._think_repositories: Dict[Tuple[str, Optional[str]], ThinkRepository] = {}
+        # name -> (definition, guanaco) of the last read
+        self._guanacos: Dict[str, Tuple[dict, Guanaco]] = {}
+        self._last_signature: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def get_guanacos(self) -> List[Guanaco]:
+        with self._lock:
+            signature = self._get_file_signature()
+            definitions = self._read_definitions()
+            guanacos = {}
+            for definition in definitions:
+                name = definition["name"]
+                if name in guanacos:
+                    raise ValueError(f"Guanaco '{name}' is defined more than once in {self.path}")
+                cached = self._guanacos.get(name)
+                guanacos[name] = cached if cached and cached[0] == definition else (definition, self._build_guanaco(definition))
+            for name, (definition, _) in self._guanacos.items():
+                if name not in guanacos:
+                    self._get_realm_fetcher(self._get_platform(definition)).unsubscribe(name)
+            self._guanacos = guanacos
+            self._last_signature = signature
+            return [guanaco for _, guanaco in guanacos.values()]
+
+    def has_changes(self) -> bool:
+        return self._get_file_signature() != self._last_signature
+
+    def _get_file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read_definitions(self) -> List[dict]:
+        extension = os.path.splitext(self.path)[1].lower()
+        with open(self.path, "rb") as file:
+            if extension == ".json":
+                data = json.load(file)
+            elif extension == ".toml":
+                data = tomllib.load(file)
+            else:
+                data = yaml.safe_load(file)
+        if isinstance(data, dict):
+            data = data.get("guanacos")
+        if not isinstance(data, list):
+            raise ValueError(f"Roster file {self.path} must contain a list of guanacos")
+        for definition in data:
+            if not isinstance(definition, dict) or not definition.get("name"):
+                raise ValueError(f"Every guanaco in {self.path} needs a name")
+            if not isinstance(definition.get("user"), dict):
+                raise ValueError(f"Guanaco '{definition['name']}' needs a user")
+            quota = definition.get("quota")
+            if quota is not None and (not isinstance(quota, dict) or set(quota) - set(QUOTA_OPTIONS)):
+                raise ValueError(f"Invalid quota for '{definition['name']}'. Expected a mapping with: {', '.join(QUOTA_OPTIONS)}.")
+            subscribe = definition.get("subscribe")
+            if subscribe is not None and (not isinstance(subscribe, dict) or set(subscribe) - set(SUBSCRIBE_OPTIONS)):
+                raise ValueError(f"Invalid subscribe for '{definition['name']}'. Expected a mapping with: {', '.join(SUBSCRIBE_OPTIONS)}.")
+            engine = (definition.get("think") or {}).get("engine", "transformers")
+            if engine not in THINK_ENGINES:
+                raise ValueError(f"Invalid think engine for '{definition['name']}': {engine}. Expected one of: {', '.join(THINK_ENGINES)}.")
+        return data
+
+    def _build_guanaco(self, definition: dict) -> Guanaco:
+        user_definition = definition["user"]
+        platform = self._get_platform(definition)
+        think = definition.get("think") or {}
+        think_repository = self._get_think_repository(think.get("engine", "transformers"), think.get("model"))
+        quota = definition.get("quota")
+        if quota:
+            # Per guanaco, around the shared model
+            think_repository = QuotaThinkRepository(think_repository, definition["name"], **quota)
+        user = User(platform_id=user_definition.get("platform_id"), platform=platform, name=user_definition.get("name", ""))
+        subscription = RealmSubscription(**definition["subscribe"]) if definition.get("subscribe") else None
+        return Guanaco(
+            name=definition["name"],
+            user=user,
+            chat_message_repository=self._get_realm_fetcher(platform).subscribe(definition["name"], user, subscription),
+            think_repository=think_repository,
+            admission_filter=build_admission_filter(),
+        )
+
+    @staticmethod
+    def _get_platform(definition: dict) -> str:
+        return definition["user"].get("platform", "zulip")
+
+    def _get_realm_fetcher(self, platform: str) -> RealmFetcher:
+        if platform not in self._realm_fetchers:
+            self._realm_fetchers[platform] = RealmFetcher(self._get_chat_message_repository(platform))
+        return self._realm_fetchers[platform]
+
+    def _get_chat_message_repository(self, platform: str) -> ChatMessageRepository:
+        if platform not in self._chat_message_repositories:
+            self._chat_message_repositories[platform] = self.chat_message_repository_factory(platform)
+        return self._chat_message_repositories[platform]
+
+    def _get_think_repository(self, engine: str, model: Optional[str]) -> ThinkRepository:
+        key = (engine, model)
+        if key not in self._think_repositories:
+            self._think_repositories[key] = self.think_repository_factory(engine, model)
+        return self._think_repositories[key]
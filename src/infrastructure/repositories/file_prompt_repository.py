@@ -0,0 +1,16 @@
+import os
+from domain.ports.prompt_repository import PromptRepository
+
+class FilePromptRepository(PromptRepository):
+    """Prompt templates stored as <directory>/<name>.txt: the local fallback of a remote prompt service, or its stand-in."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def get_prompt(self, name: str) -> str:
+        path = os.path.join(self.directory, f"{name}.txt")
+        try:
+            with open(path, encoding="utf-8") as prompt_file:
+                return prompt_file.read()
+        except FileNotFoundError:
+            raise KeyError(f"Prompt not found: {path}")
@@ -0,0 +1,45 @@
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from domain.ports.lease_repository import LeaseRepository
+
+class InMemoryLeaseRepository(LeaseRepository):
+    """Leases for a single process (several GuanacosSpits in one interpreter, or tests)."""
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._leases: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        now = self.clock()
+        with self._lock:
+            current = self._leases.get(key)
+            if current is None or current[0] == owner or current[1] <= now:
+                self._leases[key] = (owner, now + ttl)
+                return True
+            return False
+
+    def renew(self, keys: List[str], owner: str, ttl: float) -> List[str]:
+        now = self.clock()
+        renewed = []
+        with self._lock:
+            for key in keys:
+                current = self._leases.get(key)
+                if current is not None and current[0] == owner and current[1] > now:
+                    self._leases[key] = (owner, now + ttl)
+                    renewed.append(key)
+        return renewed
+
+    def release(self, key: str, owner: str):
+        with self._lock:
+            current = self._leases.get(key)
+            if current is not None and current[0] == owner:
+                del self._leases[key]
+
+    def get_owner(self, key: str) -> Optional[str]:
+        with self._lock:
+            current = self._leases.get(key)
+        if current is None or current[1] <= self.clock():
+            return None
+        return current[0]
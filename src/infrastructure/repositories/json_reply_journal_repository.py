@@ -0,0 +1,52 @@
+import json
+import logging
+import os
+import tempfile
+from typing import List
+from domain.entities.pending_reply import PendingReply
+from domain.ports.reply_journal_repository import ReplyJournalRepository
+
+logger = logging.getLogger(__name__)
+
+class JsonReplyJournalRepository(ReplyJournalRepository):
+    """Journal kept in a JSON file, written atomically so a crash while saving never leaves it half written."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def save(self, pending_replies: List[PendingReply]):
+        entries = [
+            {
+                "guanaco_name": pending.guanaco_name,
+                "stream_id": pending.stream_id,
+                "topic": pending.topic,
+                "triggered_at": pending.triggered_at,
+                "reply": pending.reply,
+            }
+            for pending in pending_replies
+        ]
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=".reply_journal-")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+                json.dump(entries, file, ensure_ascii=False, indent=2)
+            os.replace(temporary_path, self.path)
+        except Exception:
+            os.unlink(temporary_path)
+            raise
+
+    def load(self) -> List[PendingReply]:
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                entries = json.load(file)
+            return [PendingReply(**entry) for entry in entries]
+        except (ValueError, TypeError) as e:
+            logger.warning("Ignoring unreadable reply journal %s: %s", self.path, e)
+            return []
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
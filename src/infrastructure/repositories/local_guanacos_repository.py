@@ -1,6 +1,8 @@
 from domain.entities.guanaco.guanaco import Guanaco
 from domain.entities.user import User
 from domain.ports.guanacos_repository import GuanacosRepository
+from infrastructure.admission.admission_filter_builder import build_admission_filter
+from infrastructure.prompts.context_builder import build_context_builder
 from infrastructure.repositories.zulip_chat_message_repository import ZulipChatMessageRepository
 from infrastructure.repositories.transformers_think_repository import TransformersThinkRepository
 
@@ -14,5 +16,6 @@ class LocalGuanacosRepository(GuanacosRepository):
                     platform="zulip",
                     name="Paco"), 
                 chat_message_repository=ZulipChatMessageRepository(),
-                think_repository=TransformersThinkRepository()),
+                think_repository=TransformersThinkRepository(context_builder=build_context_builder()),
+                admission_filter=build_admission_filter()),
         ]
\ No newline at end of file
@@ -3,11 +3,16 @@ from domain.entities.user import User
 import json
 from datetime import datetime
 
+MENTION_FLAGS = ("mentioned", "wildcard_mentioned")
+
 class ZulipMapper:
     def to_chat_message(self, message: dict) -> ChatMessage:
+        flags = message.get("flags") or []
         return ChatMessage(
             id=message.get("id"),
             content=message.get("content"),
             sender=User(platform_id=message.get("sender_id"), platform="zulip", name=message.get("sender_full_name")),
             created_at=datetime.fromtimestamp(message.get("timestamp")),
+            is_private=message.get("type") == "private",
+            is_mention=any(flag in flags for flag in MENTION_FLAGS),
         )
\ No newline at end of file
@@ -0,0 +1,22 @@
+from typing import Optional
+from domain.ports.think_repository import ThinkRepository
+from infrastructure.prompts.context_builder import ContextBuilder
+from infrastructure.onnx_engine.onnx_models_handler import OnnxModelsHandler
+
+class OnnxThinkRepository(ThinkRepository):
+    def __init__(self, onnx_engine: OnnxModelsHandler = None, context_builder: Optional[ContextBuilder] = None):
+        self.onnx_engine = onnx_engine or OnnxModelsHandler()
+        self.context_builder = context_builder
+
+    def get_think(self, message: str, max_new_tokens: Optional[int] = None) -> str:
+        prompt = self.context_builder.build(message) if self.context_builder else message
+        return self.onnx_engine.generate_text(prompt, max_new_tokens=max_new_tokens)
+
+    def get_raw_think(self, prompt: str, max_new_tokens: Optional[int] = None) -> str:
+        return self.onnx_engine.generate_text(prompt, max_new_tokens=max_new_tokens)
+
+    def get_status(self) -> dict:
+        return self.onnx_engine.get_status()
+
+    def unload(self) -> None:
+        self.onnx_engine.unload()
@@ -0,0 +1,143 @@
+"""
+ThinkRepository decorator that keeps one guanaco within its share of a shared model:
+a token bucket on generated tokens per minute and a cap on its concurrent generations.
+"""
+
+import threading
+import time
+from typing import Optional
+from domain.errors import QuotaExceededError
+from domain.ports.think_repository import ThinkRepository
+from infrastructure.observability.metrics import MetricsRegistry, get_metrics_registry
+from infrastructure.transformers_engine.models_handler import DEFAULT_MAX_NEW_TOKENS
+
+QUOTA_POLICIES = ("queue", "degrade", "skip")
+
+
+class TokenBucket:
+    """Holds up to capacity tokens and refills at rate_per_minute, continuously."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None, clock=time.monotonic):
+        if rate_per_minute <= 0:
+            raise ValueError("Token rate must be positive")
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def get_tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def take_up_to(self, amount: int, minimum: Optional[int] = None) -> int:
+        """Take min(amount, available) tokens if at least minimum (default: amount) are available. Returns the tokens taken."""
+        minimum = amount if minimum is None else minimum
+        with self._lock:
+            self._refill()
+            granted = int(min(amount, self._tokens))
+            if granted < minimum:
+                return 0
+            self._tokens -= granted
+            return granted
+
+    def time_until(self, amount: int) -> float:
+        """Seconds until amount tokens are available."""
+        with self._lock:
+            self._refill()
+            return max(0.0, (amount - self._tokens) / self.rate_per_second)
+
+    def _refill(self) -> None:
+        # Called with the lock held
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_second)
+        self._updated_at = now
+
+
+class QuotaThinkRepository(ThinkRepository):
+    """
+    Before thinking, a request takes a concurrency slot and reserves max_new_tokens from the bucket
+    (generations never exceed their budget, so the reservation is an upper bound of what they use).
+    Reservations are not refunded when a generation stops early, so a guanaco with short replies is throttled
+    a little before it has actually generated tokens_per_minute.
+    Nothing waits here: the inference workers are shared by every guanaco, so a throttled one must not hold them.
+    When the quota is exceeded QuotaExceededError is raised, so the message is answered later, and the policy decides:
+    - queue: answer it once the tokens are available, if that is within max_wait seconds (the error carries retry_after);
+    - degrade: think right away with the tokens left (at least min_new_tokens), deferring only until those are available;
+    - skip: leave it unanswered until the tokens are available, however long that takes (the error carries retry_after).
+    """
+
+    def __init__(self, think_repository: ThinkRepository, guanaco_name: str, tokens_per_minute: Optional[float] = None,
+                 max_concurrent: Optional[int] = None, policy: str = "queue", max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS,
+                 min_new_tokens: int = 8, max_wait: float = 30.0, metrics: Optional[MetricsRegistry] = None,
+                 clock=time.monotonic):
+        if policy not in QUOTA_POLICIES:
+            raise ValueError(f"Invalid quota policy: {policy}. Expected one of: {', '.join(QUOTA_POLICIES)}.")
+        if max_concurrent is not None and max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        if min_new_tokens < 1:
+            raise ValueError("min_new_tokens must be at least 1")
+        self.think_repository = think_repository
+        self.guanaco_name = guanaco_name
+        self.policy = policy
+        self.max_new_tokens = max_new_tokens
+        self.min_new_tokens = min(min_new_tokens, max_new_tokens)
+        self.max_wait = max_wait
+        self.clock = clock
+        self.bucket = TokenBucket(tokens_per_minute, clock=clock) if tokens_per_minute else None
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent else None
+        metrics = metrics or get_metrics_registry()
+        self._requests = metrics.counter("think_requests", "Think requests per guanaco", ("guanaco",))
+        self._tokens = metrics.counter("think_tokens_granted", "Generation tokens granted per guanaco", ("guanaco",))
+        self._degraded = metrics.counter("think_degraded", "Think requests granted fewer tokens than asked", ("guanaco",))
+        self._exceeded = metrics.counter("think_quota_exceeded", "Think requests refused by the quota", ("guanaco", "limit"))
+        self._wait = metrics.histogram("think_quota_wait_seconds", "Time a refused request is deferred until the quota can grant it", ("guanaco",))
+
+    def get_think(self, message: str, max_new_tokens: Optional[int] = None) -> str:
+        self._requests.inc(guanaco=self.guanaco_name)
+        if self._slots and not self._slots.acquire(blocking=False):
+            self._refuse("concurrency")
+        try:
+            budget = max_new_tokens or self.max_new_tokens
+            granted = self._take_tokens(budget) if self.bucket else budget
+            self._tokens.inc(granted, guanaco=self.guanaco_name)
+            if granted < budget:
+                self._degraded.inc(guanaco=self.guanaco_name)
+            return self.think_repository.get_think(message, max_new_tokens=granted)
+        finally:
+            if self._slots:
+                self._slots.release()
+
+    def get_raw_think(self, prompt: str, max_new_tokens: Optional[int] = None) -> str:
+        # Housekeeping generations (e.g. topic summaries) do not spend the quota of the guanaco's replies
+        return self.think_repository.get_raw_think(prompt, max_new_tokens=max_new_tokens)
+
+    def get_status(self) -> dict:
+        status = dict(self.think_repository.get_status())
+        status["quota"] = {
+            "policy": self.policy,
+            "tokens_available": self.bucket.get_tokens() if self.bucket else None,
+        }
+        return status
+
+    def unload(self) -> None:
+        self.think_repository.unload()
+
+    def _take_tokens(self, budget: int) -> int:
+        # A budget above the bucket capacity could never be granted
+        budget = min(budget, int(self.bucket.capacity))
+        minimum = min(self.min_new_tokens, budget) if self.policy == "degrade" else budget
+        granted = self.bucket.take_up_to(budget, minimum)
+        if granted:
+            return granted
+        wait = self.bucket.time_until(minimum)
+        if self.policy != "skip" and wait > self.max_wait:
+            self._refuse("tokens")
+        self._wait.observe(wait, guanaco=self.guanaco_name)
+        self._refuse("tokens", retry_after=wait)
+
+    def _refuse(self, limit: str, retry_after: Optional[float] = None) -> None:
+        self._exceeded.inc(guanaco=self.guanaco_name, limit=limit)
+        raise QuotaExceededError(f"Guanaco '{self.guanaco_name}' exceeded its {limit} quota", retry_after=retry_after)
@@ -0,0 +1,222 @@
+"""
+One fetch of a chat realm shared by every guanaco on it. The guanacos of a platform use the same chat
+account, so polling it once per guanaco repeated the same unread and history requests on every cycle.
+RealmFetcher fetches once (a result is reused for max_age seconds, and callers arriving during a fetch
+wait for it) and every guanaco reads it through its own RealmSubscriberRepository: only the topics it
+subscribes to, and only when they have messages after its read cursor.
+The realm itself is marked as read once every active subscriber of the topic has read it.
+Every guanaco posts from the same account, so a topic whose newest message comes from that account or from any
+subscriber is answered for all of them: otherwise sibling personas would answer each other endlessly.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from domain.entities.channel import Channel
+from domain.entities.chat_message import ChatMessage
+from domain.entities.user import User
+from domain.ports.chat_message_repository import ChatMessageRepository
+from infrastructure.observability.metrics import MetricsRegistry, get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# The fastest adaptive poll interval (a tenth of the default sleep time): one fetch per realm at most that often
+DEFAULT_MAX_AGE = 1.0
+# A subscriber that has not polled for this long (paused, removed) no longer holds the realm unread
+DEFAULT_SUBSCRIBER_TIMEOUT = 300.0
+
+
+def mentions_user(message: ChatMessage, user: User) -> bool:
+    """Rendered Zulip mentions carry the user id; raw markdown ones the name."""
+    return f'data-user-id="{user.platform_id}"' in message.content or f"@**{user.name}**" in message.content
+
+
+class RealmSubscription:
+    """
+    Topics a guanaco answers: those of the listed streams (any when not given) with the listed topics
+    (any when not given). With mentions, only the topics where it is mentioned, plus those of the listed
+    streams and topics if any are given.
+    """
+
+    def __init__(self, streams: Optional[Iterable] = None, topics: Optional[Iterable[str]] = None, mentions: bool = False):
+        self.streams = {str(stream) for stream in streams} if streams is not None else None
+        self.topics = set(topics) if topics is not None else None
+        self.mentions = mentions
+
+    def matches(self, channel: Channel, user: User) -> bool:
+        listed = (self.streams is None or channel.get_id() in self.streams) and (self.topics is None or channel.get_topic() in self.topics)
+        if not self.mentions:
+            return listed
+        if (self.streams is not None or self.topics is not None) and listed:
+            return True
+        return any(mentions_user(message, user) for message in channel.get_unanswered_messages(user))
+
+
+class Subscriber:
+    def __init__(self, name: str, user: User, subscription: RealmSubscription, last_seen: float):
+        self.name = name
+        self.user = user
+        self.subscription = subscription
+        # (stream, topic) -> id of the newest message read in it
+        self.cursors: Dict[Tuple[str, str], int] = {}
+        self.last_seen = last_seen
+
+
+class RealmFetcher:
+    def __init__(self, chat_message_repository: ChatMessageRepository, max_age: float = DEFAULT_MAX_AGE,
+                 subscriber_timeout: float = DEFAULT_SUBSCRIBER_TIMEOUT, clock=time.monotonic, metrics: Optional[MetricsRegistry] = None):
+        self.chat_message_repository = chat_message_repository
+        self.max_age = max_age
+        self.subscriber_timeout = subscriber_timeout
+        self.clock = clock
+        self._subscribers: Dict[str, Subscriber] = {}
+        self._snapshot: Optional[Dict[str, Channel]] = None
+        self._fetched_at = 0.0
+        # Held during a fetch, so concurrent callers wait for its result instead of fetching again
+        self._fetch_lock = threading.Lock()
+        self._lock = threading.Lock()
+        # The user the chat account posts as; None until the repository has told it
+        self._account_user: Optional[User] = None
+        metrics = metrics or get_metrics_registry()
+        self._fetches = metrics.counter("realm_fetches", "Unread fetches of a chat realm", ("result",))
+        self._shared = metrics.counter("realm_fetches_shared", "Guanaco polls served by a realm fetch already made")
+
+    def subscribe(self, name: str, user: User, subscription: Optional[RealmSubscription] = None) -> "RealmSubscriberRepository":
+        """The chat message repository of one guanaco; subscribing the same name again keeps its read cursors."""
+        with self._lock:
+            subscriber = self._subscribers.get(name)
+            if subscriber is None:
+                self._subscribers[name] = Subscriber(name, user, subscription or RealmSubscription(), self.clock())
+            else:
+                subscriber.user = user
+                subscriber.subscription = subscription or RealmSubscription()
+        return RealmSubscriberRepository(self, name)
+
+    def unsubscribe(self, name: str) -> None:
+        with self._lock:
+            self._subscribers.pop(name, None)
+
+    def get_subscribers(self) -> List[str]:
+        with self._lock:
+            return sorted(self._subscribers)
+
+    def get_channels(self, name: str, repository: ChatMessageRepository) -> Dict[str, Channel]:
+        """Channels of the realm for one subscriber, bound to repository so replying moves its own cursor."""
+        snapshot = self._get_snapshot()
+        channels = {}
+        read_by_own_message = []
+        with self._lock:
+            subscriber = self._subscribers.get(name)
+            if subscriber is None:
+                # Removed from the roster while its cycle was running
+                return channels
+            subscriber.last_seen = self.clock()
+            own_users = self._get_own_users()
+            topics = set()
+            for key, channel in snapshot.items():
+                if not channel.messages:
+                    continue
+                topic = (channel.get_id(), channel.get_topic())
+                topics.add(topic)
+                last_message = channel.get_last_message()
+                if last_message.id <= subscriber.cursors.get(topic, 0):
+                    continue
+                if last_message.sender in own_users:
+                    # A reply of the account (this guanaco or a sibling) is the newest message: nothing to answer there
+                    for other in self._subscribers.values():
+                        other.cursors[topic] = max(other.cursors.get(topic, 0), last_message.id)
+                    read_by_own_message.append(channel)
+                    continue
+                if not subscriber.subscription.matches(channel, subscriber.user):
+                    continue
+                # A copy per subscriber: guanacos answer the same topic independently
+                channels[key] = Channel(channel.get_id(), channel.get_topic(), channel.get_messages(), repository,
+                                        max_messages=channel.messages.max_messages)
+            # Topics gone from the unread realm are read by everyone: their cursors are no longer needed
+            for other in self._subscribers.values():
+                other.cursors = {topic: message_id for topic, message_id in other.cursors.items() if topic in topics}
+        for channel in read_by_own_message:
+            self._mark_realm_read_if_done(channel)
+        return channels
+
+    def mark_as_read(self, name: str, channel: Channel) -> None:
+        """Move the cursor of one subscriber; the realm is marked as read when no active subscriber is behind."""
+        with self._lock:
+            subscriber = self._subscribers.get(name)
+            if subscriber is not None and channel.messages:
+                topic = (channel.get_id(), channel.get_topic())
+                subscriber.cursors[topic] = max(subscriber.cursors.get(topic, 0), channel.get_last_message().id)
+        self._mark_realm_read_if_done(channel)
+
+    def _mark_realm_read_if_done(self, channel: Channel) -> None:
+        if not channel.messages:
+            return
+        topic = (channel.get_id(), channel.get_topic())
+        last_message_id = channel.get_last_message().id
+        now = self.clock()
+        with self._lock:
+            behind = [
+                subscriber.name for subscriber in self._subscribers.values()
+                if now - subscriber.last_seen <= self.subscriber_timeout
+                and subscriber.cursors.get(topic, 0) < last_message_id
+                and subscriber.subscription.matches(channel, subscriber.user)
+            ]
+        if behind:
+            logger.debug("Topic still unread by %s", ", ".join(behind), extra={"stream": channel.get_id(), "topic": channel.get_topic()})
+            return
+        self.chat_message_repository.mark_as_read(channel)
+
+    def _get_own_users(self) -> set:
+        # Called with the lock held
+        own_users = {subscriber.user for subscriber in self._subscribers.values()}
+        if self._account_user is not None:
+            own_users.add(self._account_user)
+        return own_users
+
+    def _get_snapshot(self) -> Dict[str, Channel]:
+        with self._fetch_lock:
+            if self._snapshot is not None and self.clock() - self._fetched_at < self.max_age:
+                self._shared.inc()
+                return self._snapshot
+            try:
+                snapshot = self.chat_message_repository.get_streams_with_unread_messages()
+            except Exception:
+                self._fetches.inc(result="error")
+                raise
+            self._fetches.inc(result="success")
+            if self._account_user is None:
+                try:
+                    self._account_user = self.chat_message_repository.get_account_user()
+                except Exception as e:
+                    # Retried on the next fetch; meanwhile the subscribers' own users are recognized
+                    logger.warning("Could not look up the chat account: %s", e)
+            self._snapshot = snapshot
+            self._fetched_at = self.clock()
+            return snapshot
+
+
+class RealmSubscriberRepository(ChatMessageRepository):
+    """ChatMessageRepository of one guanaco: reads through the shared realm fetch, sends directly."""
+
+    def __init__(self, fetcher: RealmFetcher, name: str):
+        self.fetcher = fetcher
+        self.name = name
+
+    def get_streams_with_unread_messages(self) -> Dict[str, Channel]:
+        return self.fetcher.get_channels(self.name, self)
+
+    def mark_as_read(self, channel: Channel):
+        self.fetcher.mark_as_read(self.name, channel)
+
+    def get_unread_messages(self, *args) -> List[ChatMessage]:
+        return self.fetcher.chat_message_repository.get_unread_messages(*args)
+
+    def send_private_message(self, message: str, user: User):
+        return self.fetcher.chat_message_repository.send_private_message(message, user)
+
+    def send_channel_message(self, message: str, channel_id: str, topic: str):
+        return self.fetcher.chat_message_repository.send_channel_message(message, channel_id, topic)
+
+    def send_thread_message(self, message: str, thread_id: str, topic: str):
+        return self.fetcher.chat_message_repository.send_thread_message(message, thread_id, topic)
@@ -0,0 +1,81 @@
+import sqlite3
+import time
+from typing import List, Optional
+from domain.ports.lease_repository import LeaseRepository
+
+class SqliteLeaseRepository(LeaseRepository):
+    """
+    Lease table in a SQLite file shared by every process (and host, on a shared volume).
+    Expiry uses wall-clock time, so hosts are expected to have synchronized clocks.
+    """
+
+    def __init__(self, path: str, clock=time.time):
+        self.path = path
+        self.clock = clock
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        # A new connection per call keeps the repository usable from any thread
+        return sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+
+    def acquire(self, key: str, owner: str, ttl: float) -> bool:
+        now = self.clock()
+        connection = self._connect()
+        try:
+            # IMMEDIATE takes the write lock up front: two processes cannot both see the lease as free
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute(
+                "INSERT INTO leases (key, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at <= ?",
+                (key, owner, now + ttl, now),
+            )
+            row = connection.execute("SELECT owner FROM leases WHERE key = ?", (key,)).fetchone()
+            connection.execute("COMMIT")
+            return row is not None and row[0] == owner
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    def renew(self, keys: List[str], owner: str, ttl: float) -> List[str]:
+        now = self.clock()
+        renewed = []
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            for key in keys:
+                cursor = connection.execute(
+                    "UPDATE leases SET expires_at = ? WHERE key = ? AND owner = ? AND expires_at > ?",
+                    (now + ttl, key, owner, now),
+                )
+                if cursor.rowcount:
+                    renewed.append(key)
+            connection.execute("COMMIT")
+            return renewed
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    def release(self, key: str, owner: str):
+        connection = self._connect()
+        try:
+            connection.execute("DELETE FROM leases WHERE key = ? AND owner = ?", (key, owner))
+        finally:
+            connection.close()
+
+    def get_owner(self, key: str) -> Optional[str]:
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                "SELECT owner FROM leases WHERE key = ? AND expires_at > ?", (key, self.clock())
+            ).fetchone()
+            return row[0] if row else None
+        finally:
+            connection.close()
@@ -1,9 +1,22 @@
+from typing import Optional
 from domain.ports.think_repository import ThinkRepository
+from infrastructure.prompts.context_builder import ContextBuilder
 from infrastructure.transformers_engine.models_handler import ModelsHandler
 
 class TransformersThinkRepository(ThinkRepository):
-    def __init__(self):
-        self.transformers_engine = ModelsHandler()
+    def __init__(self, transformers_engine: ModelsHandler = None, context_builder: Optional[ContextBuilder] = None):
+        self.transformers_engine = transformers_engine or ModelsHandler()
+        self.context_builder = context_builder
 
-    def get_think(self, message: str) -> str:
-        return self.transformers_engine.generate_text(message)
\ No newline at end of file
+    def get_think(self, message: str, max_new_tokens: Optional[int] = None) -> str:
+        prompt = self.context_builder.build(message) if self.context_builder else message
+        return self.transformers_engine.generate_text(prompt, max_new_tokens=max_new_tokens)
+
+    def get_raw_think(self, prompt: str, max_new_tokens: Optional[int] = None) -> str:
+        return self.transformers_engine.generate_text(prompt, max_new_tokens=max_new_tokens)
+
+    def get_status(self) -> dict:
+        return self.transformers_engine.get_status()
+
+    def unload(self) -> None:
+        self.transformers_engine.unload()
@@ -1,18 +1,27 @@
 from domain.ports.chat_message_repository import ChatMessageRepository
 from domain.entities.user import User
 from domain.entities.chat_message import ChatMessage
-from typing import List, Dict
-import zulip
+from typing import List, Dict, Tuple
 from infrastructure.config.zulip_config import ZulipConfig
+from infrastructure.lazy_imports import lazy_import
 from datetime import datetime
 from typing import Optional
 from infrastructure.repositories.mappers.zulip_mapper import ZulipMapper
+from infrastructure.repositories.zulip_unread_index import ZulipUnreadIndex
 import json
+import threading
 from domain.entities.channel import Channel
+from infrastructure.observability.metrics import MetricsRegistry, get_metrics_registry
+from infrastructure.observability.tracing import get_tracer
+
+zulip = lazy_import("zulip")
+
+# Events that keep the unread index current (register() also returns its unread_msgs for them)
+UNREAD_EVENT_TYPES = ["message", "update_message_flags"]
 
 class ZulipChatMessageRepository(ChatMessageRepository):
 
-    def __init__(self):
+    def __init__(self, metrics: Optional[MetricsRegistry] = None):
         self.config = ZulipConfig()
         self.client = zulip.Client(
             email=self.config.email,
@@ -20,28 +29,28 @@ class ZulipChatMessageRepository(ChatMessageRepository):
             site=self.config.site,
         )
         self.mapper = ZulipMapper()
+        # Topics with unread messages, from the event queue registered on the first fetch
+        self.unread_index = ZulipUnreadIndex()
+        self._queue_id: Optional[str] = None
+        self._last_event_id = -1
+        self._sync_lock = threading.Lock()
+        # Newest message of each topic already counted as skipped, so a topic left unread is counted once
+        self._skipped: Dict[Tuple[str, str], int] = {}
+        self._account_user: Optional[User] = None
+        metrics = metrics or get_metrics_registry()
+        self._generations_avoided = metrics.counter(
+            "engagement_generations_avoided", "Unread topics not answered because of the engagement policy", ("reason",))
 
-    def __group_messages_by_stream(self, messages: List[ChatMessage]) -> Dict[str, Channel]:
-        # Group messages by stream using the raw message data
-        channels = {}
-        if hasattr(self, '_raw_messages'):
-            for i, raw_msg in enumerate(self._raw_messages):
-                stream_id = str(raw_msg.get("stream_id", ""))
-                topic = raw_msg.get("subject", "")
-                
-                if stream_id not in channels:
-                    channels[stream_id] = Channel(stream_id, topic, [], self)
-                
-                # Add the corresponding ChatMessage to the channel
-                if i < len(messages):
-                    channels[stream_id].add_message(messages[i])
-        
-        return channels
-    
     def get_messages_from_channel(self, channel: Channel) -> List[ChatMessage]:
+        with get_tracer().start_span("zulip.get_messages_from_channel", stream=channel.get_id(), topic=channel.get_topic()) as span:
+            messages = self._get_messages_from_channel(channel)
+            span.set_attribute("messages", len(messages))
+            return messages
+
+    def _get_messages_from_channel(self, channel: Channel) -> List[ChatMessage]:
         messages = self.client.get_messages({
             "anchor": "newest",
-            "num_before": 500,
+            "num_before": self.config.channel_max_messages,
             "num_after": 0,
             "narrow": [
                 {"operator": "stream", "operand": channel.get_id()},
@@ -54,15 +63,72 @@ class ZulipChatMessageRepository(ChatMessageRepository):
         return [self.mapper.to_chat_message(msg) for msg in messages.get("messages", [])]
 
     def get_streams_with_unread_messages(self) -> Dict[str, Channel]:
-        messages = self.get_unread_messages()
-        channels = self.__group_messages_by_stream(messages)
-        for channel in channels.values():
-            messages = self.get_messages_from_channel(channel)
-            for message in messages:
-                channel.add_message(message)
+        """One channel per topic with unread messages, keyed "stream_id/topic"."""
+        self.sync_unread_index()
+        channels = {}
+        for stream_id, topic in self._get_topics_to_answer():
+            channel = Channel(stream_id, topic, [], self, max_messages=self.config.channel_max_messages)
+            # Bodies are only fetched for the topics to answer: their recent history, unread messages included
+            channel.add_messages(self.get_messages_from_channel(channel))
+            channels[f"{stream_id}/{topic}"] = channel
         return channels
 
+    def _get_topics_to_answer(self) -> List[Tuple[str, str]]:
+        """Unread topics allowed by the engagement policy (ZULIP_ENGAGEMENT, ZULIP_ENGAGEMENT_STREAMS)."""
+        topics = self.unread_index.get_topics()
+        mentioned = self.unread_index.get_topics(mentions_only=True) if self.config.engagement == "mentions" else None
+        streams = set(self.config.engagement_streams) if self.config.engagement_streams else None
+        to_answer = []
+        for key, newest_id in topics.items():
+            if streams is not None and key[0] not in streams:
+                reason = "stream"
+            elif mentioned is not None and key not in mentioned:
+                reason = "not_mentioned"
+            else:
+                to_answer.append(key)
+                continue
+            if self._skipped.get(key) != newest_id:
+                self._skipped[key] = newest_id
+                self._generations_avoided.inc(reason=reason)
+        # Topics read since are forgotten
+        self._skipped = {key: newest_id for key, newest_id in self._skipped.items() if key in topics}
+        return to_answer
+
+    def sync_unread_index(self) -> None:
+        """Apply the events queued since the last sync; registers (and bootstraps the index) the first time."""
+        with self._sync_lock, get_tracer().start_span("zulip.sync_unread_index") as span:
+            if self._queue_id is None:
+                self._register()
+            else:
+                response = self.client.get_events(queue_id=self._queue_id, last_event_id=self._last_event_id, dont_block=True)
+                if response.get("result") != "success":
+                    if response.get("code") != "BAD_EVENT_QUEUE_ID":
+                        raise RuntimeError(f"Zulip API error: {response.get('msg')}")
+                    # The queue expired (e.g. after a long pause): rebuild the index from a new one
+                    self._register()
+                else:
+                    events = response.get("events", [])
+                    for event in events:
+                        self.unread_index.apply_event(event)
+                        self._last_event_id = max(self._last_event_id, event["id"])
+                    span.set_attribute("events", len(events))
+            span.set_attribute("topics", len(self.unread_index))
+
+    def _register(self) -> None:
+        response = self.client.register(event_types=UNREAD_EVENT_TYPES)
+        if response.get("result") != "success":
+            raise RuntimeError(f"Zulip API error: {response.get('msg')}")
+        self._queue_id = response["queue_id"]
+        self._last_event_id = response["last_event_id"]
+        self.unread_index.bootstrap(response.get("unread_msgs") or {})
+
     def get_unread_messages(self) -> List[ChatMessage]:
+        with get_tracer().start_span("zulip.get_unread_messages") as span:
+            messages = self._get_unread_messages()
+            span.set_attribute("messages", len(messages))
+            return messages
+
+    def _get_unread_messages(self) -> List[ChatMessage]:
         params = {
             "anchor": "first_unread",
             "num_before": 0,
@@ -80,10 +146,7 @@ class ZulipChatMessageRepository(ChatMessageRepository):
         if response.get("result") != "success":
             raise RuntimeError(f"Zulip API error: {response.get('msg')}")
 
-        messages = response.get("messages", [])
-        # Store the original messages for channel grouping
-        self._raw_messages = messages
-        return [self.mapper.to_chat_message(msg) for msg in messages]
+        return [self.mapper.to_chat_message(msg) for msg in response.get("messages", [])]
     
     def send_private_message(self, message: str, user: User):
         recipient_user_id = self._find_user_id_by_email(user.email)
@@ -106,7 +169,8 @@ class ZulipChatMessageRepository(ChatMessageRepository):
             "content": message,
             "subject": topic,
         }
-        response = self.client.send_message(request)
+        with get_tracer().start_span("zulip.send_channel_message", stream=channel_id, topic=topic, characters=len(message)):
+            response = self.client.send_message(request)
         if response.get("result") != "success":
             raise RuntimeError(f"Zulip API error: {response.get('msg')}")
 
@@ -122,9 +186,22 @@ class ZulipChatMessageRepository(ChatMessageRepository):
             raise RuntimeError(f"Zulip API error: {response.get('msg')}")
 
     def mark_as_read(self, channel: Channel):
-        response = self.client.mark_stream_as_read(channel.get_id())
+        # Only the topic answered: a channel is one topic, its siblings in the stream are still unanswered
+        with get_tracer().start_span("zulip.mark_as_read", stream=channel.get_id(), topic=channel.get_topic()):
+            response = self.client.mark_topic_as_read(channel.get_id(), channel.get_topic())
         if response.get("result") != "success":
             raise RuntimeError(f"Zulip API error: {response.get('msg')}")
+        # Not answered again before the flag events arrive
+        self.unread_index.mark_topic_as_read((channel.get_id(), channel.get_topic()))
+
+    def get_account_user(self) -> User:
+        """The bot account every guanaco of the realm posts as (looked up once)."""
+        if self._account_user is None:
+            response = self.client.get_profile()
+            if response.get("result") != "success":
+                raise RuntimeError(f"Zulip API error: {response.get('msg')}")
+            self._account_user = User(platform_id=response["user_id"], platform="zulip", name=response.get("full_name", ""))
+        return self._account_user
 
     def _find_user_id_by_email(self, email: str) -> Optional[int]:
         users_response = self.client.get_users()
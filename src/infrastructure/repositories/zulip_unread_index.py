@@ -0,0 +1,103 @@
+"""
+Unread stream messages of the Zulip account indexed by (stream_id, topic), without their bodies.
+Bootstrapped from the unread_msgs section of a register() response and kept current from the
+message and update_message_flags events of that queue, so finding the topics to answer costs
+one event poll instead of downloading the unread messages themselves.
+Unread mentions are indexed too, so an engagement policy that only answers mentions picks its
+topics without any message body.
+"""
+
+import threading
+from typing import Dict, Iterable, Set, Tuple
+
+TopicKey = Tuple[str, str]
+
+# Topics answered: every unread one, or only those where the account is mentioned
+ENGAGEMENT_MODES = ("all", "mentions")
+MENTION_FLAGS = ("mentioned", "wildcard_mentioned")
+
+
+class ZulipUnreadIndex:
+    def __init__(self):
+        self._topics: Dict[TopicKey, Set[int]] = {}
+        # message id -> topic, to remove ids that flag events give without their topic
+        self._message_topics: Dict[int, TopicKey] = {}
+        self._mentions: Set[int] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._topics)
+
+    def bootstrap(self, unread_msgs: dict) -> None:
+        """Replace the index with the stream section of register()'s unread_msgs."""
+        with self._lock:
+            self._clear()
+            for entry in unread_msgs.get("streams", []):
+                self._add((str(entry["stream_id"]), entry["topic"]), entry.get("unread_message_ids", []))
+            self._mentions.update(message_id for message_id in unread_msgs.get("mentions", []) if message_id in self._message_topics)
+
+    def apply_event(self, event: dict) -> None:
+        event_type = event.get("type")
+        if event_type == "message":
+            message = event.get("message", {})
+            # The account's own messages arrive already read
+            flags = event.get("flags") or []
+            if message.get("type") == "stream" and "read" not in flags:
+                with self._lock:
+                    self._add((str(message["stream_id"]), message.get("subject", message.get("topic", ""))), [message["id"]])
+                    if any(flag in flags for flag in MENTION_FLAGS):
+                        self._mentions.add(message["id"])
+        elif event_type == "update_message_flags" and event.get("flag") == "read":
+            with self._lock:
+                if event.get("op") == "add":
+                    if event.get("all"):
+                        self._clear()
+                    else:
+                        self._remove(event.get("messages", []))
+                elif event.get("op") == "remove":
+                    # Marked as unread again: the topic comes in the details
+                    for message_id, details in (event.get("message_details") or {}).items():
+                        if details.get("type") == "stream":
+                            self._add((str(details["stream_id"]), details.get("topic", "")), [int(message_id)])
+                            if details.get("mentioned"):
+                                self._mentions.add(int(message_id))
+
+    def mark_topic_as_read(self, key: TopicKey) -> None:
+        """Drop a topic right away, without waiting for the flag events of its marking as read."""
+        with self._lock:
+            message_ids = self._topics.get((str(key[0]), key[1]))
+            if message_ids:
+                self._remove(message_ids)
+
+    def get_topics(self, mentions_only: bool = False) -> Dict[TopicKey, int]:
+        """Topics with unread messages and the id of the newest one; with mentions_only, those where the account is mentioned."""
+        with self._lock:
+            keys = {self._message_topics[message_id] for message_id in self._mentions} if mentions_only else self._topics
+            return {key: max(self._topics[key]) for key in keys}
+
+    def _clear(self) -> None:
+        # Called with the lock held
+        self._topics.clear()
+        self._message_topics.clear()
+        self._mentions.clear()
+
+    def _add(self, key: TopicKey, message_ids: Iterable[int]) -> None:
+        # Called with the lock held
+        message_ids = set(message_ids)
+        if not message_ids:
+            return
+        self._topics.setdefault(key, set()).update(message_ids)
+        for message_id in message_ids:
+            self._message_topics[message_id] = key
+
+    def _remove(self, message_ids: Iterable[int]) -> None:
+        # Called with the lock held
+        for message_id in list(message_ids):
+            self._mentions.discard(message_id)
+            key = self._message_topics.pop(message_id, None)
+            if key is None:
+                continue
+            topic_ids = self._topics[key]
+            topic_ids.discard(message_id)
+            if not topic_ids:
+                del self._topics[key]
@@ -0,0 +1,28 @@
+"""
+Tiny text-classification model for the admission stage: the probability that a message needs a full answer.
+The pipeline is loaded on the first message it scores, on the CPU, so it does not compete with the reply model.
+"""
+
+import threading
+from infrastructure.lazy_imports import lazy_import
+
+pipeline = lazy_import("transformers", "pipeline")
+
+
+class TransformersAdmissionClassifier:
+    def __init__(self, model_name: str, positive_label: str = "LABEL_1", max_characters: int = 512):
+        self.model_name = model_name
+        self.positive_label = positive_label
+        self.max_characters = max_characters
+        self._classifier = None
+        self._lock = threading.Lock()
+
+    def __call__(self, text: str) -> float:
+        result = self._get_classifier()(text[:self.max_characters])[0]
+        return result["score"] if result["label"] == self.positive_label else 1.0 - result["score"]
+
+    def _get_classifier(self):
+        with self._lock:
+            if self._classifier is None:
+                self._classifier = pipeline("text-classification", model=self.model_name, device="cpu")
+            return self._classifier
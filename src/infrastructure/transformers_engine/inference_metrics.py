@@ -0,0 +1,74 @@
+"""
+Inference metrics recorded by ModelsHandler: where the latency of a reply goes
+(queue wait, prefill / time to first token, decode speed) and how big requests are.
+"""
+
+import time
+from typing import Optional
+from infrastructure.observability.metrics import MetricsRegistry, get_metrics_registry
+
+TOKEN_COUNT_BUCKETS = (1, 8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+TOKENS_PER_SECOND_BUCKETS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class InferenceMetrics:
+    def __init__(self, registry: Optional[MetricsRegistry] = None):
+        registry = registry or get_metrics_registry()
+        self.requests = registry.counter("inference_requests", "Generation requests received")
+        self.failures = registry.counter("inference_failures", "Generation requests that failed")
+        self.queue_wait = registry.histogram("inference_queue_wait_seconds", "Time spent waiting for the model to be free")
+        self.prefill = registry.histogram("inference_prefill_seconds", "Time from the start of generate() to the first new token")
+        self.time_to_first_token = registry.histogram("inference_time_to_first_token_seconds", "Time from the request to the first new token")
+        self.decode_speed = registry.histogram("inference_decode_tokens_per_second", "Generated tokens per second after the first token", buckets=TOKENS_PER_SECOND_BUCKETS)
+        self.input_tokens = registry.histogram("inference_input_tokens", "Prompt tokens per request", buckets=TOKEN_COUNT_BUCKETS)
+        self.output_tokens = registry.histogram("inference_output_tokens", "Generated tokens per request", buckets=TOKEN_COUNT_BUCKETS)
+
+    def record_generation(self, timer: "GenerationTimer") -> None:
+        if timer.queue_wait is not None:
+            self.queue_wait.observe(timer.queue_wait)
+        if timer.first_token_at is not None:
+            self.prefill.observe(timer.first_token_at - timer.generation_started_at)
+            self.time_to_first_token.observe(timer.first_token_at - timer.requested_at)
+        if timer.output_tokens > 1 and timer.finished_at is not None:
+            decode_time = timer.finished_at - timer.first_token_at
+            if decode_time > 0:
+                self.decode_speed.observe((timer.output_tokens - 1) / decode_time)
+        self.input_tokens.observe(timer.input_tokens)
+        self.output_tokens.observe(timer.output_tokens)
+
+
+class GenerationTimer:
+    """
+    Streamer passed to generate() to timestamp the tokens as they are produced.
+    generate() first puts the prompt ids, then every new token. It implements the put/end
+    interface of transformers' BaseStreamer without subclassing it, so importing it does not import transformers.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.requested_at = clock()
+        self.queue_wait: Optional[float] = None
+        self.generation_started_at: Optional[float] = None
+        self.first_token_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._prompt_received = False
+
+    def mark_dequeued(self) -> None:
+        self.queue_wait = self.clock() - self.requested_at
+
+    def start_generation(self) -> None:
+        self.generation_started_at = self.clock()
+
+    def put(self, value) -> None:
+        if not self._prompt_received:
+            self._prompt_received = True
+            self.input_tokens = int(value.shape[-1])
+            return
+        if self.first_token_at is None:
+            self.first_token_at = self.clock()
+        self.output_tokens += int(value.numel())
+
+    def end(self) -> None:
+        self.finished_at = self.clock()
@@ -0,0 +1,36 @@
+"""
+Helpers to read the resident set size (RSS) of the current process.
+Used by ModelsHandler to report the memory cost of loading a model.
+"""
+
+import os
+import sys
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+
+def get_current_rss_bytes() -> int:
+    """Current resident set size of the process, in bytes (0 if unknown)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Not on Linux: the best we can offer is the peak value
+        return get_peak_rss_bytes()
+
+
+def get_peak_rss_bytes() -> int:
+    """Peak resident set size of the process since it started, in bytes (0 if unknown)."""
+    if resource is None:
+        return 0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes everywhere else
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def to_megabytes(value_in_bytes: int) -> float:
+    return round(value_in_bytes / (1024 * 1024), 1)
@@ -1,80 +1,263 @@
-from transformers import AutoModelForCausalLM, AutoTokenizer
+import functools
+import gc
+import logging
 import os
-import torch
+import re
+import threading
+from typing import List, Optional
+from infrastructure.config.models_config import ModelsConfig
+from infrastructure.lazy_imports import lazy_import
+from infrastructure.observability.structured_logging import summarize
+from infrastructure.observability.tracing import get_tracer
+from infrastructure.transformers_engine.inference_metrics import GenerationTimer, InferenceMetrics
+from infrastructure.transformers_engine.memory_usage import get_current_rss_bytes, get_peak_rss_bytes, to_megabytes
+
+# torch and transformers take seconds to import: they are loaded with the model, not with the module
+torch = lazy_import("torch")
+AutoModelForCausalLM = lazy_import("transformers", "AutoModelForCausalLM")
+AutoTokenizer = lazy_import("transformers", "AutoTokenizer")
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "Qwen/Qwen3-1.7B"
+# Kept short for faster generation
+DEFAULT_MAX_NEW_TOKENS = 32
+FALLBACK_RESPONSE = "I apologize, I'm having trouble generating a response right now."
+
+def clean_prompt(prompt: str) -> str:
+    """Strip HTML tags (Zulip sends rendered markdown) and never return an empty prompt."""
+    cleaned = re.sub(r'<[^>]+>', '', prompt).strip()
+    return cleaned or "Hello"
+
+@functools.lru_cache(maxsize=None)
+def get_available_devices() -> dict:
+    """
+    Accelerators torch can use on this node. Probing initializes the CUDA, MPS and XPU runtimes,
+    so it is done once per process, the first time a model needs a device.
+    """
+    devices = {
+        "cuda": torch.cuda.device_count() if torch.cuda.is_available() else 0,
+        "cpu": os.cpu_count() or 1,
+        "mps": hasattr(torch.backends, "mps") and torch.backends.mps.is_available(),
+        "xpu": hasattr(torch, "xpu") and hasattr(torch.xpu, "is_available") and torch.xpu.is_available(),
+        "amd_rocm": getattr(torch.version, "hip", None) is not None,
+    }
+    for device, available in devices.items():
+        logger.info("Availables %s: %s", device, available)
+    return devices
 
 class ModelsHandler:
-    def __init__(self):
-        self.models = ["Qwen/Qwen3-1.7B"]
+    def __init__(self, memory_profile: Optional[str] = None, model_name: Optional[str] = None, metrics: Optional[InferenceMetrics] = None):
+        self.models = [model_name or DEFAULT_MODEL]
+        self.max_new_tokens = DEFAULT_MAX_NEW_TOKENS
+        self.memory_profile = memory_profile or ModelsConfig().memory_profile
+        self.memory_report = None
+        self.metrics = metrics or InferenceMetrics()
+        # The model is shared by every guanaco: one generation at a time, the rest wait in line
+        self._generation_lock = threading.Lock()
         self._model = None
         self._tokenizer = None
-        self.list_all_the_availables_devices()
 
-    def list_all_the_availables_devices(self):
-        num_cuda = torch.cuda.device_count() if torch.cuda.is_available() else 0
-        num_cpu = os.cpu_count() or 1
-        has_mps = hasattr(torch.backends, "mps") and torch.backends.mps.is_available()
-        has_xpu = hasattr(torch, "xpu") and hasattr(torch.xpu, "is_available") and torch.xpu.is_available()
-        has_rocm = getattr(torch.version, "hip", None) is not None
-        print(f"Availables cuda GPUs: {num_cuda}")
-        print(f"Availables cpu: {num_cpu}")
-        print(f"Availables mps: {has_mps}")
-        print(f"Availables xpu: {has_xpu}")
-        print(f"Availables amd_rocm: {has_rocm}")
+    def list_all_the_availables_devices(self) -> dict:
+        return get_available_devices()
+
 
 
+    def get_low_memory_dtype(self):
+        """Pick the smallest floating point dtype the target device can compute with efficiently."""
+        if self.list_all_the_availables_devices()["cuda"]:
+            return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        try:
+            if torch.ops.mkldnn._is_mkldnn_bf16_supported():
+                return torch.bfloat16
+            if torch.ops.mkldnn._is_mkldnn_fp16_supported():
+                return torch.float16
+        except (AttributeError, RuntimeError):
+            pass
+        return torch.float32
+
+    def get_loading_options(self) -> dict:
+        """Extra from_pretrained arguments for the configured memory profile."""
+        if self.memory_profile != "low":
+            return {}
+        return {
+            "dtype": self.get_low_memory_dtype(),
+            # Stream the weights straight into the model instead of building a randomly initialized copy first
+            "low_cpu_mem_usage": True,
+            # safetensors checkpoints are memory-mapped instead of fully read into RAM
+            "use_safetensors": True,
+        }
 
     def get_model(self, model_name: str) -> AutoModelForCausalLM:
         if self._model is None:
-            try:
-                self._model = AutoModelForCausalLM.from_pretrained(model_name, device_map="auto")
-            except Exception:
-                self._model = AutoModelForCausalLM.from_pretrained(model_name)
-                if torch.cuda.is_available():
-                    self._model.to("cuda")
-                elif hasattr(torch.backends, "mps") and torch.backends.mps.is_available():
-                    self._model.to("mps")
-                elif hasattr(torch, "xpu") and hasattr(torch.xpu, "is_available") and torch.xpu.is_available():
-                    self._model.to("xpu")
-            self._model.eval()
+            with get_tracer().start_span("model.load", model=model_name, memory_profile=self.memory_profile):
+                self._load_model(model_name)
         return self._model
+
+    def _load_model(self, model_name: str) -> None:
+        loading_options = self.get_loading_options()
+        try:
+            self._model = AutoModelForCausalLM.from_pretrained(model_name, device_map="auto", **loading_options)
+        except Exception:
+            self._model = AutoModelForCausalLM.from_pretrained(model_name, **loading_options)
+            device = self.get_device()
+            if device != "cpu":
+                self._model.to(device)
+        self._model.eval()
+        self.memory_report = self.measure_memory(loading_options.get("dtype"))
+
+    def measure_memory(self, dtype=None) -> dict:
+        """Report peak RSS (reached while loading) and steady RSS (once loading garbage is released)."""
+        gc.collect()
+        report = {
+            "memory_profile": self.memory_profile,
+            "dtype": str(dtype) if dtype is not None else "default",
+            "peak_rss_mb": to_megabytes(get_peak_rss_bytes()),
+            "steady_rss_mb": to_megabytes(get_current_rss_bytes()),
+        }
+        logger.info("Model loaded with memory profile '%s' (dtype: %s, peak RSS: %s MB, steady RSS: %s MB)",
+                    report["memory_profile"], report["dtype"], report["peak_rss_mb"], report["steady_rss_mb"])
+        return report
     
-    def generate_text(self, prompt: str) -> str:
+    def generate_text(self, prompt: str, max_new_tokens: Optional[int] = None) -> str:
+        timer = GenerationTimer()
+        self.metrics.requests.inc()
+        with get_tracer().start_span("model.generate_text", engine="transformers", model=self.models[0]) as span:
+            with self._generation_lock:
+                timer.mark_dequeued()
+                span.set_attribute("queue_wait_seconds", timer.queue_wait)
+                try:
+                    result = self._generate(prompt, timer, max_new_tokens or self.max_new_tokens)
+                except Exception as e:
+                    self.metrics.failures.inc()
+                    span.record_error(e)
+                    logger.error("Generation failed: %s", e)
+                    return FALLBACK_RESPONSE
+            span.set_attributes(input_tokens=timer.input_tokens, output_tokens=timer.output_tokens)
+        self.metrics.record_generation(timer)
+        return result
+
+    def generate_texts(self, prompts: List[str], max_new_tokens: Optional[int] = None) -> List[str]:
+        """Generate the replies for several prompts in a single padded batch."""
+        timer = GenerationTimer()
+        self.metrics.requests.inc(len(prompts))
+        with get_tracer().start_span("model.generate_texts", engine="transformers", model=self.models[0], batch_size=len(prompts)) as span:
+            with self._generation_lock:
+                timer.mark_dequeued()
+                span.set_attribute("queue_wait_seconds", timer.queue_wait)
+                try:
+                    results = self._generate_batch(prompts, timer, max_new_tokens or self.max_new_tokens)
+                except Exception as e:
+                    self.metrics.failures.inc(len(prompts))
+                    span.record_error(e)
+                    logger.error("Batch generation failed: %s", e)
+                    return [FALLBACK_RESPONSE for _ in prompts]
+            span.set_attributes(input_tokens=timer.input_tokens, output_tokens=timer.output_tokens)
+        self.metrics.record_generation(timer)
+        return results
+
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def get_status(self) -> dict:
+        return {
+            "engine": "transformers",
+            "model": self.models[0],
+            "loaded": self.is_loaded(),
+            "memory_profile": self.memory_profile,
+            "memory_report": self.memory_report,
+            "max_new_tokens": self.max_new_tokens,
+        }
+
+    def unload(self) -> None:
+        """Drop the model and tokenizer to free their memory; the next generation loads them again."""
+        # Waits for the generation in progress, which still uses them
+        with self._generation_lock:
+            was_loaded = self.is_loaded()
+            self._model = None
+            self._tokenizer = None
+            self.memory_report = None
+        gc.collect()
+        # Only probed if a model was loaded: unloading an unused handler does not initialize CUDA
+        if was_loaded and self.list_all_the_availables_devices()["cuda"]:
+            torch.cuda.empty_cache()
+        if was_loaded:
+            logger.info("Model %s unloaded", self.models[0])
+
+    def get_tokenizer(self, model_id: str):
+        if self._tokenizer is None:
+            self._tokenizer = AutoTokenizer.from_pretrained(model_id)
+            # Prompts end with the message being answered: a long one loses its oldest context, not that message
+            self._tokenizer.truncation_side = "left"
+        return self._tokenizer
+
+    def get_device(self) -> str:
+        devices = self.list_all_the_availables_devices()
+        return "cuda" if devices["cuda"] else ("mps" if devices["mps"] else ("xpu" if devices["xpu"] else "cpu"))
+
+    def get_pad_token_id(self) -> int:
+        return self._tokenizer.pad_token_id if self._tokenizer.pad_token_id is not None else self._tokenizer.eos_token_id
+
+    def _generate_batch(self, prompts: List[str], timer: GenerationTimer, max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS) -> List[str]:
+        model_id = self.models[0]
+        model = self.get_model(model_id)
+        tokenizer = self.get_tokenizer(model_id)
+        pad_token_id = self.get_pad_token_id()
+        if tokenizer.pad_token_id is None:
+            tokenizer.pad_token_id = pad_token_id
+        # Decoder-only models continue from the last position, so pad on the left; the tokenizer is shared
+        # with single-prompt generations, so its padding side is put back afterwards
+        padding_side = tokenizer.padding_side
+        tokenizer.padding_side = "left"
         try:
-            print(f"[DEBUG] Generating text for prompt: {prompt}")
-            model_id = self.models[0]
-            model = self.get_model(model_id)
-            if self._tokenizer is None:
-                self._tokenizer = AutoTokenizer.from_pretrained(model_id)
-            
-            # Clean HTML tags from prompt if present
-            import re
-            clean_prompt = re.sub(r'<[^>]+>', '', prompt).strip()
-            if not clean_prompt:
-                clean_prompt = "Hello"
-            
-            print(f"[DEBUG] Clean prompt: {clean_prompt}")
-            inputs = self._tokenizer(clean_prompt, return_tensors="pt", max_length=512, truncation=True)
-            device = (
-                "cuda" if torch.cuda.is_available() else
-                ("mps" if hasattr(torch.backends, "mps") and torch.backends.mps.is_available() else
-                 ("xpu" if hasattr(torch, "xpu") and hasattr(torch.xpu, "is_available") and torch.xpu.is_available() else "cpu"))
+            inputs = tokenizer([clean_prompt(prompt) for prompt in prompts], return_tensors="pt", max_length=512, truncation=True, padding=True)
+        finally:
+            tokenizer.padding_side = padding_side
+        prompt_length = inputs["input_ids"].shape[-1]
+        device = self.get_device()
+        if device != "cpu":
+            inputs = {k: v.to(device) for k, v in inputs.items()}
+        timer.start_generation()
+        with torch.no_grad():
+            outputs = model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                pad_token_id=pad_token_id,
+                streamer=timer,
             )
+        # Only the continuation: the prompt holds the summary and other people's messages
+        return [tokenizer.decode(output[prompt_length:], skip_special_tokens=True) for output in outputs]
+
+    def _generate(self, prompt: str, timer: GenerationTimer, max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS) -> str:
+        logger.debug("Generating text for prompt: %s", summarize(prompt))
+        model_id = self.models[0]
+        model = self.get_model(model_id)
+        self.get_tokenizer(model_id)
+        
+        tracer = get_tracer()
+        with tracer.start_span("model.tokenize"):
+            # Clean HTML tags from prompt if present
+            cleaned_prompt = clean_prompt(prompt)
+            inputs = self._tokenizer(cleaned_prompt, return_tensors="pt", max_length=512, truncation=True)
+            prompt_length = inputs["input_ids"].shape[-1]
+            device = self.get_device()
             if device != "cpu":
                 inputs = {k: v.to(device) for k, v in inputs.items()}
-            pad_token_id = (
-                self._tokenizer.pad_token_id if self._tokenizer.pad_token_id is not None else self._tokenizer.eos_token_id
-            )
-            print(f"[DEBUG] Starting generation...")
+        pad_token_id = self.get_pad_token_id()
+        with tracer.start_span("model.generate", max_new_tokens=max_new_tokens) as span:
+            timer.start_generation()
             with torch.no_grad():
                 outputs = model.generate(
                     **inputs,
-                    max_new_tokens=32,  # Reduced for faster generation
+                    max_new_tokens=max_new_tokens,
                     do_sample=False,
                     pad_token_id=pad_token_id,
+                    streamer=timer,
                 )
-            result = self._tokenizer.decode(outputs[0], skip_special_tokens=True)
-            print(f"[DEBUG] Generated result: {result}")
-            return result
-        except Exception as e:
-            print(f"[ERROR] Generation failed: {e}")
-            return "I apologize, I'm having trouble generating a response right now."
\ No newline at end of file
+            span.set_attributes(input_tokens=timer.input_tokens, output_tokens=timer.output_tokens)
+        with tracer.start_span("model.decode"):
+            # Only the continuation: the prompt holds the summary and other people's messages
+            result = self._tokenizer.decode(outputs[0][prompt_length:], skip_special_tokens=True)
+        logger.debug("Generated %s tokens: %s", timer.output_tokens, summarize(result))
+        return result
@@ -0,0 +1,266 @@
+"""
+Infrastructure scheduler that runs the work of many Guanacos on a small, bounded pool of threads.
+A single dispatcher thread keeps a heap of next-run times and hands due Guanacos to the executor.
+"""
+
+import collections
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional
+from domain.entities.guanaco.guanaco import Guanaco
+from domain.errors import ChannelWorkError
+from infrastructure.observability.tracing import get_tracer
+from infrastructure.workers.poll_policy import PollPolicy
+
+logger = logging.getLogger(__name__)
+
+# Failures the next cycle can get past: some channels of the cycle failed, or the chat API or network did.
+# The Guanaco keeps running and its poll policy backs off; any other error stops it.
+RECOVERABLE_ERRORS = (ChannelWorkError, RuntimeError, OSError)
+
+
+class ScheduledGuanaco:
+    """Scheduling state of one Guanaco. A Guanaco never runs concurrently with itself."""
+
+    def __init__(self, worker_id: str, guanaco: Guanaco, poll_policy: PollPolicy, work: Optional[Callable[[], bool]] = None):
+        self.worker_id = worker_id
+        self.guanaco = guanaco
+        self.poll_policy = poll_policy
+        self.work = work or guanaco.work
+        self.next_run_at = 0.0
+        self.cycles = 0
+        self.last_cycle_duration: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.in_flight = False
+        self._active = True
+        self._paused = False
+        # Sequence of the heap item that is current for this entry; older items are stale and skipped
+        self._heap_sequence: Optional[int] = None
+
+    def is_running(self) -> bool:
+        """Check if the Guanaco is still scheduled."""
+        return self._active
+
+    def is_paused(self) -> bool:
+        return self._paused
+
+    def deactivate(self) -> None:
+        self._active = False
+
+    def get_state(self) -> dict:
+        return {
+            "running": self.is_running(),
+            "paused": self.is_paused(),
+            "in_flight": self.in_flight,
+            "cycles": self.cycles,
+            "last_cycle_duration": self.last_cycle_duration,
+            "last_error": self.last_error,
+            "seconds_to_next_cycle": max(0.0, self.next_run_at - time.monotonic()) if self._heap_sequence is not None else None,
+            "poll": self.poll_policy.get_stats(),
+        }
+
+
+class GuanacoScheduler:
+    """
+    Runs Guanaco.work() for every scheduled Guanaco, waiting the interval given by its poll policy
+    between the end of a cycle and the start of the next one, with at most max_workers cycles in flight.
+    """
+
+    def __init__(self, max_workers: int = 4, on_worker_stopped: Optional[Callable[[ScheduledGuanaco], None]] = None,
+                 max_recent_errors: int = 50):
+        self.max_workers = max_workers
+        self.on_worker_stopped = on_worker_stopped
+        self.recent_errors: Deque[dict] = collections.deque(maxlen=max_recent_errors)
+        self._entries: Dict[str, ScheduledGuanaco] = {}
+        # Removed entries whose last cycle is still in flight: a new entry for the same worker waits for it
+        self._retiring: Dict[str, ScheduledGuanaco] = {}
+        self._heap: List[tuple] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._slots = threading.BoundedSemaphore(max_workers)
+        self._in_flight = 0
+        self._stopping = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._dispatcher_thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start the dispatcher thread and the executor."""
+        if self._dispatcher_thread and self._dispatcher_thread.is_alive():
+            raise ValueError("Scheduler is already running")
+
+        self._stopping = False
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="GuanacoScheduler")
+        self._dispatcher_thread = threading.Thread(target=self._dispatch_loop, name="GuanacoScheduler-dispatcher", daemon=True)
+        self._dispatcher_thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop dispatching and wait up to timeout seconds for the cycles in flight."""
+        with self._condition:
+            self._stopping = True
+            for entry in self._entries.values():
+                entry.deactivate()
+            self._condition.notify_all()
+            deadline = time.monotonic() + timeout
+            while self._in_flight and time.monotonic() < deadline:
+                self._condition.wait(deadline - time.monotonic())
+
+        if self._dispatcher_thread:
+            self._dispatcher_thread.join(timeout=timeout)
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def add(self, worker_id: str, guanaco: Guanaco, sleep_time: float = 10, poll_policy: Optional[PollPolicy] = None,
+            work: Optional[Callable[[], bool]] = None) -> ScheduledGuanaco:
+        """
+        Schedule a Guanaco; its first cycle runs right away, or once the cycle in flight of a removed entry
+        for the same worker finishes. Without a poll policy it polls every sleep_time.
+        A cycle calls guanaco.work() unless another work callable is given.
+        """
+        with self._condition:
+            if worker_id in self._entries and self._entries[worker_id].is_running():
+                raise ValueError(f"Worker for {worker_id} is already scheduled")
+            entry = ScheduledGuanaco(worker_id, guanaco, poll_policy or PollPolicy(sleep_time), work)
+            self._entries[worker_id] = entry
+            if not self._waits_for_retiring(entry):
+                self._push(entry, time.monotonic())
+            return entry
+
+    def remove(self, worker_id: str) -> None:
+        """Unschedule a Guanaco. A cycle already in flight is allowed to finish."""
+        with self._condition:
+            entry = self._entries.pop(worker_id, None)
+            if entry:
+                entry.deactivate()
+                if entry.in_flight:
+                    self._retiring[worker_id] = entry
+                self._condition.notify_all()
+
+    def pause(self, worker_id: str) -> None:
+        """Skip the cycles of a Guanaco until resumed. A cycle already in flight is allowed to finish."""
+        with self._condition:
+            entry = self._get_entry(worker_id)
+            entry._paused = True
+            entry._heap_sequence = None
+            self._condition.notify_all()
+
+    def resume(self, worker_id: str) -> None:
+        """Resume a paused Guanaco; its next cycle runs right away."""
+        with self._condition:
+            entry = self._get_entry(worker_id)
+            if not entry._paused:
+                return
+            entry._paused = False
+            if not entry.in_flight and not self._waits_for_retiring(entry):
+                self._push(entry, time.monotonic())
+
+    def set_poll_policy(self, worker_id: str, poll_policy: PollPolicy) -> None:
+        """Replace the poll policy of a Guanaco; the next cycle is rescheduled with the new policy's interval."""
+        with self._condition:
+            entry = self._get_entry(worker_id)
+            entry.poll_policy = poll_policy
+            if not entry.in_flight and not entry._paused and not self._waits_for_retiring(entry):
+                self._push(entry, time.monotonic() + poll_policy.current_interval)
+
+    def get_entries(self) -> Dict[str, ScheduledGuanaco]:
+        return dict(self._entries)
+
+    def get_in_flight_count(self) -> int:
+        return self._in_flight
+
+    def _get_entry(self, worker_id: str) -> ScheduledGuanaco:
+        # Called with the condition held
+        entry = self._entries.get(worker_id)
+        if entry is None:
+            raise KeyError(f"Worker {worker_id} is not scheduled")
+        return entry
+
+    def _waits_for_retiring(self, entry: ScheduledGuanaco) -> bool:
+        # Called with the condition held. Two entries of one worker never run at once, or a persona could reply twice
+        retiring = self._retiring.get(entry.worker_id)
+        return retiring is not None and retiring is not entry and retiring.in_flight
+
+    def _push(self, entry: ScheduledGuanaco, run_at: float) -> None:
+        # Called with the condition held
+        entry.next_run_at = run_at
+        entry._heap_sequence = next(self._sequence)
+        heapq.heappush(self._heap, (run_at, entry._heap_sequence, entry))
+        self._condition.notify_all()
+
+    def _next_due_entry(self) -> Optional[ScheduledGuanaco]:
+        """Block until a Guanaco is due (returned) or the scheduler stops (None)."""
+        with self._condition:
+            while not self._stopping:
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                run_at, sequence, entry = self._heap[0]
+                if not entry.is_running() or sequence != entry._heap_sequence:
+                    heapq.heappop(self._heap)  # Removed, paused or rescheduled while waiting in the heap
+                    continue
+                delay = run_at - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                heapq.heappop(self._heap)
+                entry._heap_sequence = None
+                entry.in_flight = True
+                return entry
+            return None
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            entry = self._next_due_entry()
+            if entry is None:
+                return
+            # Wait for a free thread so due Guanacos keep their heap order instead of piling up in the executor
+            self._slots.acquire()
+            with self._condition:
+                if self._stopping:
+                    entry.in_flight = False
+                    self._slots.release()
+                    return
+                self._in_flight += 1
+            self._executor.submit(self._run_cycle, entry)
+
+    def _run_cycle(self, entry: ScheduledGuanaco) -> None:
+        started_at = time.monotonic()
+        entry.poll_policy.record_cycle_start(started_at)
+        work_performed = False
+        try:
+            # Root span of the cycle: fetches, model stages and sends run inside it or name it as their parent
+            with get_tracer().start_span("guanaco.cycle", guanaco=entry.worker_id) as span:
+                work_performed = bool(entry.work())
+                span.set_attribute("work_performed", work_performed)
+        except RECOVERABLE_ERRORS as e:
+            entry.last_error = str(e)
+            self.recent_errors.append({"at": time.time(), "source": f"worker:{entry.worker_id}", "error": str(e)})
+            logger.warning("Guanaco worker '%s' failed a cycle, retrying later: %s", entry.worker_id, e)
+        except Exception as e:
+            entry.last_error = str(e)
+            entry.deactivate()
+            self.recent_errors.append({"at": time.time(), "source": f"worker:{entry.worker_id}", "error": str(e)})
+            logger.error("Guanaco worker '%s' encountered an error: %s", entry.worker_id, e)
+        finally:
+            finished_at = time.monotonic()
+            entry.cycles += 1
+            entry.last_cycle_duration = finished_at - started_at
+            self._slots.release()
+            with self._condition:
+                self._in_flight -= 1
+                entry.in_flight = False
+                next_interval = entry.poll_policy.next_interval(work_performed)
+                if entry.is_running() and not entry.is_paused() and not self._stopping:
+                    self._push(entry, finished_at + next_interval)
+                if self._retiring.get(entry.worker_id) is entry:
+                    del self._retiring[entry.worker_id]
+                    successor = self._entries.get(entry.worker_id)
+                    if successor and successor.is_running() and not successor.is_paused() and not self._stopping:
+                        self._push(successor, time.monotonic())
+                self._condition.notify_all()
+
+        if not entry.is_running() and self.on_worker_stopped:
+            self.on_worker_stopped(entry)
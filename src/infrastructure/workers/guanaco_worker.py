@@ -1,12 +1,16 @@
 """
 Infrastructure worker that manages a single Guanaco's execution in an infinite loop.
 Handles technical concerns like threading, process lifecycle, and execution management.
+GuanacosSpits runs its roster through GuanacoScheduler; this worker remains for running a single Guanaco on its own thread.
 """
 
-import time
+import logging
 import threading
 from typing import Optional
 from domain.entities.guanaco.guanaco import Guanaco
+from infrastructure.workers.poll_policy import PollPolicy
+
+logger = logging.getLogger(__name__)
 
 
 class GuanacoWorker:
@@ -21,9 +25,10 @@ class GuanacoWorker:
     - Technical infrastructure concerns
     """
     
-    def __init__(self, guanaco: Guanaco, sleep_time: int = 10):
+    def __init__(self, guanaco: Guanaco, sleep_time: int = 10, poll_policy: Optional[PollPolicy] = None):
         self.guanaco = guanaco
         self.sleep_time = sleep_time
+        self.poll_policy = poll_policy or PollPolicy(sleep_time)
         self._stop_event = threading.Event()
         self._worker_thread: Optional[threading.Thread] = None
         self._is_running = False
@@ -41,19 +46,19 @@ class GuanacoWorker:
         )
         self._worker_thread.start()
         self._is_running = True
-        print(f"[INFO] Guanaco worker '{self.guanaco.name}' started")
+        logger.info("Guanaco worker '%s' started", self.guanaco.name)
     
-    def stop(self) -> None:
-        """Stop the worker gracefully."""
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the worker gracefully, waiting up to timeout seconds for the cycle in progress."""
         if not self._is_running:
             return
         
         self._stop_event.set()
         if self._worker_thread:
-            self._worker_thread.join(timeout=5.0)
+            self._worker_thread.join(timeout=timeout)
         
         self._is_running = False
-        print(f"[INFO] Guanaco worker '{self.guanaco.name}' stopped")
+        logger.info("Guanaco worker '%s' stopped", self.guanaco.name)
     
     def is_running(self) -> bool:
         """Check if the worker is currently running."""
@@ -63,15 +68,13 @@ class GuanacoWorker:
         """Main work loop that executes continuously until stopped."""
         try:
             while not self._stop_event.is_set():
-                self.guanaco.work()
+                self.poll_policy.record_cycle_start()
+                work_performed = bool(self.guanaco.work())
                 
-                # Sleep in small intervals to allow for responsive shutdown
-                elapsed = 0
-                while elapsed < self.sleep_time and not self._stop_event.is_set():
-                    time.sleep(min(1, self.sleep_time - elapsed))
-                    elapsed += 1
+                # Waiting on the stop event keeps shutdown responsive without drifting the interval
+                self._stop_event.wait(self.poll_policy.next_interval(work_performed))
                     
         except Exception as e:
-            print(f"[ERROR] Guanaco worker '{self.guanaco.name}' encountered an error: {e}")
+            logger.error("Guanaco worker '%s' encountered an error: %s", self.guanaco.name, e)
         finally:
             self._is_running = False
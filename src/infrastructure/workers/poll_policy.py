@@ -0,0 +1,88 @@
+"""
+Policies deciding how long a Guanaco waits before polling for messages again,
+keyed off whether its last Guanaco.work() call actually did something.
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class PollPolicy:
+    """Fixed interval policy; base class of the adaptive one. Also keeps the effective interval stats."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.current_interval = interval
+        self.cycles = 0
+        self.active_cycles = 0
+        self.idle_streak = 0
+        self._last_started_at: Optional[float] = None
+        self._effective_interval_total = 0.0
+        self._effective_interval_count = 0
+        self.last_effective_interval: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record_cycle_start(self, started_at: Optional[float] = None) -> None:
+        """Measure the real time between two cycle starts (interval + duration of the work)."""
+        started_at = time.monotonic() if started_at is None else started_at
+        with self._lock:
+            if self._last_started_at is not None:
+                self.last_effective_interval = started_at - self._last_started_at
+                self._effective_interval_total += self.last_effective_interval
+                self._effective_interval_count += 1
+            self._last_started_at = started_at
+
+    def next_interval(self, work_performed: bool) -> float:
+        """Seconds to wait after a cycle that did (or did not) perform work."""
+        with self._lock:
+            self.cycles += 1
+            if work_performed:
+                self.active_cycles += 1
+                self.idle_streak = 0
+            else:
+                self.idle_streak += 1
+            self.current_interval = self._compute_interval(work_performed)
+            return self.current_interval
+
+    def _compute_interval(self, work_performed: bool) -> float:
+        return self.interval
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            average = self._effective_interval_total / self._effective_interval_count if self._effective_interval_count else None
+            return {
+                "cycles": self.cycles,
+                "active_cycles": self.active_cycles,
+                "idle_streak": self.idle_streak,
+                "current_interval": self.current_interval,
+                "last_effective_interval": self.last_effective_interval,
+                "average_effective_interval": average,
+            }
+
+
+class AdaptivePollPolicy(PollPolicy):
+    """
+    Snaps to fast_interval right after a cycle that did work (a conversation is probably going on)
+    and backs off exponentially while idle, up to max_interval.
+    """
+
+    def __init__(self, interval: float, fast_interval: float, max_interval: float, backoff_factor: float = 2.0):
+        if not 0 < fast_interval <= interval <= max_interval:
+            raise ValueError("Intervals must satisfy 0 < fast_interval <= interval <= max_interval")
+        if backoff_factor < 1:
+            raise ValueError("Backoff factor must be at least 1")
+        super().__init__(interval)
+        self.fast_interval = fast_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+
+    @classmethod
+    def from_sleep_time(cls, sleep_time: float) -> "AdaptivePollPolicy":
+        """Ten times faster than sleep_time after activity, up to six times slower when idle."""
+        return cls(interval=sleep_time, fast_interval=sleep_time / 10, max_interval=sleep_time * 6)
+
+    def _compute_interval(self, work_performed: bool) -> float:
+        if work_performed:
+            return self.fast_interval
+        return min(self.max_interval, self.current_interval * self.backoff_factor)
@@ -1,13 +1,90 @@
 from application.use_cases.guanacos_spits import GuanacosSpits
+from application.services.lease_keeper import TopicLeaseClaim, default_owner_id
+from application.services.conversation_memory import ConversationMemory
+from application.services.reply_pipeline import ReplyPipeline
 from infrastructure.repositories.local_guanacos_repository import LocalGuanacosRepository
+from infrastructure.repositories.file_guanacos_repository import FileGuanacosRepository
+from infrastructure.repositories.sqlite_lease_repository import SqliteLeaseRepository
+from infrastructure.repositories.json_reply_journal_repository import JsonReplyJournalRepository
+from infrastructure.config.admin_config import AdminConfig
+from infrastructure.config.logging_config import LoggingConfig
+from infrastructure.config.metrics_config import MetricsConfig
+from infrastructure.config.reply_pipeline_config import ReplyPipelineConfig
+from infrastructure.config.roster_config import RosterConfig
+from infrastructure.config.sharding_config import ShardingConfig
+from infrastructure.config.tracing_config import TracingConfig
+from infrastructure.observability.admin_server import AdminHttpServer
+from infrastructure.observability.metrics import get_metrics_registry
+from infrastructure.observability.prometheus_exporter import build_exporters
+from infrastructure.observability.structured_logging import BackgroundLogging
+from infrastructure.observability.tracing import JsonlSpanExporter, get_tracer
 
 def main():
+    logging_config = LoggingConfig()
+    background_logging = BackgroundLogging(logging_config.log_level, logging_config.log_format)
+    background_logging.start()
+    try:
+        run()
+    finally:
+        # Writes the records still queued
+        background_logging.stop()
+
+def run():
     # Initialize repository and use case following dependency injection principle
-    guanacos_repository = LocalGuanacosRepository()
-    guanacos_spits = GuanacosSpits(guanacos_repository, sleep_time=10)
+    roster_config = RosterConfig()
+    guanacos_repository = FileGuanacosRepository(roster_config.guanacos_file) if roster_config.guanacos_file else LocalGuanacosRepository()
+    sharding_config = ShardingConfig()
+    owner_id = sharding_config.owner_id or default_owner_id()
+    lease_repository = SqliteLeaseRepository(sharding_config.lease_db_path) if sharding_config.shard_mode != "none" else None
+    channel_claim = TopicLeaseClaim(lease_repository, owner_id, sharding_config.lease_ttl) if sharding_config.shard_mode == "topic" else None
+    reply_pipeline_config = ReplyPipelineConfig()
+    guanacos_spits = GuanacosSpits(
+        guanacos_repository,
+        sleep_time=10,
+        pipeline=ReplyPipeline(
+            # Several topics are sent at once; each send worker takes the topic lock
+            send_workers=reply_pipeline_config.channel_concurrency,
+            channel_claim=channel_claim,
+            max_message_age=reply_pipeline_config.max_message_age,
+            shed_policy=reply_pipeline_config.shed_policy,
+            fallback_reply=reply_pipeline_config.fallback_reply,
+            conversation_memory=ConversationMemory(
+                recent_messages=reply_pipeline_config.recent_messages,
+                summary_max_new_tokens=reply_pipeline_config.summary_max_new_tokens,
+            ) if reply_pipeline_config.recent_messages else None,
+        ),
+        lease_repository=lease_repository if sharding_config.shard_mode == "guanaco" else None,
+        owner_id=owner_id,
+        lease_ttl=sharding_config.lease_ttl,
+        drain_timeout=reply_pipeline_config.drain_timeout,
+        reply_journal=JsonReplyJournalRepository(reply_pipeline_config.journal_file),
+        roster_check_interval=roster_config.check_interval,
+        channel_concurrency=reply_pipeline_config.channel_concurrency,
+    )
+    metrics_exporters = build_exporters(get_metrics_registry(), MetricsConfig())
+    admin_config = AdminConfig()
+    admin_server = AdminHttpServer(guanacos_spits, admin_config.admin_host, admin_config.admin_port) if admin_config.admin_port is not None else None
+    tracing_config = TracingConfig()
+    span_exporter = JsonlSpanExporter(tracing_config.trace_file, flush_interval=tracing_config.flush_interval) if tracing_config.trace_file else None
     
     # Start the workers and run until shutdown
-    guanacos_spits.run()
+    for exporter in metrics_exporters:
+        exporter.start()
+    if admin_server:
+        admin_server.start()
+    if span_exporter:
+        span_exporter.start()
+        get_tracer().set_exporter(span_exporter)
+    try:
+        guanacos_spits.run()
+    finally:
+        if span_exporter:
+            get_tracer().set_exporter(None)
+            span_exporter.stop()
+        if admin_server:
+            admin_server.stop()
+        for exporter in metrics_exporters:
+            exporter.stop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
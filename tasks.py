@@ -14,3 +14,31 @@ def test(c):
     # Optionally build a colored HTML report with genhtml if available
     if shutil.which("genhtml"):
         c.run("genhtml lcov.info -o lcov-report")
+
+@task
+def bench_onnx(c, model=None, repeat=3):
+    # Compare PyTorch eager and ONNX Runtime generation on the same prompts
+    model_option = f" --model {model}" if model else ""
+    c.run(f"python benchmarks/compare_think_repositories.py --repeat {repeat}{model_option}")
+
+@task
+def bench(c, quick=False, update_baseline=False):
+    # Offline benchmark of ModelsHandler with tiny random-init models, compared with benchmarks/baseline.json
+    options = ""
+    if quick:
+        options += " --quick"
+    if update_baseline:
+        options += " --update-baseline"
+    c.run(f"python -m benchmarks.models_handler_benchmark{options}")
+
+@task
+def trace_report(c, spans_file="traces.jsonl", group_by=None):
+    # Per-stage latency breakdown of the spans written with TRACE_FILE
+    group_option = f" --group-by {group_by}" if group_by else ""
+    c.run(f"python -m benchmarks.trace_report {spans_file}{group_option}")
+
+@task
+def import_report(c, module="main", budget=None):
+    # Import-time profile of the entry point, checked against the startup budget
+    budget_option = f" --budget {budget}" if budget else ""
+    c.run(f"python -m benchmarks.import_time --module {module}{budget_option}")
@@ -0,0 +1,95 @@
+import pytest
+from datetime import datetime
+from unittest.mock import Mock
+from application.services.admission_filter import RuleAdmissionFilter
+from domain.entities.admission_decision import CANNED, CHEAP, SKIP, THINK
+from domain.entities.channel import Channel
+from domain.entities.chat_message import ChatMessage
+from domain.entities.user import User
+from infrastructure.observability.metrics import MetricsRegistry
+
+PANCHO = User(platform_id=1, platform="zulip", name="Pancho")
+ROSA = User(platform_id=2, platform="zulip", name="Rosa")
+
+
+def make_channel(*messages):
+    """Channel of (sender, content) messages."""
+    return Channel("42", "Lunch", [
+        ChatMessage(id=i, content=content, sender=sender, created_at=datetime(2024, 1, 1)) for i, (sender, content) in enumerate(messages, start=1)
+    ], Mock())
+
+
+class TestRuleAdmissionFilter:
+    def setup_method(self):
+        self.metrics = MetricsRegistry()
+
+    def make_filter(self, **kwargs):
+        return RuleAdmissionFilter(metrics=self.metrics, **kwargs)
+
+    @pytest.mark.parametrize("content, action, rule", [
+        ("<p>ok</p>", SKIP, "acknowledgement"),
+        ("<p>+1</p>", SKIP, "acknowledgement"),
+        ('<p><span aria-label="thumbs up" class="emoji emoji-1f44d" role="img" title="thumbs up">:thumbs_up:</span></p>', SKIP, "emoji_only"),
+        ("<p>🎉🎉</p>", SKIP, "emoji_only"),
+        ("<p>Thanks Pancho!</p>", CANNED, "thanks"),
+        ("<p>Hola Pancho</p>", CHEAP, "greeting"),
+        ("<p>What is a guanaco?</p>", THINK, None),
+        ("<p>ok, but why?</p>", THINK, None),
+    ])
+    def test_should_decide_from_the_unanswered_message(self, content, action, rule):
+        decision = self.make_filter().decide(make_channel((ROSA, content)), PANCHO)
+
+        assert decision.action == action
+        assert decision.rule == rule
+
+    def test_should_answer_thanks_with_the_canned_reply_and_greetings_with_the_cheap_budget(self):
+        admission_filter = self.make_filter(cheap_max_new_tokens=32)
+
+        assert admission_filter.decide(make_channel((ROSA, "gracias")), PANCHO).reply == "You're welcome!"
+        assert admission_filter.decide(make_channel((ROSA, "hello")), PANCHO).max_new_tokens == 32
+
+    def test_should_think_when_a_question_is_followed_by_an_acknowledgement(self):
+        channel = make_channel((PANCHO, "Hi!"), (ROSA, "Where do guanacos live?"), (ROSA, "ok"))
+
+        assert self.make_filter().decide(channel, PANCHO).action == THINK
+
+    def test_should_skip_echoes_of_the_guanaco_own_messages(self):
+        channel = make_channel((ROSA, "hi"), (PANCHO, "<p>Guanacos live in the Andes.</p>"), (ROSA, "<p>guanacos live in  the Andes.</p>"))
+
+        decision = self.make_filter().decide(channel, PANCHO)
+
+        assert (decision.action, decision.rule) == (SKIP, "echo")
+
+    def test_should_send_what_the_classifier_scores_low_to_the_cheap_path(self):
+        classifier = Mock(side_effect=[0.2, 0.9])
+        admission_filter = self.make_filter(classifier=classifier, classifier_threshold=0.5)
+
+        low = admission_filter.decide(make_channel((ROSA, "<p>lol same</p>")), PANCHO)
+        high = admission_filter.decide(make_channel((ROSA, "<p>Can you explain this?</p>")), PANCHO)
+
+        assert (low.action, low.rule) == (CHEAP, "classifier")
+        assert high.action == THINK
+        classifier.assert_any_call("lol same")
+
+    def test_should_not_ask_the_classifier_when_a_rule_matched(self):
+        classifier = Mock(return_value=0.0)
+
+        self.make_filter(classifier=classifier).decide(make_channel((ROSA, "ok")), PANCHO)
+
+        classifier.assert_not_called()
+
+    def test_should_think_when_the_classifier_fails(self):
+        admission_filter = self.make_filter(classifier=Mock(side_effect=RuntimeError("no model")))
+
+        assert admission_filter.decide(make_channel((ROSA, "lol same")), PANCHO).action == THINK
+
+    def test_should_count_the_decisions_per_rule(self):
+        admission_filter = self.make_filter()
+
+        for content in ("ok", "ok", "thanks", "What is a guanaco?"):
+            admission_filter.decide(make_channel((ROSA, content)), PANCHO)
+
+        decisions = self.metrics.get("admission_decisions")
+        assert decisions.get(rule="acknowledgement", action=SKIP) == 2
+        assert decisions.get(rule="thanks", action=CANNED) == 1
+        assert decisions.get(rule="none", action=THINK) == 1
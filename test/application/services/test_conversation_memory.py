@@ -0,0 +1,121 @@
+import pytest
+from datetime import datetime
+from unittest.mock import Mock
+from application.services.conversation_memory import ConversationMemory
+from domain.entities.channel import Channel
+from domain.entities.chat_message import ChatMessage
+from domain.entities.user import User
+from infrastructure.observability.metrics import MetricsRegistry
+
+ANA = User(platform_id=1, platform="zulip", name="Ana")
+
+
+def make_channel(count, topic="General"):
+    messages = [ChatMessage(id=index + 1, content=f"<p>message {index + 1}</p>", sender=ANA, created_at=datetime(2024, 1, 1)) for index in range(count)]
+    return Channel("1", topic, messages, Mock())
+
+
+class TestConversationMemory:
+    def _create_memory(self, **options):
+        self.submitted = []
+        return ConversationMemory(submit=lambda channel, task: self.submitted.append(task) or True, metrics=MetricsRegistry(), **options)
+
+    def test_should_build_the_prompt_from_the_last_messages(self):
+        memory = self._create_memory(recent_messages=2)
+
+        prompt = memory.build_prompt(make_channel(2), Mock())
+
+        assert prompt == "Ana: message 1\nAna: message 2"
+        assert self.submitted == []
+
+    def test_should_fold_older_messages_into_the_summary_in_the_background(self):
+        memory = self._create_memory(recent_messages=2, summary_max_new_tokens=32)
+        think_repository = Mock()
+        think_repository.get_raw_think.return_value = "Ana counted to three."
+        channel = make_channel(5)
+
+        prompt = memory.build_prompt(channel, think_repository)
+
+        # The reply does not wait for the summary
+        assert prompt == "Ana: message 4\nAna: message 5"
+        think_repository.get_raw_think.assert_not_called()
+        assert len(self.submitted) == 1
+        self.submitted[0]()
+        summary_prompt = think_repository.get_raw_think.call_args.args[0]
+        assert "Ana: message 1\nAna: message 2\nAna: message 3" in summary_prompt
+        assert think_repository.get_raw_think.call_args.kwargs == {"max_new_tokens": 32}
+        assert memory.build_prompt(channel, think_repository) == "Summary of the earlier conversation: Ana counted to three.\nAna: message 4\nAna: message 5"
+        assert len(self.submitted) == 1
+
+    def test_should_only_summarize_the_messages_that_left_the_window_since(self):
+        memory = self._create_memory(recent_messages=2)
+        think_repository = Mock()
+        think_repository.get_raw_think.return_value = "Counting."
+        channel = make_channel(4)
+        memory.build_prompt(channel, think_repository)
+        self.submitted.pop()()
+
+        channel.add_message(ChatMessage(id=5, content="message 5", sender=ANA, created_at=datetime(2024, 1, 1)))
+        memory.build_prompt(channel, think_repository)
+        self.submitted.pop()()
+
+        summary_prompt = think_repository.get_raw_think.call_args.args[0]
+        assert "Summary so far: Counting." in summary_prompt
+        assert "Ana: message 3" in summary_prompt
+        assert "message 2" not in summary_prompt
+
+    def test_should_keep_the_prompt_bounded_however_long_the_topic(self):
+        memory = self._create_memory(recent_messages=3, max_summary_chars=50)
+        think_repository = Mock()
+        think_repository.get_raw_think.return_value = "x" * 500
+
+        for count in (10, 100, 1000):
+            memory.build_prompt(make_channel(count), think_repository)
+            while self.submitted:
+                self.submitted.pop()()
+
+        prompt = memory.build_prompt(make_channel(5000), think_repository)
+        assert len(prompt) <= len("Summary of the earlier conversation: ") + 50 + 3 * len("\nAna: message 5000")
+
+    def test_should_keep_the_continuation_when_the_model_echoes_the_prompt(self):
+        memory = self._create_memory(recent_messages=1)
+        think_repository = Mock()
+        think_repository.get_raw_think.side_effect = lambda prompt, max_new_tokens: f"{prompt} Ana said hi twice."
+        memory.build_prompt(make_channel(3), think_repository)
+        self.submitted.pop()()
+
+        assert memory.get_summary("1", "General") == "Ana said hi twice."
+
+    def test_should_keep_the_previous_summary_and_retry_when_the_update_fails(self):
+        memory = self._create_memory(recent_messages=1)
+        think_repository = Mock()
+        think_repository.get_raw_think.side_effect = RuntimeError("model busy")
+        channel = make_channel(3)
+        memory.build_prompt(channel, think_repository)
+
+        self.submitted.pop()()
+
+        assert memory.get_summary("1", "General") == ""
+        memory.build_prompt(channel, think_repository)
+        assert len(self.submitted) == 1
+
+    def test_should_retry_on_the_next_reply_when_the_update_cannot_be_submitted(self):
+        submit = Mock(return_value=False)
+        memory = ConversationMemory(recent_messages=1, submit=submit, metrics=MetricsRegistry())
+        channel = make_channel(3)
+
+        memory.build_prompt(channel, Mock())
+        memory.build_prompt(channel, Mock())
+
+        assert submit.call_count == 2
+
+    def test_should_forget_the_least_recently_used_topics(self):
+        memory = self._create_memory(recent_messages=1, max_topics=2)
+        for topic in ("a", "b", "c"):
+            memory.build_prompt(make_channel(1, topic), Mock())
+
+        assert memory.get_cache_sizes() == {"conversation_summaries": 2}
+
+    def test_should_reject_an_empty_window(self):
+        with pytest.raises(ValueError, match="Invalid recent messages: 0"):
+            ConversationMemory(recent_messages=0)
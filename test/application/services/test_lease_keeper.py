@@ -0,0 +1,123 @@
+import time
+from unittest.mock import Mock
+from types import SimpleNamespace
+from application.services.lease_keeper import LeaseKeeper, TopicLeaseClaim, default_owner_id
+from infrastructure.repositories.in_memory_lease_repository import InMemoryLeaseRepository
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLeaseKeeper:
+    def test_should_renew_every_third_of_the_ttl(self):
+        keeper = LeaseKeeper(InMemoryLeaseRepository(), "a", ttl=30)
+
+        assert keeper.heartbeat_interval == 10
+
+    def test_should_acquire_free_candidates_on_heartbeat(self):
+        on_acquired = Mock()
+        keeper = LeaseKeeper(InMemoryLeaseRepository(), "a", ttl=30, on_acquired=on_acquired)
+        keeper.add_candidate("guanaco:Pancho")
+
+        keeper.heartbeat()
+
+        assert keeper.owns("guanaco:Pancho")
+        on_acquired.assert_called_once_with("guanaco:Pancho")
+
+    def test_should_keep_candidates_owned_by_others_on_standby(self):
+        repository = InMemoryLeaseRepository()
+        repository.acquire("guanaco:Pancho", "b", 30)
+        keeper = LeaseKeeper(repository, "a", ttl=30)
+        keeper.add_candidate("guanaco:Pancho")
+
+        keeper.heartbeat()
+
+        assert not keeper.owns("guanaco:Pancho")
+        assert keeper.get_standby() == {"guanaco:Pancho"}
+
+    def test_should_take_over_when_the_owner_stops_renewing(self):
+        clock = FakeClock()
+        repository = InMemoryLeaseRepository(clock=clock)
+        repository.acquire("guanaco:Pancho", "b", 30)
+        on_acquired = Mock()
+        keeper = LeaseKeeper(repository, "a", ttl=30, on_acquired=on_acquired)
+        keeper.add_candidate("guanaco:Pancho")
+        keeper.heartbeat()
+
+        clock.now += 31
+        keeper.heartbeat()
+
+        assert keeper.owns("guanaco:Pancho")
+        on_acquired.assert_called_once_with("guanaco:Pancho")
+
+    def test_should_report_leases_lost_to_another_owner(self):
+        clock = FakeClock()
+        repository = InMemoryLeaseRepository(clock=clock)
+        on_lost = Mock()
+        keeper = LeaseKeeper(repository, "a", ttl=30, on_lost=on_lost)
+        keeper.add_candidate("guanaco:Pancho")
+        keeper.heartbeat()
+
+        # A paused process misses its renewals and another one takes over
+        clock.now += 31
+        repository.acquire("guanaco:Pancho", "b", 30)
+        keeper.heartbeat()
+
+        on_lost.assert_called_once_with("guanaco:Pancho")
+        assert not keeper.owns("guanaco:Pancho")
+        assert keeper.get_standby() == {"guanaco:Pancho"}
+
+    def test_should_release_owned_leases_on_stop(self):
+        repository = InMemoryLeaseRepository()
+        keeper = LeaseKeeper(repository, "a", ttl=30)
+        keeper.add_candidate("guanaco:Pancho")
+        keeper.heartbeat()
+        keeper.start()
+
+        keeper.stop()
+
+        assert repository.get_owner("guanaco:Pancho") is None
+        assert keeper.get_owned() == set()
+
+    def test_should_release_lease_when_removing_a_candidate(self):
+        repository = InMemoryLeaseRepository()
+        keeper = LeaseKeeper(repository, "a", ttl=30)
+        keeper.add_candidate("guanaco:Pancho")
+        keeper.heartbeat()
+
+        keeper.remove_candidate("guanaco:Pancho")
+
+        assert repository.get_owner("guanaco:Pancho") is None
+        assert keeper.get_standby() == set()
+
+    def test_should_heartbeat_in_background(self):
+        repository = Mock(renew=Mock(return_value=[]), acquire=Mock(return_value=True))
+        keeper = LeaseKeeper(repository, "a", ttl=0.03)
+        keeper.add_candidate("guanaco:Pancho")
+
+        keeper.start()
+        deadline = time.monotonic() + 2
+        while not repository.renew.called and time.monotonic() < deadline:
+            time.sleep(0.005)
+        keeper.stop()
+
+        repository.acquire.assert_called_with("guanaco:Pancho", "a", 0.03)
+        assert repository.renew.called
+
+    def test_should_use_hostname_and_pid_as_default_owner(self):
+        assert default_owner_id().endswith(f":{__import__('os').getpid()}")
+
+
+class TestTopicLeaseClaim:
+    def test_should_claim_each_topic_for_a_single_owner(self):
+        repository = InMemoryLeaseRepository()
+        job = SimpleNamespace(key=("Pancho", "1", "General"))
+
+        assert TopicLeaseClaim(repository, "a")(job) is True
+        assert TopicLeaseClaim(repository, "b")(job) is False
+        assert repository.get_owner("topic:Pancho:1:General") == "a"
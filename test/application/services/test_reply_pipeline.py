@@ -0,0 +1,526 @@
+import pytest
+import time
+import threading
+from unittest.mock import Mock, patch
+from types import SimpleNamespace
+from datetime import datetime
+from application.services.reply_pipeline import ReplyPipeline, ReplyJob
+from domain.entities.admission_decision import CANNED, CHEAP, SKIP, AdmissionDecision
+from infrastructure.observability.metrics import MetricsRegistry
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def make_channel(channel_id, topic="General", unanswered=None):
+    return Mock(
+        get_id=Mock(return_value=channel_id),
+        get_topic=Mock(return_value=topic),
+        get_unanswered_messages=Mock(return_value=unanswered or []),
+    )
+
+
+def make_message(created_at, is_private=False, is_mention=False):
+    return SimpleNamespace(created_at=datetime.fromtimestamp(created_at), is_private=is_private, is_mention=is_mention)
+
+
+def make_guanaco(channels, think=None):
+    return SimpleNamespace(
+        name="Pancho",
+        user=None,
+        get_channels_to_answer=Mock(return_value=channels),
+        admit=Mock(return_value=AdmissionDecision()),
+        think=Mock(side_effect=think or (lambda channel: f"reply to {channel.get_id()}")),
+    )
+
+
+class TestReplyPipeline:
+    def test_should_think_and_send_a_reply_for_each_fetched_channel(self):
+        channels = [make_channel("1"), make_channel("2")]
+        guanaco = make_guanaco(channels)
+        pipeline = ReplyPipeline()
+        pipeline.start()
+
+        assert pipeline.fetch(guanaco) is True
+
+        assert wait_until(lambda: all(channel.respond.called for channel in channels))
+        pipeline.stop()
+        channels[0].respond.assert_called_once_with("reply to 1")
+        channels[1].respond.assert_called_once_with("reply to 2")
+        assert pipeline.get_queue_depths() == {"inference": 0, "send": 0, "in_flight": 0}
+
+    def test_should_send_several_topics_at_once_but_one_reply_at_a_time_per_topic(self):
+        from domain.entities.guanaco.topic_locks import TopicLocks
+        release = threading.Event()
+        sending = []
+
+        def make_blocking_channel(channel_id):
+            channel = make_channel(channel_id)
+            channel.respond.side_effect = lambda reply: (sending.append(channel_id), release.wait(2))
+            return channel
+
+        pancho = make_guanaco([make_blocking_channel("1")])
+        lola = make_guanaco([make_blocking_channel("1"), make_blocking_channel("2")])
+        lola.name = "Lola"
+        pipeline = ReplyPipeline(send_workers=3, topic_locks=TopicLocks())
+        pipeline.start()
+
+        pipeline.fetch(pancho)
+        pipeline.fetch(lola)
+
+        # Topic 2 is sent while topic 1 is still sending, but the second reply to topic 1 waits for the first
+        assert wait_until(lambda: sorted(sending) == ["1", "2"])
+        time.sleep(0.05)
+        assert sorted(sending) == ["1", "2"]
+        release.set()
+        assert wait_until(lambda: sorted(sending) == ["1", "1", "2"])
+        pipeline.stop()
+
+    def test_should_return_false_when_nothing_to_answer(self):
+        pipeline = ReplyPipeline()
+
+        assert pipeline.fetch(make_guanaco([])) is False
+
+    def test_should_not_queue_a_channel_already_in_flight(self):
+        channel = make_channel("1")
+        guanaco = make_guanaco([channel])
+        pipeline = ReplyPipeline()
+
+        assert pipeline.fetch(guanaco) is True
+        assert pipeline.fetch(guanaco) is False
+        assert pipeline.get_queue_depths()["inference"] == 1
+
+    def test_should_fetch_other_channels_while_thinking(self):
+        thinking = threading.Event()
+        release = threading.Event()
+
+        def slow_think(channel):
+            thinking.set()
+            release.wait(timeout=2)
+            return "slow reply"
+
+        first = make_guanaco([make_channel("1")], think=slow_think)
+        second = make_guanaco([make_channel("2")])
+        pipeline = ReplyPipeline()
+        pipeline.start()
+
+        pipeline.fetch(first)
+        assert thinking.wait(timeout=1)
+        # The model is busy with channel 1, yet channel 2 is fetched and queued
+        assert pipeline.fetch(second) is True
+        assert pipeline.get_queue_depths()["inference"] == 1
+        release.set()
+        pipeline.stop()
+
+    def test_should_block_fetching_when_the_inference_queue_is_full(self):
+        guanaco = make_guanaco([make_channel("1"), make_channel("2")])
+        pipeline = ReplyPipeline(max_pending_inference=1)
+        fetch_done = threading.Event()
+
+        threading.Thread(target=lambda: (pipeline.fetch(guanaco), fetch_done.set()), daemon=True).start()
+
+        assert not fetch_done.wait(timeout=0.2)
+        # Stopping releases the blocked fetch and forgets the job it could not queue
+        pipeline.stop()
+        assert fetch_done.wait(timeout=1)
+        assert pipeline.get_queue_depths()["in_flight"] == 1
+
+    def test_should_release_channel_when_thinking_fails(self):
+        channel = make_channel("1")
+        guanaco = make_guanaco([channel], think=Mock(side_effect=Exception("Model failed")))
+        pipeline = ReplyPipeline()
+        pipeline.start()
+
+        pipeline.fetch(guanaco)
+
+        assert wait_until(lambda: pipeline.get_queue_depths()["in_flight"] == 0)
+        pipeline.stop()
+        channel.respond.assert_not_called()
+
+    def test_should_release_channel_when_sending_fails(self):
+        channel = make_channel("1")
+        channel.respond.side_effect = Exception("Zulip down")
+        pipeline = ReplyPipeline()
+        pipeline.start()
+
+        pipeline.fetch(make_guanaco([channel]))
+
+        assert wait_until(lambda: channel.respond.called and pipeline.get_queue_depths()["in_flight"] == 0)
+        pipeline.stop()
+        assert [error["error"] for error in pipeline.recent_errors] == ["Zulip down"]
+        assert pipeline.recent_errors[0]["source"].startswith("send:")
+
+    def test_should_raise_error_when_starting_twice(self):
+        pipeline = ReplyPipeline()
+        pipeline.start()
+
+        with pytest.raises(ValueError, match="Reply pipeline is already running"):
+            pipeline.start()
+        pipeline.stop()
+
+    def test_should_key_jobs_by_guanaco_stream_and_topic(self):
+        job = ReplyJob(make_guanaco([]), make_channel("42", "Lunch"))
+
+        assert job.key == ("Pancho", "42", "Lunch")
+
+    def test_should_skip_channels_that_cannot_be_claimed(self):
+        channels = [make_channel("1"), make_channel("2")]
+        guanaco = make_guanaco(channels)
+        pipeline = ReplyPipeline(channel_claim=lambda job: job.key[1] == "1")
+
+        assert pipeline.fetch(guanaco) is True
+
+        assert pipeline.get_queue_depths() == {"inference": 1, "send": 0, "in_flight": 1}
+
+    def test_should_drop_reply_when_claim_is_lost_before_sending(self):
+        channel = make_channel("1")
+        claims = iter([True, False])
+        pipeline = ReplyPipeline(channel_claim=lambda job: next(claims))
+        pipeline.start()
+
+        pipeline.fetch(make_guanaco([channel]))
+
+        assert wait_until(lambda: pipeline.get_queue_depths()["in_flight"] == 0)
+        pipeline.stop()
+        channel.respond.assert_not_called()
+
+    def test_should_mark_jobs_with_private_messages_or_mentions_as_urgent(self):
+        normal = ReplyJob(make_guanaco([]), make_channel("1", unanswered=[make_message(100)]))
+        private = ReplyJob(make_guanaco([]), make_channel("1", unanswered=[make_message(100, is_private=True)]))
+        mention = ReplyJob(make_guanaco([]), make_channel("1", unanswered=[make_message(100), make_message(200, is_mention=True)]))
+
+        assert normal.priority == "normal"
+        assert private.priority == "urgent"
+        assert mention.priority == "urgent"
+        assert mention.waiting_since == 100
+
+    def test_should_think_urgent_jobs_before_older_normal_ones(self):
+        thought = []
+        channels = [
+            make_channel("1", "Chatter", unanswered=[make_message(100)]),
+            make_channel("2", "Question", unanswered=[make_message(200, is_mention=True)]),
+        ]
+        pipeline = ReplyPipeline(metrics=MetricsRegistry())
+
+        pipeline.fetch(make_guanaco(channels, think=lambda channel: thought.append(channel.get_topic())))
+        assert pipeline.get_inference_queue_sizes() == {"urgent": 1, "normal": 1, "background": 0}
+        pipeline.start()
+
+        assert wait_until(lambda: len(thought) == 2)
+        pipeline.stop()
+        assert thought == ["Question", "Chatter"]
+
+    def test_should_record_queue_wait_by_priority_class(self):
+        registry = MetricsRegistry()
+        channel = make_channel("1", unanswered=[make_message(100, is_private=True)])
+        pipeline = ReplyPipeline(metrics=registry)
+        pipeline.start()
+
+        pipeline.fetch(make_guanaco([channel]))
+
+        assert wait_until(lambda: channel.respond.called)
+        pipeline.stop()
+        assert registry.get("reply_jobs").get(priority="urgent") == 1
+        assert registry.get("reply_queue_wait_seconds").get(priority="urgent")["count"] == 1
+        assert registry.get("reply_message_age_seconds").get(priority="urgent")["count"] == 1
+        assert registry.get("reply_queue_wait_seconds").get(priority="normal")["count"] == 0
+
+    def test_should_coalesce_a_waiting_topic_into_its_newest_fetch(self):
+        registry = MetricsRegistry()
+        thought = []
+        old_channel = make_channel("1", "Lunch")
+        new_channel = make_channel("1", "Lunch")
+        pipeline = ReplyPipeline(metrics=registry)
+
+        pipeline.fetch(make_guanaco([old_channel]))
+        pipeline.fetch(make_guanaco([new_channel], think=lambda channel: thought.append(channel) or "reply"))
+        assert pipeline.get_queue_depths() == {"inference": 1, "send": 0, "in_flight": 1}
+        pipeline.start()
+
+        assert wait_until(lambda: new_channel.respond.called)
+        pipeline.stop()
+        assert thought == [new_channel]
+        old_channel.respond.assert_not_called()
+        assert registry.get("reply_jobs_coalesced").get() == 1
+
+    def test_should_keep_the_admission_decision_of_the_coalesced_job(self):
+        registry = MetricsRegistry()
+        new_channel = make_channel("1", "Lunch")
+        pipeline = ReplyPipeline(metrics=registry)
+        pipeline.fetch(make_guanaco([make_channel("1", "Lunch")]))
+        guanaco = make_guanaco([new_channel], think=lambda channel, **kwargs: "¡Hola!")
+        guanaco.admit.return_value = AdmissionDecision(CHEAP, rule="greeting", max_new_tokens=48)
+
+        pipeline.fetch(guanaco)
+        pipeline.start()
+
+        assert wait_until(lambda: new_channel.respond.called)
+        pipeline.stop()
+        guanaco.admit.assert_called_once_with(new_channel)
+        guanaco.think.assert_called_once_with(new_channel, max_new_tokens=48)
+        assert registry.get("reply_jobs").get(priority="normal") == 2
+
+    def test_should_not_coalesce_a_topic_already_being_thought(self):
+        thinking = threading.Event()
+        release = threading.Event()
+        channel = make_channel("1", "Lunch")
+        pipeline = ReplyPipeline()
+        pipeline.start()
+
+        pipeline.fetch(make_guanaco([channel], think=lambda channel: (thinking.set(), release.wait(2), "reply")[-1]))
+        assert thinking.wait(2)
+        assert pipeline.fetch(make_guanaco([make_channel("1", "Lunch")])) is False
+        assert pipeline.get_queue_depths()["inference"] == 0
+
+        release.set()
+        assert wait_until(lambda: channel.respond.called)
+        pipeline.stop()
+
+    def test_should_answer_stale_messages_with_the_fallback_reply(self):
+        registry = MetricsRegistry()
+        channel = make_channel("1", unanswered=[make_message(time.time() - 120)])
+        guanaco = make_guanaco([channel])
+        pipeline = ReplyPipeline(metrics=registry, max_message_age=60, fallback_reply="Too late!")
+        pipeline.start()
+
+        pipeline.fetch(guanaco)
+
+        assert wait_until(lambda: channel.respond.called)
+        pipeline.stop()
+        channel.respond.assert_called_once_with("Too late!")
+        guanaco.think.assert_not_called()
+        assert registry.get("reply_jobs_shed").get(policy="fallback") == 1
+
+    @pytest.mark.parametrize("decision", [
+        AdmissionDecision(SKIP, rule="acknowledgement"),
+        AdmissionDecision(CANNED, rule="thanks", reply="You're welcome!"),
+    ])
+    def test_should_send_without_thinking_what_the_admission_stage_answers(self, decision):
+        registry = MetricsRegistry()
+        channel = make_channel("1")
+        guanaco = make_guanaco([channel])
+        guanaco.admit.return_value = decision
+        pipeline = ReplyPipeline(metrics=registry)
+        pipeline.start()
+
+        assert pipeline.fetch(guanaco) is False
+
+        assert wait_until(lambda: channel.mark_as_read.called or channel.respond.called)
+        pipeline.stop()
+        guanaco.think.assert_not_called()
+        if decision.reply:
+            channel.respond.assert_called_once_with("You're welcome!")
+        else:
+            channel.mark_as_read.assert_called_once()
+            channel.respond.assert_not_called()
+
+    def test_should_think_with_the_cheap_budget_decided_by_the_admission_stage(self):
+        channel = make_channel("1")
+        guanaco = make_guanaco([channel], think=lambda channel, **kwargs: "¡Hola!")
+        guanaco.admit.return_value = AdmissionDecision(CHEAP, rule="greeting", max_new_tokens=48)
+        pipeline = ReplyPipeline(metrics=MetricsRegistry())
+        pipeline.start()
+
+        pipeline.fetch(guanaco)
+
+        assert wait_until(lambda: channel.respond.called)
+        pipeline.stop()
+        guanaco.think.assert_called_once_with(channel, max_new_tokens=48)
+        channel.respond.assert_called_once_with("¡Hola!")
+
+    def test_should_mark_stale_messages_as_read_when_skipping(self):
+        registry = MetricsRegistry()
+        channel = make_channel("1", unanswered=[make_message(time.time() - 120)])
+        pipeline = ReplyPipeline(metrics=registry, max_message_age=60, shed_policy="skip")
+        pipeline.start()
+
+        pipeline.fetch(make_guanaco([channel]))
+
+        assert wait_until(lambda: channel.mark_as_read.called)
+        pipeline.stop()
+        channel.respond.assert_not_called()
+        assert registry.get("reply_jobs_shed").get(policy="skip") == 1
+
+    def test_should_shed_jobs_that_became_stale_while_waiting(self):
+        channel = make_channel("1", unanswered=[make_message(time.time() - 5)])
+        guanaco = make_guanaco([channel])
+        pipeline = ReplyPipeline(metrics=MetricsRegistry(), max_message_age=10, shed_policy="skip")
+
+        pipeline.fetch(guanaco)
+        pipeline.max_message_age = 1
+        pipeline.start()
+
+        assert wait_until(lambda: channel.mark_as_read.called)
+        pipeline.stop()
+        guanaco.think.assert_not_called()
+
+    def test_should_reply_normally_to_recent_messages(self):
+        channel = make_channel("1", unanswered=[make_message(time.time())])
+        pipeline = ReplyPipeline(metrics=MetricsRegistry(), max_message_age=60)
+        pipeline.start()
+
+        pipeline.fetch(make_guanaco([channel]))
+
+        assert wait_until(lambda: channel.respond.called)
+        pipeline.stop()
+        channel.respond.assert_called_once_with("reply to 1")
+
+    def test_should_raise_error_when_shed_policy_is_unknown(self):
+        with pytest.raises(ValueError, match="Invalid shed policy: drop. Expected one of: fallback, skip."):
+            ReplyPipeline(shed_policy="drop")
+
+    def test_should_wait_for_in_flight_replies_when_draining(self):
+        channel = make_channel("1")
+        guanaco = make_guanaco([channel], think=lambda channel: (time.sleep(0.1), "reply")[-1])
+        pipeline = ReplyPipeline(metrics=MetricsRegistry())
+        pipeline.start()
+        pipeline.fetch(guanaco)
+
+        assert pipeline.drain(timeout=2) == []
+
+        channel.respond.assert_called_once_with("reply")
+        assert pipeline.fetch(make_guanaco([make_channel("2")])) is False
+
+    def test_should_return_unfinished_replies_after_the_drain_deadline(self):
+        release = threading.Event()
+        channels = [make_channel("1", "Lunch", unanswered=[make_message(100)]), make_channel("2", "Dinner", unanswered=[make_message(200)])]
+        pipeline = ReplyPipeline(metrics=MetricsRegistry())
+        pipeline.start()
+        pipeline.fetch(make_guanaco(channels, think=lambda channel: (release.wait(2), "reply")[-1]))
+
+        unfinished = pipeline.drain(timeout=0.05)
+        release.set()
+
+        assert sorted(pending.key for pending in unfinished) == [("Pancho", "1", "Lunch"), ("Pancho", "2", "Dinner")]
+        assert {pending.triggered_at for pending in unfinished} == {100, 200}
+
+    def test_should_send_a_resumed_reply_without_thinking_again(self):
+        from domain.entities.pending_reply import PendingReply
+        registry = MetricsRegistry()
+        unchanged = make_channel("1", "Lunch", unanswered=[make_message(100)])
+        changed = make_channel("2", "Dinner", unanswered=[make_message(300)])
+        guanaco = make_guanaco([unchanged, changed])
+        pipeline = ReplyPipeline(metrics=registry)
+        pipeline.resume([PendingReply("Pancho", "1", "Lunch", 100, "Tacos"), PendingReply("Pancho", "2", "Dinner", 200, "Pizza")])
+        pipeline.start()
+
+        pipeline.fetch(guanaco)
+
+        assert wait_until(lambda: unchanged.respond.called and changed.respond.called)
+        pipeline.stop()
+        unchanged.respond.assert_called_once_with("Tacos")
+        changed.respond.assert_called_once_with("reply to 2")
+        guanaco.think.assert_called_once_with(changed)
+        assert registry.get("reply_jobs_resumed").get() == 1
+
+    def test_should_leave_the_channel_for_later_when_the_quota_is_exceeded(self):
+        from domain.errors import QuotaExceededError
+        channel = make_channel("1")
+
+        def think(channel):
+            raise QuotaExceededError("Guanaco 'Pancho' exceeded its tokens quota")
+
+        pipeline = ReplyPipeline(metrics=MetricsRegistry())
+        pipeline.start()
+
+        pipeline.fetch(make_guanaco([channel], think=think))
+
+        assert wait_until(lambda: pipeline.get_queue_depths()["in_flight"] == 0)
+        pipeline.stop()
+        channel.respond.assert_not_called()
+        channel.mark_as_read.assert_not_called()
+
+    def test_should_not_fetch_a_topic_again_until_the_quota_can_grant_it(self):
+        from domain.errors import QuotaExceededError
+        registry = MetricsRegistry()
+        channel = make_channel("1")
+        attempts = []
+
+        def think(channel):
+            attempts.append(channel)
+            raise QuotaExceededError("Guanaco 'Pancho' exceeded its tokens quota", retry_after=0.3)
+
+        guanaco = make_guanaco([channel], think=think)
+        pipeline = ReplyPipeline(metrics=registry)
+        pipeline.start()
+
+        pipeline.fetch(guanaco)
+        assert wait_until(lambda: pipeline.get_queue_depths()["in_flight"] == 0)
+        assert pipeline.fetch(guanaco) is False
+        assert registry.get("reply_jobs_deferred").get() == 1
+        time.sleep(0.3)
+        assert pipeline.fetch(guanaco) is True
+
+        assert wait_until(lambda: len(attempts) == 2)
+        pipeline.stop()
+
+    def test_should_trace_think_and_send_under_the_fetching_cycle(self):
+        from infrastructure.observability.tracing import Tracer
+        spans = []
+        tracer = Tracer(SimpleNamespace(export=spans.append))
+        channel = make_channel("1", "Lunch")
+        pipeline = ReplyPipeline(metrics=MetricsRegistry())
+        pipeline.start()
+
+        with patch("application.services.reply_pipeline.get_tracer", return_value=tracer):
+            with tracer.start_span("guanaco.cycle") as cycle:
+                pipeline.fetch(make_guanaco([channel]))
+            assert wait_until(lambda: len(spans) == 3)
+        pipeline.stop()
+
+        stages = {span.name: span for span in spans}
+        assert stages["reply.think"].parent_id == cycle.span_id
+        assert stages["reply.send"].parent_id == cycle.span_id
+        assert stages["reply.send"].attributes == {"guanaco": "Pancho", "stream": "1", "topic": "Lunch", "priority": "normal", "shed": False}
+
+    def test_should_think_on_the_prompt_built_by_the_conversation_memory(self):
+        channel = make_channel("1")
+        guanaco = make_guanaco([channel], think=lambda channel, prompt=None: f"reply to {prompt}")
+        guanaco.think_repository = Mock()
+        conversation_memory = Mock()
+        conversation_memory.build_prompt.return_value = "Summary of the earlier conversation: guanacos\nAna: hola"
+        pipeline = ReplyPipeline(conversation_memory=conversation_memory, metrics=MetricsRegistry())
+        pipeline.start()
+
+        pipeline.fetch(guanaco)
+
+        assert wait_until(lambda: channel.respond.called)
+        pipeline.stop()
+        conversation_memory.build_prompt.assert_called_once_with(channel, guanaco.think_repository)
+        channel.respond.assert_called_once_with("reply to Summary of the earlier conversation: guanacos\nAna: hola")
+        assert conversation_memory.submit == pipeline.submit_background
+
+    def test_should_run_background_work_only_when_no_reply_is_waiting(self):
+        order = []
+        release = threading.Event()
+        first = make_channel("1")
+        second = make_channel("2")
+
+        def think(channel, prompt=None):
+            if channel is first:
+                release.wait(2)
+            order.append(f"reply {channel.get_id()}")
+            return "reply"
+
+        pipeline = ReplyPipeline(metrics=MetricsRegistry())
+        pipeline.start()
+        pipeline.fetch(make_guanaco([first], think=think))
+        assert wait_until(lambda: pipeline.get_inference_queue_sizes()["normal"] == 0)
+        # While the first reply is thought, a summary and another reply wait: the reply goes first
+        assert pipeline.submit_background(make_channel("3"), lambda: order.append("summary")) is True
+        pipeline.fetch(make_guanaco([second], think=think))
+        release.set()
+
+        assert wait_until(lambda: len(order) == 3)
+        pipeline.stop()
+        assert order == ["reply 1", "reply 2", "summary"]
+
+    def test_should_refuse_background_work_once_intake_is_closed(self):
+        pipeline = ReplyPipeline(metrics=MetricsRegistry())
+        pipeline.close_intake()
+
+        assert pipeline.submit_background(make_channel("1"), Mock()) is False
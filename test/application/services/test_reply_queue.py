@@ -0,0 +1,150 @@
+import pytest
+import queue
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import Mock
+from application.services.reply_queue import BACKGROUND, NORMAL, URGENT, PriorityReplyQueue
+
+
+def make_job(stream, priority=NORMAL, waiting_since=0.0, name=None, topic=None):
+    return SimpleNamespace(
+        key=("Pancho", stream, topic or object()),
+        name=name or f"{stream}-{waiting_since}",
+        priority=priority,
+        waiting_since=waiting_since,
+        channel=Mock(get_id=Mock(return_value=stream)),
+    )
+
+
+def drain(reply_queue):
+    names = []
+    while reply_queue.qsize():
+        names.append(reply_queue.get(timeout=0).name)
+    return names
+
+
+class TestPriorityReplyQueue:
+    def test_should_serve_urgent_jobs_before_normal_ones(self):
+        reply_queue = PriorityReplyQueue(maxsize=0)
+        reply_queue.put(make_job("1", name="normal"))
+        reply_queue.put(make_job("2", URGENT, name="mention"))
+
+        assert drain(reply_queue) == ["mention", "normal"]
+
+    def test_should_serve_the_longest_waiting_job_of_a_stream_first(self):
+        reply_queue = PriorityReplyQueue(maxsize=0)
+        reply_queue.put(make_job("1", waiting_since=20, name="recent"))
+        reply_queue.put(make_job("1", waiting_since=10, name="old"))
+
+        assert drain(reply_queue) == ["old", "recent"]
+
+    def test_should_not_let_a_chatty_stream_starve_a_quiet_one(self):
+        reply_queue = PriorityReplyQueue(maxsize=0)
+        for index in range(5):
+            reply_queue.put(make_job("chatty", waiting_since=index, name=f"chatty{index}"))
+        reply_queue.put(make_job("quiet", waiting_since=100, name="quiet"))
+
+        assert drain(reply_queue).index("quiet") <= 1
+
+    def test_should_share_between_streams_according_to_their_weights(self):
+        reply_queue = PriorityReplyQueue(maxsize=0, stream_weights={"heavy": 3})
+        for index in range(6):
+            reply_queue.put(make_job("heavy", waiting_since=index, name="heavy"))
+            reply_queue.put(make_job("light", waiting_since=index, name="light"))
+
+        assert drain(reply_queue)[:8].count("heavy") == 6
+
+    def test_should_not_give_credit_to_a_stream_for_its_idle_time(self):
+        reply_queue = PriorityReplyQueue(maxsize=0)
+        for index in range(4):
+            reply_queue.put(make_job("busy", waiting_since=index, name="busy"))
+        drain(reply_queue)
+        reply_queue.put(make_job("busy", waiting_since=10, name="busy"))
+        reply_queue.put(make_job("busy", waiting_since=11, name="busy"))
+        reply_queue.put(make_job("new", waiting_since=12, name="new"))
+        reply_queue.put(make_job("new", waiting_since=13, name="new"))
+
+        # The new stream joins at the current virtual time: it goes next, then both alternate
+        assert drain(reply_queue) == ["new", "busy", "new", "busy"]
+
+    def test_should_serve_background_jobs_only_when_no_reply_is_waiting(self):
+        reply_queue = PriorityReplyQueue(maxsize=0)
+        reply_queue.put(make_job("1", BACKGROUND, name="summary"))
+        reply_queue.put(make_job("2", name="normal"))
+        reply_queue.put(make_job("3", URGENT, name="mention"))
+
+        assert drain(reply_queue) == ["mention", "normal", "summary"]
+
+    def test_should_keep_room_for_replies_when_background_jobs_fill_their_slots(self):
+        reply_queue = PriorityReplyQueue(maxsize=1)
+        reply_queue.put(make_job("1", BACKGROUND, name="summary"))
+
+        with pytest.raises(queue.Full):
+            reply_queue.put(make_job("1", BACKGROUND, name="another summary"), block=False)
+        reply_queue.put(make_job("2", name="normal"), block=False)
+        assert reply_queue.get_sizes() == {URGENT: 0, NORMAL: 1, BACKGROUND: 1}
+
+    def test_should_raise_full_when_normal_jobs_fill_the_queue(self):
+        reply_queue = PriorityReplyQueue(maxsize=1)
+        reply_queue.put(make_job("1"))
+
+        with pytest.raises(queue.Full):
+            reply_queue.put(make_job("2"), timeout=0.01)
+
+    def test_should_admit_urgent_jobs_in_the_headroom_of_a_full_queue(self):
+        reply_queue = PriorityReplyQueue(maxsize=1, urgent_headroom=1)
+        reply_queue.put(make_job("1"))
+
+        reply_queue.put(make_job("2", URGENT), timeout=0.01)
+
+        assert reply_queue.get_sizes() == {URGENT: 1, NORMAL: 1, BACKGROUND: 0}
+        with pytest.raises(queue.Full):
+            reply_queue.put(make_job("3", URGENT), timeout=0.01)
+
+    def test_should_raise_empty_when_nothing_arrives(self):
+        with pytest.raises(queue.Empty):
+            PriorityReplyQueue().get(timeout=0.01)
+
+    def test_should_wake_up_a_blocked_get_when_a_job_arrives(self):
+        reply_queue = PriorityReplyQueue()
+        job = make_job("1")
+        threading.Timer(0.02, lambda: reply_queue.put(job)).start()
+
+        assert reply_queue.get(timeout=2) is job
+
+    def test_should_raise_error_when_a_weight_is_not_positive(self):
+        with pytest.raises(ValueError, match="Stream weights must be positive"):
+            PriorityReplyQueue(stream_weights={"1": 0})
+
+    def test_should_replace_a_pending_job_of_the_same_topic(self):
+        reply_queue = PriorityReplyQueue(maxsize=1)
+        old = make_job("1", name="old", topic="Lunch")
+        new = make_job("1", URGENT, name="new", topic="Lunch")
+        reply_queue.put(old)
+
+        assert reply_queue.replace(old, new) is True
+
+        assert reply_queue.get_sizes() == {URGENT: 1, NORMAL: 0, BACKGROUND: 0}
+        assert not reply_queue.is_pending(old)
+        assert reply_queue.is_pending(new)
+        assert drain(reply_queue) == ["new"]
+
+    def test_should_not_replace_a_job_already_taken(self):
+        reply_queue = PriorityReplyQueue()
+        old = make_job("1", topic="Lunch")
+        reply_queue.put(old)
+        reply_queue.get(timeout=0)
+
+        assert reply_queue.replace(old, make_job("1", topic="Lunch")) is False
+        assert reply_queue.qsize() == 0
+
+    def test_should_keep_fair_order_when_skipping_replaced_jobs(self):
+        reply_queue = PriorityReplyQueue(maxsize=0)
+        stale = make_job("1", waiting_since=1, name="stale", topic="A")
+        reply_queue.put(stale)
+        reply_queue.put(make_job("1", waiting_since=2, name="b", topic="B"))
+        reply_queue.put(make_job("2", waiting_since=3, name="c", topic="C"))
+        reply_queue.replace(stale, make_job("1", waiting_since=1, name="fresh", topic="A"))
+
+        assert drain(reply_queue) == ["fresh", "c", "b"]
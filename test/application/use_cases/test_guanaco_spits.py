@@ -2,6 +2,7 @@ import pytest
 from unittest.mock import patch, Mock
 import time
 import threading
+import signal
 from types import SimpleNamespace
 from domain.ports.guanacos_repository import GuanacosRepository
 from application.use_cases.guanacos_spits import GuanacosSpits
@@ -177,28 +178,388 @@ class TestGuanacoSpits:
         # Add some workers first
         guanacos_spits._workers = {"test": Mock(is_running=Mock(return_value=True))}
         
-        # Mock time.sleep to raise KeyboardInterrupt after first call
-        original_sleep = time.sleep
-        call_count = [0]
+        # Interrupt while waiting for a wakeup
+        guanacos_spits._wakeup = Mock(wait=Mock(side_effect=KeyboardInterrupt()))
         
-        def mock_sleep(duration):
-            call_count[0] += 1
-            if call_count[0] >= 2:  # Raise on second call
-                raise KeyboardInterrupt()
-            original_sleep(0.01)  # Short real sleep for first call
+        # Should re-raise KeyboardInterrupt
+        with pytest.raises(KeyboardInterrupt):
+            guanacos_spits._wait_for_shutdown()
+
+    def test_should_wake_up_immediately_when_stop_is_requested(self):
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        worker = SimpleNamespace(work=Mock(return_value=True), name="test_worker")
+        guanacos_repository.get_guanacos.return_value = [worker]
         
-        import time as time_module
-        time_module.sleep = mock_sleep
+        guanacos_spits = GuanacosSpits(guanacos_repository, sleep_time=10)
+        run_thread = threading.Thread(target=guanacos_spits.run, daemon=True)
+        run_thread.start()
+        time.sleep(0.05)
         
-        try:
-            # Should re-raise KeyboardInterrupt
-            with pytest.raises(KeyboardInterrupt):
-                guanacos_spits._wait_for_shutdown()
-        finally:
-            time_module.sleep = original_sleep
+        started = time.monotonic()
+        guanacos_spits.stop()
+        run_thread.join(timeout=1.0)
+        
+        assert not run_thread.is_alive()
+        assert time.monotonic() - started < 0.5
+
+    def test_should_shut_down_when_the_last_worker_stops_on_error(self):
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        worker = SimpleNamespace(work=Mock(side_effect=Exception("Test error")), name="test_worker")
+        guanacos_repository.get_guanacos.return_value = [worker]
+        
+        guanacos_spits = GuanacosSpits(guanacos_repository, sleep_time=10)
+        run_thread = threading.Thread(target=guanacos_spits.run, daemon=True)
+        run_thread.start()
+        run_thread.join(timeout=1.0)
+        
+        assert not run_thread.is_alive()
+
+    def test_should_wake_up_when_receiving_a_signal(self):
+        guanacos_spits = GuanacosSpits(Mock(), sleep_time=0.1)
+        
+        guanacos_spits._signal_handler(signal.SIGTERM, None)
+        
+        assert guanacos_spits._wakeup.wait(timeout=1.0)
 
     def test_should_stop_all_workers_when_no_workers_exist(self):
         guanacos_spits = GuanacosSpits(Mock(), sleep_time=0.1)
         
         # Should handle gracefully when no workers exist
-        guanacos_spits._stop_all_workers()  # Should not raise exception
\ No newline at end of file
+        guanacos_spits._stop_all_workers()  # Should not raise exception
+    def test_should_give_each_worker_its_own_poll_policy(self):
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        worker_1 = SimpleNamespace(work=Mock(return_value=False), name="worker1")
+        worker_2 = SimpleNamespace(work=Mock(return_value=False), name="worker2")
+        guanacos_repository.get_guanacos.return_value = [worker_1, worker_2]
+        
+        guanacos_spits = GuanacosSpits(guanacos_repository, sleep_time=10)
+        guanacos_spits._start_all_workers()
+        time.sleep(0.05)
+        stats = guanacos_spits.get_worker_stats()
+        guanacos_spits._stop_all_workers()
+        
+        assert set(stats) == {"worker1", "worker2"}
+        # Idle after the first cycle: backing off from the base interval
+        assert stats["worker1"]["current_interval"] == 20
+        assert guanacos_spits._workers == {}
+
+    def test_should_only_fetch_in_scheduled_cycles_when_using_a_pipeline(self):
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        guanaco = SimpleNamespace(work=Mock(return_value=True), name="test_worker")
+        guanacos_repository.get_guanacos.return_value = [guanaco]
+        pipeline = Mock()
+        pipeline.fetch.return_value = False
+        
+        guanacos_spits = GuanacosSpits(guanacos_repository, sleep_time=10, pipeline=pipeline)
+        threading.Thread(target=lambda: (time.sleep(0.1), guanacos_spits.stop()), daemon=True).start()
+        guanacos_spits.run()
+        
+        pipeline.start.assert_called_once()
+        pipeline.fetch.assert_called_with(guanaco)
+        pipeline.close_intake.assert_called_once()
+        pipeline.drain.assert_called_once()
+        guanaco.work.assert_not_called()
+
+    def test_should_answer_channels_with_shared_threads_when_configured(self):
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        guanaco = SimpleNamespace(work=Mock(return_value=False), name="test_worker")
+        guanacos_repository.get_guanacos.return_value = [guanaco]
+        
+        guanacos_spits = GuanacosSpits(guanacos_repository, sleep_time=10, channel_concurrency=3)
+        threading.Thread(target=lambda: (time.sleep(0.1), guanacos_spits.stop()), daemon=True).start()
+        guanacos_spits.run()
+        
+        guanaco.work.assert_called_with(executor=guanacos_spits._channel_executor, max_concurrent_channels=3)
+        assert guanacos_spits._channel_executor._max_workers == 3
+
+    def test_should_split_guanacos_between_processes_sharing_leases(self):
+        from infrastructure.repositories.in_memory_lease_repository import InMemoryLeaseRepository
+        lease_repository = InMemoryLeaseRepository()
+        lease_repository.acquire("guanaco:worker2", "other", 30)
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        worker_1 = SimpleNamespace(work=Mock(return_value=True), name="worker1")
+        worker_2 = SimpleNamespace(work=Mock(return_value=True), name="worker2")
+        guanacos_repository.get_guanacos.return_value = [worker_1, worker_2]
+        guanacos_spits = GuanacosSpits(guanacos_repository, sleep_time=0.05, lease_repository=lease_repository, owner_id="me")
+
+        guanacos_spits._start_all_workers()
+        try:
+            assert guanacos_spits.get_running_workers() == ["worker1"]
+            assert guanacos_spits.get_standby_workers() == ["worker2"]
+        finally:
+            guanacos_spits._stop_all_workers()
+
+        assert lease_repository.get_owner("guanaco:worker1") is None
+        assert lease_repository.get_owner("guanaco:worker2") == "other"
+        assert worker_2.work.call_count == 0
+
+    def test_should_take_over_guanacos_released_by_another_process(self):
+        from infrastructure.repositories.in_memory_lease_repository import InMemoryLeaseRepository
+        lease_repository = InMemoryLeaseRepository()
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        worker = SimpleNamespace(work=Mock(return_value=True), name="worker1")
+        guanacos_repository.get_guanacos.return_value = [worker]
+        first = GuanacosSpits(guanacos_repository, sleep_time=0.05, lease_repository=lease_repository, owner_id="first", lease_ttl=0.06)
+        second = GuanacosSpits(guanacos_repository, sleep_time=0.05, lease_repository=lease_repository, owner_id="second", lease_ttl=0.06)
+
+        first._start_all_workers()
+        second_thread = threading.Thread(target=second.run, daemon=True)
+        second_thread.start()
+        time.sleep(0.1)
+        assert second.get_running_workers() == []
+        assert second.get_standby_workers() == ["worker1"]
+
+        first._stop_all_workers()
+        deadline = time.monotonic() + 2
+        while second.get_running_workers() != ["worker1"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        second.stop()
+        second_thread.join(timeout=5)
+
+        assert lease_repository.get_owner("guanaco:worker1") is None
+        assert not second_thread.is_alive()
+        assert worker.work.call_count >= 2
+
+    def test_should_journal_unfinished_replies_and_resume_them_on_start(self):
+        from domain.entities.pending_reply import PendingReply
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        guanaco = SimpleNamespace(work=Mock(return_value=True), name="worker1")
+        guanacos_repository.get_guanacos.return_value = [guanaco]
+        previous = [PendingReply("worker1", "1", "Lunch", 100.0, "Tacos")]
+        unfinished = [PendingReply("worker1", "2", "Dinner", 200.0)]
+        reply_journal = Mock(load=Mock(return_value=previous))
+        pipeline = Mock(fetch=Mock(return_value=False), drain=Mock(return_value=unfinished))
+        guanacos_spits = GuanacosSpits(guanacos_repository, sleep_time=10, pipeline=pipeline, drain_timeout=3, reply_journal=reply_journal)
+
+        guanacos_spits._start_all_workers()
+        guanacos_spits._stop_all_workers()
+
+        pipeline.resume.assert_called_once_with(previous)
+        reply_journal.clear.assert_called_once()
+        assert pipeline.drain.call_args.kwargs["timeout"] <= 3
+        reply_journal.save.assert_called_once_with(unfinished)
+
+    def test_should_wait_for_an_in_flight_reply_before_stopping(self):
+        from application.services.reply_pipeline import ReplyPipeline
+        from domain.entities.admission_decision import AdmissionDecision
+        from infrastructure.observability.metrics import MetricsRegistry
+        thinking = threading.Event()
+        channel = Mock(get_id=Mock(return_value="1"), get_topic=Mock(return_value="Lunch"), get_unanswered_messages=Mock(return_value=[]))
+        guanaco = SimpleNamespace(
+            name="worker1",
+            user=None,
+            get_channels_to_answer=Mock(side_effect=[[channel], []] + [[]] * 100),
+            admit=Mock(return_value=AdmissionDecision()),
+            think=Mock(side_effect=lambda channel: (thinking.set(), time.sleep(0.2), "reply")[-1]),
+        )
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        guanacos_repository.get_guanacos.return_value = [guanaco]
+        reply_journal = Mock(load=Mock(return_value=[]))
+        guanacos_spits = GuanacosSpits(guanacos_repository, sleep_time=10, pipeline=ReplyPipeline(metrics=MetricsRegistry()), reply_journal=reply_journal)
+
+        guanacos_spits._start_all_workers()
+        assert thinking.wait(2)
+        guanacos_spits._stop_all_workers()
+
+        channel.respond.assert_called_once_with("reply")
+        reply_journal.save.assert_called_once_with([])
+
+    def test_should_only_restart_the_guanacos_that_changed_in_the_roster(self):
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        kept = SimpleNamespace(work=Mock(return_value=False), name="kept")
+        removed = SimpleNamespace(work=Mock(return_value=False), name="removed")
+        changed = SimpleNamespace(work=Mock(return_value=False), name="changed")
+        changed_again = SimpleNamespace(work=Mock(return_value=False), name="changed")
+        added = SimpleNamespace(work=Mock(return_value=False), name="added")
+        guanacos_repository.get_guanacos.return_value = [kept, removed, changed]
+        guanacos_spits = GuanacosSpits(guanacos_repository, sleep_time=10)
+        guanacos_spits._start_all_workers()
+        kept_entry = guanacos_spits._workers["kept"]
+        removed_entry = guanacos_spits._workers["removed"]
+
+        guanacos_repository.get_guanacos.return_value = [kept, changed_again, added]
+        guanacos_spits.reload_roster()
+        try:
+            assert sorted(guanacos_spits.get_running_workers()) == ["added", "changed", "kept"]
+            assert guanacos_spits._workers["kept"] is kept_entry
+            assert guanacos_spits._workers["changed"].guanaco is changed_again
+            assert not removed_entry.is_running()
+        finally:
+            guanacos_spits._stop_all_workers()
+
+    def test_should_not_run_a_changed_guanaco_while_its_previous_cycle_is_in_flight(self):
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        cycle_started = threading.Event()
+        release = threading.Event()
+        running = []
+        overlaps = []
+
+        def work():
+            overlaps.append(bool(running))
+            running.append(True)
+            cycle_started.set()
+            release.wait(2.0)
+            running.pop()
+            return False
+
+        changed = SimpleNamespace(work=Mock(side_effect=work), name="changed")
+        changed_again = SimpleNamespace(work=Mock(side_effect=work), name="changed")
+        guanacos_repository.get_guanacos.return_value = [changed]
+        guanacos_spits = GuanacosSpits(guanacos_repository, sleep_time=10)
+        guanacos_spits._start_all_workers()
+        assert cycle_started.wait(2.0)
+
+        guanacos_repository.get_guanacos.return_value = [changed_again]
+        guanacos_spits.reload_roster()
+        try:
+            time.sleep(0.1)
+            assert changed_again.work.call_count == 0
+            release.set()
+            deadline = time.monotonic() + 2.0
+            while changed_again.work.call_count == 0 and time.monotonic() < deadline:
+                time.sleep(0.005)
+            assert changed_again.work.call_count == 1
+            assert overlaps == [False, False]
+        finally:
+            release.set()
+            guanacos_spits._stop_all_workers()
+
+    def test_should_keep_the_roster_when_reloading_fails(self):
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        worker = SimpleNamespace(work=Mock(return_value=False), name="worker1")
+        guanacos_repository.get_guanacos.return_value = [worker]
+        guanacos_spits = GuanacosSpits(guanacos_repository, sleep_time=10)
+        guanacos_spits._start_all_workers()
+
+        guanacos_repository.get_guanacos.side_effect = ValueError("broken roster")
+        guanacos_spits.reload_roster()
+        try:
+            assert guanacos_spits.get_running_workers() == ["worker1"]
+        finally:
+            guanacos_spits._stop_all_workers()
+
+    def test_should_reload_the_roster_while_running_when_it_changes(self):
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        worker_1 = SimpleNamespace(work=Mock(return_value=False), name="worker1")
+        worker_2 = SimpleNamespace(work=Mock(return_value=False), name="worker2")
+        guanacos_repository.get_guanacos.side_effect = [[worker_1], [worker_1, worker_2]]
+        guanacos_repository.has_changes.side_effect = [True] + [False] * 1000
+        guanacos_spits = GuanacosSpits(guanacos_repository, sleep_time=10, roster_check_interval=0.01)
+
+        threading.Thread(target=lambda: (time.sleep(0.2), guanacos_spits.stop()), daemon=True).start()
+        guanacos_spits.run()
+
+        worker_2.work.assert_called()
+
+    def test_should_release_the_lease_of_a_guanaco_removed_from_the_roster(self):
+        from infrastructure.repositories.in_memory_lease_repository import InMemoryLeaseRepository
+        lease_repository = InMemoryLeaseRepository()
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        worker_1 = SimpleNamespace(work=Mock(return_value=False), name="worker1")
+        worker_2 = SimpleNamespace(work=Mock(return_value=False), name="worker2")
+        guanacos_repository.get_guanacos.return_value = [worker_1, worker_2]
+        guanacos_spits = GuanacosSpits(guanacos_repository, sleep_time=10, lease_repository=lease_repository, owner_id="me")
+        guanacos_spits._start_all_workers()
+
+        guanacos_repository.get_guanacos.return_value = [worker_1]
+        guanacos_spits.reload_roster()
+        try:
+            assert lease_repository.get_owner("guanaco:worker2") is None
+            assert guanacos_spits.get_running_workers() == ["worker1"]
+        finally:
+            guanacos_spits._stop_all_workers()
+
+    def test_should_pause_and_resume_a_worker_at_runtime(self):
+        from infrastructure.workers.poll_policy import PollPolicy
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        worker = SimpleNamespace(work=Mock(return_value=False), name="worker1")
+        guanacos_repository.get_guanacos.return_value = [worker]
+        guanacos_spits = GuanacosSpits(guanacos_repository, poll_policy_factory=lambda: PollPolicy(0.01))
+        guanacos_spits._start_all_workers()
+        try:
+            guanacos_spits.pause_worker("worker1")
+            time.sleep(0.05)
+            paused_count = worker.work.call_count
+            time.sleep(0.1)
+            assert worker.work.call_count == paused_count
+            assert guanacos_spits.get_status()["workers"]["worker1"]["paused"] is True
+
+            guanacos_spits.resume_worker("worker1")
+            time.sleep(0.1)
+            assert worker.work.call_count > paused_count
+            assert guanacos_spits.get_status()["paused_workers"] == []
+        finally:
+            guanacos_spits._stop_all_workers()
+
+    def test_should_keep_a_worker_paused_when_the_roster_changes_it(self):
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        worker = SimpleNamespace(work=Mock(return_value=False), name="worker1")
+        changed = SimpleNamespace(work=Mock(return_value=False), name="worker1")
+        guanacos_repository.get_guanacos.return_value = [worker]
+        guanacos_spits = GuanacosSpits(guanacos_repository, sleep_time=10)
+        guanacos_spits._start_all_workers()
+        guanacos_spits.pause_worker("worker1")
+
+        guanacos_repository.get_guanacos.return_value = [changed]
+        guanacos_spits.reload_roster()
+        try:
+            assert guanacos_spits._workers["worker1"].is_paused()
+            changed.work.assert_not_called()
+        finally:
+            guanacos_spits._stop_all_workers()
+
+    def test_should_override_the_poll_interval_of_a_worker(self):
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        worker = SimpleNamespace(work=Mock(return_value=False), name="worker1")
+        guanacos_repository.get_guanacos.return_value = [worker]
+        guanacos_spits = GuanacosSpits(guanacos_repository, sleep_time=10)
+        guanacos_spits._start_all_workers()
+        try:
+            guanacos_spits.set_worker_interval("worker1", 30)
+            assert guanacos_spits.get_worker_stats()["worker1"]["current_interval"] == 30
+
+            guanacos_spits.set_worker_interval("worker1", None)
+            assert guanacos_spits.get_worker_stats()["worker1"]["current_interval"] == 10
+        finally:
+            guanacos_spits._stop_all_workers()
+
+    def test_should_reject_controls_for_unknown_workers_and_invalid_intervals(self):
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        guanacos_repository.get_guanacos.return_value = [SimpleNamespace(work=Mock(return_value=False), name="worker1")]
+        guanacos_spits = GuanacosSpits(guanacos_repository, sleep_time=10)
+        guanacos_spits._start_all_workers()
+        try:
+            with pytest.raises(KeyError):
+                guanacos_spits.pause_worker("unknown")
+            with pytest.raises(ValueError, match="Invalid poll interval"):
+                guanacos_spits.set_worker_interval("worker1", 0)
+        finally:
+            guanacos_spits._stop_all_workers()
+
+    def test_should_report_models_queues_and_unload_shared_models_once(self):
+        from application.services.reply_pipeline import ReplyPipeline
+        from infrastructure.observability.metrics import MetricsRegistry
+        guanacos_repository = Mock(spec=GuanacosRepository)
+        think_repository = Mock()
+        think_repository.get_status.return_value = {"model": "tiny", "loaded": True}
+        worker_1 = SimpleNamespace(work=Mock(return_value=False), name="worker1", think_repository=think_repository, get_channels_to_answer=Mock(return_value=[]))
+        worker_2 = SimpleNamespace(work=Mock(return_value=False), name="worker2", think_repository=think_repository, get_channels_to_answer=Mock(side_effect=Exception("Zulip is down")))
+        guanacos_repository.get_guanacos.return_value = [worker_1, worker_2]
+        pipeline = ReplyPipeline(metrics=MetricsRegistry())
+        guanacos_spits = GuanacosSpits(guanacos_repository, sleep_time=10, pipeline=pipeline)
+        guanacos_spits._start_all_workers()
+        try:
+            deadline = time.monotonic() + 2
+            while guanacos_spits.is_worker_running("worker2") and time.monotonic() < deadline:
+                time.sleep(0.005)
+            status = guanacos_spits.get_status()
+            unloaded = guanacos_spits.unload_models()
+        finally:
+            guanacos_spits._stop_all_workers()
+
+        assert status["models"] == {"worker1": {"model": "tiny", "loaded": True}, "worker2": {"model": "tiny", "loaded": True}}
+        assert status["queues"] == {"inference": 0, "send": 0, "in_flight": 0}
+        assert status["caches"]["guanacos"] == 2
+        assert [(error["source"], error["error"]) for error in status["recent_errors"]] == [("worker:worker2", "Zulip is down")]
+        assert unloaded == 1
+        think_repository.unload.assert_called_once()
@@ -0,0 +1,41 @@
+import pytest
+from benchmarks.import_time import STARTUP_BUDGET_SECONDS, check_budget, format_report, measure_imports, parse_importtime, summarize_imports
+
+IMPORTTIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       200 |        200 |   _io
+import time:      1500 |       1500 |       torch._C
+import time:      2500 |       4000 |     torch
+import time:       300 |       4300 |   infrastructure.transformers_engine
+import time:       700 |       5000 | main
+"""
+
+
+class TestImportTime:
+    def test_should_parse_importtime_output(self):
+        entries = parse_importtime(IMPORTTIME_OUTPUT.splitlines())
+
+        assert [entry["name"] for entry in entries] == ["_io", "torch._C", "torch", "infrastructure.transformers_engine", "main"]
+        assert entries[1] == {"name": "torch._C", "self_us": 1500, "cumulative_us": 1500, "depth": 3}
+        assert entries[-1]["depth"] == 0
+
+    def test_should_summarize_per_package_and_flag_heavy_imports(self):
+        summary = summarize_imports(parse_importtime(IMPORTTIME_OUTPUT.splitlines()), "main", top=2)
+
+        assert summary["total_s"] == pytest.approx(0.005)
+        assert summary["top_packages"] == [{"package": "torch", "self_s": 0.004}, {"package": "main", "self_s": 0.0007}]
+        assert summary["eager_heavy_packages"] == ["torch"]
+        assert check_budget(summary, budget=1.0) == ["import main imported torch"]
+        assert "Imported eagerly (should be deferred): torch" in format_report(summary, budget=1.0)
+
+    def test_should_report_imports_over_budget(self):
+        summary = summarize_imports(parse_importtime(IMPORTTIME_OUTPUT.splitlines()), "main")
+
+        assert check_budget(summary, budget=0.001) == [
+            "import main took 0.005 s, over the 0.001 s budget",
+            "import main imported torch",
+        ]
+
+    def test_should_import_main_within_the_startup_budget(self):
+        summary = summarize_imports(measure_imports("main"), "main")
+
+        assert check_budget(summary, STARTUP_BUDGET_SECONDS) == [], format_report(summary, STARTUP_BUDGET_SECONDS)
@@ -0,0 +1,67 @@
+import json
+from benchmarks import models_handler_benchmark
+from benchmarks.models_handler_benchmark import build_prompt, case_name, compare_with_baseline, summarize
+from benchmarks.tiny_models import build_tiny_tokenizer, save_tiny_model
+
+
+def report(calibration, **latencies):
+    return {"calibration_s": calibration, "results": {name: {"latency_min_s": value} for name, value in latencies.items()}}
+
+
+class TestModelsHandlerBenchmark:
+    def test_should_build_prompt_of_requested_token_length(self):
+        tokenizer = build_tiny_tokenizer()
+
+        assert len(tokenizer(build_prompt(128))["input_ids"]) == 128
+
+    def test_should_round_trip_any_text_with_tiny_tokenizer(self):
+        tokenizer = build_tiny_tokenizer()
+
+        assert tokenizer.decode(tokenizer("¿Qué tal, guanaco? 🦙")["input_ids"]) == "¿Qué tal, guanaco? 🦙"
+
+    def test_should_name_cases_after_their_parameters(self):
+        assert case_name("onnx", 16, 1, 2) == "onnx/prompt=16/batch=1/threads=2"
+
+    def test_should_summarize_latencies_and_throughput(self):
+        summary = summarize([0.2, 0.1, 0.3], output_tokens=60)
+
+        assert summary["latency_min_s"] == 0.1
+        assert summary["latency_p50_s"] == 0.2
+        assert summary["output_tokens_per_s"] == 100.0
+
+    def test_should_report_cases_slower_than_baseline(self):
+        baseline = report(1.0, fast=0.1, slow=0.1)
+        current = report(1.0, fast=0.11, slow=0.2)
+
+        regressions = compare_with_baseline(current, baseline, tolerance=0.25)
+
+        assert [regression["case"] for regression in regressions] == ["slow"]
+        assert regressions[0]["ratio"] == 2.0
+
+    def test_should_normalize_by_machine_speed(self):
+        baseline = report(1.0, case=0.1)
+        # Twice slower machine, twice slower case: not a regression
+        current = report(2.0, case=0.2)
+
+        assert compare_with_baseline(current, baseline, tolerance=0.25) == []
+
+    def test_should_ignore_cases_missing_from_baseline(self):
+        assert compare_with_baseline(report(1.0, new_case=5.0), report(1.0), tolerance=0.25) == []
+
+    def test_should_run_quick_suite_and_write_results(self, tmp_path):
+        output_path = tmp_path / "results.json"
+        baseline_path = tmp_path / "baseline.json"
+        arguments = ["--quick", "--engines", "transformers-default", "--iterations", "1",
+                     "--output", str(output_path), "--baseline", str(baseline_path)]
+
+        assert models_handler_benchmark.main(arguments + ["--update-baseline"]) == 0
+        assert models_handler_benchmark.main(arguments + ["--tolerance", "100"]) == 0
+
+        results = json.loads(output_path.read_text())["results"]
+        assert "transformers-default/prompt=16/batch=2/threads=1" in results
+
+    def test_should_reuse_saved_tiny_model(self, tmp_path):
+        model_dir = save_tiny_model(str(tmp_path / "model"))
+
+        assert save_tiny_model(model_dir) == model_dir
+        assert (tmp_path / "model" / "tokenizer.json").exists()
@@ -0,0 +1,58 @@
+import pytest
+import json
+from benchmarks.trace_report import aggregate, format_report, load_spans, main
+
+
+def span(name, start_ms, end_ms, error=False, **attributes):
+    return {
+        "name": name,
+        "startTimeUnixNano": int(start_ms * 1e6),
+        "endTimeUnixNano": int(end_ms * 1e6),
+        "attributes": attributes,
+        "status": {"code": "ERROR" if error else "OK"},
+    }
+
+
+class TestTraceReport:
+    def test_should_break_down_latency_per_stage(self):
+        spans = [
+            span("guanaco.cycle", 0, 1000),
+            span("model.generate", 100, 900),
+            span("zulip.send_channel_message", 900, 950, error=True),
+            span("guanaco.cycle", 0, 1000),
+            span("model.generate", 100, 300),
+        ]
+
+        breakdown = aggregate(spans)
+
+        assert list(breakdown) == ["guanaco.cycle", "model.generate", "zulip.send_channel_message"]
+        assert breakdown["model.generate"]["count"] == 2
+        assert breakdown["model.generate"]["total_s"] == pytest.approx(1.0)
+        assert breakdown["model.generate"]["p50_s"] == pytest.approx(0.2)
+        assert breakdown["model.generate"]["max_s"] == pytest.approx(0.8)
+        assert breakdown["model.generate"]["share_of_cycles"] == pytest.approx(0.5)
+        assert breakdown["zulip.send_channel_message"]["errors"] == 1
+
+    def test_should_split_stages_by_an_attribute(self):
+        spans = [span("reply.think", 0, 10, guanaco="Pancho"), span("reply.think", 0, 30, guanaco="Paco")]
+
+        breakdown = aggregate(spans, group_by="guanaco")
+
+        assert list(breakdown) == ["reply.think [guanaco=Paco]", "reply.think [guanaco=Pancho]"]
+        assert breakdown["reply.think [guanaco=Paco]"]["share_of_cycles"] is None
+
+    def test_should_skip_unfinished_spans_and_broken_lines(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        unfinished = dict(span("guanaco.cycle", 0, 1), endTimeUnixNano=None)
+        path.write_text(json.dumps(span("model.decode", 0, 5)) + "\n" + json.dumps(unfinished) + "\n{\"name\": \"cut\n")
+
+        breakdown = aggregate(load_spans(str(path)))
+
+        assert list(breakdown) == ["model.decode"]
+        assert "model.decode" in format_report(breakdown)
+
+    def test_should_fail_when_the_file_has_no_spans(self, tmp_path, capsys):
+        path = tmp_path / "traces.jsonl"
+        path.write_text("")
+
+        assert main([str(path)]) == 1
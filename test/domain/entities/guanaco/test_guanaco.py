@@ -1,8 +1,13 @@
 import pytest
-from unittest.mock import Mock
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, Mock
+from domain.entities.admission_decision import CANNED, CHEAP, SKIP, AdmissionDecision
 from domain.entities.guanaco.guanaco import Guanaco
+from domain.entities.guanaco.topic_locks import TopicLocks
 from domain.entities.user import User
-from domain.errors import MissingUserError, MissingRepositoryError
+from domain.errors import ChannelWorkError, MissingUserError, MissingRepositoryError
 from domain.ports.chat_message_repository import ChatMessageRepository
 from domain.entities.channel import Channel
 from domain.ports.think_repository import ThinkRepository
@@ -85,4 +90,198 @@ class TestGuanaco:
 
         result = guanaco.work()
 
-        assert result is False
\ No newline at end of file
+        assert result is False
+    def test_should_return_only_channels_not_last_answered_by_the_guanaco(self):
+        mock_chat_repo = Mock(ChatMessageRepository)
+        guanaco_user = Mock(User)
+        answered = Mock(Channel)
+        answered.get_last_message.return_value = Mock(sender=guanaco_user)
+        pending = Mock(Channel)
+        pending.get_last_message.return_value = Mock(sender=Mock(User))
+        mock_chat_repo.get_streams_with_unread_messages.return_value = {"1": answered, "2": pending}
+        guanaco = Guanaco(
+            user=guanaco_user,
+            chat_message_repository=mock_chat_repo,
+            think_repository=Mock(ThinkRepository)
+        )
+
+        assert guanaco.get_channels_to_answer() == [pending]
+
+    def test_should_think_about_the_last_message_of_the_channel(self):
+        mock_think_repo = Mock(ThinkRepository)
+        mock_think_repo.get_think.return_value = "I think I'm a guanaco"
+        channel = Mock(Channel)
+        channel.get_last_message.return_value = Mock(content="What are you?")
+        guanaco = Guanaco(think_repository=mock_think_repo)
+
+        assert guanaco.think(channel) == "I think I'm a guanaco"
+        mock_think_repo.get_think.assert_called_once_with("What are you?")
+
+    def test_should_raise_a_missing_user_error_when_fetching_channels_without_a_user(self):
+        guanaco = Guanaco()
+
+        with pytest.raises(MissingUserError):
+            guanaco.get_channels_to_answer()
+
+    def test_should_answer_other_channels_when_the_quota_is_exceeded(self):
+        from domain.errors import QuotaExceededError
+        mock_chat_repo = Mock(ChatMessageRepository)
+        mock_think_repo = Mock(ThinkRepository)
+        mock_think_repo.get_think.side_effect = [QuotaExceededError("Guanaco 'Pancho' exceeded its tokens quota"), "I think I'm a guanaco"]
+        first_channel = Mock(Channel)
+        second_channel = Mock(Channel)
+        for channel in (first_channel, second_channel):
+            channel.get_last_message.return_value = Mock(sender=Mock(User), content="hi")
+        mock_chat_repo.get_streams_with_unread_messages.return_value = {"1": first_channel, "2": second_channel}
+        guanaco = Guanaco(user=Mock(User), chat_message_repository=mock_chat_repo, think_repository=mock_think_repo)
+
+        result = guanaco.work()
+
+        first_channel.respond.assert_not_called()
+        second_channel.respond.assert_called_once_with("I think I'm a guanaco")
+        assert result is True
+
+    def test_should_not_render_the_channel_history_when_working(self):
+        mock_chat_repo = Mock(ChatMessageRepository)
+        mock_think_repo = Mock(ThinkRepository)
+        mock_think_repo.get_think.return_value = "reply"
+        channel = MagicMock(Channel)
+        channel.get_last_message.return_value = Mock(sender=Mock(User))
+        mock_chat_repo.get_streams_with_unread_messages.return_value = {"1": channel}
+        guanaco = Guanaco(user=Mock(User), chat_message_repository=mock_chat_repo, think_repository=mock_think_repo)
+
+        guanaco.work()
+
+        channel.__str__.assert_not_called()
+
+    def _create_channels(self, *topics):
+        channels = {}
+        for index, (stream, topic) in enumerate(topics):
+            channel = Mock(Channel)
+            channel.get_id.return_value = stream
+            channel.get_topic.return_value = topic
+            channel.get_last_message.return_value = Mock(sender=Mock(User), content=f"message {index}")
+            channels[str(index)] = channel
+        return channels
+
+    def test_should_answer_independent_channels_concurrently(self):
+        mock_chat_repo = Mock(ChatMessageRepository)
+        mock_chat_repo.get_streams_with_unread_messages.return_value = self._create_channels((1, "a"), (1, "b"), (2, "a"))
+        # Every think waits for the other two: only returns if the three run at the same time
+        barrier = threading.Barrier(3, timeout=5)
+        mock_think_repo = Mock(ThinkRepository)
+        mock_think_repo.get_think.side_effect = lambda message: barrier.wait() and "reply" or "reply"
+        guanaco = Guanaco(user=Mock(User), chat_message_repository=mock_chat_repo, think_repository=mock_think_repo, topic_locks=TopicLocks())
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            result = guanaco.work(executor=executor, max_concurrent_channels=3)
+
+        assert result is True
+        assert guanaco.last_work_result.answered == 3
+        for channel in mock_chat_repo.get_streams_with_unread_messages.return_value.values():
+            channel.respond.assert_called_once_with("reply")
+
+    def test_should_not_answer_more_channels_at_once_than_the_limit(self):
+        mock_chat_repo = Mock(ChatMessageRepository)
+        mock_chat_repo.get_streams_with_unread_messages.return_value = self._create_channels(*[(1, str(topic)) for topic in range(6)])
+        lock = threading.Lock()
+        running = [0]
+        max_running = [0]
+
+        def think(message):
+            with lock:
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return "reply"
+
+        mock_think_repo = Mock(ThinkRepository)
+        mock_think_repo.get_think.side_effect = think
+        guanaco = Guanaco(user=Mock(User), chat_message_repository=mock_chat_repo, think_repository=mock_think_repo, topic_locks=TopicLocks())
+
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            guanaco.work(executor=executor, max_concurrent_channels=2)
+
+        assert max_running[0] <= 2
+        assert guanaco.last_work_result.answered == 6
+
+    def test_should_answer_one_channel_of_a_topic_at_a_time(self):
+        topic_locks = TopicLocks()
+        channel = self._create_channels((1, "a"))["0"]
+        guanaco = Guanaco(think_repository=Mock(ThinkRepository), topic_locks=topic_locks)
+        answered = threading.Event()
+
+        with topic_locks.hold(1, "a"):
+            thread = threading.Thread(target=lambda: guanaco.answer(channel) and answered.set())
+            thread.start()
+            # Another reply is being sent in the same topic
+            assert not answered.wait(0.1)
+            channel.respond.assert_not_called()
+        thread.join(timeout=5)
+
+        assert answered.is_set()
+        channel.respond.assert_called_once()
+
+    def test_should_answer_the_other_channels_and_raise_the_errors_together(self):
+        mock_chat_repo = Mock(ChatMessageRepository)
+        channels = self._create_channels((1, "a"), (1, "b"), (2, "c"))
+        mock_chat_repo.get_streams_with_unread_messages.return_value = channels
+        mock_think_repo = Mock(ThinkRepository)
+        mock_think_repo.get_think.side_effect = lambda message: "reply"
+        channels["0"].respond.side_effect = ConnectionError("zulip down")
+        channels["2"].respond.side_effect = TimeoutError("slow zulip")
+        guanaco = Guanaco(user=Mock(User), chat_message_repository=mock_chat_repo, think_repository=mock_think_repo, topic_locks=TopicLocks())
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            with pytest.raises(ChannelWorkError) as error:
+                guanaco.work(executor=executor)
+
+        assert [channel for channel, _ in error.value.errors] == [channels["0"], channels["2"]]
+        assert str(error.value) == "1/a: zulip down; 2/c: slow zulip"
+        channels["1"].respond.assert_called_once_with("reply")
+        assert guanaco.last_work_result.answered == 1
+
+    def test_should_keep_answering_after_a_failing_channel_without_executor(self):
+        mock_chat_repo = Mock(ChatMessageRepository)
+        channels = self._create_channels((1, "a"), (1, "b"))
+        mock_chat_repo.get_streams_with_unread_messages.return_value = channels
+        mock_think_repo = Mock(ThinkRepository)
+        mock_think_repo.get_think.side_effect = [RuntimeError("model crashed"), "reply"]
+        guanaco = Guanaco(user=Mock(User), chat_message_repository=mock_chat_repo, think_repository=mock_think_repo, topic_locks=TopicLocks())
+
+        with pytest.raises(ChannelWorkError, match="model crashed"):
+            guanaco.work()
+
+        channels["1"].respond.assert_called_once_with("reply")
+
+    def test_should_not_think_when_the_admission_stage_skips_or_answers_the_channel(self):
+        mock_think_repo = Mock(ThinkRepository)
+        admission_filter = Mock()
+        guanaco = Guanaco(user=Mock(User), think_repository=mock_think_repo, topic_locks=TopicLocks(), admission_filter=admission_filter)
+        skipped = Mock(Channel)
+        canned = Mock(Channel)
+        admission_filter.decide.side_effect = [AdmissionDecision(SKIP, rule="acknowledgement"), AdmissionDecision(CANNED, rule="thanks", reply="You're welcome!")]
+
+        assert guanaco.answer(skipped) is True
+        assert guanaco.answer(canned) is True
+
+        skipped.mark_as_read.assert_called_once()
+        skipped.respond.assert_not_called()
+        canned.respond.assert_called_once_with("You're welcome!")
+        mock_think_repo.get_think.assert_not_called()
+
+    def test_should_think_with_the_cheap_budget_decided_by_the_admission_stage(self):
+        mock_think_repo = Mock(ThinkRepository)
+        mock_think_repo.get_think.return_value = "¡Hola!"
+        channel = Mock(Channel)
+        channel.get_last_message.return_value = Mock(content="hola")
+        admission_filter = Mock(decide=Mock(return_value=AdmissionDecision(CHEAP, rule="greeting", max_new_tokens=48)))
+        guanaco = Guanaco(user=Mock(User), think_repository=mock_think_repo, topic_locks=TopicLocks(), admission_filter=admission_filter)
+
+        guanaco.answer(channel)
+
+        admission_filter.decide.assert_called_once_with(channel, guanaco.user)
+        mock_think_repo.get_think.assert_called_once_with("hola", max_new_tokens=48)
+        channel.respond.assert_called_once_with("¡Hola!")
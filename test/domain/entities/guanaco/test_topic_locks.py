@@ -0,0 +1,38 @@
+import pytest
+import threading
+from domain.entities.guanaco.topic_locks import TopicLocks
+
+
+class TestTopicLocks:
+    def test_should_serialize_holders_of_the_same_topic(self):
+        topic_locks = TopicLocks()
+        acquired = threading.Event()
+
+        def hold_same_topic():
+            with topic_locks.hold(1, "a"):
+                acquired.set()
+
+        with topic_locks.hold(1, "a"):
+            thread = threading.Thread(target=hold_same_topic)
+            thread.start()
+            assert not acquired.wait(0.1)
+        thread.join(timeout=5)
+
+        assert acquired.is_set()
+
+    def test_should_not_block_other_topics(self):
+        topic_locks = TopicLocks()
+
+        with topic_locks.hold(1, "a"):
+            with topic_locks.hold(1, "b"):
+                with topic_locks.hold(2, "a"):
+                    assert len(topic_locks) == 3
+
+    def test_should_forget_locks_nobody_holds(self):
+        topic_locks = TopicLocks()
+
+        with pytest.raises(ValueError):
+            with topic_locks.hold(1, "a"):
+                raise ValueError("reply failed")
+
+        assert len(topic_locks) == 0
@@ -1,4 +1,7 @@
+from datetime import datetime
 from domain.entities.channel import Channel
+from domain.entities.chat_message import ChatMessage
+from domain.entities.user import User
 from unittest.mock import Mock
 from domain.ports.chat_message_repository import ChatMessageRepository
 
@@ -71,14 +74,51 @@ class TestChannel:
     
     def test_should_get_last_message(self):
         mock_repository = Mock(spec=ChatMessageRepository)
-        mock_message_1 = Mock()
-        mock_message_2 = Mock()
-        messages = [mock_message_1, mock_message_2]
+        mock_message_1 = Mock(id=1)
+        mock_message_2 = Mock(id=2)
+        messages = [mock_message_2, mock_message_1]
         
         channel = Channel(id="1", topic="Test Topic", messages=messages, chat_message_repository=mock_repository)
         
         assert channel.get_last_message() == mock_message_2
     
+    def test_should_keep_each_message_once_when_a_fetched_page_overlaps(self):
+        rosa = User(platform_id=2, platform="zulip", name="Rosa")
+        unread = ChatMessage(id=3, content="@Pancho?", sender=rosa, created_at=datetime(2024, 1, 3))
+        history = [
+            ChatMessage(id=1, content="hi", sender=rosa, created_at=datetime(2024, 1, 1)),
+            ChatMessage(id=2, content="hello", sender=rosa, created_at=datetime(2024, 1, 2)),
+            ChatMessage(id=3, content="@Pancho?", sender=rosa, created_at=datetime(2024, 1, 3)),
+        ]
+        channel = Channel(id="1", topic="Test Topic", messages=[unread], chat_message_repository=Mock(spec=ChatMessageRepository))
+
+        assert channel.add_messages(history) == 2
+        assert channel.add_message(unread) is False
+        assert [message.id for message in channel.get_messages()] == [1, 2, 3]
+        assert channel.has_message(2)
+
+    def test_should_keep_only_the_newest_messages_when_bounded(self):
+        rosa = User(platform_id=2, platform="zulip", name="Rosa")
+        messages = [ChatMessage(id=i, content=str(i), sender=rosa, created_at=datetime(2024, 1, 1)) for i in range(1, 6)]
+        channel = Channel(id="1", topic="Test Topic", messages=messages, chat_message_repository=Mock(spec=ChatMessageRepository), max_messages=2)
+
+        assert [message.id for message in channel.get_messages()] == [4, 5]
+        assert not channel.has_message(1)
+
+    def test_should_get_messages_after_the_last_one_sent_by_the_user(self):
+        guanaco = User(platform_id=1, platform="zulip", name="Pancho")
+        rosa = User(platform_id=2, platform="zulip", name="Rosa")
+        messages = [
+            ChatMessage(id=1, content="hi", sender=rosa, created_at=datetime(2024, 1, 1)),
+            ChatMessage(id=2, content="hello", sender=guanaco, created_at=datetime(2024, 1, 2)),
+            ChatMessage(id=3, content="how are you?", sender=rosa, created_at=datetime(2024, 1, 3)),
+            ChatMessage(id=4, content="@Pancho?", sender=rosa, created_at=datetime(2024, 1, 4)),
+        ]
+        channel = Channel(id="1", topic="Test Topic", messages=messages, chat_message_repository=Mock(spec=ChatMessageRepository))
+
+        assert [message.id for message in channel.get_unanswered_messages(guanaco)] == [3, 4]
+        assert [message.id for message in channel.get_unanswered_messages(None)] == [1, 2, 3, 4]
+
     def test_should_get_channel_id(self):
         mock_repository = Mock(spec=ChatMessageRepository)
         empty_messages = []
@@ -123,8 +163,8 @@ class TestChannel:
     
     def test_should_put_two_messages_when_there_are_two(self):
         mock_repository = Mock(spec=ChatMessageRepository)
-        mock_message_1 = Mock()
-        mock_message_2 = Mock()
+        mock_message_1 = Mock(id=1)
+        mock_message_2 = Mock(id=2)
         messages = [mock_message_1, mock_message_2]
         mock_message_1.__str__ = Mock(return_value="Test Message 1")
         mock_message_2.__str__ = Mock(return_value="Test Message 2")
@@ -149,4 +189,12 @@ class TestChannel:
         channel.respond("Test Message")
         
         mock_repository.mark_as_read.assert_called_once_with(channel)
-        
\ No newline at end of file
+        
+    def test_should_mark_channel_as_read_without_responding(self):
+        mock_repository = Mock(spec=ChatMessageRepository)
+        channel = Channel(id="1", topic="Test Topic", messages=[], chat_message_repository=mock_repository)
+
+        channel.mark_as_read()
+
+        mock_repository.mark_as_read.assert_called_once_with(channel)
+        mock_repository.send_channel_message.assert_not_called()
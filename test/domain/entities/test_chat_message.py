@@ -20,6 +20,8 @@ class TestChatMessage:
         assert chat_message.sender.platform_id == "1"
         assert chat_message.sender.platform == "telegram"
         assert chat_message.sender.name == "John Doe"
+        assert chat_message.is_private is False
+        assert chat_message.is_mention is False
     
     def test_should_fail_when_creating_a_chat_message_with_empty_id(self):
         user = User(platform_id="1", platform="telegram", name="John Doe")
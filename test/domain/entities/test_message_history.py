@@ -0,0 +1,66 @@
+from datetime import datetime
+import pytest
+from domain.entities.chat_message import ChatMessage
+from domain.entities.message_history import MessageHistory
+from domain.entities.user import User
+
+ROSA = User(platform_id=2, platform="zulip", name="Rosa")
+
+
+def make_message(id: int, content: str = "hi") -> ChatMessage:
+    return ChatMessage(id=id, content=content, sender=ROSA, created_at=datetime(2024, 1, 1))
+
+
+def ids(history: MessageHistory):
+    return [message.id for message in history]
+
+
+class TestMessageHistory:
+    def test_should_order_messages_by_id_whatever_the_insertion_order(self):
+        history = MessageHistory([make_message(5), make_message(2)])
+
+        history.add(make_message(3))
+        history.merge([make_message(9), make_message(1), make_message(7)])
+
+        assert ids(history) == [1, 2, 3, 5, 7, 9]
+        assert history.last().id == 9
+
+    def test_should_keep_each_message_once(self):
+        history = MessageHistory([make_message(1), make_message(2)])
+
+        assert history.add(make_message(2)) is False
+        assert history.merge([make_message(2), make_message(3), make_message(3)]) == 1
+        assert ids(history) == [1, 2, 3]
+        assert len(history) == 3
+
+    def test_should_replace_a_message_with_its_newer_copy(self):
+        history = MessageHistory([make_message(1), make_message(2, "draft")])
+
+        history.merge([make_message(2, "edited")])
+
+        assert [message.content for message in history] == ["hi", "edited"]
+        assert history.get(2).content == "edited"
+
+    def test_should_check_membership_by_id(self):
+        history = MessageHistory([make_message(1)])
+
+        assert 1 in history
+        assert 2 not in history
+
+    def test_should_drop_the_oldest_messages_beyond_the_maximum(self):
+        history = MessageHistory([make_message(i) for i in range(1, 4)], max_messages=3)
+
+        history.merge([make_message(4), make_message(5)])
+
+        assert ids(history) == [3, 4, 5]
+        assert 1 not in history
+        assert history.get(1) is None
+
+    def test_should_iterate_newest_first_when_reversed(self):
+        history = MessageHistory([make_message(2), make_message(1)])
+
+        assert [message.id for message in reversed(history)] == [2, 1]
+
+    def test_should_raise_error_when_maximum_is_not_positive(self):
+        with pytest.raises(ValueError, match="Invalid max messages: 0"):
+            MessageHistory(max_messages=0)
@@ -0,0 +1,14 @@
+import pytest
+from domain.entities.pending_reply import PendingReply
+
+
+class TestPendingReply:
+    def test_should_key_pending_replies_by_guanaco_stream_and_topic(self):
+        pending = PendingReply("Pancho", "1", "Lunch", 100.0, "Tacos")
+
+        assert pending.key == ("Pancho", "1", "Lunch")
+        assert pending.reply == "Tacos"
+
+    def test_should_fail_without_guanaco_name(self):
+        with pytest.raises(ValueError, match="Guanaco name is required"):
+            PendingReply("", "1", "Lunch", 100.0)
@@ -10,3 +10,10 @@ class TestGuanacosRepository:
         repository = DummyRepo()
         with pytest.raises(NotImplementedError):
             repository.get_guanacos()
+
+    def test_should_report_no_changes_by_default(self):
+        class FixedRepo(GuanacosRepository):
+            def get_guanacos(self):
+                return []
+
+        assert FixedRepo().has_changes() is False
@@ -0,0 +1,24 @@
+import pytest
+from domain.ports.lease_repository import LeaseRepository
+
+class TestLeaseRepository:
+    def test_should_raise_not_implemented_error_when_calling_abstract_methods(self):
+        class DummyRepo(LeaseRepository):
+            def acquire(self, key, owner, ttl):
+                return super().acquire(key, owner, ttl)
+            def renew(self, keys, owner, ttl):
+                return super().renew(keys, owner, ttl)
+            def release(self, key, owner):
+                return super().release(key, owner)
+            def get_owner(self, key):
+                return super().get_owner(key)
+
+        repository = DummyRepo()
+        with pytest.raises(NotImplementedError):
+            repository.acquire("key", "owner", 1)
+        with pytest.raises(NotImplementedError):
+            repository.renew(["key"], "owner", 1)
+        with pytest.raises(NotImplementedError):
+            repository.release("key", "owner")
+        with pytest.raises(NotImplementedError):
+            repository.get_owner("key")
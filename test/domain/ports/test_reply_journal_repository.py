@@ -0,0 +1,20 @@
+import pytest
+from domain.ports.reply_journal_repository import ReplyJournalRepository
+
+class TestReplyJournalRepository:
+    def test_should_raise_not_implemented_error_when_calling_abstract_methods(self):
+        class DummyRepo(ReplyJournalRepository):
+            def save(self, pending_replies):
+                return super().save(pending_replies)
+            def load(self):
+                return super().load()
+            def clear(self):
+                return super().clear()
+
+        repository = DummyRepo()
+        with pytest.raises(NotImplementedError):
+            repository.save([])
+        with pytest.raises(NotImplementedError):
+            repository.load()
+        with pytest.raises(NotImplementedError):
+            repository.clear()
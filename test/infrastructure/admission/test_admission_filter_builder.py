@@ -0,0 +1,35 @@
+import os
+import pytest
+from unittest.mock import patch
+from infrastructure.admission import admission_filter_builder
+from infrastructure.admission.admission_filter_builder import build_admission_filter
+from infrastructure.config.admission_config import AdmissionConfig
+from infrastructure.transformers_engine.admission_classifier import TransformersAdmissionClassifier
+
+
+@pytest.fixture(autouse=True)
+def reset_admission_filter():
+    admission_filter_builder._admission_filter = None
+    yield
+    admission_filter_builder._admission_filter = None
+
+
+class TestBuildAdmissionFilter:
+    @patch.dict(os.environ, {}, clear=True)
+    def test_should_not_build_a_filter_when_disabled(self):
+        assert build_admission_filter() is None
+
+    @patch.dict(os.environ, {"ADMISSION_FILTER": "rules", "ADMISSION_THANKS_REPLY": "¡De nada!"}, clear=True)
+    def test_should_share_one_filter_between_guanacos(self):
+        admission_filter = build_admission_filter()
+
+        assert build_admission_filter() is admission_filter
+        assert admission_filter.classifier is None
+        assert [rule.reply for rule in admission_filter.rules if rule.name == "thanks"] == ["¡De nada!"]
+
+    @patch.dict(os.environ, {"ADMISSION_FILTER": "rules", "ADMISSION_CLASSIFIER_MODEL": "tiny-classifier"}, clear=True)
+    def test_should_add_the_classifier_when_a_model_is_configured(self):
+        admission_filter = build_admission_filter(AdmissionConfig())
+
+        assert isinstance(admission_filter.classifier, TransformersAdmissionClassifier)
+        assert admission_filter.classifier.model_name == "tiny-classifier"
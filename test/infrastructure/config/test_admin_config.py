@@ -0,0 +1,19 @@
+import os
+from unittest.mock import patch
+from infrastructure.config.admin_config import AdminConfig
+
+
+class TestAdminConfig:
+    @patch.dict(os.environ, {"ADMIN_HOST": "0.0.0.0", "ADMIN_PORT": "9465"})
+    def test_should_load_config_from_environment_variables(self):
+        config = AdminConfig()
+
+        assert config.admin_host == "0.0.0.0"
+        assert config.admin_port == 9465
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_should_disable_the_admin_endpoint_when_not_configured(self):
+        config = AdminConfig()
+
+        assert config.admin_port is None
+        assert config.admin_host == "127.0.0.1"
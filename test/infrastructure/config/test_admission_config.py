@@ -0,0 +1,32 @@
+import os
+import pytest
+from unittest.mock import patch
+from infrastructure.config.admission_config import AdmissionConfig
+
+
+class TestAdmissionConfig:
+    @patch.dict(os.environ, {}, clear=True)
+    def test_should_admit_every_message_by_default(self):
+        config = AdmissionConfig()
+
+        assert config.mode == "off"
+        assert config.cheap_max_new_tokens == 48
+        assert config.classifier_model is None
+
+    @patch.dict(os.environ, {"ADMISSION_FILTER": "rules", "ADMISSION_THANKS_REPLY": "¡De nada!", "ADMISSION_CHEAP_TOKENS": "24",
+                             "ADMISSION_CLASSIFIER_MODEL": "tiny-classifier", "ADMISSION_CLASSIFIER_LABEL": "question",
+                             "ADMISSION_CLASSIFIER_THRESHOLD": "0.3"}, clear=True)
+    def test_should_load_admission_settings_from_environment_variables(self):
+        config = AdmissionConfig()
+
+        assert config.mode == "rules"
+        assert config.canned_thanks == "¡De nada!"
+        assert config.cheap_max_new_tokens == 24
+        assert config.classifier_model == "tiny-classifier"
+        assert config.classifier_label == "question"
+        assert config.classifier_threshold == 0.3
+
+    @patch.dict(os.environ, {"ADMISSION_FILTER": "model"}, clear=True)
+    def test_should_raise_error_when_the_mode_is_unknown(self):
+        with pytest.raises(ValueError, match="Invalid ADMISSION_FILTER: model. Expected one of: off, rules."):
+            AdmissionConfig()
@@ -0,0 +1,25 @@
+import pytest
+import os
+from unittest.mock import patch
+from infrastructure.config.logging_config import LoggingConfig
+
+
+class TestLoggingConfig:
+    @patch.dict(os.environ, {"LOG_LEVEL": "debug", "LOG_FORMAT": "json"})
+    def test_should_load_config_from_environment_variables(self):
+        config = LoggingConfig()
+
+        assert config.log_level == "DEBUG"
+        assert config.log_format == "json"
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_should_default_to_info_text_logs(self):
+        config = LoggingConfig()
+
+        assert config.log_level == "INFO"
+        assert config.log_format == "text"
+
+    @patch.dict(os.environ, {"LOG_LEVEL": "LOUD"})
+    def test_should_raise_error_when_level_is_invalid(self):
+        with pytest.raises(ValueError, match="Invalid LOG_LEVEL: LOUD. Expected one of: DEBUG, INFO, WARNING, ERROR."):
+            LoggingConfig()
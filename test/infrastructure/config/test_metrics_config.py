@@ -0,0 +1,21 @@
+import os
+from unittest.mock import patch
+from infrastructure.config.metrics_config import MetricsConfig
+
+
+class TestMetricsConfig:
+    @patch.dict(os.environ, {"METRICS_FILE": "/tmp/donmingo.prom", "METRICS_PORT": "9464", "METRICS_EXPORT_INTERVAL": "5"})
+    def test_should_load_config_from_environment_variables(self):
+        config = MetricsConfig()
+
+        assert config.metrics_file == "/tmp/donmingo.prom"
+        assert config.metrics_port == 9464
+        assert config.export_interval == 5.0
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_should_disable_exporters_when_not_configured(self):
+        config = MetricsConfig()
+
+        assert config.metrics_file is None
+        assert config.metrics_port is None
+        assert config.metrics_host == "127.0.0.1"
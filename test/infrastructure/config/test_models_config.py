@@ -0,0 +1,23 @@
+import pytest
+import os
+from unittest.mock import patch
+from infrastructure.config.models_config import ModelsConfig
+
+
+class TestModelsConfig:
+    @patch.dict(os.environ, {}, clear=True)
+    def test_should_use_default_memory_profile_when_not_configured(self):
+        config = ModelsConfig()
+
+        assert config.memory_profile == "default"
+
+    @patch.dict(os.environ, {"MODEL_MEMORY_PROFILE": "low"})
+    def test_should_load_memory_profile_from_environment_variables(self):
+        config = ModelsConfig()
+
+        assert config.memory_profile == "low"
+
+    @patch.dict(os.environ, {"MODEL_MEMORY_PROFILE": "tiny"})
+    def test_should_raise_error_when_memory_profile_is_unknown(self):
+        with pytest.raises(ValueError, match="Invalid MODEL_MEMORY_PROFILE: tiny. Expected one of: default, low."):
+            ModelsConfig()
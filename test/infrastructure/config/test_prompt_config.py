@@ -0,0 +1,29 @@
+import pytest
+import os
+from unittest.mock import patch
+from infrastructure.config.prompt_config import PromptConfig
+
+
+class TestPromptConfig:
+    @patch.dict(os.environ, {"PROMPT_TEMPLATE": "reply", "PROMPT_SOURCE": "arize", "PROMPT_DIR": "/etc/prompts", "PROMPT_CACHE_TTL": "60"})
+    def test_should_load_config_from_environment_variables(self):
+        config = PromptConfig()
+
+        assert config.template_name == "reply"
+        assert config.source == "arize"
+        assert config.directory == "/etc/prompts"
+        assert config.cache_ttl == 60.0
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_should_use_defaults(self):
+        config = PromptConfig()
+
+        assert config.template_name is None
+        assert config.source == "file"
+        assert config.directory == "prompts"
+        assert config.cache_ttl == 300.0
+
+    @patch.dict(os.environ, {"PROMPT_SOURCE": "s3"})
+    def test_should_reject_invalid_source(self):
+        with pytest.raises(ValueError, match="Invalid PROMPT_SOURCE: s3"):
+            PromptConfig()
@@ -0,0 +1,57 @@
+import pytest
+import os
+from unittest.mock import patch
+from infrastructure.config.reply_pipeline_config import ReplyPipelineConfig
+
+
+class TestReplyPipelineConfig:
+    @patch.dict(os.environ, {}, clear=True)
+    def test_should_not_shed_by_default(self):
+        config = ReplyPipelineConfig()
+
+        assert config.max_message_age is None
+        assert config.shed_policy == "fallback"
+        assert config.fallback_reply
+
+    @patch.dict(os.environ, {"REPLY_MAX_MESSAGE_AGE": "600", "REPLY_SHED_POLICY": "skip", "REPLY_FALLBACK_MESSAGE": "Too late!"})
+    def test_should_load_shedding_from_environment_variables(self):
+        config = ReplyPipelineConfig()
+
+        assert config.max_message_age == 600
+        assert config.shed_policy == "skip"
+        assert config.fallback_reply == "Too late!"
+
+    @patch.dict(os.environ, {"REPLY_SHED_POLICY": "drop"})
+    def test_should_raise_error_when_shed_policy_is_unknown(self):
+        with pytest.raises(ValueError, match="Invalid REPLY_SHED_POLICY: drop. Expected one of: fallback, skip."):
+            ReplyPipelineConfig()
+
+    @patch.dict(os.environ, {"DRAIN_TIMEOUT": "45", "REPLY_JOURNAL_FILE": "/data/journal.json"})
+    def test_should_load_drain_settings_from_environment_variables(self):
+        config = ReplyPipelineConfig()
+
+        assert config.drain_timeout == 45
+        assert config.journal_file == "/data/journal.json"
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_should_disable_conversation_memory_by_default(self):
+        config = ReplyPipelineConfig()
+
+        assert config.recent_messages is None
+        assert config.summary_max_new_tokens == 96
+
+    @patch.dict(os.environ, {"REPLY_RECENT_MESSAGES": "8", "REPLY_SUMMARY_TOKENS": "64"})
+    def test_should_load_conversation_memory_from_environment_variables(self):
+        config = ReplyPipelineConfig()
+
+        assert config.recent_messages == 8
+        assert config.summary_max_new_tokens == 64
+
+    @patch.dict(os.environ, {"REPLY_CHANNEL_CONCURRENCY": "4"})
+    def test_should_load_channel_concurrency_from_environment_variables(self):
+        assert ReplyPipelineConfig().channel_concurrency == 4
+
+    @patch.dict(os.environ, {"REPLY_CHANNEL_CONCURRENCY": "0"})
+    def test_should_raise_error_when_channel_concurrency_is_not_positive(self):
+        with pytest.raises(ValueError, match="Invalid REPLY_CHANNEL_CONCURRENCY: 0. Expected at least 1."):
+            ReplyPipelineConfig()
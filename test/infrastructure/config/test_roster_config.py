@@ -0,0 +1,19 @@
+import os
+from unittest.mock import patch
+from infrastructure.config.roster_config import RosterConfig
+
+
+class TestRosterConfig:
+    @patch.dict(os.environ, {}, clear=True)
+    def test_should_use_the_built_in_roster_by_default(self):
+        config = RosterConfig()
+
+        assert config.guanacos_file is None
+        assert config.check_interval == 5
+
+    @patch.dict(os.environ, {"GUANACOS_FILE": "guanacos.yaml", "ROSTER_CHECK_INTERVAL": "1.5"})
+    def test_should_load_roster_settings_from_environment_variables(self):
+        config = RosterConfig()
+
+        assert config.guanacos_file == "guanacos.yaml"
+        assert config.check_interval == 1.5
@@ -0,0 +1,29 @@
+import pytest
+import os
+from unittest.mock import patch
+from infrastructure.config.sharding_config import ShardingConfig
+
+
+class TestShardingConfig:
+    @patch.dict(os.environ, {}, clear=True)
+    def test_should_not_shard_by_default(self):
+        config = ShardingConfig()
+
+        assert config.shard_mode == "none"
+        assert config.lease_db_path == ".leases.sqlite3"
+        assert config.lease_ttl == 30
+        assert config.owner_id is None
+
+    @patch.dict(os.environ, {"SHARD_MODE": "topic", "LEASE_DB_PATH": "/shared/leases.db", "LEASE_TTL": "9", "SHARD_OWNER_ID": "host-a"})
+    def test_should_load_sharding_from_environment_variables(self):
+        config = ShardingConfig()
+
+        assert config.shard_mode == "topic"
+        assert config.lease_db_path == "/shared/leases.db"
+        assert config.lease_ttl == 9
+        assert config.owner_id == "host-a"
+
+    @patch.dict(os.environ, {"SHARD_MODE": "stream"})
+    def test_should_raise_error_when_shard_mode_is_unknown(self):
+        with pytest.raises(ValueError, match="Invalid SHARD_MODE: stream. Expected one of: none, guanaco, topic."):
+            ShardingConfig()
@@ -0,0 +1,19 @@
+import os
+from unittest.mock import patch
+from infrastructure.config.tracing_config import TracingConfig
+
+
+class TestTracingConfig:
+    @patch.dict(os.environ, {"TRACE_FILE": "traces.jsonl", "TRACE_FLUSH_INTERVAL": "5"})
+    def test_should_load_config_from_environment_variables(self):
+        config = TracingConfig()
+
+        assert config.trace_file == "traces.jsonl"
+        assert config.flush_interval == 5.0
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_should_disable_tracing_when_not_configured(self):
+        config = TracingConfig()
+
+        assert config.trace_file is None
+        assert config.flush_interval == 2.0
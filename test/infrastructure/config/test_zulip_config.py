@@ -36,3 +36,32 @@ class TestZulipConfig:
     def test_should_raise_error_when_environment_variable_is_empty_string(self):
         with pytest.raises(ValueError, match="Missing required environment variables: ZULIP_API_KEY"):
             ZulipConfig()
+
+    @patch.dict(os.environ, {"ZULIP_API_KEY": "test_key", "ZULIP_EMAIL": "test@example.com", "ZULIP_SITE": "test.zulipchat.com"}, clear=True)
+    def test_should_keep_500_messages_per_channel_by_default(self):
+        assert ZulipConfig().channel_max_messages == 500
+
+    @patch.dict(os.environ, {"ZULIP_API_KEY": "test_key", "ZULIP_EMAIL": "test@example.com", "ZULIP_SITE": "test.zulipchat.com", "ZULIP_CHANNEL_MAX_MESSAGES": "0"}, clear=True)
+    def test_should_raise_error_when_channel_max_messages_is_not_positive(self):
+        with pytest.raises(ValueError, match="Invalid ZULIP_CHANNEL_MAX_MESSAGES: 0"):
+            ZulipConfig()
+
+    @patch.dict(os.environ, {"ZULIP_API_KEY": "test_key", "ZULIP_EMAIL": "test@example.com", "ZULIP_SITE": "test.zulipchat.com",
+                             "ZULIP_ENGAGEMENT": "mentions", "ZULIP_ENGAGEMENT_STREAMS": "42, 43"}, clear=True)
+    def test_should_load_the_engagement_policy(self):
+        config = ZulipConfig()
+
+        assert config.engagement == "mentions"
+        assert config.engagement_streams == ["42", "43"]
+
+    @patch.dict(os.environ, {"ZULIP_API_KEY": "test_key", "ZULIP_EMAIL": "test@example.com", "ZULIP_SITE": "test.zulipchat.com"}, clear=True)
+    def test_should_answer_every_topic_by_default(self):
+        config = ZulipConfig()
+
+        assert config.engagement == "all"
+        assert config.engagement_streams is None
+
+    @patch.dict(os.environ, {"ZULIP_API_KEY": "test_key", "ZULIP_EMAIL": "test@example.com", "ZULIP_SITE": "test.zulipchat.com", "ZULIP_ENGAGEMENT": "dms"}, clear=True)
+    def test_should_raise_error_when_the_engagement_is_unknown(self):
+        with pytest.raises(ValueError, match="Invalid ZULIP_ENGAGEMENT: dms. Expected one of: all, mentions."):
+            ZulipConfig()
@@ -0,0 +1,102 @@
+import pytest
+import json
+import urllib.request
+import urllib.error
+from unittest.mock import Mock
+from infrastructure.observability.admin_server import AdminHttpServer
+
+
+def make_guanacos_spits():
+    guanacos_spits = Mock()
+    guanacos_spits.get_status.return_value = {"workers": {"Pancho": {"paused": False}}, "recent_errors": []}
+    guanacos_spits.unload_models.return_value = 1
+    return guanacos_spits
+
+
+class TestAdminHttpServer:
+    def test_should_return_the_runtime_status(self):
+        admin = AdminHttpServer(make_guanacos_spits())
+
+        assert admin.handle("GET", "/status") == (200, {"workers": {"Pancho": {"paused": False}}, "recent_errors": []})
+
+    def test_should_pause_and_resume_workers(self):
+        guanacos_spits = make_guanacos_spits()
+        admin = AdminHttpServer(guanacos_spits)
+
+        assert admin.handle("POST", "/workers/Pancho/pause") == (200, {"worker": "Pancho", "action": "pause"})
+        assert admin.handle("POST", "/workers/Pancho/resume")[0] == 200
+        guanacos_spits.pause_worker.assert_called_once_with("Pancho")
+        guanacos_spits.resume_worker.assert_called_once_with("Pancho")
+
+    def test_should_decode_percent_encoded_worker_names(self):
+        guanacos_spits = make_guanacos_spits()
+        admin = AdminHttpServer(guanacos_spits)
+
+        assert admin.handle("POST", "/workers/Do%C3%B1a%20Rosa/pause") == (200, {"worker": "Doña Rosa", "action": "pause"})
+        guanacos_spits.pause_worker.assert_called_once_with("Doña Rosa")
+
+    def test_should_set_and_reset_the_poll_interval(self):
+        guanacos_spits = make_guanacos_spits()
+        admin = AdminHttpServer(guanacos_spits)
+
+        assert admin.handle("POST", "/workers/Pancho/interval", b'{"interval": 30}')[0] == 200
+        assert admin.handle("POST", "/workers/Pancho/interval", b'{"interval": null}')[0] == 200
+        assert [call.args for call in guanacos_spits.set_worker_interval.call_args_list] == [("Pancho", 30), ("Pancho", None)]
+
+    @pytest.mark.parametrize("body", [b"not json", b"{}", b'{"interval": "fast"}', b'{"interval": true}'])
+    def test_should_reject_invalid_interval_bodies(self, body):
+        guanacos_spits = make_guanacos_spits()
+        status, payload = AdminHttpServer(guanacos_spits).handle("POST", "/workers/Pancho/interval", body)
+
+        assert status == 400
+        assert "error" in payload
+        guanacos_spits.set_worker_interval.assert_not_called()
+
+    def test_should_answer_not_found_for_unknown_workers_and_routes(self):
+        guanacos_spits = make_guanacos_spits()
+        guanacos_spits.pause_worker.side_effect = KeyError("Unknown Guanaco: Nobody")
+        admin = AdminHttpServer(guanacos_spits)
+
+        assert admin.handle("POST", "/workers/Nobody/pause") == (404, {"error": "Unknown Guanaco: Nobody"})
+        assert admin.handle("GET", "/workers/Pancho/pause")[0] == 404
+        assert admin.handle("DELETE", "/status")[0] == 404
+
+    def test_should_ignore_the_query_string_when_routing(self):
+        guanacos_spits = make_guanacos_spits()
+        admin = AdminHttpServer(guanacos_spits)
+
+        assert admin.handle("GET", "/status?x=1")[0] == 200
+        assert admin.handle("POST", "/workers/Pancho/pause?source=cli") == (200, {"worker": "Pancho", "action": "pause"})
+
+    def test_should_answer_json_when_an_action_fails_unexpectedly(self):
+        guanacos_spits = make_guanacos_spits()
+        guanacos_spits.unload_models.side_effect = RuntimeError("CUDA error")
+
+        assert AdminHttpServer(guanacos_spits).handle("POST", "/models/unload") == (500, {"error": "CUDA error"})
+
+    def test_should_unload_the_models(self):
+        guanacos_spits = make_guanacos_spits()
+
+        assert AdminHttpServer(guanacos_spits).handle("POST", "/models/unload") == (200, {"unloaded": 1})
+
+    def test_should_serve_the_routes_over_http(self):
+        guanacos_spits = make_guanacos_spits()
+        admin = AdminHttpServer(guanacos_spits, port=0)
+        admin.start()
+
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{admin.port}/status") as response:
+                status = json.loads(response.read())
+                content_type = response.headers["Content-Type"]
+            request = urllib.request.Request(f"http://127.0.0.1:{admin.port}/workers/Pancho/interval", data=b'{"interval": 5}', method="POST")
+            with urllib.request.urlopen(request) as response:
+                assert response.status == 200
+            with pytest.raises(urllib.error.HTTPError) as error:
+                urllib.request.urlopen(f"http://127.0.0.1:{admin.port}/unknown")
+        finally:
+            admin.stop()
+
+        assert status["workers"] == {"Pancho": {"paused": False}}
+        assert content_type == "application/json"
+        guanacos_spits.set_worker_interval.assert_called_once_with("Pancho", 5)
+        assert error.value.code == 404
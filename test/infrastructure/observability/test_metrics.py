@@ -0,0 +1,78 @@
+import pytest
+from infrastructure.observability.metrics import MetricsRegistry, get_metrics_registry
+
+
+class TestMetricsRegistry:
+    def test_should_count_per_label_values(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("replies", "Replies sent", ["guanaco"])
+
+        counter.inc(guanaco="Pancho")
+        counter.inc(2, guanaco="Pancho")
+        counter.inc(guanaco="Paco")
+
+        assert counter.get(guanaco="Pancho") == 3
+        assert counter.get(guanaco="Paco") == 1
+        assert counter.get(guanaco="Nobody") == 0
+
+    def test_should_not_allow_decreasing_counters(self):
+        counter = MetricsRegistry().counter("replies", "Replies sent")
+
+        with pytest.raises(ValueError, match="Counters can only increase"):
+            counter.inc(-1)
+
+    def test_should_reject_unexpected_labels(self):
+        counter = MetricsRegistry().counter("replies", "Replies sent", ["guanaco"])
+
+        with pytest.raises(ValueError, match="Metric replies expects labels"):
+            counter.inc(stream="general")
+
+    def test_should_return_the_same_metric_when_registered_twice(self):
+        registry = MetricsRegistry()
+
+        assert registry.counter("replies", "Replies sent") is registry.counter("replies", "Replies sent")
+
+    def test_should_reject_registering_a_name_with_another_type(self):
+        registry = MetricsRegistry()
+        registry.counter("replies", "Replies sent")
+
+        with pytest.raises(ValueError, match="already registered"):
+            registry.histogram("replies", "Replies sent")
+
+    def test_should_accumulate_histogram_observations(self):
+        histogram = MetricsRegistry().histogram("latency", "Latency", buckets=(0.1, 1))
+
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+
+        assert histogram.get() == {"count": 2, "sum": 0.55}
+
+    def test_should_render_counters_in_prometheus_text_format(self):
+        registry = MetricsRegistry()
+        registry.counter("replies", "Replies sent", ["guanaco"]).inc(guanaco='Pa"co')
+
+        assert registry.to_prometheus_text() == (
+            "# HELP replies_total Replies sent\n"
+            "# TYPE replies_total counter\n"
+            'replies_total{guanaco="Pa\\"co"} 1\n'
+        )
+
+    def test_should_render_cumulative_histogram_buckets(self):
+        registry = MetricsRegistry()
+        histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(3)
+
+        assert registry.to_prometheus_text() == (
+            "# HELP latency_seconds Latency\n"
+            "# TYPE latency_seconds histogram\n"
+            'latency_seconds_bucket{le="0.1"} 1\n'
+            'latency_seconds_bucket{le="1"} 2\n'
+            'latency_seconds_bucket{le="+Inf"} 3\n'
+            "latency_seconds_sum 3.55\n"
+            "latency_seconds_count 3\n"
+        )
+
+    def test_should_share_a_default_registry(self):
+        assert get_metrics_registry() is get_metrics_registry()
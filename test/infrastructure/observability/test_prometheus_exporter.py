@@ -0,0 +1,59 @@
+import pytest
+import urllib.request
+import urllib.error
+from types import SimpleNamespace
+from infrastructure.observability.metrics import MetricsRegistry
+from infrastructure.observability.prometheus_exporter import PrometheusFileExporter, PrometheusHttpExporter, build_exporters
+
+
+class TestPrometheusExporter:
+    def test_should_write_metrics_to_file(self, tmp_path):
+        registry = MetricsRegistry()
+        registry.counter("replies", "Replies sent").inc()
+        metrics_path = tmp_path / "donmingo.prom"
+
+        PrometheusFileExporter(registry, str(metrics_path)).write()
+
+        assert metrics_path.read_text() == registry.to_prometheus_text()
+
+    def test_should_write_metrics_once_more_when_stopped(self, tmp_path):
+        registry = MetricsRegistry()
+        metrics_path = tmp_path / "donmingo.prom"
+        exporter = PrometheusFileExporter(registry, str(metrics_path), interval=60)
+
+        exporter.start()
+        registry.counter("replies", "Replies sent").inc()
+        exporter.stop()
+
+        assert "replies_total 1" in metrics_path.read_text()
+
+    def test_should_serve_metrics_over_http(self):
+        registry = MetricsRegistry()
+        registry.counter("replies", "Replies sent").inc()
+        exporter = PrometheusHttpExporter(registry, port=0)
+        exporter.start()
+
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{exporter.port}/metrics") as response:
+                body = response.read().decode("utf-8")
+                content_type = response.headers["Content-Type"]
+            with pytest.raises(urllib.error.HTTPError):
+                urllib.request.urlopen(f"http://127.0.0.1:{exporter.port}/other")
+        finally:
+            exporter.stop()
+
+        assert body == registry.to_prometheus_text()
+        assert content_type.startswith("text/plain; version=0.0.4")
+
+    def test_should_build_exporters_from_configuration(self):
+        config = SimpleNamespace(metrics_file="metrics.prom", metrics_host="127.0.0.1", metrics_port=9464, export_interval=5)
+
+        exporters = build_exporters(MetricsRegistry(), config)
+
+        assert [type(exporter) for exporter in exporters] == [PrometheusFileExporter, PrometheusHttpExporter]
+        assert exporters[0].interval == 5
+
+    def test_should_not_build_exporters_when_not_configured(self):
+        config = SimpleNamespace(metrics_file=None, metrics_host="127.0.0.1", metrics_port=None, export_interval=15)
+
+        assert build_exporters(MetricsRegistry(), config) == []
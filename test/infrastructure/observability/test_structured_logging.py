@@ -0,0 +1,96 @@
+import pytest
+import io
+import json
+import logging
+import threading
+from infrastructure.observability.structured_logging import BackgroundLogging, StructuredFormatter, summarize
+
+
+def make_record(message, *args, level=logging.INFO, **extra):
+    record = logging.LogRecord("test", level, __file__, 1, message, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestSummary:
+    def test_should_keep_short_payloads_whole(self):
+        assert str(summarize("Hello")) == "Hello"
+
+    def test_should_cut_large_payloads_and_report_their_size(self):
+        assert str(summarize("x" * 500, limit=10)) == "xxxxxxxxxx... (500 chars)"
+
+    def test_should_not_render_the_payload_until_formatted(self):
+        payload = RenderCounter()
+
+        summary = summarize(payload)
+
+        assert payload.renders == 0
+        str(summary)
+        assert payload.renders == 1
+
+
+class RenderCounter:
+    def __init__(self):
+        self.renders = 0
+
+    def __str__(self):
+        self.renders += 1
+        return "payload"
+
+
+class TestStructuredFormatter:
+    def test_should_format_text_with_level_and_extra_fields(self):
+        record = make_record("%s has processed messages", "Pancho", guanaco="Pancho", topic="Lunch")
+
+        assert StructuredFormatter().format(record) == "[INFO] Pancho has processed messages guanaco=Pancho topic=Lunch"
+
+    def test_should_format_one_json_object_per_record(self):
+        record = make_record("Generation failed: %s", "boom", level=logging.ERROR, guanaco="Pancho")
+
+        entry = json.loads(StructuredFormatter("json").format(record))
+
+        assert entry["level"] == "ERROR"
+        assert entry["message"] == "Generation failed: boom"
+        assert entry["guanaco"] == "Pancho"
+
+    def test_should_raise_error_when_format_is_unknown(self):
+        with pytest.raises(ValueError, match="Invalid log format: xml. Expected one of: text, json."):
+            StructuredFormatter("xml")
+
+
+class TestBackgroundLogging:
+    def test_should_write_records_from_a_background_thread(self):
+        stream = io.StringIO()
+        writer_threads = []
+        background_logging = BackgroundLogging("INFO", stream=stream)
+        original_emit = background_logging.output.emit
+        background_logging.output.emit = lambda record: (writer_threads.append(threading.current_thread()), original_emit(record))
+        background_logging.start()
+
+        logging.getLogger("donmingo.test").info("Replied to %s", "Lunch", extra={"guanaco": "Pancho"})
+        background_logging.stop()
+
+        assert stream.getvalue() == "[INFO] Replied to Lunch guanaco=Pancho\n"
+        assert writer_threads and threading.current_thread() not in writer_threads
+
+    def test_should_not_format_records_below_the_level(self):
+        payload = RenderCounter()
+        background_logging = BackgroundLogging("INFO", stream=io.StringIO())
+        background_logging.start()
+
+        logging.getLogger("donmingo.test").debug("Prompt: %s", payload)
+        background_logging.stop()
+
+        assert payload.renders == 0
+
+    def test_should_detach_from_the_root_logger_when_stopped(self):
+        root = logging.getLogger()
+        handlers = list(root.handlers)
+        level = root.level
+        background_logging = BackgroundLogging("DEBUG", stream=io.StringIO())
+
+        background_logging.start()
+        background_logging.stop()
+
+        assert root.handlers == handlers
+        assert root.level == level
@@ -0,0 +1,114 @@
+import pytest
+import json
+import threading
+from infrastructure.observability.metrics import MetricsRegistry
+from infrastructure.observability.tracing import NOOP_SPAN, JsonlSpanExporter, Span, Tracer
+
+
+class CollectingExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+class TestTracer:
+    def test_should_not_create_spans_without_an_exporter(self):
+        tracer = Tracer()
+
+        with tracer.start_span("guanaco.cycle", guanaco="Pancho") as span:
+            assert span is NOOP_SPAN
+            assert tracer.get_current_span() is None
+
+    def test_should_nest_spans_under_the_current_one(self):
+        exporter = CollectingExporter()
+        tracer = Tracer(exporter)
+
+        with tracer.start_span("guanaco.cycle", guanaco="Pancho") as cycle:
+            with tracer.start_span("zulip.get_unread_messages") as fetch:
+                fetch.set_attribute("messages", 3)
+
+        assert [span.name for span in exporter.spans] == ["zulip.get_unread_messages", "guanaco.cycle"]
+        assert fetch.trace_id == cycle.trace_id
+        assert fetch.parent_id == cycle.span_id
+        assert cycle.parent_id is None
+        assert fetch.attributes == {"messages": 3}
+        assert cycle.get_duration() >= fetch.get_duration() >= 0
+
+    def test_should_attach_spans_of_other_threads_to_an_explicit_parent(self):
+        exporter = CollectingExporter()
+        tracer = Tracer(exporter)
+        with tracer.start_span("guanaco.cycle") as cycle:
+            pass
+
+        def think():
+            with tracer.start_span("reply.think", parent=cycle):
+                pass
+
+        thread = threading.Thread(target=think)
+        thread.start()
+        thread.join()
+
+        assert exporter.spans[-1].parent_id == cycle.span_id
+        assert exporter.spans[-1].trace_id == cycle.trace_id
+
+    def test_should_mark_the_span_as_failed_when_the_block_raises(self):
+        exporter = CollectingExporter()
+        tracer = Tracer(exporter)
+
+        with pytest.raises(RuntimeError):
+            with tracer.start_span("zulip.send_channel_message"):
+                raise RuntimeError("Zulip down")
+
+        assert exporter.spans[0].to_dict()["status"] == {"code": "ERROR", "message": "RuntimeError: Zulip down"}
+        assert tracer.get_current_span() is None
+
+
+class TestJsonlSpanExporter:
+    def make_span(self, name):
+        span = Span(name, "a" * 32, "b" * 16, None, {"stream": "1"})
+        span.end()
+        return span
+
+    def test_should_write_one_json_span_per_line_when_stopped(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        exporter = JsonlSpanExporter(str(path), flush_interval=60, metrics=MetricsRegistry())
+        exporter.start()
+
+        exporter.export(self.make_span("guanaco.cycle"))
+        exporter.export(self.make_span("model.generate"))
+        exporter.stop()
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line["name"] for line in lines] == ["guanaco.cycle", "model.generate"]
+        assert lines[0]["traceId"] == "a" * 32
+        assert lines[0]["attributes"] == {"stream": "1"}
+        assert lines[0]["endTimeUnixNano"] >= lines[0]["startTimeUnixNano"]
+
+    def test_should_write_in_batches_from_the_background_thread(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        registry = MetricsRegistry()
+        exporter = JsonlSpanExporter(str(path), batch_size=2, flush_interval=0.01, metrics=registry)
+        exporter.start()
+
+        for _ in range(5):
+            exporter.export(self.make_span("reply.send"))
+        deadline = threading.Event()
+        for _ in range(200):
+            if path.exists() and len(path.read_text().splitlines()) == 5:
+                break
+            deadline.wait(0.01)
+        exporter.stop()
+
+        assert len(path.read_text().splitlines()) == 5
+        assert registry.counter("trace_spans_exported", "").get() == 5
+
+    def test_should_drop_spans_instead_of_blocking_when_the_queue_is_full(self, tmp_path):
+        registry = MetricsRegistry()
+        exporter = JsonlSpanExporter(str(tmp_path / "traces.jsonl"), max_queue_size=1, metrics=registry)
+
+        exporter.export(self.make_span("reply.send"))
+        exporter.export(self.make_span("reply.send"))
+
+        assert registry.counter("trace_spans_dropped", "").get() == 1
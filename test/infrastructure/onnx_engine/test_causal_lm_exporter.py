@@ -0,0 +1,58 @@
+import pytest
+import json
+import os
+import torch
+from unittest.mock import Mock, patch
+from transformers import Qwen3Config, Qwen3ForCausalLM
+from infrastructure.onnx_engine.causal_lm_exporter import CausalLMExporter, get_past_names
+
+
+def build_tiny_model():
+    torch.manual_seed(0)
+    config = Qwen3Config(
+        vocab_size=128, hidden_size=32, intermediate_size=64, num_hidden_layers=2,
+        num_attention_heads=4, num_key_value_heads=2, head_dim=8, max_position_embeddings=128,
+    )
+    return Qwen3ForCausalLM(config).eval()
+
+
+class TestCausalLMExporter:
+    def test_should_name_past_inputs_per_layer(self):
+        assert get_past_names(2) == [
+            "past_key_values.0.key", "past_key_values.0.value",
+            "past_key_values.1.key", "past_key_values.1.value",
+        ]
+
+    def test_should_place_exports_in_a_directory_per_model(self, tmp_path):
+        exporter = CausalLMExporter(str(tmp_path))
+
+        assert exporter.get_export_path("Qwen/Qwen3-1.7B") == os.path.join(str(tmp_path), "Qwen--Qwen3-1.7B", "model.onnx")
+
+    def test_should_export_model_with_past_key_values(self, tmp_path):
+        onnx = pytest.importorskip("onnx")
+        exporter = CausalLMExporter(str(tmp_path))
+
+        export_path = exporter.export("tiny-model", model=build_tiny_model())
+
+        graph = onnx.load(export_path).graph
+        assert [graph_input.name for graph_input in graph.input] == ["input_ids", "attention_mask", *get_past_names(2)]
+        assert graph.output[0].name == "logits"
+        assert exporter.is_exported("tiny-model")
+
+    def test_should_reuse_cached_export(self, tmp_path):
+        exporter = CausalLMExporter(str(tmp_path))
+        exporter.export("tiny-model", model=build_tiny_model())
+
+        with patch('infrastructure.onnx_engine.causal_lm_exporter.torch.onnx.export') as mock_export:
+            exporter.export("tiny-model", model=Mock())
+
+        mock_export.assert_not_called()
+
+    def test_should_export_again_when_library_versions_change(self, tmp_path):
+        exporter = CausalLMExporter(str(tmp_path))
+        os.makedirs(exporter.get_export_dir("tiny-model"))
+        open(exporter.get_export_path("tiny-model"), "w").close()
+        with open(os.path.join(exporter.get_export_dir("tiny-model"), "export.json"), "w") as metadata_file:
+            json.dump({"model_name": "tiny-model", "torch_version": "0.0", "transformers_version": "0.0"}, metadata_file)
+
+        assert exporter.is_exported("tiny-model") is False
@@ -0,0 +1,96 @@
+import threading
+import numpy as np
+import torch
+from unittest.mock import Mock, patch
+from infrastructure.onnx_engine.causal_lm_exporter import CausalLMExporter
+from infrastructure.onnx_engine.onnx_models_handler import OnnxModelsHandler
+from test.infrastructure.onnx_engine.test_causal_lm_exporter import build_tiny_model
+
+
+class TestOnnxModelsHandler:
+    def test_should_use_default_model_and_configured_cache_dir(self, tmp_path):
+        handler = OnnxModelsHandler(cache_dir=str(tmp_path))
+
+        assert handler.model_name == "Qwen/Qwen3-1.7B"
+        assert handler.exporter.cache_dir == str(tmp_path)
+
+    def test_should_match_transformers_greedy_decoding(self, tmp_path):
+        model = build_tiny_model()
+        CausalLMExporter(str(tmp_path)).export("tiny-model", model=model)
+        handler = OnnxModelsHandler(model_name="tiny-model", cache_dir=str(tmp_path), max_new_tokens=8)
+        input_ids = np.array([[5, 17, 42, 7, 99]], dtype=np.int64)
+        attention_mask = np.ones_like(input_ids)
+
+        generated = handler.generate_ids(input_ids, attention_mask)
+
+        with torch.no_grad():
+            expected = model.generate(
+                torch.from_numpy(input_ids), attention_mask=torch.from_numpy(attention_mask),
+                max_new_tokens=8, do_sample=False,
+            )[0, 5:].tolist()
+        assert generated == expected
+
+    def test_should_stop_at_eos_token(self, tmp_path):
+        handler = OnnxModelsHandler(model_name="tiny-model", cache_dir=str(tmp_path), max_new_tokens=8)
+        session = Mock()
+        session.get_inputs.return_value = [Mock(shape=["batch", "sequence"])]
+        session.get_inputs.return_value[0].name = "input_ids"
+        logits = np.zeros((1, 1, 10), dtype=np.float32)
+        logits[0, -1, 3] = 1.0
+        session.run.return_value = [logits]
+        handler._session = session
+
+        generated = handler.generate_ids(np.array([[1]], dtype=np.int64), np.array([[1]], dtype=np.int64), eos_token_id=3)
+
+        assert generated == [3]
+        session.run.assert_called_once()
+
+    def test_should_decode_only_the_generated_tokens(self, tmp_path):
+        handler = OnnxModelsHandler(model_name="tiny-model", cache_dir=str(tmp_path))
+        tokenizer = Mock(eos_token_id=2)
+        tokenizer.return_value = {"input_ids": np.array([[4, 5]]), "attention_mask": np.array([[1, 1]])}
+        tokenizer.decode.return_value = "Answer"
+        handler._tokenizer = tokenizer
+        handler.generate_ids = Mock(return_value=[6, 7])
+
+        result = handler.generate_text("<p>Prompt</p>")
+
+        tokenizer.assert_called_once_with("Prompt", return_tensors="np", max_length=512, truncation=True)
+        tokenizer.decode.assert_called_once_with([6, 7], skip_special_tokens=True)
+        assert result == "Answer"
+
+    def test_should_return_fallback_response_when_generation_fails(self, tmp_path):
+        handler = OnnxModelsHandler(model_name="tiny-model", cache_dir=str(tmp_path))
+        handler.get_tokenizer = Mock(side_effect=Exception("Tokenizer missing"))
+
+        result = handler.generate_text("test")
+
+        assert result == "I apologize, I'm having trouble generating a response right now."
+
+    def test_should_export_and_create_the_session_once_for_concurrent_callers(self, tmp_path):
+        handler = OnnxModelsHandler(model_name="tiny-model", cache_dir=str(tmp_path))
+        exporting = threading.Event()
+        release = threading.Event()
+        handler.exporter = Mock(export=Mock(side_effect=lambda model_name: (exporting.set(), release.wait(2), "model.onnx")[-1]))
+
+        with patch("infrastructure.onnx_engine.onnx_models_handler.onnxruntime") as onnxruntime:
+            first = threading.Thread(target=handler.get_session)
+            first.start()
+            assert exporting.wait(2)
+            second = threading.Thread(target=handler.get_session)
+            second.start()
+            release.set()
+            first.join(2)
+            second.join(2)
+
+        handler.exporter.export.assert_called_once_with("tiny-model")
+        onnxruntime.InferenceSession.assert_called_once()
+
+    def test_should_report_and_drop_the_loaded_session(self, tmp_path):
+        handler = OnnxModelsHandler(model_name="tiny-model", cache_dir=str(tmp_path))
+        handler._session = Mock()
+
+        assert handler.get_status()["loaded"] is True
+        handler.unload()
+
+        assert handler.get_status() == {"engine": "onnx", "model": "tiny-model", "loaded": False, "max_new_tokens": 32}
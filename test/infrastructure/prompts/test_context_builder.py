@@ -0,0 +1,45 @@
+import os
+from unittest.mock import Mock, patch
+from infrastructure.config.prompt_config import PromptConfig
+from infrastructure.prompts import context_builder
+from infrastructure.prompts.context_builder import ContextBuilder, build_context_builder
+from infrastructure.prompts.prompt_templates import PromptTemplate
+
+
+class TestContextBuilder:
+    def test_should_render_the_message_with_the_template(self):
+        provider = Mock()
+        provider.get_template.return_value = PromptTemplate("guanaco", "You are a guanaco.\n{message}")
+        builder = ContextBuilder(provider, "guanaco")
+
+        assert builder.build("hola") == "You are a guanaco.\nhola"
+        provider.get_template.assert_called_once_with("guanaco")
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_should_not_build_without_template_name(self):
+        assert build_context_builder() is None
+
+    @patch.object(context_builder, "_prompt_template_provider", None)
+    @patch.dict(os.environ, {"PROMPT_TEMPLATE": "reply"}, clear=True)
+    def test_should_read_templates_from_files_by_default(self, tmp_path):
+        (tmp_path / "reply.txt").write_text("Guanaco: {message}")
+        os.environ["PROMPT_DIR"] = str(tmp_path)
+
+        builder = build_context_builder()
+
+        assert builder.build("hola") == "Guanaco: hola"
+
+    @patch.object(context_builder, "_prompt_template_provider", None)
+    @patch.dict(os.environ, {"PROMPT_TEMPLATE": "reply"}, clear=True)
+    def test_should_share_one_provider(self):
+        assert build_context_builder().prompt_template_provider is build_context_builder().prompt_template_provider
+
+    @patch.object(context_builder, "_prompt_template_provider", None)
+    @patch("infrastructure.prompts.context_builder.ArizePromptRepository")
+    @patch.dict(os.environ, {"PROMPT_TEMPLATE": "reply", "PROMPT_SOURCE": "arize"}, clear=True)
+    def test_should_fetch_templates_from_arize_with_local_fallback(self, mock_arize_repository_class):
+        builder = build_context_builder(PromptConfig())
+
+        provider = builder.prompt_template_provider
+        assert provider.prompt_repository == mock_arize_repository_class.return_value
+        assert provider.fallback_repository.directory == "prompts"
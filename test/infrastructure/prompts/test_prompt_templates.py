@@ -0,0 +1,131 @@
+import pytest
+from unittest.mock import Mock
+from infrastructure.observability.metrics import MetricsRegistry
+from infrastructure.prompts.prompt_templates import DEFAULT_TEMPLATE, PromptTemplate, PromptTemplateProvider
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPromptTemplate:
+    def test_should_render_variables(self):
+        template = PromptTemplate("reply", "Answer like a guanaco: {message}")
+
+        assert template.render(message="hola") == "Answer like a guanaco: hola"
+        assert template.get_variables() == ["message"]
+
+    def test_should_render_missing_variables_as_empty(self):
+        template = PromptTemplate("reply", "{summary}\n{message}")
+
+        assert template.render(message="hola") == "\nhola"
+
+    def test_should_version_templates_by_source(self):
+        assert PromptTemplate("reply", "{message}").version == PromptTemplate("other", "{message}").version
+        assert PromptTemplate("reply", "{message}").version != PromptTemplate("reply", "> {message}").version
+
+    def test_should_reject_invalid_placeholders(self):
+        with pytest.raises(ValueError, match="Invalid placeholder"):
+            PromptTemplate("reply", "{message!r}")
+
+
+class TestPromptTemplateProvider:
+    def _create_provider(self, prompt_repository, fallback_repository=None):
+        self.clock = FakeClock()
+        self.background_tasks = []
+        self.metrics = MetricsRegistry()
+        return PromptTemplateProvider(prompt_repository, fallback_repository, ttl=60, retry_interval=10, clock=self.clock,
+                                      run_in_background=self.background_tasks.append, metrics=self.metrics)
+
+    def _run_background_tasks(self):
+        tasks, self.background_tasks[:] = list(self.background_tasks), []
+        for task in tasks:
+            task()
+
+    def test_should_serve_the_fallback_on_a_miss_and_refresh_in_background(self):
+        prompt_repository = Mock()
+        prompt_repository.get_prompt.return_value = "Remote: {message}"
+        fallback_repository = Mock()
+        fallback_repository.get_prompt.return_value = "Local: {message}"
+        provider = self._create_provider(prompt_repository, fallback_repository)
+
+        assert provider.get_template("reply").render(message="hola") == "Local: hola"
+        prompt_repository.get_prompt.assert_not_called()
+        assert len(self.background_tasks) == 1
+
+        self._run_background_tasks()
+
+        assert provider.get_template("reply").render(message="hola") == "Remote: hola"
+        assert self.background_tasks == []
+
+    def test_should_serve_the_default_template_without_fallback(self):
+        prompt_repository = Mock()
+        provider = self._create_provider(prompt_repository)
+
+        assert provider.get_template("reply").source == DEFAULT_TEMPLATE
+
+    def test_should_serve_stale_template_while_refreshing(self):
+        prompt_repository = Mock()
+        prompt_repository.get_prompt.return_value = "v1 {message}"
+        provider = self._create_provider(prompt_repository)
+        provider.refresh("reply")
+        prompt_repository.get_prompt.return_value = "v2 {message}"
+
+        self.clock.now = 30
+        assert provider.get_template("reply").source == "v1 {message}"
+        assert self.background_tasks == []
+
+        self.clock.now = 61
+        assert provider.get_template("reply").source == "v1 {message}"
+        assert provider.get_template("reply").source == "v1 {message}"
+        # A single refresh is in flight however many requests see the stale template
+        assert len(self.background_tasks) == 1
+
+        self._run_background_tasks()
+
+        assert provider.get_template("reply").source == "v2 {message}"
+
+    def test_should_compile_each_version_once(self):
+        prompt_repository = Mock()
+        prompt_repository.get_prompt.return_value = "{message}"
+        provider = self._create_provider(prompt_repository)
+        provider.refresh("reply")
+        template = provider.get_template("reply")
+
+        self.clock.now = 61
+        provider.refresh("reply")
+
+        assert provider.get_template("reply") is template
+        assert self.metrics.counter("prompt_template_compilations", "").get() == 1
+        assert self.metrics.counter("prompt_template_refreshes", "", ("result",)).get(result="success") == 2
+
+    def test_should_keep_the_cached_template_when_the_service_fails(self):
+        prompt_repository = Mock()
+        prompt_repository.get_prompt.return_value = "v1 {message}"
+        provider = self._create_provider(prompt_repository)
+        provider.refresh("reply")
+        prompt_repository.get_prompt.side_effect = ConnectionError("prompt service down")
+
+        self.clock.now = 61
+        provider.get_template("reply")
+        self._run_background_tasks()
+
+        assert provider.get_template("reply").source == "v1 {message}"
+        assert self.metrics.counter("prompt_template_refreshes", "", ("result",)).get(result="error") == 1
+        # Retried after retry_interval, not on every request
+        self.clock.now = 65
+        provider.get_template("reply")
+        assert self.background_tasks == []
+        self.clock.now = 72
+        provider.get_template("reply")
+        assert len(self.background_tasks) == 1
+
+    def test_should_report_cache_sizes(self):
+        provider = self._create_provider(Mock())
+        provider.get_template("reply")
+
+        assert provider.get_cache_sizes() == {"prompt_templates": 1}
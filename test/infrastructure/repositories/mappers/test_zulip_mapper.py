@@ -48,7 +48,9 @@ class TestZulipMapper:
             id=12345,
             content="Hello, how are you?",
             sender=mock_user,
-            created_at=mock_datetime_instance
+            created_at=mock_datetime_instance,
+            is_private=False,
+            is_mention=False,
         )
         
         # Should return the created chat message
@@ -89,8 +91,24 @@ class TestZulipMapper:
             id=None,
             content=None,
             sender=mock_user,
-            created_at=mock_datetime_instance
+            created_at=mock_datetime_instance,
+            is_private=False,
+            is_mention=False,
         )
         
         # Should return the created chat message
         assert result == mock_chat_message
+
+    @pytest.mark.parametrize("message, is_private, is_mention", [
+        ({"type": "private", "flags": ["read"]}, True, False),
+        ({"type": "stream", "flags": ["mentioned"]}, False, True),
+        ({"type": "stream", "flags": ["wildcard_mentioned"]}, False, True),
+        ({"type": "stream", "flags": ["read", "has_alert_word"]}, False, False),
+    ])
+    def test_should_map_private_messages_and_mentions(self, message, is_private, is_mention):
+        zulip_message = {"id": 1, "content": "hi", "sender_id": 2, "sender_full_name": "Rosa", "timestamp": 1609459200, **message}
+
+        result = ZulipMapper().to_chat_message(zulip_message)
+
+        assert result.is_private is is_private
+        assert result.is_mention is is_mention
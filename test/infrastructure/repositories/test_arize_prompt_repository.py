@@ -0,0 +1,19 @@
+import pytest
+from unittest.mock import Mock
+from infrastructure.repositories.arize_prompt_repository import ArizePromptRepository
+
+
+class TestArizePromptRepository:
+    def test_should_return_the_prompt_from_arize(self):
+        arize_client = Mock()
+        arize_client.get_prompt.return_value = "Guanaco: {message}"
+
+        assert ArizePromptRepository(arize_client).get_prompt("reply") == "Guanaco: {message}"
+        arize_client.get_prompt.assert_called_once_with("reply")
+
+    def test_should_raise_key_error_when_missing(self):
+        arize_client = Mock()
+        arize_client.get_prompt.return_value = None
+
+        with pytest.raises(KeyError):
+            ArizePromptRepository(arize_client).get_prompt("reply")
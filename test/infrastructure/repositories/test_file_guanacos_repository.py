@@ -0,0 +1,153 @@
+import pytest
+import json
+import os
+from unittest.mock import Mock
+from domain.entities.user import User
+from infrastructure.repositories.file_guanacos_repository import FileGuanacosRepository
+
+PANCHO = {"name": "Pancho", "user": {"platform_id": 1, "platform": "zulip", "name": "Paco"}, "think": {"engine": "transformers", "model": "tiny"}}
+ROSA = {"name": "Rosa", "user": {"platform_id": 2, "platform": "zulip", "name": "Rosita"}, "think": {"engine": "transformers", "model": "tiny"}}
+
+
+def write_roster(path, guanacos):
+    path.write_text(json.dumps({"guanacos": guanacos}))
+    # Make every write visible to the change check even within the filesystem timestamp resolution
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def make_repository(path):
+    return FileGuanacosRepository(
+        str(path),
+        chat_message_repository_factory=Mock(side_effect=lambda platform: Mock(name=f"chat-{platform}")),
+        think_repository_factory=Mock(side_effect=lambda engine, model: Mock(name=f"think-{engine}-{model}")),
+    )
+
+
+class TestFileGuanacosRepository:
+    def test_should_build_guanacos_from_a_json_roster(self, tmp_path):
+        path = tmp_path / "guanacos.json"
+        write_roster(path, [PANCHO])
+        repository = make_repository(path)
+
+        guanacos = repository.get_guanacos()
+
+        assert [guanaco.name for guanaco in guanacos] == ["Pancho"]
+        assert guanacos[0].user == User(platform_id=1, platform="zulip", name="Paco")
+        repository.think_repository_factory.assert_called_once_with("transformers", "tiny")
+        repository.chat_message_repository_factory.assert_called_once_with("zulip")
+
+    def test_should_read_toml_and_yaml_rosters(self, tmp_path):
+        toml_path = tmp_path / "guanacos.toml"
+        toml_path.write_text('[[guanacos]]\nname = "Pancho"\nuser = { platform_id = 1, platform = "zulip", name = "Paco" }\n')
+        yaml_path = tmp_path / "guanacos.yaml"
+        yaml_path.write_text("guanacos:\n  - name: Pancho\n    user: {platform_id: 1, platform: zulip, name: Paco}\n    think: {engine: onnx}\n")
+
+        assert [guanaco.name for guanaco in make_repository(toml_path).get_guanacos()] == ["Pancho"]
+        yaml_repository = make_repository(yaml_path)
+        assert [guanaco.name for guanaco in yaml_repository.get_guanacos()] == ["Pancho"]
+        yaml_repository.think_repository_factory.assert_called_once_with("onnx", None)
+
+    def test_should_share_models_and_clients_between_guanacos(self, tmp_path):
+        path = tmp_path / "guanacos.json"
+        write_roster(path, [PANCHO, ROSA])
+        repository = make_repository(path)
+
+        pancho, rosa = repository.get_guanacos()
+
+        assert pancho.think_repository is rosa.think_repository
+        # One realm fetch for both, read through a repository per guanaco
+        assert pancho.chat_message_repository.fetcher is rosa.chat_message_repository.fetcher
+        assert pancho.chat_message_repository is not rosa.chat_message_repository
+        assert repository.think_repository_factory.call_count == 1
+        assert repository.chat_message_repository_factory.call_count == 1
+
+    def test_should_return_the_same_instance_for_unchanged_guanacos(self, tmp_path):
+        path = tmp_path / "guanacos.json"
+        write_roster(path, [PANCHO, ROSA])
+        repository = make_repository(path)
+        pancho, rosa = repository.get_guanacos()
+
+        write_roster(path, [PANCHO, {**ROSA, "user": {**ROSA["user"], "name": "Rosa"}}])
+        new_pancho, new_rosa = repository.get_guanacos()
+
+        assert new_pancho is pancho
+        assert new_rosa is not rosa
+        assert new_rosa.think_repository is rosa.think_repository
+
+    def test_should_report_changes_only_after_the_file_is_modified(self, tmp_path):
+        path = tmp_path / "guanacos.json"
+        write_roster(path, [PANCHO])
+        repository = make_repository(path)
+        assert repository.has_changes() is True
+
+        repository.get_guanacos()
+        assert repository.has_changes() is False
+
+        write_roster(path, [PANCHO, ROSA])
+        assert repository.has_changes() is True
+
+    @pytest.mark.parametrize("guanacos, message", [
+        ([{"user": PANCHO["user"]}], "Every guanaco in .* needs a name"),
+        ([{"name": "Pancho"}], "Guanaco 'Pancho' needs a user"),
+        ([PANCHO, PANCHO], "Guanaco 'Pancho' is defined more than once"),
+        ([{**PANCHO, "think": {"engine": "gpt"}}], "Invalid think engine for 'Pancho': gpt. Expected one of: transformers, onnx."),
+    ])
+    def test_should_raise_error_when_the_roster_is_invalid(self, tmp_path, guanacos, message):
+        path = tmp_path / "guanacos.json"
+        write_roster(path, guanacos)
+
+        with pytest.raises(ValueError, match=message):
+            make_repository(path).get_guanacos()
+
+    def test_should_raise_error_when_the_file_format_is_unknown(self):
+        with pytest.raises(ValueError, match="Unsupported roster file: guanacos.ini"):
+            FileGuanacosRepository("guanacos.ini")
+
+    def test_should_wrap_the_shared_model_with_a_per_guanaco_quota(self, tmp_path):
+        from infrastructure.repositories.quota_think_repository import QuotaThinkRepository
+        path = tmp_path / "guanacos.json"
+        write_roster(path, [{**PANCHO, "quota": {"tokens_per_minute": 600, "policy": "degrade"}}, ROSA])
+
+        pancho, rosa = make_repository(path).get_guanacos()
+
+        assert isinstance(pancho.think_repository, QuotaThinkRepository)
+        assert pancho.think_repository.think_repository is rosa.think_repository
+        assert pancho.think_repository.policy == "degrade"
+
+    def test_should_raise_error_when_the_quota_has_unknown_options(self, tmp_path):
+        path = tmp_path / "guanacos.json"
+        write_roster(path, [{**PANCHO, "quota": {"tokens_per_hour": 10}}])
+
+        with pytest.raises(ValueError, match="Invalid quota for 'Pancho'"):
+            make_repository(path).get_guanacos()
+
+    def test_should_subscribe_guanacos_to_the_topics_of_their_roster_entry(self, tmp_path):
+        path = tmp_path / "guanacos.json"
+        write_roster(path, [{**PANCHO, "subscribe": {"streams": [42], "mentions": True}}, ROSA])
+
+        pancho, rosa = make_repository(path).get_guanacos()
+
+        fetcher = pancho.chat_message_repository.fetcher
+        assert fetcher.get_subscribers() == ["Pancho", "Rosa"]
+        assert fetcher._subscribers["Pancho"].subscription.streams == {"42"}
+        assert fetcher._subscribers["Pancho"].subscription.mentions is True
+        assert fetcher._subscribers["Rosa"].subscription.streams is None
+
+    def test_should_unsubscribe_guanacos_removed_from_the_roster(self, tmp_path):
+        path = tmp_path / "guanacos.json"
+        write_roster(path, [PANCHO, ROSA])
+        repository = make_repository(path)
+        pancho, _ = repository.get_guanacos()
+
+        write_roster(path, [PANCHO])
+        repository.get_guanacos()
+
+        assert pancho.chat_message_repository.fetcher.get_subscribers() == ["Pancho"]
+
+    def test_should_raise_error_when_the_subscription_has_unknown_options(self, tmp_path):
+        path = tmp_path / "guanacos.json"
+        write_roster(path, [{**PANCHO, "subscribe": {"channels": [1]}}])
+
+        with pytest.raises(ValueError, match="Invalid subscribe for 'Pancho'"):
+            make_repository(path).get_guanacos()
@@ -0,0 +1,13 @@
+import pytest
+from infrastructure.repositories.file_prompt_repository import FilePromptRepository
+
+
+class TestFilePromptRepository:
+    def test_should_read_the_prompt_file(self, tmp_path):
+        (tmp_path / "reply.txt").write_text("Guanaco: {message}")
+
+        assert FilePromptRepository(str(tmp_path)).get_prompt("reply") == "Guanaco: {message}"
+
+    def test_should_raise_key_error_when_missing(self, tmp_path):
+        with pytest.raises(KeyError):
+            FilePromptRepository(str(tmp_path)).get_prompt("reply")
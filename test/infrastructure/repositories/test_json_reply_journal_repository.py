@@ -0,0 +1,32 @@
+from domain.entities.pending_reply import PendingReply
+from infrastructure.repositories.json_reply_journal_repository import JsonReplyJournalRepository
+
+
+class TestJsonReplyJournalRepository:
+    def test_should_load_the_saved_replies(self, tmp_path):
+        repository = JsonReplyJournalRepository(str(tmp_path / "journal.json"))
+        pending_replies = [PendingReply("Pancho", "1", "Lunch", 100.0, "Tacos"), PendingReply("Pancho", "2", "Dinner", 200.5)]
+
+        repository.save(pending_replies)
+
+        assert JsonReplyJournalRepository(str(tmp_path / "journal.json")).load() == pending_replies
+
+    def test_should_load_nothing_when_there_is_no_journal(self, tmp_path):
+        assert JsonReplyJournalRepository(str(tmp_path / "journal.json")).load() == []
+
+    def test_should_ignore_an_unreadable_journal(self, tmp_path):
+        path = tmp_path / "journal.json"
+        path.write_text("{not json")
+
+        assert JsonReplyJournalRepository(str(path)).load() == []
+
+    def test_should_remove_the_journal_when_clearing(self, tmp_path):
+        path = tmp_path / "journal.json"
+        repository = JsonReplyJournalRepository(str(path))
+        repository.save([PendingReply("Pancho", "1", "Lunch", 100.0)])
+
+        repository.clear()
+        repository.clear()
+
+        assert not path.exists()
+        assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,104 @@
+import pytest
+import threading
+from infrastructure.repositories.in_memory_lease_repository import InMemoryLeaseRepository
+from infrastructure.repositories.sqlite_lease_repository import SqliteLeaseRepository
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_repository(request, tmp_path):
+    def factory(clock):
+        if request.param == "memory":
+            return InMemoryLeaseRepository(clock=clock)
+        return SqliteLeaseRepository(str(tmp_path / "leases.sqlite3"), clock=clock)
+    return factory
+
+
+class TestLeaseRepositories:
+    def test_should_acquire_a_free_lease(self, make_repository):
+        repository = make_repository(FakeClock())
+
+        assert repository.acquire("guanaco:Pancho", "a", 30) is True
+        assert repository.get_owner("guanaco:Pancho") == "a"
+
+    def test_should_not_acquire_a_lease_held_by_another_owner(self, make_repository):
+        repository = make_repository(FakeClock())
+        repository.acquire("guanaco:Pancho", "a", 30)
+
+        assert repository.acquire("guanaco:Pancho", "b", 30) is False
+        assert repository.get_owner("guanaco:Pancho") == "a"
+
+    def test_should_take_over_an_expired_lease(self, make_repository):
+        clock = FakeClock()
+        repository = make_repository(clock)
+        repository.acquire("guanaco:Pancho", "a", 30)
+
+        clock.now += 31
+
+        assert repository.get_owner("guanaco:Pancho") is None
+        assert repository.acquire("guanaco:Pancho", "b", 30) is True
+        assert repository.get_owner("guanaco:Pancho") == "b"
+
+    def test_should_renew_only_leases_still_owned(self, make_repository):
+        clock = FakeClock()
+        repository = make_repository(clock)
+        repository.acquire("guanaco:Pancho", "a", 30)
+        repository.acquire("guanaco:Rosa", "a", 30)
+        clock.now += 31
+        repository.acquire("guanaco:Rosa", "b", 30)
+
+        assert repository.renew(["guanaco:Pancho", "guanaco:Rosa"], "a", 30) == []
+
+        repository.acquire("guanaco:Pancho", "a", 30)
+        clock.now += 20
+        assert repository.renew(["guanaco:Pancho", "guanaco:Rosa"], "a", 30) == ["guanaco:Pancho"]
+        clock.now += 20
+        assert repository.get_owner("guanaco:Pancho") == "a"
+
+    def test_should_release_only_own_leases(self, make_repository):
+        repository = make_repository(FakeClock())
+        repository.acquire("guanaco:Pancho", "a", 30)
+
+        repository.release("guanaco:Pancho", "b")
+        assert repository.get_owner("guanaco:Pancho") == "a"
+
+        repository.release("guanaco:Pancho", "a")
+        assert repository.get_owner("guanaco:Pancho") is None
+        assert repository.acquire("guanaco:Pancho", "b", 30) is True
+
+    def test_should_grant_a_contended_lease_to_exactly_one_owner(self, make_repository):
+        repository = make_repository(FakeClock())
+        results = {}
+        barrier = threading.Barrier(8)
+
+        def contend(owner):
+            barrier.wait()
+            results[owner] = repository.acquire("topic:Pancho:1:General", owner, 30)
+
+        threads = [threading.Thread(target=contend, args=(f"owner{i}",)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        winners = [owner for owner, acquired in results.items() if acquired]
+        assert len(winners) == 1
+        assert repository.get_owner("topic:Pancho:1:General") == winners[0]
+
+
+class TestSqliteLeaseRepository:
+    def test_should_share_leases_between_instances_of_the_same_file(self, tmp_path):
+        path = str(tmp_path / "leases.sqlite3")
+        first = SqliteLeaseRepository(path)
+        second = SqliteLeaseRepository(path)
+
+        assert first.acquire("guanaco:Pancho", "a", 30) is True
+        assert second.acquire("guanaco:Pancho", "b", 30) is False
+        assert second.get_owner("guanaco:Pancho") == "a"
@@ -5,11 +5,12 @@ from domain.entities.guanaco.guanaco import Guanaco
 
 
 class TestLocalGuanacosRepository:
+    @patch('infrastructure.repositories.local_guanacos_repository.build_admission_filter')
     @patch('infrastructure.repositories.local_guanacos_repository.TransformersThinkRepository')
     @patch('infrastructure.repositories.local_guanacos_repository.ZulipChatMessageRepository')
     @patch('infrastructure.repositories.local_guanacos_repository.User')
     @patch('infrastructure.repositories.local_guanacos_repository.Guanaco')
-    def test_should_return_list_of_guanacos_with_mocked_dependencies(self, mock_guanaco_class, mock_user_class, mock_zulip_repo_class, mock_transformers_repo_class):
+    def test_should_return_list_of_guanacos_with_mocked_dependencies(self, mock_guanaco_class, mock_user_class, mock_zulip_repo_class, mock_transformers_repo_class, mock_build_admission_filter):
         # Setup mocks
         mock_user = Mock()
         mock_user_class.return_value = mock_user
@@ -42,7 +43,8 @@ class TestLocalGuanacosRepository:
             name="Pancho",
             user=mock_user,
             chat_message_repository=mock_zulip_repo,
-            think_repository=mock_transformers_repo
+            think_repository=mock_transformers_repo,
+            admission_filter=mock_build_admission_filter.return_value
         )
         
         # Should return a list with one guanaco
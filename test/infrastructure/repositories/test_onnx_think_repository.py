@@ -0,0 +1,24 @@
+from unittest.mock import Mock, patch
+from infrastructure.repositories.onnx_think_repository import OnnxThinkRepository
+
+
+class TestOnnxThinkRepository:
+    @patch('infrastructure.repositories.onnx_think_repository.OnnxModelsHandler')
+    def test_should_initialize_with_onnx_models_handler(self, mock_onnx_handler_class):
+        mock_handler = Mock()
+        mock_onnx_handler_class.return_value = mock_handler
+
+        repository = OnnxThinkRepository()
+
+        mock_onnx_handler_class.assert_called_once()
+        assert repository.onnx_engine == mock_handler
+
+    def test_should_return_generated_text_from_onnx_engine(self):
+        mock_handler = Mock()
+        mock_handler.generate_text.return_value = "Generated with onnxruntime"
+
+        repository = OnnxThinkRepository(onnx_engine=mock_handler)
+        response = repository.get_think("What do you think about AI?")
+
+        mock_handler.generate_text.assert_called_once_with("What do you think about AI?", max_new_tokens=None)
+        assert response == "Generated with onnxruntime"
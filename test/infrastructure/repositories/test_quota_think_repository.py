@@ -0,0 +1,174 @@
+import pytest
+import threading
+from unittest.mock import Mock
+from domain.errors import QuotaExceededError
+from infrastructure.observability.metrics import MetricsRegistry
+from infrastructure.repositories.quota_think_repository import QuotaThinkRepository, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def make_repository(clock, **options):
+    think_repository = Mock(get_think=Mock(side_effect=lambda message, max_new_tokens=None: f"{message}:{max_new_tokens}"))
+    registry = MetricsRegistry()
+    repository = QuotaThinkRepository(think_repository, "Pancho", metrics=registry, clock=clock, **options)
+    return repository, think_repository, registry
+
+
+class TestTokenBucket:
+    def test_should_start_full_and_refill_over_time(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, clock=clock)
+
+        assert bucket.take_up_to(60) == 60
+        assert bucket.take_up_to(1) == 0
+        clock.now += 10
+        assert bucket.get_tokens() == 10
+        assert bucket.time_until(20) == 10
+
+    def test_should_not_refill_beyond_capacity(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, capacity=30, clock=clock)
+        clock.now += 600
+
+        assert bucket.get_tokens() == 30
+
+    def test_should_grant_partial_amounts_above_the_minimum(self):
+        bucket = TokenBucket(60, clock=FakeClock())
+        bucket.take_up_to(50)
+
+        assert bucket.take_up_to(32, minimum=20) == 0
+        assert bucket.take_up_to(32, minimum=8) == 10
+
+    def test_should_raise_error_when_rate_is_not_positive(self):
+        with pytest.raises(ValueError, match="Token rate must be positive"):
+            TokenBucket(0)
+
+
+class TestQuotaThinkRepository:
+    def test_should_think_with_the_requested_budget_within_quota(self):
+        repository, think_repository, registry = make_repository(FakeClock(), tokens_per_minute=600)
+
+        assert repository.get_think("hi") == "hi:32"
+        assert repository.get_think("hi", max_new_tokens=16) == "hi:16"
+        assert registry.get("think_requests").get(guanaco="Pancho") == 2
+        assert registry.get("think_tokens_granted").get(guanaco="Pancho") == 48
+
+    def test_should_not_spend_the_quota_on_raw_generations(self):
+        repository, think_repository, registry = make_repository(FakeClock(), tokens_per_minute=10, policy="skip")
+
+        repository.get_raw_think("Summarize", max_new_tokens=96)
+
+        think_repository.get_raw_think.assert_called_once_with("Summarize", max_new_tokens=96)
+        assert repository.bucket.get_tokens() == 10
+        assert registry.get("think_requests").get(guanaco="Pancho") == 0
+
+    def test_should_defer_until_the_tokens_are_available_when_queueing(self):
+        clock = FakeClock()
+        repository, think_repository, registry = make_repository(clock, tokens_per_minute=60, max_new_tokens=30)
+        repository.get_think("first")
+        repository.get_think("second")
+
+        # The caller is told when to come back instead of waiting on a shared worker
+        with pytest.raises(QuotaExceededError) as error:
+            repository.get_think("third")
+        assert error.value.retry_after == 30
+        assert clock.now == 1000
+        assert think_repository.get_think.call_count == 2
+        assert registry.get("think_quota_wait_seconds").get(guanaco="Pancho")["sum"] == 30
+
+        clock.advance(30)
+        assert repository.get_think("third") == "third:30"
+
+    def test_should_refuse_when_the_wait_would_exceed_max_wait(self):
+        repository, think_repository, registry = make_repository(FakeClock(), tokens_per_minute=60, max_new_tokens=60, max_wait=5)
+        repository.get_think("first")
+
+        with pytest.raises(QuotaExceededError, match="Guanaco 'Pancho' exceeded its tokens quota") as error:
+            repository.get_think("second")
+        assert error.value.retry_after is None
+        assert think_repository.get_think.call_count == 1
+        assert registry.get("think_quota_exceeded").get(guanaco="Pancho", limit="tokens") == 1
+
+    def test_should_degrade_to_the_tokens_left(self):
+        repository, _, registry = make_repository(FakeClock(), tokens_per_minute=60, policy="degrade", max_new_tokens=40)
+        repository.get_think("first")
+
+        assert repository.get_think("second") == "second:20"
+        assert registry.get("think_degraded").get(guanaco="Pancho") == 1
+
+    def test_should_defer_only_until_the_minimum_when_degrading(self):
+        clock = FakeClock()
+        repository, _, _ = make_repository(clock, tokens_per_minute=60, policy="degrade", max_new_tokens=60, min_new_tokens=8)
+        repository.get_think("first")
+
+        with pytest.raises(QuotaExceededError) as error:
+            repository.get_think("second")
+        assert error.value.retry_after == 8
+
+        clock.advance(8)
+        assert repository.get_think("second") == "second:8"
+
+    def test_should_skip_until_the_tokens_are_available(self):
+        clock = FakeClock()
+        repository, _, _ = make_repository(clock, tokens_per_minute=60, policy="skip", max_new_tokens=40, max_wait=5)
+        repository.get_think("first")
+
+        # Not fetched again on every cycle: the topic is deferred until it can be answered, even past max_wait
+        with pytest.raises(QuotaExceededError) as error:
+            repository.get_think("second")
+        assert error.value.retry_after == 20
+        assert clock.now == 1000
+
+    def test_should_raise_error_when_min_new_tokens_is_not_positive(self):
+        with pytest.raises(ValueError, match="min_new_tokens must be at least 1"):
+            QuotaThinkRepository(Mock(), "Pancho", min_new_tokens=0, metrics=MetricsRegistry())
+
+    def test_should_cap_concurrent_generations(self):
+        thinking = threading.Event()
+        release = threading.Event()
+        think_repository = Mock(get_think=Mock(side_effect=lambda message, max_new_tokens=None: (thinking.set(), release.wait(2), "done")[-1]))
+        registry = MetricsRegistry()
+        repository = QuotaThinkRepository(think_repository, "Pancho", max_concurrent=1, policy="skip", metrics=registry)
+        first = threading.Thread(target=repository.get_think, args=("first",))
+        first.start()
+        assert thinking.wait(2)
+
+        with pytest.raises(QuotaExceededError, match="concurrency"):
+            repository.get_think("second")
+        release.set()
+        first.join(2)
+
+        assert repository.get_think("third") == "done"
+        assert registry.get("think_quota_exceeded").get(guanaco="Pancho", limit="concurrency") == 1
+
+    def test_should_give_back_the_concurrency_slot_when_thinking_fails(self):
+        think_repository = Mock(get_think=Mock(side_effect=[RuntimeError("boom"), "ok"]))
+        repository = QuotaThinkRepository(think_repository, "Pancho", max_concurrent=1, policy="skip", metrics=MetricsRegistry())
+
+        with pytest.raises(RuntimeError):
+            repository.get_think("first")
+
+        assert repository.get_think("second") == "ok"
+
+    def test_should_raise_error_when_policy_is_unknown(self):
+        with pytest.raises(ValueError, match="Invalid quota policy: drop. Expected one of: queue, degrade, skip."):
+            QuotaThinkRepository(Mock(), "Pancho", policy="drop")
+
+    def test_should_add_the_quota_state_to_the_engine_status(self):
+        clock = FakeClock()
+        repository, think_repository, _ = make_repository(clock, tokens_per_minute=60, policy="skip")
+        think_repository.get_status.return_value = {"model": "tiny", "loaded": True}
+
+        assert repository.get_status() == {"model": "tiny", "loaded": True, "quota": {"policy": "skip", "tokens_available": 60}}
+        repository.unload()
+        think_repository.unload.assert_called_once()
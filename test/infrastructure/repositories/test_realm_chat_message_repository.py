@@ -0,0 +1,173 @@
+from datetime import datetime
+from unittest.mock import Mock
+from domain.entities.channel import Channel
+from domain.entities.chat_message import ChatMessage
+from domain.entities.user import User
+from domain.ports.chat_message_repository import ChatMessageRepository
+from infrastructure.observability.metrics import MetricsRegistry
+from infrastructure.repositories.realm_chat_message_repository import RealmFetcher, RealmSubscription
+
+ROSA = User(platform_id=10, platform="zulip", name="Rosa")
+PANCHO = User(platform_id=1, platform="zulip", name="Pancho")
+LOLA = User(platform_id=2, platform="zulip", name="Lola")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_message(id: int, sender: User = ROSA, content: str = "hola") -> ChatMessage:
+    return ChatMessage(id=id, content=content, sender=sender, created_at=datetime(2024, 1, 1))
+
+
+def make_realm(*topics):
+    """Chat repository whose unread realm is the given (stream, topic, messages)."""
+    realm = Mock(spec=ChatMessageRepository)
+    realm.get_streams_with_unread_messages.side_effect = lambda: {
+        stream: Channel(stream, topic, messages, realm) for stream, topic, messages in topics
+    }
+    return realm
+
+
+class TestRealmFetcher:
+    def setup_method(self):
+        self.clock = FakeClock()
+
+    def make_fetcher(self, realm, **kwargs):
+        return RealmFetcher(realm, clock=self.clock, metrics=MetricsRegistry(), **kwargs)
+
+    def test_should_fetch_the_realm_once_for_every_guanaco(self):
+        realm = make_realm(("42", "Lunch", [make_message(1)]))
+        fetcher = self.make_fetcher(realm)
+        repositories = [fetcher.subscribe(f"guanaco-{i}", User(platform_id=i, platform="zulip", name=str(i))) for i in range(100, 110)]
+
+        channels = [repository.get_streams_with_unread_messages() for repository in repositories]
+
+        assert realm.get_streams_with_unread_messages.call_count == 1
+        assert all(list(channel) == ["42"] for channel in channels)
+        # Each guanaco answers its own copy, bound to its own repository
+        assert channels[0]["42"] is not channels[1]["42"]
+        assert channels[0]["42"].chat_message_repository is repositories[0]
+
+    def test_should_fetch_again_once_the_last_fetch_is_older_than_max_age(self):
+        realm = make_realm(("42", "Lunch", [make_message(1)]))
+        repository = self.make_fetcher(realm, max_age=1.0).subscribe("Pancho", PANCHO)
+
+        repository.get_streams_with_unread_messages()
+        self.clock.now = 0.5
+        repository.get_streams_with_unread_messages()
+        self.clock.now = 1.0
+        repository.get_streams_with_unread_messages()
+
+        assert realm.get_streams_with_unread_messages.call_count == 2
+
+    def test_should_not_return_a_topic_again_once_the_guanaco_read_it(self):
+        realm = make_realm(("42", "Lunch", [make_message(1)]))
+        fetcher = self.make_fetcher(realm)
+        pancho = fetcher.subscribe("Pancho", PANCHO)
+        lola = fetcher.subscribe("Lola", LOLA)
+        channel = pancho.get_streams_with_unread_messages()["42"]
+
+        channel.respond("¡Hola!")
+
+        realm.send_channel_message.assert_called_once_with("¡Hola!", "42", "Lunch")
+        assert pancho.get_streams_with_unread_messages() == {}
+        assert list(lola.get_streams_with_unread_messages()) == ["42"]
+
+    def test_should_mark_the_realm_as_read_only_when_every_subscriber_read_the_topic(self):
+        realm = make_realm(("42", "Lunch", [make_message(1)]))
+        fetcher = self.make_fetcher(realm)
+        pancho = fetcher.subscribe("Pancho", PANCHO)
+        lola = fetcher.subscribe("Lola", LOLA)
+
+        pancho.get_streams_with_unread_messages()["42"].mark_as_read()
+        realm.mark_as_read.assert_not_called()
+
+        lola.get_streams_with_unread_messages()["42"].mark_as_read()
+        realm.mark_as_read.assert_called_once()
+        assert realm.mark_as_read.call_args.args[0].get_id() == "42"
+
+    def test_should_not_wait_for_subscribers_that_stopped_polling(self):
+        realm = make_realm(("42", "Lunch", [make_message(1)]))
+        fetcher = self.make_fetcher(realm, subscriber_timeout=60)
+        pancho = fetcher.subscribe("Pancho", PANCHO)
+        fetcher.subscribe("Lola", LOLA)
+
+        self.clock.now = 61
+        pancho.get_streams_with_unread_messages()["42"].mark_as_read()
+
+        realm.mark_as_read.assert_called_once()
+
+    def test_should_return_a_topic_again_when_a_newer_message_arrives(self):
+        messages = [make_message(1)]
+        realm = make_realm(("42", "Lunch", messages))
+        fetcher = self.make_fetcher(realm, subscriber_timeout=60)
+        pancho = fetcher.subscribe("Pancho", PANCHO)
+        fetcher.subscribe("Lola", LOLA)
+        pancho.get_streams_with_unread_messages()["42"].mark_as_read()
+
+        messages.append(make_message(2))
+        self.clock.now = 5
+
+        assert [message.id for message in pancho.get_streams_with_unread_messages()["42"].get_messages()] == [1, 2]
+
+    def test_should_only_return_the_topics_a_guanaco_subscribes_to(self):
+        realm = make_realm(
+            ("42", "Lunch", [make_message(1)]),
+            ("43", "Work", [make_message(2, content='<span class="user-mention" data-user-id="1">@Pancho</span> help')]),
+            ("44", "News", [make_message(3)]),
+        )
+        fetcher = self.make_fetcher(realm)
+        by_stream = fetcher.subscribe("Pancho", PANCHO, RealmSubscription(streams=[42]))
+        by_mention = fetcher.subscribe("Pancho mentions", PANCHO, RealmSubscription(mentions=True))
+        by_topic_or_mention = fetcher.subscribe("Lola", LOLA, RealmSubscription(topics=["News"], mentions=True))
+
+        assert list(by_stream.get_streams_with_unread_messages()) == ["42"]
+        assert list(by_mention.get_streams_with_unread_messages()) == ["43"]
+        assert list(by_topic_or_mention.get_streams_with_unread_messages()) == ["44"]
+
+    def test_should_treat_a_topic_whose_newest_message_is_its_own_as_read(self):
+        realm = make_realm(("42", "Lunch", [make_message(1), make_message(2, sender=PANCHO)]))
+        fetcher = self.make_fetcher(realm)
+        pancho = fetcher.subscribe("Pancho", PANCHO)
+
+        assert pancho.get_streams_with_unread_messages() == {}
+        realm.mark_as_read.assert_called_once()
+
+    def test_should_not_answer_the_reply_of_a_sibling_guanaco(self):
+        realm = make_realm(("42", "Lunch", [make_message(1), make_message(2, sender=LOLA)]))
+        fetcher = self.make_fetcher(realm)
+        pancho = fetcher.subscribe("Pancho", PANCHO)
+        lola = fetcher.subscribe("Lola", LOLA)
+
+        assert pancho.get_streams_with_unread_messages() == {}
+        assert lola.get_streams_with_unread_messages() == {}
+        # Every cursor moved past the reply: nobody holds the topic unread
+        realm.mark_as_read.assert_called()
+        assert realm.mark_as_read.call_args.args[0].get_topic() == "Lunch"
+
+    def test_should_not_answer_the_messages_of_the_shared_chat_account(self):
+        account = User(platform_id=99, platform="zulip", name="Guanacos bot")
+        realm = make_realm(("42", "Lunch", [make_message(1), make_message(2, sender=account)]))
+        realm.get_account_user.return_value = account
+        fetcher = self.make_fetcher(realm)
+        pancho = fetcher.subscribe("Pancho", PANCHO)
+        lola = fetcher.subscribe("Lola", LOLA)
+
+        assert pancho.get_streams_with_unread_messages() == {}
+        assert lola.get_streams_with_unread_messages() == {}
+        realm.get_account_user.assert_called_once()
+
+    def test_should_return_nothing_for_an_unsubscribed_guanaco(self):
+        realm = make_realm(("42", "Lunch", [make_message(1)]))
+        fetcher = self.make_fetcher(realm)
+        repository = fetcher.subscribe("Pancho", PANCHO)
+
+        fetcher.unsubscribe("Pancho")
+
+        assert repository.get_streams_with_unread_messages() == {}
+        assert fetcher.get_subscribers() == []
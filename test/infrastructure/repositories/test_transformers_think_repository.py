@@ -25,7 +25,7 @@ class TestTransformersThinkRepository:
         response = repository.get_think("What do you think about AI?")
         
         # Should call the models handler with the message
-        mock_handler.generate_text.assert_called_once_with("What do you think about AI?")
+        mock_handler.generate_text.assert_called_once_with("What do you think about AI?", max_new_tokens=None)
         # Should return the exact literal response from the handler
         assert response == "This is a generated response from the model"
 
@@ -39,7 +39,7 @@ class TestTransformersThinkRepository:
         response = repository.get_think("")
         
         # Should call the models handler with empty string
-        mock_handler.generate_text.assert_called_once_with("")
+        mock_handler.generate_text.assert_called_once_with("", max_new_tokens=None)
         # Should return the exact literal response
         assert response == "Empty input received"
 
@@ -54,3 +54,33 @@ class TestTransformersThinkRepository:
         # Should propagate the exception from the models handler
         with pytest.raises(Exception, match="Model loading failed"):
             repository.get_think("test message")
+
+    def test_should_delegate_status_and_unload_to_the_models_handler(self):
+        mock_handler = Mock()
+        mock_handler.get_status.return_value = {"loaded": True}
+        repository = TransformersThinkRepository(mock_handler)
+
+        assert repository.get_status() == {"loaded": True}
+        repository.unload()
+        mock_handler.unload.assert_called_once()
+
+    def test_should_build_the_prompt_with_the_context_builder(self):
+        mock_handler = Mock()
+        context_builder = Mock()
+        context_builder.build.return_value = "You are a guanaco.\nhola"
+
+        repository = TransformersThinkRepository(mock_handler, context_builder=context_builder)
+        repository.get_think("hola")
+
+        context_builder.build.assert_called_once_with("hola")
+        mock_handler.generate_text.assert_called_once_with("You are a guanaco.\nhola", max_new_tokens=None)
+
+    def test_should_generate_raw_prompts_without_the_context_builder(self):
+        mock_handler = Mock()
+        context_builder = Mock()
+
+        repository = TransformersThinkRepository(mock_handler, context_builder=context_builder)
+        repository.get_raw_think("Summarize the conversation", max_new_tokens=96)
+
+        context_builder.build.assert_not_called()
+        mock_handler.generate_text.assert_called_once_with("Summarize the conversation", max_new_tokens=96)
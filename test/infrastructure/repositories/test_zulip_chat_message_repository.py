@@ -3,6 +3,9 @@ from unittest.mock import Mock, patch, MagicMock
 from infrastructure.repositories.zulip_chat_message_repository import ZulipChatMessageRepository
 from domain.entities.user import User
 from domain.entities.channel import Channel
+from domain.entities.chat_message import ChatMessage
+from datetime import datetime
+from infrastructure.observability.metrics import MetricsRegistry
 
 
 class TestZulipChatMessageRepository:
@@ -15,6 +18,9 @@ class TestZulipChatMessageRepository:
         mock_config.email = "test@example.com"
         mock_config.api_key = "test_api_key"
         mock_config.site = "test.zulipchat.com"
+        mock_config.channel_max_messages = 500
+        mock_config.engagement = "all"
+        mock_config.engagement_streams = None
         mock_config_class.return_value = mock_config
         
         mock_client = Mock()
@@ -282,17 +288,19 @@ class TestZulipChatMessageRepository:
         
         # Mock mark as read success
         mark_response = {"result": "success"}
-        mock_client.mark_stream_as_read.return_value = mark_response
+        mock_client.mark_topic_as_read.return_value = mark_response
         
         # Mock channel
         mock_channel = Mock()
         mock_channel.get_id.return_value = "42"
+        mock_channel.get_topic.return_value = "Lunch"
         
         repository = ZulipChatMessageRepository()
         repository.mark_as_read(mock_channel)
         
-        # Should mark stream as read
-        mock_client.mark_stream_as_read.assert_called_once_with("42")
+        # Should mark only the topic as read
+        mock_client.mark_topic_as_read.assert_called_once_with("42", "Lunch")
+        mock_client.mark_stream_as_read.assert_not_called()
 
     @patch('infrastructure.repositories.zulip_chat_message_repository.ZulipMapper')
     @patch('infrastructure.repositories.zulip_chat_message_repository.zulip.Client')
@@ -305,10 +313,11 @@ class TestZulipChatMessageRepository:
         
         # Mock mark as read failure
         mark_response = {"result": "error", "msg": "Stream not found"}
-        mock_client.mark_stream_as_read.return_value = mark_response
+        mock_client.mark_topic_as_read.return_value = mark_response
         
         mock_channel = Mock()
         mock_channel.get_id.return_value = "invalid"
+        mock_channel.get_topic.return_value = "Lunch"
         
         repository = ZulipChatMessageRepository()
         
@@ -405,73 +414,151 @@ class TestZulipChatMessageRepository:
         with pytest.raises(RuntimeError, match="Zulip API error: Permission denied"):
             repository._find_user_id_by_email("test@example.com")
 
-    @patch('infrastructure.repositories.zulip_chat_message_repository.Channel')
     @patch('infrastructure.repositories.zulip_chat_message_repository.ZulipMapper')
     @patch('infrastructure.repositories.zulip_chat_message_repository.zulip.Client')
     @patch('infrastructure.repositories.zulip_chat_message_repository.ZulipConfig')
-    def test_should_get_streams_with_unread_messages(self, mock_config_class, mock_client_class, mock_mapper_class, mock_channel_class):
-        # Setup mocks
+    def test_should_get_one_channel_per_unread_topic_from_the_register_state(self, mock_config_class, mock_client_class, mock_mapper_class):
         self._setup_basic_mocks(mock_config_class, mock_client_class, mock_mapper_class)
-        
         mock_client = mock_client_class.return_value
-        mock_mapper = mock_mapper_class.return_value
-        
-        # Mock raw messages (what comes from Zulip API)
-        raw_messages = [
-            {"stream_id": "42", "subject": "Discussion", "id": 1, "content": "Hello"},
-            {"stream_id": "43", "subject": "Chat", "id": 2, "content": "World"}
-        ]
-        
-        # Mock unread messages response
-        unread_response = {
+        mock_client.register.return_value = {
             "result": "success",
-            "messages": raw_messages
+            "queue_id": "q1",
+            "last_event_id": 7,
+            "unread_msgs": {"streams": [
+                {"stream_id": 42, "topic": "Discussion", "unread_message_ids": [3]},
+                {"stream_id": 42, "topic": "Lunch", "unread_message_ids": [5, 6]},
+            ]},
         }
-        mock_client.get_messages.return_value = unread_response
-        
-        # Mock ChatMessage objects
-        mock_message1 = Mock()
-        mock_message2 = Mock()
-        mock_mapper.to_chat_message.side_effect = [mock_message1, mock_message2]
-        
-        # Mock channel creation
-        mock_channel1 = Mock()
-        mock_channel2 = Mock()
-        mock_channel_class.side_effect = [mock_channel1, mock_channel2]
-        
-        # Mock get_messages_from_channel to return additional messages
-        mock_channel_msg1 = Mock()
-        mock_channel_msg2 = Mock()
-        
+        rosa = User(platform_id=2, platform="zulip", name="Rosa")
+        histories = {
+            "Discussion": [ChatMessage(id=i, content=str(i), sender=rosa, created_at=datetime(2024, 1, 1)) for i in (1, 2, 3)],
+            "Lunch": [ChatMessage(id=i, content=str(i), sender=rosa, created_at=datetime(2024, 1, 1)) for i in (4, 5, 6)],
+        }
+
         repository = ZulipChatMessageRepository()
-        
-        with patch.object(repository, 'get_messages_from_channel') as mock_get_channel_msgs:
-            mock_get_channel_msgs.side_effect = [[mock_channel_msg1], [mock_channel_msg2]]
-            
-            result = repository.get_streams_with_unread_messages()
-            
-            # Should create channels for each unique stream
-            assert mock_channel_class.call_count == 2
-            mock_channel_class.assert_any_call("42", "Discussion", [], repository)
-            mock_channel_class.assert_any_call("43", "Chat", [], repository)
-            
-            # Should add unread messages to channels
-            mock_channel1.add_message.assert_any_call(mock_message1)
-            mock_channel2.add_message.assert_any_call(mock_message2)
-            
-            # Should get additional messages from each channel
-            mock_get_channel_msgs.assert_any_call(mock_channel1)
-            mock_get_channel_msgs.assert_any_call(mock_channel2)
-            
-            # Should add channel messages
-            mock_channel1.add_message.assert_any_call(mock_channel_msg1)
-            mock_channel2.add_message.assert_any_call(mock_channel_msg2)
-            
-            # Should return channels by stream ID
-            assert "42" in result
-            assert "43" in result
-            assert result["42"] == mock_channel1
-            assert result["43"] == mock_channel2
+        with patch.object(repository, 'get_messages_from_channel', side_effect=lambda channel: histories[channel.get_topic()]):
+            channels = repository.get_streams_with_unread_messages()
+
+        mock_client.register.assert_called_once_with(event_types=["message", "update_message_flags"])
+        # Only the history of the topics is fetched, not the unread messages themselves
+        mock_client.get_messages.assert_not_called()
+        assert sorted(channels) == ["42/Discussion", "42/Lunch"]
+        assert channels["42/Lunch"].get_id() == "42"
+        assert [message.id for message in channels["42/Lunch"].get_messages()] == [4, 5, 6]
+        assert channels["42/Discussion"].get_last_message() is histories["Discussion"][2]
+
+    @patch('infrastructure.repositories.zulip_chat_message_repository.ZulipMapper')
+    @patch('infrastructure.repositories.zulip_chat_message_repository.zulip.Client')
+    @patch('infrastructure.repositories.zulip_chat_message_repository.ZulipConfig')
+    def test_should_keep_the_other_topics_of_the_stream_unread_when_answering_one(self, mock_config_class, mock_client_class, mock_mapper_class):
+        self._setup_basic_mocks(mock_config_class, mock_client_class, mock_mapper_class)
+        mock_client = mock_client_class.return_value
+        mock_client.register.return_value = {
+            "result": "success",
+            "queue_id": "q1",
+            "last_event_id": 7,
+            "unread_msgs": {"streams": [
+                {"stream_id": 42, "topic": "Discussion", "unread_message_ids": [3]},
+                {"stream_id": 42, "topic": "Lunch", "unread_message_ids": [6]},
+            ]},
+        }
+        mock_client.get_events.return_value = {"result": "success", "events": []}
+        mock_client.mark_topic_as_read.return_value = {"result": "success"}
+        rosa = User(platform_id=2, platform="zulip", name="Rosa")
+        histories = {
+            "Discussion": [ChatMessage(id=3, content="3", sender=rosa, created_at=datetime(2024, 1, 1))],
+            "Lunch": [ChatMessage(id=6, content="6", sender=rosa, created_at=datetime(2024, 1, 1))],
+        }
+
+        repository = ZulipChatMessageRepository()
+        with patch.object(repository, 'get_messages_from_channel', side_effect=lambda channel: histories[channel.get_topic()]):
+            repository.get_streams_with_unread_messages()["42/Lunch"].mark_as_read()
+            channels = repository.get_streams_with_unread_messages()
+
+        mock_client.mark_topic_as_read.assert_called_once_with("42", "Lunch")
+        mock_client.mark_stream_as_read.assert_not_called()
+        assert sorted(channels) == ["42/Discussion"]
+
+    @patch('infrastructure.repositories.zulip_chat_message_repository.ZulipMapper')
+    @patch('infrastructure.repositories.zulip_chat_message_repository.zulip.Client')
+    @patch('infrastructure.repositories.zulip_chat_message_repository.ZulipConfig')
+    def test_should_only_fetch_the_topics_allowed_by_the_engagement_policy(self, mock_config_class, mock_client_class, mock_mapper_class):
+        self._setup_basic_mocks(mock_config_class, mock_client_class, mock_mapper_class)
+        mock_config_class.return_value.engagement = "mentions"
+        mock_config_class.return_value.engagement_streams = ["42"]
+        mock_client = mock_client_class.return_value
+        mock_client.register.return_value = {
+            "result": "success", "queue_id": "q1", "last_event_id": 7,
+            "unread_msgs": {
+                "streams": [
+                    {"stream_id": 42, "topic": "Help", "unread_message_ids": [3]},
+                    {"stream_id": 42, "topic": "Chatter", "unread_message_ids": [4, 5]},
+                    {"stream_id": 43, "topic": "Help", "unread_message_ids": [6]},
+                ],
+                "mentions": [3, 6],
+            },
+        }
+        mock_client.get_events.return_value = {"result": "success", "events": []}
+        metrics = MetricsRegistry()
+
+        repository = ZulipChatMessageRepository(metrics=metrics)
+        with patch.object(repository, 'get_messages_from_channel', return_value=[]) as mock_get_channel_messages:
+            channels = repository.get_streams_with_unread_messages()
+            repository.get_streams_with_unread_messages()
+
+        assert list(channels) == ["42/Help"]
+        assert mock_get_channel_messages.call_count == 2
+        # Counted once per topic, not once per poll
+        avoided = metrics.counter("engagement_generations_avoided", "", ("reason",))
+        assert avoided.get(reason="not_mentioned") == 1
+        assert avoided.get(reason="stream") == 1
+
+    @patch('infrastructure.repositories.zulip_chat_message_repository.ZulipMapper')
+    @patch('infrastructure.repositories.zulip_chat_message_repository.zulip.Client')
+    @patch('infrastructure.repositories.zulip_chat_message_repository.ZulipConfig')
+    def test_should_keep_the_unread_index_current_from_events(self, mock_config_class, mock_client_class, mock_mapper_class):
+        self._setup_basic_mocks(mock_config_class, mock_client_class, mock_mapper_class)
+        mock_client = mock_client_class.return_value
+        mock_client.register.return_value = {
+            "result": "success", "queue_id": "q1", "last_event_id": 7,
+            "unread_msgs": {"streams": [{"stream_id": 42, "topic": "Lunch", "unread_message_ids": [5]}]},
+        }
+        mock_client.get_events.return_value = {"result": "success", "events": [
+            {"id": 8, "type": "update_message_flags", "op": "add", "flag": "read", "messages": [5], "all": False},
+            {"id": 9, "type": "message", "flags": [], "message": {"id": 10, "type": "stream", "stream_id": 43, "subject": "News"}},
+        ]}
+
+        repository = ZulipChatMessageRepository()
+        repository.sync_unread_index()
+        repository.sync_unread_index()
+
+        mock_client.get_events.assert_called_once_with(queue_id="q1", last_event_id=7, dont_block=True)
+        assert repository.unread_index.get_topics() == {("43", "News"): 10}
+
+    @patch('infrastructure.repositories.zulip_chat_message_repository.ZulipMapper')
+    @patch('infrastructure.repositories.zulip_chat_message_repository.zulip.Client')
+    @patch('infrastructure.repositories.zulip_chat_message_repository.ZulipConfig')
+    def test_should_register_again_when_the_event_queue_expired(self, mock_config_class, mock_client_class, mock_mapper_class):
+        self._setup_basic_mocks(mock_config_class, mock_client_class, mock_mapper_class)
+        mock_client = mock_client_class.return_value
+        mock_client.register.return_value = {"result": "success", "queue_id": "q1", "last_event_id": 7, "unread_msgs": {"streams": []}}
+        mock_client.get_events.return_value = {"result": "error", "code": "BAD_EVENT_QUEUE_ID", "msg": "Bad event queue ID: q1"}
+
+        repository = ZulipChatMessageRepository()
+        repository.sync_unread_index()
+        repository.sync_unread_index()
+
+        assert mock_client.register.call_count == 2
+
+    @patch('infrastructure.repositories.zulip_chat_message_repository.ZulipMapper')
+    @patch('infrastructure.repositories.zulip_chat_message_repository.zulip.Client')
+    @patch('infrastructure.repositories.zulip_chat_message_repository.ZulipConfig')
+    def test_should_raise_error_when_the_register_fails(self, mock_config_class, mock_client_class, mock_mapper_class):
+        self._setup_basic_mocks(mock_config_class, mock_client_class, mock_mapper_class)
+        mock_client_class.return_value.register.return_value = {"result": "error", "msg": "Unauthorized"}
+
+        with pytest.raises(RuntimeError, match="Zulip API error: Unauthorized"):
+            ZulipChatMessageRepository().get_streams_with_unread_messages()
 
     @patch('infrastructure.repositories.zulip_chat_message_repository.ZulipMapper')
     @patch('infrastructure.repositories.zulip_chat_message_repository.zulip.Client')
@@ -534,12 +621,31 @@ class TestZulipChatMessageRepository:
         with pytest.raises(RuntimeError, match="Zulip API error: Thread not found"):
             repository.send_thread_message("Hello!", "nonexistent", "Topic")
 
+    @patch('infrastructure.repositories.zulip_chat_message_repository.ZulipMapper')
+    @patch('infrastructure.repositories.zulip_chat_message_repository.zulip.Client')
+    @patch('infrastructure.repositories.zulip_chat_message_repository.ZulipConfig')
+    def test_should_look_up_the_account_user_once(self, mock_config_class, mock_client_class, mock_mapper_class):
+        self._setup_basic_mocks(mock_config_class, mock_client_class, mock_mapper_class)
+        mock_client = mock_client_class.return_value
+        mock_client.get_profile.return_value = {"result": "success", "user_id": 99, "full_name": "Guanacos bot"}
+
+        repository = ZulipChatMessageRepository()
+        account = repository.get_account_user()
+
+        assert account == User(platform_id=99, platform="zulip")
+        assert account.name == "Guanacos bot"
+        assert repository.get_account_user() is account
+        mock_client.get_profile.assert_called_once()
+
     def _setup_basic_mocks(self, mock_config_class, mock_client_class, mock_mapper_class):
         """Helper method to set up basic mocks for most tests"""
         mock_config = Mock()
         mock_config.email = "test@example.com"
         mock_config.api_key = "test_key"
         mock_config.site = "test.zulipchat.com"
+        mock_config.channel_max_messages = 500
+        mock_config.engagement = "all"
+        mock_config.engagement_streams = None
         mock_config_class.return_value = mock_config
         
         mock_client = Mock()
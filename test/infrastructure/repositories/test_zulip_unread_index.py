@@ -0,0 +1,98 @@
+from infrastructure.repositories.zulip_unread_index import ZulipUnreadIndex
+
+UNREAD_MSGS = {
+    "streams": [
+        {"stream_id": 42, "topic": "Lunch", "unread_message_ids": [5, 6]},
+        {"stream_id": 43, "topic": "News", "unread_message_ids": [7]},
+    ],
+    "pms": [{"other_user_id": 9, "unread_message_ids": [8]}],
+    "mentions": [7, 8],
+}
+
+
+def make_index():
+    index = ZulipUnreadIndex()
+    index.bootstrap(UNREAD_MSGS)
+    return index
+
+
+class TestZulipUnreadIndex:
+    def test_should_index_the_unread_stream_topics_of_the_register_state(self):
+        index = make_index()
+
+        assert index.get_topics() == {("42", "Lunch"): 6, ("43", "News"): 7}
+        assert len(index) == 2
+
+    def test_should_add_unread_stream_messages(self):
+        index = make_index()
+
+        index.apply_event({"type": "message", "flags": ["mentioned"], "message": {"id": 9, "type": "stream", "stream_id": 42, "subject": "Work"}})
+        index.apply_event({"type": "message", "flags": [], "message": {"id": 10, "type": "stream", "stream_id": 42, "subject": "Lunch"}})
+
+        assert index.get_topics() == {("42", "Lunch"): 10, ("43", "News"): 7, ("42", "Work"): 9}
+
+    def test_should_ignore_messages_that_arrive_read(self):
+        index = make_index()
+
+        index.apply_event({"type": "message", "flags": ["read"], "message": {"id": 9, "type": "stream", "stream_id": 42, "subject": "Work"}})
+        index.apply_event({"type": "message", "flags": [], "message": {"id": 10, "type": "private"}})
+
+        assert ("42", "Work") not in index.get_topics()
+        assert len(index) == 2
+
+    def test_should_drop_a_topic_once_all_its_messages_are_read(self):
+        index = make_index()
+
+        index.apply_event({"type": "update_message_flags", "op": "add", "flag": "read", "messages": [5], "all": False})
+        assert index.get_topics()[("42", "Lunch")] == 6
+
+        index.apply_event({"type": "update_message_flags", "op": "add", "flag": "read", "messages": [6, 8], "all": False})
+        assert index.get_topics() == {("43", "News"): 7}
+
+    def test_should_clear_the_index_when_everything_is_marked_as_read(self):
+        index = make_index()
+
+        index.apply_event({"type": "update_message_flags", "op": "add", "flag": "read", "messages": [], "all": True})
+
+        assert index.get_topics() == {}
+
+    def test_should_add_messages_marked_as_unread_again(self):
+        index = make_index()
+
+        index.apply_event({
+            "type": "update_message_flags", "op": "remove", "flag": "read", "messages": [3],
+            "message_details": {"3": {"type": "stream", "stream_id": 44, "topic": "Old"}},
+        })
+
+        assert index.get_topics()[("44", "Old")] == 3
+
+    def test_should_ignore_other_flags(self):
+        index = make_index()
+
+        index.apply_event({"type": "update_message_flags", "op": "add", "flag": "starred", "messages": [5, 6], "all": False})
+
+        assert ("42", "Lunch") in index.get_topics()
+
+    def test_should_drop_only_the_topic_marked_as_read(self):
+        index = make_index()
+        index.apply_event({"type": "message", "flags": [], "message": {"id": 9, "type": "stream", "stream_id": 42, "subject": "Dinner"}})
+
+        index.mark_topic_as_read(("42", "Lunch"))
+
+        assert index.get_topics() == {("42", "Dinner"): 9, ("43", "News"): 7}
+
+    def test_should_index_the_topics_with_unread_mentions(self):
+        index = make_index()
+        assert index.get_topics(mentions_only=True) == {("43", "News"): 7}
+
+        index.apply_event({"type": "message", "flags": ["wildcard_mentioned"], "message": {"id": 9, "type": "stream", "stream_id": 42, "subject": "Lunch"}})
+        assert index.get_topics(mentions_only=True) == {("43", "News"): 7, ("42", "Lunch"): 9}
+
+        index.apply_event({"type": "update_message_flags", "op": "add", "flag": "read", "messages": [7, 9], "all": False})
+        assert index.get_topics(mentions_only=True) == {}
+
+    def test_should_give_the_newest_unread_message_of_a_mentioned_topic(self):
+        index = make_index()
+        index.apply_event({"type": "message", "flags": [], "message": {"id": 8, "type": "stream", "stream_id": 43, "subject": "News"}})
+
+        assert index.get_topics(mentions_only=True) == {("43", "News"): 8}
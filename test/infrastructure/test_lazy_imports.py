@@ -0,0 +1,35 @@
+import pytest
+import sys
+from unittest.mock import patch
+from infrastructure.lazy_imports import lazy_import
+
+
+class TestLazyImports:
+    def test_should_import_the_module_on_first_attribute_access(self):
+        sys.modules.pop("colorsys", None)
+        colorsys = lazy_import("colorsys")
+
+        assert "colorsys" not in sys.modules
+        assert not colorsys.is_loaded()
+        assert colorsys.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+        assert colorsys.is_loaded()
+        assert "colorsys" in sys.modules
+
+    def test_should_stand_in_for_a_module_attribute(self):
+        ordered_dict = lazy_import("collections", "OrderedDict")
+
+        assert ordered_dict(a=1) == {"a": 1}
+        assert ordered_dict.fromkeys(["a"]) == {"a": None}
+
+    def test_should_let_tests_patch_attributes_of_the_module(self):
+        json = lazy_import("json")
+
+        with patch.object(json, "dumps", return_value="patched"):
+            assert json.dumps({}) == "patched"
+        assert json.dumps({}) == "{}"
+
+    def test_should_raise_import_error_on_first_use_when_missing(self):
+        missing = lazy_import("not_an_installed_package")
+
+        with pytest.raises(ImportError):
+            missing.anything
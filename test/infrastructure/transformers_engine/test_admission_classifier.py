@@ -0,0 +1,23 @@
+from unittest.mock import Mock, patch
+from infrastructure.transformers_engine.admission_classifier import TransformersAdmissionClassifier
+
+
+class TestTransformersAdmissionClassifier:
+    @patch('infrastructure.transformers_engine.admission_classifier.pipeline')
+    def test_should_load_the_model_once_on_the_first_message(self, mock_pipeline):
+        mock_pipeline.return_value = Mock(return_value=[{"label": "LABEL_1", "score": 0.8}])
+        classifier = TransformersAdmissionClassifier("tiny-classifier")
+
+        classifier("hola")
+        classifier("hola")
+
+        mock_pipeline.assert_called_once_with("text-classification", model="tiny-classifier", device="cpu")
+
+    @patch('infrastructure.transformers_engine.admission_classifier.pipeline')
+    def test_should_score_the_probability_of_the_positive_label(self, mock_pipeline):
+        mock_pipeline.return_value = Mock(side_effect=[[{"label": "question", "score": 0.8}], [{"label": "chitchat", "score": 0.9}]])
+        classifier = TransformersAdmissionClassifier("tiny-classifier", positive_label="question", max_characters=4)
+
+        assert classifier("where are you?") == 0.8
+        assert abs(classifier("lol") - 0.1) < 1e-9
+        mock_pipeline.return_value.assert_any_call("wher")
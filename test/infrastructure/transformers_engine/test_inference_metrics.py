@@ -0,0 +1,62 @@
+import torch
+from infrastructure.observability.metrics import MetricsRegistry
+from infrastructure.transformers_engine.inference_metrics import GenerationTimer, InferenceMetrics
+
+
+class FakeClock:
+    def __init__(self, *times):
+        self.times = list(times)
+
+    def __call__(self):
+        return self.times.pop(0)
+
+
+class TestInferenceMetrics:
+    def test_should_timestamp_prompt_and_generated_tokens(self):
+        # requested, dequeued, generation start, first token, end
+        timer = GenerationTimer(clock=FakeClock(0.0, 0.5, 1.0, 1.5, 2.0))
+
+        timer.mark_dequeued()
+        timer.start_generation()
+        timer.put(torch.ones((1, 7), dtype=torch.long))
+        for _ in range(3):
+            timer.put(torch.ones((1,), dtype=torch.long))
+        timer.end()
+
+        assert timer.queue_wait == 0.5
+        assert timer.input_tokens == 7
+        assert timer.output_tokens == 3
+        assert timer.first_token_at == 1.5
+        assert timer.finished_at == 2.0
+
+    def test_should_record_latency_breakdown_and_token_counts(self):
+        registry = MetricsRegistry()
+        metrics = InferenceMetrics(registry)
+        timer = GenerationTimer(clock=FakeClock(0.0, 0.5, 1.0, 1.5, 3.5))
+        timer.mark_dequeued()
+        timer.start_generation()
+        timer.put(torch.ones((1, 7), dtype=torch.long))
+        for _ in range(5):
+            timer.put(torch.ones((1,), dtype=torch.long))
+        timer.end()
+
+        metrics.record_generation(timer)
+
+        assert metrics.queue_wait.get() == {"count": 1, "sum": 0.5}
+        assert metrics.prefill.get() == {"count": 1, "sum": 0.5}
+        assert metrics.time_to_first_token.get() == {"count": 1, "sum": 1.5}
+        assert metrics.decode_speed.get() == {"count": 1, "sum": 2.0}
+        assert metrics.input_tokens.get() == {"count": 1, "sum": 7}
+        assert metrics.output_tokens.get() == {"count": 1, "sum": 5}
+
+    def test_should_skip_token_timings_when_nothing_was_generated(self):
+        metrics = InferenceMetrics(MetricsRegistry())
+        timer = GenerationTimer(clock=FakeClock(0.0, 0.2, 0.3))
+        timer.mark_dequeued()
+        timer.start_generation()
+
+        metrics.record_generation(timer)
+
+        assert metrics.queue_wait.get()["count"] == 1
+        assert metrics.time_to_first_token.get()["count"] == 0
+        assert metrics.decode_speed.get()["count"] == 0
@@ -0,0 +1,30 @@
+from unittest.mock import patch, mock_open
+from infrastructure.transformers_engine import memory_usage
+from infrastructure.transformers_engine.memory_usage import get_current_rss_bytes, get_peak_rss_bytes, to_megabytes
+
+
+class TestMemoryUsage:
+    def test_should_read_current_rss_from_proc_statm(self):
+        with patch("builtins.open", mock_open(read_data="1000 250 30 1 0 100 0")), \
+             patch.object(memory_usage.os, "sysconf", return_value=4096):
+            assert get_current_rss_bytes() == 250 * 4096
+
+    def test_should_fallback_to_peak_rss_when_proc_is_not_available(self):
+        with patch("builtins.open", side_effect=OSError("No /proc")), \
+             patch.object(memory_usage, "get_peak_rss_bytes", return_value=1234):
+            assert get_current_rss_bytes() == 1234
+
+    def test_should_report_peak_rss_in_bytes(self):
+        with patch.object(memory_usage.resource, "getrusage") as mock_getrusage, \
+             patch.object(memory_usage.sys, "platform", "linux"):
+            mock_getrusage.return_value.ru_maxrss = 2048
+            assert get_peak_rss_bytes() == 2048 * 1024
+
+    def test_should_not_scale_peak_rss_on_macos(self):
+        with patch.object(memory_usage.resource, "getrusage") as mock_getrusage, \
+             patch.object(memory_usage.sys, "platform", "darwin"):
+            mock_getrusage.return_value.ru_maxrss = 2048
+            assert get_peak_rss_bytes() == 2048
+
+    def test_should_convert_bytes_to_megabytes(self):
+        assert to_megabytes(3 * 1024 * 1024) == 3.0
@@ -1,12 +1,37 @@
 import pytest
 from unittest.mock import Mock, patch, MagicMock
-from infrastructure.transformers_engine.models_handler import ModelsHandler
+from infrastructure.transformers_engine.models_handler import ModelsHandler, get_available_devices
+from infrastructure.transformers_engine.inference_metrics import GenerationTimer, InferenceMetrics
+from infrastructure.observability.metrics import MetricsRegistry
+from infrastructure.observability.tracing import Tracer
+from test.infrastructure.observability.test_tracing import CollectingExporter
 
 
 class TestModelsHandler:
+    @pytest.fixture(autouse=True)
+    def clear_device_probe(self):
+        # The probe is cached per process: every test probes its own patched torch
+        get_available_devices.cache_clear()
+        yield
+        get_available_devices.cache_clear()
+
+    @patch('infrastructure.transformers_engine.models_handler.torch')
+    @patch('infrastructure.transformers_engine.models_handler.os')
+    def test_should_initialize_without_probing_devices(self, mock_os, mock_torch):
+        handler = ModelsHandler()
+        
+        # Should set models list
+        assert handler.models == ["Qwen/Qwen3-1.7B"]
+        assert handler._model is None
+        assert handler._tokenizer is None
+        
+        # Devices are probed when a model needs one, not on construction
+        mock_torch.cuda.is_available.assert_not_called()
+        mock_os.cpu_count.assert_not_called()
+
     @patch('infrastructure.transformers_engine.models_handler.torch')
     @patch('infrastructure.transformers_engine.models_handler.os')
-    def test_should_initialize_with_device_listing(self, mock_os, mock_torch):
+    def test_should_list_devices_once_per_process(self, mock_os, mock_torch):
         # Setup mocks for device availability
         mock_torch.cuda.is_available.return_value = True
         mock_torch.cuda.device_count.return_value = 2
@@ -18,17 +43,13 @@ class TestModelsHandler:
         mock_torch.xpu.is_available.return_value = False
         mock_torch.version.hip = None
         
-        handler = ModelsHandler()
-        
-        # Should set models list
-        assert handler.models == ["Qwen/Qwen3-1.7B"]
-        assert handler._model is None
-        assert handler._tokenizer is None
+        devices = ModelsHandler().list_all_the_availables_devices()
+        ModelsHandler().get_device()
         
-        # Should check device availability
-        mock_torch.cuda.is_available.assert_called()
-        mock_torch.cuda.device_count.assert_called()
-        mock_os.cpu_count.assert_called()
+        assert devices == {"cuda": 2, "cpu": 8, "mps": False, "xpu": False, "amd_rocm": False}
+        mock_torch.cuda.is_available.assert_called_once()
+        mock_torch.cuda.device_count.assert_called_once()
+        mock_os.cpu_count.assert_called_once()
 
     @patch('infrastructure.transformers_engine.models_handler.torch')
     @patch('infrastructure.transformers_engine.models_handler.os')
@@ -38,10 +59,10 @@ class TestModelsHandler:
         mock_torch.cuda.device_count.return_value = 0
         mock_os.cpu_count.return_value = None  # This should default to 1
         
-        handler = ModelsHandler()
+        devices = ModelsHandler().list_all_the_availables_devices()
         
         # Should handle None cpu_count gracefully
-        mock_os.cpu_count.assert_called()
+        assert devices["cpu"] == 1
 
     @patch('infrastructure.transformers_engine.models_handler.AutoModelForCausalLM')
     @patch('infrastructure.transformers_engine.models_handler.torch')
@@ -149,10 +170,10 @@ class TestModelsHandler:
         mock_auto_tokenizer.from_pretrained.return_value = mock_tokenizer
         
         # Mock tokenizer inputs and outputs
-        mock_inputs = {"input_ids": Mock(), "attention_mask": Mock()}
+        mock_inputs = {"input_ids": Mock(shape=(1, 2)), "attention_mask": Mock()}
         mock_tokenizer.return_value = mock_inputs
         
-        mock_outputs = [Mock()]
+        mock_outputs = [[4, 5, 6]]
         mock_model.generate.return_value = mock_outputs
         
         mock_tokenizer.decode.return_value = "Generated response text"
@@ -176,9 +197,57 @@ class TestModelsHandler:
         # No longer expecting top_p and temperature
         
         # Should decode output
-        mock_tokenizer.decode.assert_called_once_with(mock_outputs[0], skip_special_tokens=True)
+        mock_tokenizer.decode.assert_called_once_with([6], skip_special_tokens=True)
         assert result == "Generated response text"
 
+    @patch('infrastructure.transformers_engine.models_handler.AutoTokenizer')
+    @patch('infrastructure.transformers_engine.models_handler.AutoModelForCausalLM')
+    @patch('infrastructure.transformers_engine.models_handler.torch')
+    @patch('infrastructure.transformers_engine.models_handler.os')
+    def test_should_generate_at_most_the_requested_tokens(self, mock_os, mock_torch, mock_auto_model, mock_auto_tokenizer):
+        mock_torch.cuda.is_available.return_value = False
+        mock_os.cpu_count.return_value = 4
+        mock_model = Mock()
+        mock_auto_model.from_pretrained.return_value = mock_model
+        mock_tokenizer = Mock(pad_token_id=1234)
+        mock_tokenizer.return_value = {"input_ids": Mock(shape=(1, 2)), "attention_mask": Mock()}
+        mock_auto_tokenizer.from_pretrained.return_value = mock_tokenizer
+        mock_model.generate.return_value = [[4, 5, 6]]
+        mock_tokenizer.decode.return_value = "Short"
+
+        handler = ModelsHandler()
+        handler.generate_text("Test prompt", max_new_tokens=8)
+
+        assert mock_model.generate.call_args[1]["max_new_tokens"] == 8
+
+    @patch('infrastructure.transformers_engine.models_handler.AutoTokenizer')
+    @patch('infrastructure.transformers_engine.models_handler.AutoModelForCausalLM')
+    @patch('infrastructure.transformers_engine.models_handler.torch')
+    @patch('infrastructure.transformers_engine.models_handler.os')
+    def test_should_not_echo_the_summary_and_messages_of_the_prompt(self, mock_os, mock_torch, mock_auto_model, mock_auto_tokenizer):
+        mock_torch.cuda.is_available.return_value = False
+        mock_torch.backends.mps.is_available.return_value = False
+        mock_torch.xpu.is_available.return_value = False
+        mock_os.cpu_count.return_value = 4
+        # A word per token
+        vocabulary = []
+        def tokenize(text, **kwargs):
+            vocabulary.extend(word for word in text.split() if word not in vocabulary)
+            return {"input_ids": Mock(shape=(1, len(text.split()))), "ids": [vocabulary.index(word) for word in text.split()]}
+        mock_tokenizer = Mock(pad_token_id=0, side_effect=tokenize)
+        mock_tokenizer.decode.side_effect = lambda ids, **kwargs: " ".join(vocabulary[i] for i in ids)
+        mock_auto_tokenizer.from_pretrained.return_value = mock_tokenizer
+        mock_model = mock_auto_model.from_pretrained.return_value
+        def generate(ids, **kwargs):
+            vocabulary.extend(["They", "graze."])
+            return [ids + [len(vocabulary) - 2, len(vocabulary) - 1]]
+        mock_model.generate.side_effect = generate
+
+        result = ModelsHandler().generate_text("Summary of the earlier conversation: Rosa asked about guanacos.\nRosa: What do they eat?")
+
+        assert result == "They graze."
+        assert mock_tokenizer.truncation_side == "left"
+
     @patch('infrastructure.transformers_engine.models_handler.AutoTokenizer')
     @patch('infrastructure.transformers_engine.models_handler.AutoModelForCausalLM')
     @patch('infrastructure.transformers_engine.models_handler.torch')
@@ -198,10 +267,10 @@ class TestModelsHandler:
         mock_tokenizer.eos_token_id = 5678  # Should use this instead
         mock_auto_tokenizer.from_pretrained.return_value = mock_tokenizer
         
-        mock_inputs = {"input_ids": Mock(), "attention_mask": Mock()}
+        mock_inputs = {"input_ids": Mock(shape=(1, 2)), "attention_mask": Mock()}
         mock_tokenizer.return_value = mock_inputs
         
-        mock_outputs = [Mock()]
+        mock_outputs = [[4, 5, 6]]
         mock_model.generate.return_value = mock_outputs
         mock_tokenizer.decode.return_value = "Generated text"
         
@@ -233,10 +302,10 @@ class TestModelsHandler:
         mock_tokenizer.pad_token_id = 1234
         mock_auto_tokenizer.from_pretrained.return_value = mock_tokenizer
         
-        mock_inputs = {"input_ids": Mock(), "attention_mask": Mock()}
+        mock_inputs = {"input_ids": Mock(shape=(1, 2)), "attention_mask": Mock()}
         mock_tokenizer.return_value = mock_inputs
         
-        mock_outputs = [Mock()]
+        mock_outputs = [[4, 5, 6]]
         mock_model.generate.return_value = mock_outputs
         mock_tokenizer.decode.return_value = "Response"
         
@@ -301,10 +370,10 @@ class TestModelsHandler:
         mock_auto_tokenizer.from_pretrained.return_value = mock_tokenizer
         
         # Mock tokenizer inputs (should NOT be moved to device for CPU)
-        mock_inputs = {"input_ids": Mock(), "attention_mask": Mock()}
+        mock_inputs = {"input_ids": Mock(shape=(1, 2)), "attention_mask": Mock()}
         mock_tokenizer.return_value = mock_inputs
         
-        mock_outputs = [Mock()]
+        mock_outputs = [[4, 5, 6]]
         mock_model.generate.return_value = mock_outputs
         mock_tokenizer.decode.return_value = "CPU generated text"
         
@@ -335,10 +404,10 @@ class TestModelsHandler:
         mock_tokenizer.pad_token_id = 1234
         mock_auto_tokenizer.from_pretrained.return_value = mock_tokenizer
         
-        mock_inputs = {"input_ids": Mock(), "attention_mask": Mock()}
+        mock_inputs = {"input_ids": Mock(shape=(1, 2)), "attention_mask": Mock()}
         mock_tokenizer.return_value = mock_inputs
         
-        mock_outputs = [Mock()]
+        mock_outputs = [[4, 5, 6]]
         mock_model.generate.return_value = mock_outputs
         mock_tokenizer.decode.return_value = "Cleaned response"
         
@@ -372,3 +441,228 @@ class TestModelsHandler:
         
         # Should return error message
         assert result == "I apologize, I'm having trouble generating a response right now."
+
+    @patch('infrastructure.transformers_engine.models_handler.AutoModelForCausalLM')
+    @patch('infrastructure.transformers_engine.models_handler.torch')
+    @patch('infrastructure.transformers_engine.models_handler.os')
+    def test_should_load_model_with_low_memory_options_when_profile_is_low(self, mock_os, mock_torch, mock_auto_model):
+        mock_torch.cuda.is_available.return_value = False
+        mock_torch.ops.mkldnn._is_mkldnn_bf16_supported.return_value = True
+        mock_os.cpu_count.return_value = 4
+
+        mock_model = Mock()
+        mock_auto_model.from_pretrained.return_value = mock_model
+
+        handler = ModelsHandler(memory_profile="low")
+        handler.get_model("test-model")
+
+        mock_auto_model.from_pretrained.assert_called_once_with(
+            "test-model",
+            device_map="auto",
+            dtype=mock_torch.bfloat16,
+            low_cpu_mem_usage=True,
+            use_safetensors=True,
+        )
+
+    @patch('infrastructure.transformers_engine.models_handler.AutoModelForCausalLM')
+    @patch('infrastructure.transformers_engine.models_handler.torch')
+    @patch('infrastructure.transformers_engine.models_handler.os')
+    def test_should_keep_low_memory_options_in_fallback_loading(self, mock_os, mock_torch, mock_auto_model):
+        mock_torch.cuda.is_available.return_value = False
+        mock_torch.backends.mps.is_available.return_value = False
+        mock_torch.xpu.is_available.return_value = False
+        mock_torch.ops.mkldnn._is_mkldnn_bf16_supported.return_value = False
+        mock_torch.ops.mkldnn._is_mkldnn_fp16_supported.return_value = True
+        mock_os.cpu_count.return_value = 4
+
+        mock_model = Mock()
+        mock_auto_model.from_pretrained.side_effect = [Exception("Device map failed"), mock_model]
+
+        handler = ModelsHandler(memory_profile="low")
+        handler.get_model("test-model")
+
+        mock_auto_model.from_pretrained.assert_called_with(
+            "test-model",
+            dtype=mock_torch.float16,
+            low_cpu_mem_usage=True,
+            use_safetensors=True,
+        )
+
+    @patch('infrastructure.transformers_engine.models_handler.torch')
+    @patch('infrastructure.transformers_engine.models_handler.os')
+    def test_should_prefer_bfloat16_on_cuda_when_supported(self, mock_os, mock_torch):
+        mock_torch.cuda.is_available.return_value = True
+        mock_torch.cuda.is_bf16_supported.return_value = True
+        mock_os.cpu_count.return_value = 4
+
+        handler = ModelsHandler(memory_profile="low")
+
+        assert handler.get_low_memory_dtype() == mock_torch.bfloat16
+
+    @patch('infrastructure.transformers_engine.models_handler.torch')
+    @patch('infrastructure.transformers_engine.models_handler.os')
+    def test_should_keep_float32_when_cpu_has_no_reduced_precision_support(self, mock_os, mock_torch):
+        mock_torch.cuda.is_available.return_value = False
+        mock_torch.ops.mkldnn._is_mkldnn_bf16_supported.side_effect = AttributeError("No mkldnn")
+        mock_os.cpu_count.return_value = 4
+
+        handler = ModelsHandler(memory_profile="low")
+
+        assert handler.get_low_memory_dtype() == mock_torch.float32
+
+    @patch('infrastructure.transformers_engine.models_handler.get_current_rss_bytes', return_value=300 * 1024 * 1024)
+    @patch('infrastructure.transformers_engine.models_handler.get_peak_rss_bytes', return_value=500 * 1024 * 1024)
+    @patch('infrastructure.transformers_engine.models_handler.AutoModelForCausalLM')
+    @patch('infrastructure.transformers_engine.models_handler.torch')
+    @patch('infrastructure.transformers_engine.models_handler.os')
+    def test_should_report_peak_and_steady_rss_after_loading(self, mock_os, mock_torch, mock_auto_model, mock_peak, mock_current):
+        mock_torch.cuda.is_available.return_value = False
+        mock_os.cpu_count.return_value = 4
+        mock_auto_model.from_pretrained.return_value = Mock()
+
+        handler = ModelsHandler()
+        assert handler.memory_report is None
+
+        handler.get_model("test-model")
+
+        assert handler.memory_report == {
+            "memory_profile": "default",
+            "dtype": "default",
+            "peak_rss_mb": 500.0,
+            "steady_rss_mb": 300.0,
+        }
+
+    @patch('infrastructure.transformers_engine.models_handler.AutoTokenizer')
+    @patch('infrastructure.transformers_engine.models_handler.AutoModelForCausalLM')
+    @patch('infrastructure.transformers_engine.models_handler.torch')
+    @patch('infrastructure.transformers_engine.models_handler.os')
+    def test_should_record_inference_metrics_for_each_generation(self, mock_os, mock_torch, mock_auto_model, mock_auto_tokenizer):
+        mock_torch.cuda.is_available.return_value = False
+        mock_torch.no_grad.return_value.__enter__ = Mock()
+        mock_torch.no_grad.return_value.__exit__ = Mock()
+        mock_os.cpu_count.return_value = 4
+        mock_model = Mock()
+        mock_auto_model.from_pretrained.return_value = mock_model
+        mock_tokenizer = Mock()
+        mock_tokenizer.return_value = {"input_ids": Mock(shape=(1, 2))}
+        mock_auto_tokenizer.from_pretrained.return_value = mock_tokenizer
+        mock_model.generate.return_value = [[4, 5, 6]]
+        metrics = InferenceMetrics(MetricsRegistry())
+
+        handler = ModelsHandler(metrics=metrics)
+        handler.generate_text("Hello")
+
+        # The handler streams the tokens to a timer to measure time to first token
+        assert isinstance(mock_model.generate.call_args[1]["streamer"], GenerationTimer)
+        assert metrics.requests.get() == 1
+        assert metrics.failures.get() == 0
+        assert metrics.queue_wait.get()["count"] == 1
+
+    @patch('infrastructure.transformers_engine.models_handler.AutoTokenizer')
+    @patch('infrastructure.transformers_engine.models_handler.AutoModelForCausalLM')
+    @patch('infrastructure.transformers_engine.models_handler.torch')
+    @patch('infrastructure.transformers_engine.models_handler.os')
+    def test_should_count_failed_generations(self, mock_os, mock_torch, mock_auto_model, mock_auto_tokenizer):
+        mock_torch.cuda.is_available.return_value = False
+        mock_os.cpu_count.return_value = 4
+        mock_auto_model.from_pretrained.return_value.generate.side_effect = Exception("Generation failed")
+        metrics = InferenceMetrics(MetricsRegistry())
+
+        handler = ModelsHandler(metrics=metrics)
+        handler.generate_text("Hello")
+
+        assert metrics.requests.get() == 1
+        assert metrics.failures.get() == 1
+
+    @patch('infrastructure.transformers_engine.models_handler.AutoTokenizer')
+    @patch('infrastructure.transformers_engine.models_handler.AutoModelForCausalLM')
+    @patch('infrastructure.transformers_engine.models_handler.torch')
+    @patch('infrastructure.transformers_engine.models_handler.os')
+    def test_should_generate_a_padded_batch_of_prompts(self, mock_os, mock_torch, mock_auto_model, mock_auto_tokenizer):
+        mock_torch.cuda.is_available.return_value = False
+        mock_torch.backends.mps.is_available.return_value = False
+        mock_torch.xpu.is_available.return_value = False
+        mock_torch.no_grad.return_value.__enter__ = Mock()
+        mock_torch.no_grad.return_value.__exit__ = Mock()
+        mock_os.cpu_count.return_value = 4
+        mock_model = Mock()
+        mock_auto_model.from_pretrained.return_value = mock_model
+        mock_tokenizer = Mock()
+        mock_tokenizer.pad_token_id = None
+        mock_tokenizer.eos_token_id = 5678
+        mock_tokenizer.padding_side = "right"
+        padding_sides = []
+        mock_tokenizer.side_effect = lambda *args, **kwargs: padding_sides.append(mock_tokenizer.padding_side) or {"input_ids": Mock(shape=(2, 2)), "attention_mask": Mock()}
+        mock_tokenizer.decode.side_effect = ["First reply", "Second reply"]
+        mock_auto_tokenizer.from_pretrained.return_value = mock_tokenizer
+        mock_model.generate.return_value = [[0, 4, 5], [3, 4, 6]]
+
+        handler = ModelsHandler(metrics=InferenceMetrics(MetricsRegistry()))
+        handler.max_new_tokens = 64
+        results = handler.generate_texts(["<p>First</p>", "Second"])
+
+        mock_tokenizer.assert_called_once_with(["First", "Second"], return_tensors="pt", max_length=512, truncation=True, padding=True)
+        # Padded on the left for the batch only: single-prompt generations share the tokenizer
+        assert padding_sides == ["left"]
+        assert mock_tokenizer.padding_side == "right"
+        assert mock_tokenizer.truncation_side == "left"
+        assert mock_model.generate.call_args[1]["pad_token_id"] == 5678
+        assert mock_model.generate.call_args[1]["max_new_tokens"] == 64
+        assert [call.args[0] for call in mock_tokenizer.decode.call_args_list] == [[5], [6]]
+        assert results == ["First reply", "Second reply"]
+
+    @patch('infrastructure.transformers_engine.models_handler.AutoTokenizer')
+    @patch('infrastructure.transformers_engine.models_handler.AutoModelForCausalLM')
+    @patch('infrastructure.transformers_engine.models_handler.torch')
+    @patch('infrastructure.transformers_engine.models_handler.os')
+    def test_should_return_fallback_for_every_prompt_when_batch_fails(self, mock_os, mock_torch, mock_auto_model, mock_auto_tokenizer):
+        mock_torch.cuda.is_available.return_value = False
+        mock_os.cpu_count.return_value = 4
+        mock_auto_model.from_pretrained.return_value.generate.side_effect = Exception("Generation failed")
+        metrics = InferenceMetrics(MetricsRegistry())
+
+        handler = ModelsHandler(metrics=metrics)
+        results = handler.generate_texts(["a", "b"])
+
+        assert results == ["I apologize, I'm having trouble generating a response right now."] * 2
+        assert metrics.failures.get() == 2
+
+    @patch('infrastructure.transformers_engine.models_handler.get_tracer')
+    @patch('infrastructure.transformers_engine.models_handler.AutoModelForCausalLM')
+    @patch('infrastructure.transformers_engine.models_handler.torch')
+    @patch('infrastructure.transformers_engine.models_handler.os')
+    def test_should_trace_a_batch_with_its_token_budget(self, mock_os, mock_torch, mock_auto_model, mock_get_tracer):
+        mock_torch.cuda.is_available.return_value = False
+        mock_os.cpu_count.return_value = 4
+        mock_auto_model.from_pretrained.return_value.generate.side_effect = Exception("Generation failed")
+        tracer = Tracer(CollectingExporter())
+        mock_get_tracer.return_value = tracer
+        handler = ModelsHandler(metrics=InferenceMetrics(MetricsRegistry()))
+        handler._tokenizer = MagicMock(pad_token_id=0, padding_side="right")
+
+        handler.generate_texts(["a", "b"], max_new_tokens=16)
+
+        span = tracer.exporter.spans[-1]
+        assert span.name == "model.generate_texts"
+        assert span.attributes["batch_size"] == 2
+        assert span.error == "Exception: Generation failed"
+        assert mock_auto_model.from_pretrained.return_value.generate.call_args[1]["max_new_tokens"] == 16
+
+    @patch('infrastructure.transformers_engine.models_handler.AutoModelForCausalLM')
+    @patch('infrastructure.transformers_engine.models_handler.torch')
+    @patch('infrastructure.transformers_engine.models_handler.os')
+    def test_should_unload_the_model_and_load_it_again_on_demand(self, mock_os, mock_torch, mock_auto_model):
+        mock_torch.cuda.is_available.return_value = False
+        mock_os.cpu_count.return_value = 4
+        handler = ModelsHandler(memory_profile="default", model_name="test-model")
+        handler.get_model("test-model")
+        assert handler.get_status()["loaded"] is True
+
+        handler.unload()
+
+        assert handler.get_status() == {
+            "engine": "transformers", "model": "test-model", "loaded": False,
+            "memory_profile": "default", "memory_report": None, "max_new_tokens": 32,
+        }
+        handler.get_model("test-model")
+        assert mock_auto_model.from_pretrained.call_count == 2
@@ -0,0 +1,299 @@
+import pytest
+import time
+import threading
+from unittest.mock import Mock
+from types import SimpleNamespace
+from domain.errors import ChannelWorkError
+from infrastructure.workers.guanaco_scheduler import GuanacoScheduler
+from infrastructure.workers.poll_policy import AdaptivePollPolicy, PollPolicy
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+class TestGuanacoScheduler:
+    def test_should_run_scheduled_guanaco_repeatedly(self):
+        guanaco = SimpleNamespace(work=Mock(return_value=True), name="test_guanaco")
+        scheduler = GuanacoScheduler(max_workers=2)
+        scheduler.start()
+
+        entry = scheduler.add("test_guanaco", guanaco, sleep_time=0.02)
+
+        assert wait_until(lambda: guanaco.work.call_count >= 3)
+        scheduler.stop()
+        assert entry.cycles >= 3
+        assert entry.last_cycle_duration is not None
+        assert not entry.is_running()
+
+    def test_should_run_first_cycle_immediately(self):
+        guanaco = SimpleNamespace(work=Mock(return_value=True), name="test_guanaco")
+        scheduler = GuanacoScheduler(max_workers=1)
+        scheduler.start()
+
+        started = time.monotonic()
+        scheduler.add("test_guanaco", guanaco, sleep_time=10)
+
+        assert wait_until(lambda: guanaco.work.call_count == 1)
+        assert time.monotonic() - started < 0.5
+        scheduler.stop()
+
+    def test_should_wait_sleep_time_between_cycles(self):
+        run_times = []
+        guanaco = SimpleNamespace(work=Mock(side_effect=lambda: run_times.append(time.monotonic())), name="test_guanaco")
+        scheduler = GuanacoScheduler(max_workers=1)
+        scheduler.start()
+
+        scheduler.add("test_guanaco", guanaco, sleep_time=0.1)
+        assert wait_until(lambda: len(run_times) >= 2)
+        scheduler.stop()
+
+        assert 0.09 <= run_times[1] - run_times[0] < 0.2
+
+    def test_should_never_exceed_max_workers_concurrent_cycles(self):
+        counter = {"running": 0, "max_running": 0}
+        lock = threading.Lock()
+
+        def work():
+            with lock:
+                counter["running"] += 1
+                counter["max_running"] = max(counter["max_running"], counter["running"])
+            time.sleep(0.02)
+            with lock:
+                counter["running"] -= 1
+
+        scheduler = GuanacoScheduler(max_workers=3)
+        scheduler.start()
+        guanacos = [SimpleNamespace(work=Mock(side_effect=work), name=f"g{i}") for i in range(10)]
+        for guanaco in guanacos:
+            scheduler.add(guanaco.name, guanaco, sleep_time=0.01)
+
+        assert wait_until(lambda: all(guanaco.work.call_count >= 1 for guanaco in guanacos))
+        scheduler.stop()
+        assert counter["max_running"] == 3
+
+    def test_should_handle_thousands_of_guanacos_with_a_few_threads(self):
+        guanacos = [SimpleNamespace(work=Mock(return_value=False), name=f"g{i}") for i in range(2000)]
+        threads_before = threading.active_count()
+        scheduler = GuanacoScheduler(max_workers=4)
+        scheduler.start()
+
+        for guanaco in guanacos:
+            scheduler.add(guanaco.name, guanaco, sleep_time=60)
+
+        assert wait_until(lambda: all(guanaco.work.call_count == 1 for guanaco in guanacos), timeout=10)
+        # One dispatcher plus the executor threads
+        assert threading.active_count() - threads_before <= 5
+        scheduler.stop()
+
+    def test_should_stop_scheduling_a_guanaco_that_raises(self):
+        guanaco = SimpleNamespace(work=Mock(side_effect=Exception("Test error")), name="test_guanaco")
+        on_worker_stopped = Mock()
+        scheduler = GuanacoScheduler(max_workers=1, on_worker_stopped=on_worker_stopped)
+        scheduler.start()
+
+        entry = scheduler.add("test_guanaco", guanaco, sleep_time=0.01)
+
+        assert wait_until(lambda: not entry.is_running())
+        time.sleep(0.05)
+        scheduler.stop()
+        assert guanaco.work.call_count == 1
+        assert entry.last_error == "Test error"
+        on_worker_stopped.assert_called_once_with(entry)
+
+    @pytest.mark.parametrize("error", [
+        ChannelWorkError([(Mock(get_id=Mock(return_value="42"), get_topic=Mock(return_value="Lunch")), RuntimeError("send failed"))]),
+        RuntimeError("Zulip API error: rate limited"),
+        ConnectionError("connection reset"),
+    ])
+    def test_should_keep_a_guanaco_running_and_back_off_after_a_recoverable_error(self, error):
+        guanaco = SimpleNamespace(work=Mock(side_effect=[error, error, True]), name="test_guanaco")
+        on_worker_stopped = Mock()
+        scheduler = GuanacoScheduler(max_workers=1, on_worker_stopped=on_worker_stopped)
+        scheduler.start()
+        poll_policy = AdaptivePollPolicy(interval=0.01, fast_interval=0.01, max_interval=1.0)
+
+        entry = scheduler.add("test_guanaco", guanaco, poll_policy=poll_policy)
+
+        assert wait_until(lambda: poll_policy.get_stats()["cycles"] == 3)
+        assert entry.is_running()
+        on_worker_stopped.assert_not_called()
+        scheduler.stop()
+        assert entry.last_error == str(error)
+        assert len(scheduler.recent_errors) == 2
+        # Failed cycles count as idle for the poll policy, which backs off
+        assert poll_policy.get_stats()["active_cycles"] == 1
+
+    def test_should_not_run_a_removed_guanaco_again(self):
+        guanaco = SimpleNamespace(work=Mock(return_value=True), name="test_guanaco")
+        scheduler = GuanacoScheduler(max_workers=1)
+        scheduler.start()
+        scheduler.add("test_guanaco", guanaco, sleep_time=0.05)
+        assert wait_until(lambda: guanaco.work.call_count == 1)
+
+        scheduler.remove("test_guanaco")
+        time.sleep(0.15)
+        scheduler.stop()
+
+        assert guanaco.work.call_count == 1
+        assert scheduler.get_entries() == {}
+
+    def test_should_start_a_rescheduled_worker_only_after_the_removed_cycle_finishes(self):
+        release = threading.Event()
+        old_guanaco = SimpleNamespace(work=Mock(side_effect=lambda: release.wait(2.0)), name="test_guanaco")
+        new_guanaco = SimpleNamespace(work=Mock(return_value=False), name="test_guanaco")
+        scheduler = GuanacoScheduler(max_workers=2)
+        scheduler.start()
+        scheduler.add("test_guanaco", old_guanaco, sleep_time=1)
+        assert wait_until(lambda: scheduler.get_in_flight_count() == 1)
+
+        scheduler.remove("test_guanaco")
+        scheduler.add("test_guanaco", new_guanaco, sleep_time=1)
+        time.sleep(0.1)
+        started_before_release = new_guanaco.work.call_count
+        release.set()
+        assert wait_until(lambda: new_guanaco.work.call_count == 1)
+        scheduler.stop()
+
+        assert started_before_release == 0
+
+    def test_should_reject_scheduling_the_same_worker_twice(self):
+        scheduler = GuanacoScheduler(max_workers=1)
+        guanaco = SimpleNamespace(work=Mock(return_value=True), name="test_guanaco")
+        scheduler.add("test_guanaco", guanaco, sleep_time=1)
+
+        with pytest.raises(ValueError, match="Worker for test_guanaco is already scheduled"):
+            scheduler.add("test_guanaco", guanaco, sleep_time=1)
+
+    def test_should_wait_for_cycles_in_flight_when_stopping(self):
+        finished = threading.Event()
+
+        def slow_work():
+            time.sleep(0.1)
+            finished.set()
+
+        guanaco = SimpleNamespace(work=Mock(side_effect=slow_work), name="test_guanaco")
+        scheduler = GuanacoScheduler(max_workers=1)
+        scheduler.start()
+        scheduler.add("test_guanaco", guanaco, sleep_time=1)
+        assert wait_until(lambda: scheduler.get_in_flight_count() == 1)
+
+        scheduler.stop(timeout=1.0)
+
+        assert finished.is_set()
+        assert scheduler.get_in_flight_count() == 0
+
+    def test_should_raise_error_when_starting_twice(self):
+        scheduler = GuanacoScheduler(max_workers=1)
+        scheduler.start()
+
+        with pytest.raises(ValueError, match="Scheduler is already running"):
+            scheduler.start()
+        scheduler.stop()
+
+    def test_should_use_poll_policy_to_schedule_next_cycle(self):
+        guanaco = SimpleNamespace(work=Mock(side_effect=[True, False]), name="test_guanaco")
+        poll_policy = AdaptivePollPolicy(interval=0.02, fast_interval=0.01, max_interval=10, backoff_factor=10000)
+        scheduler = GuanacoScheduler(max_workers=1)
+        scheduler.start()
+
+        scheduler.add("test_guanaco", guanaco, poll_policy=poll_policy)
+
+        assert wait_until(lambda: guanaco.work.call_count == 2)
+        time.sleep(0.05)
+        scheduler.stop()
+        # Fast after activity, then backing off to the ceiling while idle: the 3rd cycle is 10s away
+        assert guanaco.work.call_count == 2
+        assert poll_policy.get_stats()["current_interval"] == 10
+        assert poll_policy.get_stats()["average_effective_interval"] is not None
+
+    def test_should_skip_cycles_of_a_paused_guanaco_until_resumed(self):
+        guanaco = SimpleNamespace(work=Mock(return_value=True), name="test_guanaco")
+        scheduler = GuanacoScheduler(max_workers=1)
+        scheduler.start()
+        entry = scheduler.add("test_guanaco", guanaco, sleep_time=0.02)
+        assert wait_until(lambda: guanaco.work.call_count >= 1)
+
+        scheduler.pause("test_guanaco")
+        assert wait_until(lambda: not entry.in_flight)
+        paused_count = guanaco.work.call_count
+        time.sleep(0.1)
+        assert guanaco.work.call_count == paused_count
+        assert entry.get_state()["paused"] is True
+
+        scheduler.resume("test_guanaco")
+        assert wait_until(lambda: guanaco.work.call_count > paused_count)
+        scheduler.stop()
+
+    def test_should_not_double_schedule_when_resumed_quickly(self):
+        running = []
+        overlaps = []
+
+        def work():
+            overlaps.append(len(running))
+            running.append(1)
+            time.sleep(0.01)
+            running.pop()
+            return True
+
+        guanaco = SimpleNamespace(work=Mock(side_effect=work), name="test_guanaco")
+        scheduler = GuanacoScheduler(max_workers=4)
+        scheduler.start()
+        scheduler.add("test_guanaco", guanaco, sleep_time=0.001)
+        for _ in range(20):
+            scheduler.pause("test_guanaco")
+            scheduler.resume("test_guanaco")
+            time.sleep(0.002)
+        scheduler.stop()
+
+        assert max(overlaps) == 0
+
+    def test_should_reschedule_with_a_new_poll_policy(self):
+        guanaco = SimpleNamespace(work=Mock(return_value=True), name="test_guanaco")
+        scheduler = GuanacoScheduler(max_workers=1)
+        scheduler.start()
+        entry = scheduler.add("test_guanaco", guanaco, sleep_time=10)
+        assert wait_until(lambda: guanaco.work.call_count == 1 and not entry.in_flight)
+
+        scheduler.set_poll_policy("test_guanaco", PollPolicy(0.01))
+
+        assert wait_until(lambda: guanaco.work.call_count >= 3)
+        scheduler.stop()
+        assert entry.get_state()["poll"]["current_interval"] == 0.01
+
+    def test_should_raise_key_error_when_controlling_an_unknown_worker(self):
+        scheduler = GuanacoScheduler(max_workers=1)
+
+        with pytest.raises(KeyError):
+            scheduler.pause("unknown")
+
+    def test_should_keep_recent_errors(self):
+        guanaco = SimpleNamespace(work=Mock(side_effect=Exception("Test error")), name="test_guanaco")
+        scheduler = GuanacoScheduler(max_workers=1)
+        scheduler.start()
+        entry = scheduler.add("test_guanaco", guanaco, sleep_time=0.01)
+
+        assert wait_until(lambda: not entry.is_running())
+        scheduler.stop()
+        assert [(error["source"], error["error"]) for error in scheduler.recent_errors] == [("worker:test_guanaco", "Test error")]
+
+    def test_should_trace_each_cycle_as_a_root_span(self):
+        from unittest.mock import patch
+        from infrastructure.observability.tracing import Tracer
+        spans = []
+        tracer = Tracer(SimpleNamespace(export=spans.append))
+        guanaco = SimpleNamespace(work=Mock(return_value=True), name="test_guanaco")
+        scheduler = GuanacoScheduler(max_workers=1)
+
+        with patch("infrastructure.workers.guanaco_scheduler.get_tracer", return_value=tracer):
+            scheduler.start()
+            scheduler.add("test_guanaco", guanaco, sleep_time=10)
+            assert wait_until(lambda: len(spans) == 1)
+            scheduler.stop()
+
+        assert spans[0].name == "guanaco.cycle"
+        assert spans[0].parent_id is None
+        assert spans[0].attributes == {"guanaco": "test_guanaco", "work_performed": True}
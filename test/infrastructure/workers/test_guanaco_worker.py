@@ -99,3 +99,19 @@ class TestGuanacoWorker:
         # Should handle gracefully when worker thread is None
         worker.stop()
         assert not worker.is_running()
+
+    def test_should_wait_the_interval_given_by_the_poll_policy(self):
+        guanaco = Mock(spec=Guanaco)
+        guanaco.work.return_value = False
+        guanaco.name = "test_guanaco"
+        poll_policy = Mock()
+        poll_policy.next_interval.return_value = 10
+        
+        worker = GuanacoWorker(guanaco, sleep_time=0.01, poll_policy=poll_policy)
+        worker.start()
+        time.sleep(0.1)
+        worker.stop()
+        
+        # A single cycle: the next one is 10 seconds away, yet stop() returns right away
+        assert guanaco.work.call_count == 1
+        poll_policy.next_interval.assert_called_once_with(False)
@@ -0,0 +1,71 @@
+import pytest
+from infrastructure.workers.poll_policy import AdaptivePollPolicy, PollPolicy
+
+
+class TestPollPolicy:
+    def test_should_always_return_the_fixed_interval(self):
+        policy = PollPolicy(10)
+
+        assert policy.next_interval(True) == 10
+        assert policy.next_interval(False) == 10
+
+    def test_should_count_active_and_idle_cycles(self):
+        policy = PollPolicy(10)
+
+        policy.next_interval(True)
+        policy.next_interval(False)
+        policy.next_interval(False)
+
+        stats = policy.get_stats()
+        assert stats["cycles"] == 3
+        assert stats["active_cycles"] == 1
+        assert stats["idle_streak"] == 2
+
+    def test_should_measure_effective_interval_between_cycle_starts(self):
+        policy = PollPolicy(10)
+
+        policy.record_cycle_start(100.0)
+        policy.record_cycle_start(111.0)
+        policy.record_cycle_start(124.0)
+
+        stats = policy.get_stats()
+        assert stats["last_effective_interval"] == 13.0
+        assert stats["average_effective_interval"] == 12.0
+
+    def test_should_not_report_effective_interval_before_two_cycles(self):
+        policy = PollPolicy(10)
+        policy.record_cycle_start(100.0)
+
+        assert policy.get_stats()["average_effective_interval"] is None
+
+
+class TestAdaptivePollPolicy:
+    def test_should_back_off_exponentially_while_idle_up_to_the_ceiling(self):
+        policy = AdaptivePollPolicy(interval=10, fast_interval=1, max_interval=60)
+
+        intervals = [policy.next_interval(False) for _ in range(4)]
+
+        assert intervals == [20, 40, 60, 60]
+
+    def test_should_snap_to_fast_interval_after_activity(self):
+        policy = AdaptivePollPolicy(interval=10, fast_interval=1, max_interval=60)
+        policy.next_interval(False)
+        policy.next_interval(False)
+
+        assert policy.next_interval(True) == 1
+        assert policy.next_interval(False) == 2
+
+    def test_should_derive_intervals_from_sleep_time(self):
+        policy = AdaptivePollPolicy.from_sleep_time(10)
+
+        assert policy.interval == 10
+        assert policy.fast_interval == 1
+        assert policy.max_interval == 60
+
+    def test_should_reject_inconsistent_intervals(self):
+        with pytest.raises(ValueError, match="Intervals must satisfy"):
+            AdaptivePollPolicy(interval=10, fast_interval=20, max_interval=60)
+
+    def test_should_reject_shrinking_backoff(self):
+        with pytest.raises(ValueError, match="Backoff factor must be at least 1"):
+            AdaptivePollPolicy(interval=10, fast_interval=1, max_interval=60, backoff_factor=0.5)
@@ -1,15 +1,18 @@
 import pytest
+import os
 import sys
 import subprocess
 import importlib.util
-from unittest.mock import Mock, patch
+from unittest.mock import ANY, Mock, patch
 from main import main
 
 
 class TestMain:
+    @patch.dict(os.environ, {"SHARD_MODE": "none", "REPLY_MAX_MESSAGE_AGE": "300", "REPLY_SHED_POLICY": "skip"})
+    @patch('main.ReplyPipeline')
     @patch('main.LocalGuanacosRepository')
     @patch('main.GuanacosSpits')
-    def test_should_initialize_repository_and_use_case(self, mock_guanacos_spits_class, mock_repository_class):
+    def test_should_initialize_repository_and_use_case(self, mock_guanacos_spits_class, mock_repository_class, mock_pipeline_class):
         # Setup mocks
         mock_repository = Mock()
         mock_repository_class.return_value = mock_repository
@@ -24,11 +27,87 @@ class TestMain:
         mock_repository_class.assert_called_once()
         
         # Verify GuanacosSpits was created with correct parameters
-        mock_guanacos_spits_class.assert_called_once_with(mock_repository, sleep_time=10)
+        mock_guanacos_spits_class.assert_called_once_with(
+            mock_repository, sleep_time=10, pipeline=mock_pipeline_class.return_value,
+            lease_repository=None, owner_id=ANY, lease_ttl=30.0, drain_timeout=20.0, reply_journal=ANY, roster_check_interval=5.0,
+            channel_concurrency=1,
+        )
+        mock_pipeline_class.assert_called_once_with(send_workers=1, channel_claim=None, max_message_age=300.0, shed_policy="skip",
+                                                    fallback_reply=ANY, conversation_memory=None)
         
         # Verify run was called
         mock_guanacos_spits.run.assert_called_once()
 
+    @patch.dict(os.environ, {"SHARD_MODE": "guanaco", "LEASE_TTL": "12", "SHARD_OWNER_ID": "host-a"})
+    @patch('main.SqliteLeaseRepository')
+    @patch('main.ReplyPipeline')
+    @patch('main.LocalGuanacosRepository')
+    @patch('main.GuanacosSpits')
+    def test_should_share_guanacos_through_leases_in_guanaco_mode(self, mock_guanacos_spits_class, mock_repository_class, mock_pipeline_class, mock_lease_repository_class):
+        main()
+
+        assert mock_pipeline_class.call_args.kwargs["channel_claim"] is None
+        mock_guanacos_spits_class.assert_called_once_with(
+            mock_repository_class.return_value, sleep_time=10, pipeline=mock_pipeline_class.return_value,
+            lease_repository=mock_lease_repository_class.return_value, owner_id="host-a", lease_ttl=12.0,
+            drain_timeout=20.0, reply_journal=ANY, roster_check_interval=5.0, channel_concurrency=1,
+        )
+
+    @patch.dict(os.environ, {"SHARD_MODE": "none", "REPLY_CHANNEL_CONCURRENCY": "3"})
+    @patch('main.ReplyPipeline')
+    @patch('main.LocalGuanacosRepository')
+    @patch('main.GuanacosSpits')
+    def test_should_answer_several_channels_at_once_when_configured(self, mock_guanacos_spits_class, mock_repository_class, mock_pipeline_class):
+        main()
+
+        assert mock_pipeline_class.call_args.kwargs["send_workers"] == 3
+        assert mock_guanacos_spits_class.call_args.kwargs["channel_concurrency"] == 3
+
+    @patch.dict(os.environ, {"SHARD_MODE": "none", "REPLY_RECENT_MESSAGES": "4", "REPLY_SUMMARY_TOKENS": "64"})
+    @patch('main.ReplyPipeline')
+    @patch('main.LocalGuanacosRepository')
+    @patch('main.GuanacosSpits')
+    def test_should_build_prompts_from_conversation_summaries_when_configured(self, mock_guanacos_spits_class, mock_repository_class, mock_pipeline_class):
+        main()
+
+        conversation_memory = mock_pipeline_class.call_args.kwargs["conversation_memory"]
+        assert conversation_memory.recent_messages == 4
+        assert conversation_memory.summary_max_new_tokens == 64
+
+    @patch.dict(os.environ, {"SHARD_MODE": "topic", "SHARD_OWNER_ID": "host-a"})
+    @patch('main.SqliteLeaseRepository')
+    @patch('main.ReplyPipeline')
+    @patch('main.LocalGuanacosRepository')
+    @patch('main.GuanacosSpits')
+    def test_should_claim_topics_through_leases_in_topic_mode(self, mock_guanacos_spits_class, mock_repository_class, mock_pipeline_class, mock_lease_repository_class):
+        main()
+
+        channel_claim = mock_pipeline_class.call_args.kwargs["channel_claim"]
+        assert channel_claim.lease_repository is mock_lease_repository_class.return_value
+        assert channel_claim.owner == "host-a"
+        assert mock_guanacos_spits_class.call_args.kwargs["lease_repository"] is None
+
+    @patch.dict(os.environ, {"GUANACOS_FILE": "guanacos.yaml", "ROSTER_CHECK_INTERVAL": "2"})
+    @patch('main.FileGuanacosRepository')
+    @patch('main.GuanacosSpits')
+    def test_should_read_the_roster_from_a_file_when_configured(self, mock_guanacos_spits_class, mock_file_repository_class):
+        main()
+
+        mock_file_repository_class.assert_called_once_with("guanacos.yaml")
+        assert mock_guanacos_spits_class.call_args.args == (mock_file_repository_class.return_value,)
+        assert mock_guanacos_spits_class.call_args.kwargs["roster_check_interval"] == 2
+
+    @patch.dict(os.environ, {"ADMIN_PORT": "9465"})
+    @patch('main.AdminHttpServer')
+    @patch('main.LocalGuanacosRepository')
+    @patch('main.GuanacosSpits')
+    def test_should_serve_the_admin_endpoint_when_configured(self, mock_guanacos_spits_class, mock_repository_class, mock_admin_server_class):
+        main()
+
+        mock_admin_server_class.assert_called_once_with(mock_guanacos_spits_class.return_value, "127.0.0.1", 9465)
+        mock_admin_server_class.return_value.start.assert_called_once()
+        mock_admin_server_class.return_value.stop.assert_called_once()
+
     @patch('main.LocalGuanacosRepository')
     @patch('main.GuanacosSpits')
     def test_should_handle_exceptions_in_run(self, mock_guanacos_spits_class, mock_repository_class):